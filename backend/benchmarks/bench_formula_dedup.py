@@ -0,0 +1,92 @@
+"""
+Benchmark: formula SVG size in an exported corrigé (inline formulas vs shared formulas)
+
+Renders a synthetic corrigé (generated fraction exercises, not exported user documents)
+with the real corrige_classique template and compares:
+- inline: each formula SVG carries its own glyph <defs> (previous behaviour)
+- pdf:    identical formulas emitted once through the WeasyPrint url_fetcher
+When WeasyPrint is importable, PDF generation time and size are measured too.
+
+Usage: python benchmarks/bench_formula_dedup.py [nb_exercices]
+"""
+
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+matplotlib.use('Agg')
+from jinja2 import Template
+
+from latex_to_svg import latex_renderer
+from formula_dedup import externalize_formulas, make_formula_url_fetcher
+
+TEMPLATE = Path(__file__).resolve().parent.parent / 'templates' / 'corrige_classique.html'
+
+
+def build_document(nb_exercices: int, seed: int = 7):
+    """Corrigé de fractions : ~4 formules par exercice, valeurs de collège"""
+    rng = random.Random(seed)
+    exercises = []
+    for _ in range(nb_exercices):
+        a, b, c = rng.randint(1, 9), rng.randint(2, 9), rng.randint(1, 9)
+        etapes = [
+            f"On réduit au même dénominateur : \\(\\frac{{{a}}}{{{b}}} + \\frac{{{c}}}{{{b}}}\\)",
+            f"On additionne les numérateurs : \\(\\frac{{{a + c}}}{{{b}}}\\)",
+            f"On vérifie : \\({a + c} \\div {b} \\approx {round((a + c) / b, 2)}\\)",
+        ]
+        exercises.append({
+            'enonce': f"Calculer \\(\\frac{{{a}}}{{{b}}} + \\frac{{{c}}}{{{b}}}\\).",
+            'solution': {
+                'etapes': [latex_renderer.convert_latex_to_svg(step) for step in etapes],
+                'resultat': latex_renderer.convert_latex_to_svg(f"\\(\\frac{{{a + c}}}{{{b}}}\\)"),
+            },
+        })
+    return {
+        'type_doc': 'exercices', 'matiere': 'Mathématiques', 'niveau': '5e',
+        'chapitre': 'Fractions', 'exercises': exercises,
+    }
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    nb_exercices = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    document = build_document(nb_exercices)
+    html_inline = Template(TEMPLATE.read_text(encoding='utf-8')).render(document=document)
+
+    try:
+        import weasyprint
+    except (ImportError, OSError) as e:
+        weasyprint = None
+        print(f"WeasyPrint indisponible ({e.__class__.__name__}) : mesure HTML uniquement")
+
+    fallback = weasyprint.default_url_fetcher if weasyprint else None
+    (html_pdf, resources), pdf_prep_time = timed(externalize_formulas, html_inline)
+    fetcher = make_formula_url_fetcher(resources, fallback)
+    resources_size = sum(len(svg) for svg in resources.values())
+
+    print(f"Exercices              : {nb_exercices}")
+    print(f"HTML inline            : {len(html_inline) / 1024:8.1f} Ko")
+    print(f"HTML mode pdf          : {len(html_pdf) / 1024:8.1f} Ko  ({pdf_prep_time * 1000:.1f} ms)"
+          f" + {len(resources)} formules distinctes ({resources_size / 1024:.1f} Ko)")
+
+    if weasyprint:
+        pdf_inline, inline_time = timed(lambda: weasyprint.HTML(string=html_inline).write_pdf())
+        pdf_shared, shared_time = timed(
+            lambda: weasyprint.HTML(string=html_pdf, url_fetcher=fetcher).write_pdf()
+        )
+        print(f"PDF inline             : {len(pdf_inline) / 1024:8.1f} Ko  {inline_time:.2f} s")
+        print(f"PDF formules partagées : {len(pdf_shared) / 1024:8.1f} Ko  {shared_time:.2f} s")
+
+
+if __name__ == '__main__':
+    main()
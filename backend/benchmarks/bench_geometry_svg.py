@@ -0,0 +1,58 @@
+"""
+Benchmark: GeometrySVGRenderer, backend ElementTree vs écriture directe (string builder)
+
+Usage: python benchmarks/bench_geometry_svg.py [iterations]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geometry_svg_renderer import GeometrySVGRenderer
+
+FIGURES = {
+    'rectangle': {'longueur': 8, 'largeur': 5, 'points': ['A', 'B', 'C', 'D']},
+    'triangle_rectangle': {
+        'points': ['A', 'B', 'C'],
+        'segments': [['A', 'B', {'longueur': 3}], ['B', 'C', {'longueur': 4}]],
+    },
+    'triangle': {
+        'points': ['A', 'B', 'C'], 'type': 'equilateral',
+        'segments': [['A', 'B', {'longueur': 5}]],
+    },
+    'cercle': {'rayon': 3, 'centre': 'O'},
+    'thales': {
+        'points': ['A', 'B', 'C', 'D', 'E'],
+        'longueurs_connues': {'AD': 2, 'DB': 4, 'AE': 3, 'EC': 6},
+        'segments': [['A', 'D', {'longueur': 2}], ['A', 'E', {'longueur': 3}]],
+    },
+    'mediatrice_construction': {},
+}
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    renderers = {
+        'etree': GeometrySVGRenderer(backend='etree'),
+        'string': GeometrySVGRenderer(backend='string'),
+    }
+
+    print(f"{'figure':<24} {'etree µs':>10} {'string µs':>10} {'gain':>6} {'octets':>14}")
+    for figure_type, data in FIGURES.items():
+        timings, sizes = {}, {}
+        for name, renderer in renderers.items():
+            render = getattr(renderer, f"render_{figure_type}")
+            sizes[name] = len(render(dict(data)))
+            seconds = min(timeit.repeat(lambda: render(dict(data)), number=iterations, repeat=3))
+            timings[name] = seconds / iterations * 1e6
+
+        print(
+            f"{figure_type:<24} {timings['etree']:>10.1f} {timings['string']:>10.1f} "
+            f"{timings['etree'] / timings['string']:>5.1f}x {sizes['etree']:>6} -> {sizes['string']:<6}"
+        )
+
+
+if __name__ == '__main__':
+    main()
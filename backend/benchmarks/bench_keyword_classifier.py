@@ -0,0 +1,81 @@
+"""
+Benchmark: classement des énoncés par mots-clés, anciennes recherches par sous-chaîne
+(`any(mot in texte for mot in liste)`, une liste après l'autre, première trouvée) vs
+KeywordClassifier (une expression régulière compilée, un parcours, scores pondérés)
+
+Les deux analyses mesurées sont celles qui passent par keyword_classifier : type de carte
+d'un énoncé de Géographie (document_search) et détection des exercices à schéma (server).
+Durées médianes par énoncé, en microsecondes.
+
+Usage: python benchmarks/bench_keyword_classifier.py
+"""
+
+import os
+import statistics
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_classifier import KeywordClassifier
+from document_search import DOCUMENT_TYPE_KEYWORDS, document_type_classifier
+
+GEOMETRY_KEYWORDS = ["triangle", "cercle", "carré", "rectangle", "parallélogramme",
+                     "géométrie", "figure", "pythagore", "thalès", "trigonométrie",
+                     "angle", "périmètre", "aire", "longueur", "côté", "hypoténuse"]
+geometry_classifier = KeywordClassifier({"geometry": GEOMETRY_KEYWORDS})
+
+STATEMENTS = {
+    'court': "Situez Tokyo sur la carte du Japon.",
+    'moyen': (
+        "Situez sur la carte les principales villes du Japon et de la Chine, puis expliquez "
+        "pourquoi la mondialisation transforme les littoraux de l'Asie orientale."
+    ),
+    'long (sans mot-clé)': (
+        "Lis attentivement le texte suivant, relève les informations importantes puis rédige "
+        "un paragraphe argumenté qui répond à la question posée en introduction. " * 4
+    ),
+    'géométrie': (
+        "Dans le triangle ABC rectangle en B, on donne AB = 3 cm et BC = 4 cm. "
+        "Calculer la longueur de l'hypoténuse AC puis le périmètre du triangle."
+    ),
+}
+
+NUMBER = 2000
+
+
+def legacy_document_type(enonce: str) -> str:
+    """Ancienne analyse : listes testées dans l'ordre, première trouvée (sous-chaînes)"""
+    enonce_lower = enonce.lower()
+    for doc_type, keywords in DOCUMENT_TYPE_KEYWORDS.items():
+        if any(mot in enonce_lower for mot in keywords):
+            return doc_type
+    return "carte_monde"
+
+
+def legacy_geometry(enonce: str) -> list:
+    enonce_lower = enonce.lower()
+    return [mot for mot in GEOMETRY_KEYWORDS if mot in enonce_lower]
+
+
+def median_us(function, text: str) -> float:
+    runs = [timeit.timeit(lambda: function(text), number=NUMBER) / NUMBER * 1e6 for _ in range(5)]
+    return statistics.median(runs)
+
+
+def main():
+    analyses = {
+        'type de carte': (legacy_document_type,
+                          lambda text: document_type_classifier.classify(text, default="carte_monde")),
+        'schéma géométrique': (legacy_geometry,
+                               lambda text: geometry_classifier.matched_keywords(text, "geometry")),
+    }
+    print(f"{'analyse':<20} {'énoncé':<22} {'any()':>9} {'classifier':>11}  résultat (ancien -> nouveau)")
+    for analysis, (legacy, classifier) in analyses.items():
+        for name, text in STATEMENTS.items():
+            print(f"{analysis:<20} {name:<22} {median_us(legacy, text):>7.1f}µs "
+                  f"{median_us(classifier, text):>9.1f}µs  {legacy(text)} -> {classifier(text)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark: process_math_content_for_pdf on large corrigés (legacy vs memoized single pass)
+
+Usage: python benchmarks/bench_mathml_conversion.py [nb_etapes]
+"""
+
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import latex2mathml.converter
+
+from mathml_converter import process_math_content_for_pdf, get_cache_info
+
+# The legacy code logged every call at INFO: keep that cost, but not the output
+logger = logging.getLogger('benchmarks.legacy')
+logger.addHandler(logging.FileHandler(os.devnull))
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+
+def legacy_process_math_content_for_pdf(text: str) -> str:
+    """Pre-refactor implementation, kept verbatim as the reference"""
+    if not text:
+        return text
+    
+    try:
+        # Regex patterns for common LaTeX expressions
+        import re
+        
+        # CRITICAL FIX: Convert broken fraction formats to LaTeX FIRST
+        # Fix "X de Y" patterns
+        text = re.sub(r'(\d+)\s+de\s+(\d+)', r'\\frac{\1}{\2}', text)
+        # Fix "X par Y" patterns  
+        text = re.sub(r'(\d+)\s+par\s+(\d+)', r'\\frac{\1}{\2}', text)
+        # Fix simple "X/Y" patterns (but preserve URLs)
+        text = re.sub(r'(?<!http:)(?<!https:)(\d+)/(\d+)', r'\\frac{\1}{\2}', text)
+        
+        logger.info(f"🔧 Fixed broken fraction formats in text: {text[:100]}...")
+        
+        # Pattern for fractions: \frac{numerator}{denominator}
+        frac_pattern = r'\\frac\{([^}]+)\}\{([^}]+)\}'
+        
+        # Pattern for square roots: \sqrt{content}
+        sqrt_pattern = r'\\sqrt\{([^}]+)\}'
+        
+        # Pattern for powers: x^{exponent}
+        power_pattern = r'([a-zA-Z0-9]+)\^\{([^}]+)\}'
+        
+        def convert_frac(match):
+            """Convert \frac{a}{b} to MathML"""
+            numerator = match.group(1)
+            denominator = match.group(2)
+            try:
+                latex_expr = f"\\frac{{{numerator}}}{{{denominator}}}"
+                mathml = latex2mathml.converter.convert(latex_expr)
+                return mathml
+            except Exception as e:
+                logger.warning(f"Failed to convert fraction {match.group(0)}: {e}")
+                return f"{numerator}/{denominator}"  # Fallback
+        
+        def convert_sqrt(match):
+            """Convert \sqrt{content} to MathML"""
+            content = match.group(1)
+            try:
+                latex_expr = f"\\sqrt{{{content}}}"
+                mathml = latex2mathml.converter.convert(latex_expr)
+                return mathml
+            except Exception as e:
+                logger.warning(f"Failed to convert sqrt {match.group(0)}: {e}")
+                return f"√({content})"  # Fallback
+        
+        def convert_power(match):
+            """Convert x^{exp} to MathML"""
+            base = match.group(1)
+            exponent = match.group(2)
+            try:
+                latex_expr = f"{base}^{{{exponent}}}"
+                mathml = latex2mathml.converter.convert(latex_expr)
+                return mathml
+            except Exception as e:
+                logger.warning(f"Failed to convert power {match.group(0)}: {e}")
+                return f"{base}^{exponent}"  # Fallback
+        
+        # Apply conversions
+        result = re.sub(frac_pattern, convert_frac, text)
+        result = re.sub(sqrt_pattern, convert_sqrt, result)
+        result = re.sub(power_pattern, convert_power, result)
+        
+        return result
+        
+    except Exception as e:
+        logger.error(f"Error processing math content for PDF: {e}")
+        return text  # Return original text on error
+
+
+STEP_TEMPLATES = [
+    "On calcule \\frac{{{a}}}{{{b}}} + \\frac{{{c}}}{{{b}}} = \\frac{{{s}}}{{{b}}}",
+    "L'aire vaut {a}^{{2}} = {sq} cm², donc le côté mesure \\sqrt{{{sq}}} = {a} cm",
+    "Il reste {a} de {b} élèves, soit {a}/{b} de la classe",
+    "Le volume est x^{{3}} avec x = {c}, soit {cube} cm³",
+    "On simplifie : \\frac{{{s}}}{{{b}}} ne se simplifie pas si {s} et {b} sont premiers entre eux",
+]
+
+
+def build_corrige(nb_etapes: int, seed: int = 42):
+    """Étapes de corrigé réalistes (valeurs d'un niveau collège, donc très répétitives)"""
+    rng = random.Random(seed)
+    steps = []
+    for _ in range(nb_etapes):
+        a, b, c = rng.randint(1, 12), rng.randint(2, 12), rng.randint(1, 9)
+        steps.append(rng.choice(STEP_TEMPLATES).format(
+            a=a, b=b, c=c, s=a + c, sq=a * a, cube=c ** 3
+        ))
+    return steps
+
+
+def run(func, steps):
+    start = time.perf_counter()
+    results = [func(step) for step in steps]
+    return time.perf_counter() - start, results
+
+
+def main():
+    nb_etapes = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    steps = build_corrige(nb_etapes)
+
+    legacy_time, legacy_results = run(legacy_process_math_content_for_pdf, steps)
+    new_time, new_results = run(process_math_content_for_pdf, steps)
+
+    same = sum(1 for old, new in zip(legacy_results, new_results) if old == new)
+    print(f"Étapes traitées      : {nb_etapes}")
+    print(f"Legacy (latex2mathml): {legacy_time * 1000:8.1f} ms")
+    print(f"Mémoïsé, passe unique: {new_time * 1000:8.1f} ms  (x{legacy_time / new_time:.1f})")
+    print(f"Sorties identiques   : {same}/{nb_etapes}")
+    print(f"Cache fragments      : {get_cache_info()}")
+
+
+if __name__ == '__main__':
+    main()
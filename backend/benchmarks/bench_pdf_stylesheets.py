@@ -0,0 +1,86 @@
+"""
+Benchmark: temps de mise en page WeasyPrint par template d'export, avec une
+FontConfiguration neuve à chaque export (comportement historique) vs FontConfiguration
+partagée par le processus (pdf_stylesheets)
+
+Chaque template est rendu avec le document d'exemple du warm-up ; on mesure séparément
+la mise en page (render()) et l'écriture du PDF (write_pdf()), en médiane de RUNS rendus
+après un premier rendu (non compté) qui remplit les caches. Le CSS du template reste
+dans le document dans les deux cas (origine « auteur »).
+
+Usage: python benchmarks/bench_pdf_stylesheets.py
+"""
+
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+matplotlib.use('Agg')
+
+RUNS = 5
+
+
+def median_ms(phases, runs: int = RUNS):
+    """Médianes (mise en page, écriture) en ms"""
+    phases()
+    layout, write = [], []
+    for _ in range(runs):
+        layout_ms, write_ms = phases()
+        layout.append(layout_ms)
+        write.append(write_ms)
+    return statistics.median(layout), statistics.median(write)
+
+
+def timed_phases(html_content, font_config_factory):
+    import weasyprint
+    from pdf_url_fetcher import url_fetcher
+
+    start = time.perf_counter()
+    document = weasyprint.HTML(string=html_content, url_fetcher=url_fetcher).render(
+        font_config=font_config_factory()
+    )
+    laid_out = time.perf_counter()
+    document.write_pdf()
+    return (laid_out - start) * 1000, (time.perf_counter() - laid_out) * 1000
+
+
+def main():
+    try:
+        from weasyprint.text.fonts import FontConfiguration
+    except (ImportError, OSError) as e:
+        print(f"WeasyPrint indisponible ({e}) : benchmark non exécuté")
+        return
+
+    from pdf_stylesheets import font_configuration
+    from template_engine import template_engine
+    from warmup import _sample_document, WARMUP_FORMULAS
+    from latex_to_svg import latex_renderer
+
+    document = _sample_document(
+        [latex_renderer.convert_latex_to_svg(f"\\({formula}\\)") for formula in WARMUP_FORMULAS], ''
+    )
+    template_names = sorted({
+        name for name in os.listdir(template_engine.templates_dir)
+        if name.startswith(('sujet_', 'corrige_')) and name.endswith('.html') and '-' not in name
+    })
+
+    print(f"{'template':<24} {'layout neuf':>12} {'layout partagé':>15} {'write_pdf':>10} {'gain layout':>12}")
+    for filename in template_names:
+        template_name = filename[:-len('.html')]
+        html_content = template_engine.get_template(template_name).render(
+            document=document, date_creation='01/01/2026'
+        )
+
+        fresh_layout, _ = median_ms(lambda: timed_phases(html_content, FontConfiguration))
+        shared_layout, write = median_ms(lambda: timed_phases(html_content, font_configuration))
+        gain = 1 - shared_layout / fresh_layout if fresh_layout else 0
+        print(f"{template_name:<24} {fresh_layout:>10.0f}ms {shared_layout:>13.0f}ms "
+              f"{write:>8.0f}ms {gain:>11.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: SchemaRenderer, rendu matplotlib vs SVG natif (schema_svg_renderer), par type
+
+Les méthodes de rendu sont appelées directement (sans le cache de figure_cache).
+
+Usage: python benchmarks/bench_schema_svg.py [iterations]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+matplotlib.use('Agg')
+
+from render_schema import SchemaRenderer
+from schema_svg_renderer import schema_svg_renderer
+from figure_registry import ANY_FIGURE
+
+SCHEMAS = {
+    'cylindre': {'type': 'cylindre', 'rayon': 3, 'hauteur': 5},
+    'pyramide': {'type': 'pyramide', 'base': 'carre', 'cote': 4, 'hauteur': 5},
+    'triangle': {'type': 'triangle', 'points': ['A', 'B', 'C'], 'segments': [['A', 'B', {'longueur': 3}]]},
+    'triangle_rectangle': {
+        'type': 'triangle_rectangle', 'points': ['A', 'B', 'C'],
+        'segments': [['A', 'B', {'longueur': 4}], ['B', 'C', {'longueur': 3}]],
+    },
+    'rectangle': {'type': 'rectangle', 'longueur': 6, 'largeur': 4},
+    'carre': {'type': 'carre', 'cote': 4},
+    'cercle': {'type': 'cercle', 'rayon': 3},
+    'hexagone': {'type': 'hexagone', 'points': ['A', 'B', 'C', 'D', 'E', 'F']},
+}
+
+MATPLOTLIB_METHODS = {
+    'cylindre': '_render_cylindre',
+    'pyramide': '_render_pyramide',
+    'triangle': '_render_triangle',
+    'triangle_rectangle': '_render_triangle_rectangle',
+    'rectangle': '_render_rectangle',
+    'carre': '_render_carre',
+    'cercle': '_render_cercle',
+}
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    legacy = SchemaRenderer(backend='matplotlib')
+    native = schema_svg_renderer.renderers()
+
+    print(f"{'schéma':<20} {'matplotlib ms':>14} {'natif ms':>10} {'gain':>7} {'octets':>16}")
+    for schema_type, data in SCHEMAS.items():
+        matplotlib_render = getattr(legacy, MATPLOTLIB_METHODS.get(schema_type, '_render_generic_polygon'))
+        renders = {
+            'matplotlib': lambda: matplotlib_render(data),
+            'native': lambda: native.get(schema_type, native[ANY_FIGURE])(data),
+        }
+        timings, sizes = {}, {}
+        for name, render in renders.items():
+            sizes[name] = len(render())
+            number = iterations if name == 'matplotlib' else iterations * 50
+            timings[name] = min(timeit.repeat(render, number=number, repeat=3)) / number * 1e3
+
+        print(
+            f"{schema_type:<20} {timings['matplotlib']:>14.2f} {timings['native']:>10.3f} "
+            f"{timings['matplotlib'] / timings['native']:>6.0f}x {sizes['matplotlib']:>7} -> {sizes['native']:<6}"
+        )
+
+
+if __name__ == '__main__':
+    main()
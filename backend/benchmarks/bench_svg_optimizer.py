@@ -0,0 +1,55 @@
+"""
+Benchmark: octets SVG avant/après svg_optimizer, par document d'exemple (version PDF)
+
+Les artefacts sont rendus par render_pipeline sans base Mongo ; le bilan est celui
+journalisé à chaque export (svg_report).
+
+Usage: python benchmarks/bench_svg_optimizer.py
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+matplotlib.use('Agg')
+
+from render_pipeline import RenderPipeline, svg_report
+
+FRACTIONS = [r"\(\frac{%d}{%d}\)" % (n, n + 3) for n in range(1, 9)]
+
+DOCUMENTS = {
+    'fractions (8 exercices)': [
+        {'type': 'ouvert', 'enonce': f"Simplifier {fraction}",
+         'solution': {'etapes': [fraction, r"\(\frac{1}{2}\)"], 'resultat': fraction}}
+        for fraction in FRACTIONS
+    ],
+    'géométrie (4 schémas)': [
+        {'type': 'ouvert', 'enonce': "Calculer le volume du cylindre de rayon \\(r = 3\\)",
+         'donnees': {'schema': {'type': 'cylindre', 'rayon': 3, 'hauteur': 5}}},
+        {'type': 'ouvert', 'enonce': "Calculer l'aire du carré",
+         'donnees': {'schema': {'type': 'carre', 'cote': 4}}},
+        {'type': 'ouvert', 'enonce': "Hypoténuse : \\(BC^2 = AB^2 + AC^2\\)",
+         'donnees': {'schema': {'type': 'triangle_rectangle', 'points': ['A', 'B', 'C']}}},
+        {'type': 'ouvert', 'enonce': 'Figure {"type": "schema_geometrique", "figure": "carre", "points": ["A", "B", "C", "D"]}',
+         'donnees': {'schema': {'type': 'pyramide', 'base': 'triangle', 'hauteur': 5}}},
+    ],
+}
+
+
+def main():
+    print(f"{'document':<26} {'SVG avant':>10} {'SVG après':>10} {'gain':>7}")
+    for name, exercises in DOCUMENTS.items():
+        pipeline = RenderPipeline()
+        pipeline.cache.clear()
+        artifacts = asyncio.run(pipeline.artifacts_for(None, exercises))
+        report = svg_report(artifacts, 'pdf')
+
+        ratio = report['svg_bytes_saved'] / report['svg_bytes_in'] if report['svg_bytes_in'] else 0
+        print(f"{name:<26} {report['svg_bytes_in']:>10} {report['svg_bytes_out']:>10} {ratio:>6.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Class Set - Une version de la fiche par élève (même structure, autres valeurs)
+
+Chaque exercice mathématique garde son type, son niveau, son chapitre et sa difficulté
+(spec_mathematique) ; MathGenerationService, avec une graine propre à chaque version, en
+tire de nouvelles valeurs, et l'énoncé est rédigé par les templates de MathTextService
+(sans IA : instantané et reproductible). Les exercices sans spec sont repris tels quels.
+
+La graine d'une version dépend du document, du numéro de version et de la graine de la
+demande : réexporter la même série redonne exactement les mêmes fiches.
+"""
+
+import copy
+import hashlib
+import logging
+import os
+from typing import Any, Dict, List, TypeVar
+
+from models.math_models import GeneratedMathExercise, MathExerciseSpec
+from services.math_generation_service import MathGenerationService
+from services.math_text_service import MathTextService
+
+logger = logging.getLogger(__name__)
+
+CLASS_SET_MAX_VARIANTS = int(os.environ.get('CLASS_SET_MAX_VARIANTS', '40'))
+
+# Champs de figure liés aux anciennes valeurs : remplacés (ou supprimés) dans une version
+_STALE_FIELDS = ('figure_svg', 'figure_svg_id', 'schema_img', 'schema_img_id', 'geometric_schema')
+
+T = TypeVar('T')
+
+# Rédaction par templates (aucune clé IA requise)
+template_text_service = MathTextService(use_ai=False)
+
+
+def variant_seed(document_id: str, index: int, base_seed: int = 0) -> int:
+    """Graine de la version `index` d'un document"""
+    digest = hashlib.sha256(f"{document_id}:{base_seed}:{index}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def resample_exercise(exercise: Dict[str, Any], generator: MathGenerationService) -> Dict[str, Any]:
+    """Même exercice, nouvelles valeurs (copie inchangée sans spec_mathematique exploitable)"""
+    variant = copy.deepcopy(exercise)
+    spec_data = exercise.get('spec_mathematique')
+    if not spec_data:
+        return variant
+
+    try:
+        spec = generator.regenerate_spec(MathExerciseSpec(**spec_data))
+        generated = GeneratedMathExercise(
+            spec=spec,
+            texte=template_text_service.generate_template_text(spec)
+        ).to_exercise_dict()
+    except Exception as e:
+        logger.warning(f"Exercise {exercise.get('id')} kept unchanged in class set: {e}")
+        return variant
+
+    for field in _STALE_FIELDS:
+        variant.pop(field, None)
+    variant.update(generated)
+    return variant
+
+
+def build_variant(document: Dict[str, Any], index: int, base_seed: int = 0) -> Dict[str, Any]:
+    """Version `index` (à partir de 1) d'un document, titrée « version NN »"""
+    seed = variant_seed(document['id'], index, base_seed)
+    generator = MathGenerationService(seed=seed)
+
+    exercises = []
+    for position, exercise in enumerate(document.get('exercises') or [], start=1):
+        variant_exercise = resample_exercise(exercise, generator)
+        variant_exercise['id'] = f"{exercise.get('id') or position}-v{index:02d}"
+        variant_exercise['seed'] = seed
+        exercises.append(variant_exercise)
+
+    return dict(
+        document,
+        exercises=exercises,
+        type_doc=f"{document.get('type_doc') or 'exercices'} – version {index:02d}",
+    )
+
+
+def split_evenly(items: List[T], parts: int) -> List[List[T]]:
+    """Découpe en au plus `parts` lots consécutifs de tailles voisines (un job du pool par lot)"""
+    parts = max(1, min(parts, len(items)))
+    size, extra = divmod(len(items), parts)
+    chunks, start = [], 0
+    for part in range(parts):
+        end = start + size + (1 if part < extra else 0)
+        chunks.append(items[start:end])
+        start = end
+    return [chunk for chunk in chunks if chunk]
@@ -0,0 +1,168 @@
+"""
+DB Indexes - Index MongoDB requis par les requêtes fréquentes, créés au démarrage
+
+init_db_indexes.py ne créait que quatre index (sessions, jetons, utilisateurs Pro) et
+seulement lorsqu'on le lançait à la main : les requêtes des chemins chauds (document à
+exporter, historique et quota d'un invité, session, modèle Pro, paiement) parcouraient
+toute leur collection. Les index sont désormais déclarés ici, à côté des formes de
+requête qu'ils servent :
+
+- REQUIRED_INDEXES : chaque index (clés, unicité, expiration), créé au démarrage par
+  ensure_indexes() ; create_index est sans effet pour un index existant identique, et un
+  échec (doublons empêchant un index unique...) est journalisé sans bloquer le serveur
+- HOT_QUERIES : les formes des requêtes fréquentes (filtre, tri). Les tests vérifient
+  qu'un index couvre chacune d'elles et, avec une base MongoDB de test, que explain()
+  ne montre aucun parcours de collection (COLLSCAN)
+
+Les noms des index historiques d'init_db_indexes.py sont conservés.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ASCENDING = 1
+DESCENDING = -1
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """Index d'une collection"""
+    collection: str
+    keys: Tuple[Tuple[str, int], ...]
+    name: str
+    unique: bool = False
+    expire_after_seconds: Optional[int] = None
+
+    def options(self) -> Dict[str, Any]:
+        options: Dict[str, Any] = {'name': self.name}
+        if self.unique:
+            options['unique'] = True
+        if self.expire_after_seconds is not None:
+            options['expireAfterSeconds'] = self.expire_after_seconds
+        return options
+
+
+@dataclass(frozen=True)
+class HotQuery:
+    """Forme d'une requête fréquente : champs filtrés par égalité, par intervalle, tri"""
+    collection: str
+    description: str
+    filter: Dict[str, Any]
+    sort: Tuple[Tuple[str, int], ...] = ()
+    range_fields: Tuple[str, ...] = ()
+
+    @property
+    def equality_fields(self) -> List[str]:
+        return [name for name in self.filter if name not in self.range_fields]
+
+
+REQUIRED_INDEXES: Tuple[IndexSpec, ...] = (
+    # Documents : export, modification, historique d'un invité
+    IndexSpec('documents', (('id', ASCENDING),), 'documents_id', unique=True),
+    IndexSpec('documents', (('guest_id', ASCENDING), ('created_at', DESCENDING)), 'documents_guest_recent'),
+    IndexSpec('documents', (('user_id', ASCENDING), ('created_at', DESCENDING)), 'documents_user_recent'),
+
+    # Exports : quota invité sur 30 jours, statistiques d'un utilisateur Pro
+    IndexSpec('exports', (('guest_id', ASCENDING), ('created_at', DESCENDING)), 'exports_guest_recent'),
+    IndexSpec('exports', (('user_email', ASCENDING), ('created_at', DESCENDING)), 'exports_user_recent'),
+
+    # Sessions : une par utilisateur, recherche par jeton, expiration automatique
+    IndexSpec('login_sessions', (('session_token', ASCENDING),), 'login_sessions_token', unique=True),
+    IndexSpec('login_sessions', (('user_email', ASCENDING),), 'unique_user_session', unique=True),
+    IndexSpec('login_sessions', (('expires_at', ASCENDING),), 'session_expiry_ttl', expire_after_seconds=0),
+
+    # Liens de connexion
+    IndexSpec('magic_tokens', (('token', ASCENDING),), 'magic_tokens_token', unique=True),
+    IndexSpec('magic_tokens', (('expires_at', ASCENDING),), 'magic_token_ttl', expire_after_seconds=0),
+
+    # Comptes Pro, modèles personnalisés, paiements
+    IndexSpec('pro_users', (('email', ASCENDING),), 'unique_pro_user_email', unique=True),
+    IndexSpec('user_templates', (('user_email', ASCENDING),), 'user_templates_email', unique=True),
+    IndexSpec('payment_transactions', (('session_id', ASCENDING),), 'payment_transactions_session', unique=True),
+)
+
+HOT_QUERIES: Tuple[HotQuery, ...] = (
+    HotQuery('documents', 'document to export or update', {'id': 'doc-1'}),
+    HotQuery('documents', 'guest history', {'guest_id': 'guest-1'}, sort=(('created_at', DESCENDING),)),
+    HotQuery('documents', 'Pro user documents', {'user_id': 'prof@example.org'}),
+    HotQuery('exports', 'guest quota (30 days)', {'guest_id': 'guest-1', 'created_at': {'$gte': 0}},
+             range_fields=('created_at',)),
+    HotQuery('exports', 'Pro user exports', {'user_email': 'prof@example.org'}),
+    HotQuery('login_sessions', 'session validation', {'session_token': 'token-1'}),
+    HotQuery('login_sessions', 'session replacement at login', {'user_email': 'prof@example.org'}),
+    HotQuery('magic_tokens', 'magic link verification', {'token': 'token-1', 'used': False}),
+    HotQuery('pro_users', 'Pro status', {'email': 'prof@example.org'}),
+    HotQuery('user_templates', 'Pro template', {'user_email': 'prof@example.org'}),
+    HotQuery('payment_transactions', 'payment status', {'session_id': 'cs_test_1'}),
+)
+
+
+def covering_index(query: HotQuery, indexes: Iterable[IndexSpec] = REQUIRED_INDEXES) -> Optional[IndexSpec]:
+    """
+    Index qui sert la requête sans parcours de collection : son premier champ est filtré
+    par égalité et, si la requête est triée, le tri suit les champs d'égalité dans l'index
+    """
+    equality = set(query.equality_fields)
+    for index in indexes:
+        if index.collection != query.collection or index.keys[0][0] not in equality:
+            continue
+        if query.sort and not _sort_served(index, query):
+            continue
+        return index
+    return None
+
+
+def _sort_served(index: IndexSpec, query: HotQuery) -> bool:
+    fields = list(index.keys)
+    equality = set(query.equality_fields)
+    # Champs d'égalité en tête, puis le tri dans le même sens (ou entièrement inversé)
+    position = 0
+    while position < len(fields) and fields[position][0] in equality:
+        position += 1
+    following = tuple(fields[position:position + len(query.sort)])
+    reversed_sort = tuple((name, -direction) for name, direction in query.sort)
+    return following in (tuple(query.sort), reversed_sort)
+
+
+def has_collection_scan(explain: Dict[str, Any]) -> bool:
+    """Le plan retenu d'un résultat explain() parcourt-il toute la collection ?"""
+    plan = explain.get('queryPlanner', explain).get('winningPlan', {})
+    # Moteur de requêtes SBE (MongoDB 7+) : plan dans queryPlan
+    pending = [plan.get('queryPlan', plan)]
+    while pending:
+        stage = pending.pop()
+        if stage.get('stage') == 'COLLSCAN':
+            return True
+        if 'inputStage' in stage:
+            pending.append(stage['inputStage'])
+        pending.extend(stage.get('inputStages', []))
+    return False
+
+
+async def explain_query(db, query: HotQuery) -> Dict[str, Any]:
+    """Plan choisi par MongoDB pour une requête fréquente"""
+    command: Dict[str, Any] = {'find': query.collection, 'filter': query.filter}
+    if query.sort:
+        command['sort'] = dict(query.sort)
+    return await db.command({'explain': command, 'verbosity': 'queryPlanner'})
+
+
+async def ensure_indexes(db, indexes: Iterable[IndexSpec] = REQUIRED_INDEXES) -> Dict[str, Optional[str]]:
+    """
+    Crée les index manquants ; retourne nom -> None (présent) ou message d'erreur.
+    Un index en échec n'empêche pas la création des suivants.
+    """
+    report: Dict[str, Optional[str]] = {}
+    for index in indexes:
+        try:
+            await db[index.collection].create_index(list(index.keys), **index.options())
+            report[index.name] = None
+        except Exception as e:
+            logger.warning(f"Index {index.collection}.{index.name} not created: {e}")
+            report[index.name] = str(e)
+    created = sum(1 for error in report.values() if error is None)
+    logger.info(f"Database indexes ensured: {created}/{len(report)}")
+    return report
@@ -3,18 +3,112 @@
 
 import aiohttp
 import json
+import os
 import re
+import time
+from collections import OrderedDict
 from typing import Dict, List, Optional, Any
 from logger import get_logger
+from keyword_classifier import KeywordClassifier
 
 logger = get_logger()
 
+# API Wikimedia : délais explicites, connexions réutilisées, réponses gardées en cache
+WIKIMEDIA_TIMEOUT = float(os.environ.get('WIKIMEDIA_TIMEOUT', '8'))
+WIKIMEDIA_CONNECT_TIMEOUT = float(os.environ.get('WIKIMEDIA_CONNECT_TIMEOUT', '3'))
+WIKIMEDIA_MAX_CONNECTIONS = int(os.environ.get('WIKIMEDIA_MAX_CONNECTIONS', '10'))
+WIKIMEDIA_CACHE_TTL = float(os.environ.get('WIKIMEDIA_CACHE_TTL', '3600'))
+WIKIMEDIA_CACHE_SIZE = 256
+WIKIMEDIA_RESULTS = 5
+WIKIMEDIA_USER_AGENT = "LeMaitreMot/1.0 (exercices de Géographie)"
+
+
+class TTLCache:
+    """Petit cache LRU dont les entrées expirent après `ttl` secondes"""
+
+    def __init__(self, ttl: float = WIKIMEDIA_CACHE_TTL, max_entries: int = WIKIMEDIA_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        sentinel = object()
+        return self.get(key, sentinel) is not sentinel
+
+    def put(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+# Mots-clés de l'énoncé -> type de carte (ordre : départage des égalités)
+DOCUMENT_TYPE_KEYWORDS = {
+    "carte_france": [
+        "france", "français", "paris", "lyon", "marseille", "toulouse",
+        "région", "département", "préfecture", "hexagone", "métropole",
+        "aquitaine", "bretagne", "normandie", "paca", "île-de-france"
+    ],
+    "carte_europe": [
+        "europe", "européen", "union européenne", "ue", "schengen",
+        "allemagne", "berlin", "italie", "rome", "espagne", "madrid",
+        "royaume-uni", "londres", "portugal", "grèce", "pologne", "brexit"
+    ],
+    "carte_asie": [
+        "asie", "asiatique", "extrême-orient", "orient",
+        "chine", "beijing", "pékin", "shanghai", "japon", "tokyo", "osaka",
+        "inde", "delhi", "mumbai", "corée", "séoul", "seoul", "thaïlande", "vietnam"
+    ],
+    "carte_amerique_nord": [
+        "amérique du nord", "nord-américain", "alena", "nafta",
+        "états-unis", "usa", "etats-unis", "américain",
+        "new york", "washington", "californie", "texas", "floride",
+        "canada", "toronto", "vancouver", "ottawa", "québec",
+        "mexique", "mexico", "chicago", "los angeles"
+    ],
+    "carte_afrique": [
+        "afrique", "africain", "sahara", "sahel", "maghreb",
+        "nil", "congo", "niger", "zambèze",
+        "maroc", "algérie", "tunisie", "egypte", "égypte", "kenya", "nigeria",
+        "afrique du sud", "ghana", "sénégal", "mali", "tchad"
+    ],
+    "carte_monde": [
+        "monde", "mondial", "planète", "terre", "global",
+        "continents", "océans", "hémisphère", "équateur", "tropiques",
+        "mondialisation", "géographie mondiale", "planisphère"
+    ],
+}
+
+# Un énoncé qui cite une région et « le monde » reste centré sur la région
+document_type_classifier = KeywordClassifier(DOCUMENT_TYPE_KEYWORDS, category_weights={"carte_monde": 0.5})
+
+
 class DocumentSearcher:
     """Recherche automatique de documents pédagogiques libres de droit"""
     
     def __init__(self):
         self.wikimedia_api_base = "https://commons.wikimedia.org/w/api.php"
         self.wikimedia_base_url = "https://commons.wikimedia.org"
+
+        # Session HTTP du processus (créée au premier appel, dans la boucle d'événements)
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Résultats par termes de recherche, métadonnées par fichier
+        self.search_cache = TTLCache()
+        self.metadata_cache = TTLCache()
         
         # Cache des documents validés avec URLs TESTÉES ET VALIDES (Octobre 2025)
         self.validated_documents_cache = {
@@ -149,99 +243,51 @@ class DocumentSearcher:
         
         cache_key = cache_mapping.get(doc_type)
         if cache_key and cache_key in self.validated_documents_cache:
-            return self.validated_documents_cache[cache_key]
+            # Le type permet à l'export de recadrer la carte sur sa région (map_assets)
+            return dict(self.validated_documents_cache[cache_key], type=cache_key)
         
         return None
     
     def _analyze_content_for_document_type(self, enonce: str) -> str:
-        """Analyse RENFORCÉE pour garantir la diversification"""
-        enonce_lower = enonce.lower()
-        
-        # DÉTECTION ULTRA-PRÉCISE avec mots-clés étendus
-        
-        # FRANCE - Détection élargie
-        france_keywords = [
-            "france", "français", "paris", "lyon", "marseille", "toulouse", 
-            "région", "département", "préfecture", "hexagone", "métropole",
-            "aquitaine", "bretagne", "normandie", "paca", "île-de-france"
-        ]
-        if any(mot in enonce_lower for mot in france_keywords):
-            return "carte_france"
-        
-        # EUROPE - Détection élargie  
-        europe_keywords = [
-            "europe", "européen", "union européenne", "ue", "schengen",
-            "allemagne", "berlin", "italie", "rome", "espagne", "madrid",
-            "royaume-uni", "londres", "portugal", "grèce", "pologne", "brexit"
-        ]
-        if any(mot in enonce_lower for mot in europe_keywords):
-            return "carte_europe"
-        
-        # ASIE - Détection élargie
-        asie_keywords = [
-            "asie", "asiatique", "extrême-orient", "orient",
-            "chine", "beijing", "pékin", "shanghai", "japon", "tokyo", "osaka",
-            "inde", "delhi", "mumbai", "corée", "séoul", "thaïlande", "vietnam"
-        ]
-        if any(mot in enonce_lower for mot in asie_keywords):
-            return "carte_asie"
-        
-        # AMÉRIQUE DU NORD - Détection élargie
-        amerique_nord_keywords = [
-            "amérique du nord", "nord-américain", "alena", "nafta",
-            "états-unis", "usa", "etats-unis", "américain",
-            "new york", "washington", "californie", "texas", "floride",
-            "canada", "toronto", "vancouver", "ottawa", "québec",
-            "mexique", "mexico"
-        ]
-        if any(mot in enonce_lower for mot in amerique_nord_keywords):
-            return "carte_amerique_nord"
-        
-        # AFRIQUE - Détection élargie
-        afrique_keywords = [
-            "afrique", "africain", "sahara", "sahel", "maghreb",
-            "nil", "congo", "niger", "zambèze",
-            "maroc", "algérie", "tunisie", "egypte", "kenya", "nigeria",
-            "afrique du sud", "ghana", "sénégal", "mali", "tchad"
-        ]
-        if any(mot in enonce_lower for mot in afrique_keywords):
-            return "carte_afrique"
-        
-        # MONDE/GLOBAL - Détection élargie
-        monde_keywords = [
-            "monde", "mondial", "planète", "terre", "global",
-            "continents", "océans", "hémisphère", "équateur", "tropiques",
-            "mondialisation", "géographie mondiale", "planisphère"
-        ]
-        if any(mot in enonce_lower for mot in monde_keywords):
-            return "carte_monde"
-        
-        # URBAIN - Détection spéciale
-        urban_keywords = [
-            "ville", "urbain", "métropole", "agglomération", "banlieue",
-            "urbanisation", "périurbain", "centre-ville", "quartier"
-        ]
-        if any(mot in enonce_lower for mot in urban_keywords):
-            # Pour l'urbain, choisir selon contexte géographique
-            if any(mot in enonce_lower for mot in ["tokyo", "osaka", "beijing", "seoul"]):
-                return "carte_asie"
-            elif any(mot in enonce_lower for mot in ["new york", "chicago", "los angeles"]):
-                return "carte_amerique_nord"
-            elif any(mot in enonce_lower for mot in ["paris", "lyon", "marseille"]):
-                return "carte_france"
-            elif any(mot in enonce_lower for mot in ["berlin", "rome", "madrid", "londres"]):
-                return "carte_europe"
-            else:
-                return "carte_monde"  # Urbain général
-        
-        # FALLBACK par défaut
-        return "carte_monde"
+        """Type de carte d'après les mots-clés de l'énoncé (score par région, un seul parcours)"""
+        doc_type, scores = document_type_classifier.classify_with_scores(enonce, default="carte_monde")
+        logger.debug("Document type scores: %s -> %s", scores, doc_type)
+        return doc_type
     
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Session partagée : pool de connexions (keep-alive, DNS en cache) et délais explicites"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=WIKIMEDIA_TIMEOUT, connect=WIKIMEDIA_CONNECT_TIMEOUT),
+                connector=aiohttp.TCPConnector(limit=WIKIMEDIA_MAX_CONNECTIONS, ttl_dns_cache=300),
+                headers={"User-Agent": WIKIMEDIA_USER_AGENT}
+            )
+        return self._session
+
+    async def close(self):
+        """Ferme la session HTTP (arrêt du serveur)"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _api_get(self, params: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """Appel de l'API Wikimedia Commons ; None si le statut n'est pas 200"""
+        session = await self._get_session()
+        async with session.get(self.wikimedia_api_base, params=params) as response:
+            if response.status != 200:
+                logger.warning(f"Wikimedia API returned status {response.status}")
+                return None
+            return await response.json()
+
     async def _search_wikimedia_commons(self, doc_type: str, elements_requis: List[str], langue: str) -> List[Dict[str, Any]]:
-        """Recherche via l'API Wikimedia Commons"""
+        """Recherche via l'API Wikimedia Commons (une recherche + une requête de métadonnées groupée)"""
         
         # Construction de la requête de recherche
         search_terms = self._build_search_terms(doc_type, elements_requis, langue)
+        cached_results = self.search_cache.get(search_terms)
+        if cached_results is not None:
+            logger.info(f"Wikimedia search served from cache: {search_terms}")
+            return [dict(result) for result in cached_results]
         
         params = {
             "action": "query",
@@ -253,25 +299,24 @@ class DocumentSearcher:
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(self.wikimedia_api_base, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        search_results = data.get("query", {}).get("search", [])
-                        
-                        # Enrichir avec les métadonnées de chaque fichier
-                        enriched_results = []
-                        for result in search_results[:5]:  # Limiter à 5 résultats
-                            file_metadata = await self._get_file_metadata(result["title"])
-                            if file_metadata:
-                                enriched_results.append(file_metadata)
-                        
-                        return enriched_results
+            data = await self._api_get(params)
+            if data is None:
+                return []
+            search_results = data.get("query", {}).get("search", [])
+            
+            # Enrichir avec les métadonnées de chaque fichier (limité à 5 résultats)
+            titles = [result["title"] for result in search_results[:WIKIMEDIA_RESULTS]]
+            metadata_by_title = await self._get_files_metadata(titles)
+            enriched_results = [metadata_by_title[title] for title in titles if metadata_by_title.get(title)]
         except Exception as e:
             logger.error(f"Error in Wikimedia API call: {e}")
             return []
         
-        return []
+        # Métadonnées incomplètes (requête imageinfo en échec) : résultat non mis en cache,
+        # la prochaine recherche réessaie
+        if all(title in metadata_by_title for title in titles):
+            self.search_cache.put(search_terms, enriched_results)
+        return [dict(result) for result in enriched_results]
     
     def _build_search_terms(self, doc_type: str, elements_requis: List[str], langue: str) -> str:
         """Construction des termes de recherche optimisés"""
@@ -302,47 +347,64 @@ class DocumentSearcher:
     
     async def _get_file_metadata(self, filename: str) -> Optional[Dict[str, Any]]:
         """Récupère les métadonnées détaillées d'un fichier"""
+        return (await self._get_files_metadata([filename])).get(filename)
+
+    async def _get_files_metadata(self, filenames: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Métadonnées de plusieurs fichiers en une seule requête imageinfo (titles=A|B|C)"""
+        
+        results = {name: self.metadata_cache.get(name) for name in filenames if name in self.metadata_cache}
+        missing = [name for name in filenames if name not in results]
+        if not missing:
+            return results
         
         params = {
             "action": "query",
             "format": "json",
-            "titles": filename,
+            "titles": "|".join(missing),
             "prop": "imageinfo",
             "iiprop": "url|size|mime|metadata|commonsmeta",
             "iiurlwidth": "1200"
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(self.wikimedia_api_base, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        pages = data.get("query", {}).get("pages", {})
-                        
-                        for page_id, page_data in pages.items():
-                            if "imageinfo" in page_data:
-                                imageinfo = page_data["imageinfo"][0]
-                                
-                                # Extraire les informations essentielles
-                                metadata = {
-                                    "titre": filename.replace("File:", "").replace("_", " "),
-                                    "url_fichier_direct": imageinfo.get("url"),
-                                    "largeur_px": imageinfo.get("width", 0),
-                                    "hauteur_px": imageinfo.get("height", 0),
-                                    "mime_type": imageinfo.get("mime"),
-                                    "taille_bytes": imageinfo.get("size", 0),
-                                    "url_page_commons": f"{self.wikimedia_base_url}/wiki/{filename}"
-                                }
-                                
-                                # Analyser la licence
-                                licence_info = self._extract_license_info(page_data)
-                                metadata["licence"] = licence_info
-                                
-                                return metadata
+            data = await self._api_get(params)
         except Exception as e:
-            logger.error(f"Error getting file metadata for {filename}: {e}")
+            logger.error(f"Error getting file metadata for {len(missing)} files: {e}")
+            return results
+        if data is None:
+            return results
+        
+        query = data.get("query", {})
+        # Titre demandé -> titre normalisé par l'API
+        normalized = {item.get("to"): item.get("from") for item in query.get("normalized", [])}
+        for page_data in query.get("pages", {}).values():
+            filename = normalized.get(page_data.get("title"), page_data.get("title"))
+            if filename not in missing:
+                continue
+            
+            metadata = None
+            if "imageinfo" in page_data:
+                imageinfo = page_data["imageinfo"][0]
+                
+                # Extraire les informations essentielles
+                metadata = {
+                    "titre": filename.replace("File:", "").replace("_", " "),
+                    "url_fichier_direct": imageinfo.get("url"),
+                    "largeur_px": imageinfo.get("width", 0),
+                    "hauteur_px": imageinfo.get("height", 0),
+                    "mime_type": imageinfo.get("mime"),
+                    "taille_bytes": imageinfo.get("size", 0),
+                    "url_page_commons": f"{self.wikimedia_base_url}/wiki/{filename}"
+                }
+                
+                # Analyser la licence
+                licence_info = self._extract_license_info(page_data)
+                metadata["licence"] = licence_info
+            
+            self.metadata_cache.put(filename, metadata)
+            results[filename] = metadata
         
-        return None
+        return results
     
     def _extract_license_info(self, page_data: Dict[str, Any]) -> Dict[str, Any]:
         """Extrait les informations de licence d'une page Commons"""
@@ -539,7 +601,8 @@ class DocumentSearcher:
             }
         }
         
-        return fallback_docs.get(doc_type, fallback_docs["carte_monde"])
+        fallback_type = doc_type if doc_type in fallback_docs else "carte_monde"
+        return dict(fallback_docs[fallback_type], type=fallback_type)
     
     def _enrich_document_metadata(self, doc: Dict[str, Any], document_request: Dict[str, Any]) -> Dict[str, Any]:
         """Enrichit les métadonnées du document avec les informations de contexte"""
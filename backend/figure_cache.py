@@ -0,0 +1,158 @@
+"""
+Figure Cache - Mémoïsation des rendus de figures géométriques
+
+Les mêmes schémas sont re-rendus à chaque affichage ou export d'un document. Chaque
+renderer de figure passe par ce cache : la clé est l'empreinte (sha1) de la forme
+canonique du schéma (clés triées, nombres normalisés, "5 cm" == "5" == 5 == 5.0) ; le
+SVG/base64 correspondant est servi depuis un LRU borné, avec compteurs de hits/misses par
+renderer. Le rendu se fait toujours à partir du schéma d'origine (écriture des nombres et
+unités conservée).
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Nombre maximal de rendus gardés en mémoire, par renderer
+FIGURE_CACHE_SIZE = int(os.environ.get('FIGURE_CACHE_SIZE', '512'))
+
+# Décimales conservées : absorbe le bruit flottant (0.1 + 0.2) sans fusionner de vraies valeurs
+_FLOAT_DECIMALS = 6
+
+
+def canonicalize(value: Any) -> Any:
+    """
+    Forme canonique d'un schéma, pour le calcul de la clé du cache : dictionnaires à
+    clés triées, flottants arrondis. Les chaînes et le type des nombres sont conservés :
+    le rendu affiche la valeur telle qu'écrite ("2,5 cm" n'est pas 2.5, ni 5.0 5).
+    """
+    if isinstance(value, dict):
+        return {str(key): canonicalize(value[key]) for key in sorted(value, key=str)}
+    if isinstance(value, (list, tuple)):
+        return [canonicalize(item) for item in value]
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, float):
+        return round(value, _FLOAT_DECIMALS)
+    return value
+
+
+def schema_hash(schema: Any) -> str:
+    """Empreinte stable (indépendante de l'ordre des clés et du bruit flottant)"""
+    payload = json.dumps(canonicalize(schema), sort_keys=True, separators=(',', ':'),
+                         ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class FigureCache:
+    """LRU borné (thread-safe) des rendus d'un renderer, avec statistiques"""
+
+    def __init__(self, name: str, max_size: int = FIGURE_CACHE_SIZE):
+        self.name = name
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_caches: Dict[str, FigureCache] = {}
+
+
+def get_cache(name: str) -> FigureCache:
+    cache = _caches.get(name)
+    if cache is None:
+        cache = _caches.setdefault(name, FigureCache(name))
+    return cache
+
+
+def memoize_figure(name: str, to_schema: Optional[Callable[[Any], Any]] = None,
+                   variant: Optional[Callable[[Any], Any]] = None):
+    """
+    Décorateur des méthodes de rendu `render(self, schema)`.
+
+    La clé est calculée sur la forme canonique du schéma (sur `to_schema(objet)` pour les
+    objets non-dict, ex. modèle pydantic) ; la méthode reçoit le schéma d'origine.
+    `variant(self)` distingue les instances dont le rendu diffère (ex. backend de rendu).
+    Les résultats vides (échec de rendu) ne sont pas mis en cache.
+    """
+    cache = get_cache(name)
+
+    def decorator(render: Callable):
+        @functools.wraps(render)
+        def wrapper(self, schema, *args, **kwargs):
+            if to_schema is None:
+                if not isinstance(schema, dict):
+                    return render(self, schema, *args, **kwargs)
+                key = schema_hash(schema)
+            else:
+                key = schema_hash(to_schema(schema))
+            if args or kwargs or variant is not None:
+                key = schema_hash([key, list(args), kwargs, variant(self) if variant else None])
+
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+
+            result = render(self, schema, *args, **kwargs)
+            if result:
+                cache.put(key, result)
+            return result
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+def get_stats() -> Dict[str, Dict[str, Any]]:
+    """Statistiques de tous les caches de figures (endpoint /api/metrics/render)"""
+    return {name: cache.stats() for name, cache in sorted(_caches.items())}
+
+
+def clear_all() -> None:
+    for cache in _caches.values():
+        cache.clear()
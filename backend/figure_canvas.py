@@ -0,0 +1,108 @@
+"""
+Figure Canvas - Rendu matplotlib sans état global (API objet Figure + canvas Agg)
+
+pyplot garde une figure "courante" et un registre de figures partagés par tous les
+threads ; plt.rc_context modifie les rcParams globaux. Les renderers créent donc leurs
+figures ici : Figure + FigureCanvasAgg, jamais enregistrées dans pyplot (libérées par le
+ramasse-miettes, pas de plt.close), et les rcParams ne sont plus modifiés après la
+configuration initiale (lazy_imports.get_matplotlib). Le seul réglage qui varie par
+rendu, le texte en chemins des formules (svg.fonttype='path'), est appliqué par
+figure_to_svg avec matplotlib.rc_context ; seul l'export SVG d'une formule est
+exclusif, les autres exports ne s'attendent pas entre eux (matplotlib sérialise
+toutefois lui-même Figure.draw, voir Figure._render_lock).
+"""
+
+import re
+from contextlib import contextmanager
+from io import BytesIO, StringIO
+from threading import Condition
+from typing import Tuple
+
+from lazy_imports import get_matplotlib
+
+# Métadonnées horodatées retirées : un même schéma donne toujours le même SVG
+SVG_METADATA = {'Date': None}
+
+
+
+class _FontTypeLock:
+    """
+    Verrou lecteurs/rédacteur sur svg.fonttype : les exports au réglage global sont
+    concurrents entre eux ; un export qui change le réglage (formule) attend qu'ils se
+    terminent et passe seul. Un rédacteur en attente bloque les nouveaux lecteurs.
+    """
+
+    def __init__(self):
+        self._condition = Condition()
+        self._readers = 0
+        self._writing = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def shared(self):
+        with self._condition:
+            while self._writing or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        with self._condition:
+            self._waiting_writers += 1
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+
+_font_type_lock = _FontTypeLock()
+
+
+def new_figure(width: float, height: float) -> Tuple["Figure", "Axes"]:
+    """Figure indépendante de pyplot et son unique Axes"""
+    get_matplotlib()
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(width, height))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    return fig, ax
+
+
+def figure_to_svg(fig, text_as_paths: bool = False, **savefig_kwargs) -> str:
+    """
+    SVG de la figure, sans prologue XML ni DOCTYPE (pour insertion dans du HTML).
+    text_as_paths : texte écrit en chemins (formules), via rc_context({'svg.fonttype': 'path'})
+    """
+    buffer = StringIO()
+    if text_as_paths:
+        # svg.fonttype est lu pendant l'écriture et rc_context le change pour tout le
+        # processus : seuls les exports de formules sont exclusifs
+        with _font_type_lock.exclusive(), get_matplotlib().rc_context({'svg.fonttype': 'path'}):
+            fig.savefig(buffer, format='svg', metadata=SVG_METADATA, **savefig_kwargs)
+    else:
+        with _font_type_lock.shared():
+            fig.savefig(buffer, format='svg', metadata=SVG_METADATA, **savefig_kwargs)
+    svg_content = re.sub(r'<\?xml[^>]*\?>', '', buffer.getvalue())
+    svg_content = re.sub(r'<!DOCTYPE[^>]*>', '', svg_content)
+    return svg_content.strip()
+
+
+def figure_to_png(fig, **savefig_kwargs) -> bytes:
+    buffer = BytesIO()
+    fig.savefig(buffer, format='png', **savefig_kwargs)
+    return buffer.getvalue()
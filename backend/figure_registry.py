@@ -0,0 +1,167 @@
+"""
+Figure Registry - Table unique type de figure -> renderer, par format de sortie
+
+Les trois piles de rendu (GeometryRenderer, SchemaRenderer, GeometryRenderService)
+enregistrent leurs renderers ici à l'import ; chaque point d'entrée normalise le type
+de figure de la même façon puis fait une simple recherche dans la table. Un même
+(profil, type, format) peut avoir plusieurs renderers, essayés dans l'ordre
+d'enregistrement (ex. SVG natif puis repli matplotlib). Les temps de rendu sont
+comptés par renderer (endpoint /api/metrics/render).
+"""
+
+import base64
+import logging
+import time
+import unicodedata
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Formats de sortie
+FORMAT_SVG = 'svg'            # balisage SVG
+FORMAT_DATA_URI = 'data_uri'  # data:image/...;base64,... (affichage web)
+FORMAT_PNG = 'png'            # PNG encodé en base64
+
+# Type joker : renderer utilisé quand le profil n'a rien pour le type demandé
+ANY_FIGURE = '*'
+
+# Écritures alternatives rencontrées dans les schémas générés
+FIGURE_TYPE_ALIASES = {
+    'mediatrice': 'mediatrice_construction',
+    'construction_mediatrice': 'mediatrice_construction',
+    'cylinder': 'cylindre',
+    'square': 'carre',
+    'circle': 'cercle',
+    'right_triangle': 'triangle_rectangle',
+}
+
+
+class UnknownFigureType(KeyError):
+    """Aucun renderer enregistré pour ce type de figure dans ce profil et ce format"""
+
+
+def normalize_figure_type(value: Any) -> str:
+    """'Carré' -> 'carre', 'Triangle rectangle' -> 'triangle_rectangle', 'mediatrice' -> 'mediatrice_construction'"""
+    text = unicodedata.normalize('NFKD', str(value or '')).encode('ascii', 'ignore').decode('ascii')
+    text = '_'.join(text.strip().lower().replace('-', ' ').split())
+    return FIGURE_TYPE_ALIASES.get(text, text)
+
+
+def figure_type_of(schema: Dict[str, Any], default: str = '') -> str:
+    """
+    Type de figure d'un schéma : clé 'figure' des schémas géométriques
+    ({"type": "schema_geometrique", "figure": "rectangle"}), sinon clé 'type'
+    """
+    value = schema.get('figure') or schema.get('type')
+    if not value or value == 'schema_geometrique':
+        value = default
+    return normalize_figure_type(value)
+
+
+def svg_data_uri(svg_content: str) -> str:
+    return f"data:image/svg+xml;base64,{base64.b64encode(svg_content.encode('utf-8')).decode('ascii')}"
+
+
+def png_data_uri(png_base64: str) -> str:
+    return f"data:image/png;base64,{png_base64}" if png_base64 else ""
+
+
+class _Timing:
+    __slots__ = ('renders', 'errors', 'total', 'max')
+
+    def __init__(self):
+        self.renders = self.errors = 0
+        self.total = self.max = 0.0
+
+
+class FigureRegistry:
+    """(profil, type, format) -> renderers, avec compteurs de temps par renderer"""
+
+    def __init__(self):
+        self._renderers: Dict[Tuple[str, str, str], List[Tuple[str, Callable[[Any], Optional[str]]]]] = {}
+        self._timings: Dict[Tuple[str, str, str, str], _Timing] = {}
+        self._lock = Lock()
+
+    def register(self, profile: str, figure_type: str, output_format: str,
+                 renderer: Callable[[Any], Optional[str]], name: Optional[str] = None) -> None:
+        """
+        Ajoute un renderer en fin de chaîne. Il renvoie le rendu, ou None pour laisser
+        la main au suivant ("" reste un résultat : données inutilisables).
+        """
+        key = (profile, normalize_figure_type(figure_type) if figure_type != ANY_FIGURE else ANY_FIGURE, output_format)
+        self._renderers.setdefault(key, []).append((name or getattr(renderer, '__name__', 'renderer'), renderer))
+
+    def _chain(self, profile: str, figure_type: str, output_format: str):
+        chain = self._renderers.get((profile, figure_type, output_format))
+        if chain is None:
+            chain = self._renderers.get((profile, ANY_FIGURE, output_format))
+        return chain
+
+    def supports(self, profile: str, figure_type: str, output_format: str, exact: bool = False) -> bool:
+        """Type pris en charge (exact=True : sans passer par le renderer joker)"""
+        if exact:
+            return (profile, figure_type, output_format) in self._renderers
+        return self._chain(profile, figure_type, output_format) is not None
+
+    def figure_types(self, profile: str, output_format: str) -> List[str]:
+        return sorted(t for p, t, f in self._renderers if p == profile and f == output_format)
+
+    def render(self, profile: str, figure_type: str, output_format: str, data: Any) -> Optional[str]:
+        """
+        Rendu par le premier renderer de la chaîne qui ne renvoie pas None.
+        Une exception passe au renderer suivant ; elle est relancée si c'était le dernier.
+        """
+        chain = self._chain(profile, figure_type, output_format)
+        if chain is None:
+            raise UnknownFigureType(f"{profile}: {figure_type} ({output_format})")
+
+        for position, (name, renderer) in enumerate(chain):
+            start = time.perf_counter()
+            try:
+                result = renderer(data)
+            except Exception as e:
+                self._record(profile, figure_type, output_format, name, start, failed=True)
+                if position == len(chain) - 1:
+                    raise
+                logger.warning(f"{profile}/{figure_type}: {name} failed ({e}), trying next renderer")
+                continue
+            self._record(profile, figure_type, output_format, name, start, failed=False)
+            if result is not None:
+                return result
+        return None
+
+    def _record(self, profile: str, figure_type: str, output_format: str, name: str,
+                start: float, failed: bool) -> None:
+        elapsed = time.perf_counter() - start
+        key = (profile, figure_type, output_format, name)
+        with self._lock:
+            timing = self._timings.get(key)
+            if timing is None:
+                timing = self._timings[key] = _Timing()
+            timing.renders += 1
+            timing.errors += failed
+            timing.total += elapsed
+            timing.max = max(timing.max, elapsed)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Compteurs par 'profil/type/format', détaillés par renderer"""
+        report: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for (profile, figure_type, output_format, name), timing in sorted(self._timings.items()):
+                report.setdefault(f"{profile}/{figure_type}/{output_format}", {})[name] = {
+                    'renders': timing.renders,
+                    'errors': timing.errors,
+                    'total_ms': round(timing.total * 1000, 3),
+                    'mean_ms': round(timing.total * 1000 / timing.renders, 3),
+                    'max_ms': round(timing.max * 1000, 3),
+                }
+        return report
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._timings.clear()
+
+
+# Instance globale, remplie par les modules de rendu à leur import
+figure_registry = FigureRegistry()
@@ -0,0 +1,165 @@
+"""
+Figure Store - Stockage adressé par contenu des figures et formules rendues
+
+Les schémas étaient enregistrés en data URI base64 dans chaque exercice : copiés dans
+le document Mongo puis renvoyés à chaque réponse /api/documents. Chaque rendu (SVG ou
+PNG) est désormais écrit une seule fois sur disque sous le nom de son empreinte sha256
+et servi par /api/figures/{empreinte}.{ext} avec des en-têtes de cache immuables ; les
+documents ne gardent que l'identifiant "<empreinte>.<ext>".
+"""
+
+import base64
+import binascii
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Optional, Set, Tuple, Union
+
+from formula_dedup import externalize_formulas
+
+logger = logging.getLogger(__name__)
+
+FIGURE_STORE_DIR = Path(os.environ.get('FIGURE_STORE_DIR', Path(__file__).parent / 'figure_store'))
+FIGURE_URL_PREFIX = '/api/figures/'
+
+# Le contenu d'une URL ne change jamais : un an, sans revalidation
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+MEDIA_TYPES = {
+    'svg': 'image/svg+xml',
+    'png': 'image/png',
+}
+_EXTENSIONS = {media_type: ext for ext, media_type in MEDIA_TYPES.items()}
+
+_FIGURE_ID_RE = re.compile(r'^(?P<hash>[0-9a-f]{64})\.(?P<ext>svg|png)$')
+_DATA_URI_RE = re.compile(r'^data:(?P<media_type>image/(?:svg\+xml|png));base64,(?P<data>.*)$', re.DOTALL)
+
+# Champs d'exercice : rendu servi au frontend -> identifiant conservé en base
+EXERCISE_FIGURE_FIELDS = {
+    'schema_img': 'schema_img_id',
+    'figure_svg': 'figure_svg_id',
+}
+
+
+def figure_url(figure_id: str) -> str:
+    return FIGURE_URL_PREFIX + figure_id
+
+
+def figure_img_tag(figure_id: str, alt: str = 'Figure géométrique') -> str:
+    """Balise <img> remplaçant un SVG inséré tel quel dans le HTML (figure_svg)"""
+    return f'<img src="{figure_url(figure_id)}" alt="{alt}" style="max-width: 100%; height: auto;"/>'
+
+
+def parse_figure_id(figure_id: str) -> Optional[Tuple[str, str]]:
+    """'<sha256>.svg' -> (empreinte, extension), None si l'identifiant est invalide"""
+    match = _FIGURE_ID_RE.match(figure_id or '')
+    if not match:
+        return None
+    return match.group('hash'), match.group('ext')
+
+
+class FigureStore:
+    """Répertoire de figures adressées par contenu (écriture atomique, idempotente)"""
+
+    def __init__(self, root: Union[str, Path] = FIGURE_STORE_DIR):
+        self.root = Path(root)
+        self._known: Set[str] = set()
+        self._lock = Lock()
+
+    def _path(self, content_hash: str, ext: str) -> Path:
+        return self.root / content_hash[:2] / f"{content_hash}.{ext}"
+
+    def put(self, content: Union[str, bytes], ext: str = 'svg') -> str:
+        """Enregistre un rendu et renvoie son identifiant ; un contenu déjà présent n'est pas réécrit"""
+        if ext not in MEDIA_TYPES:
+            raise ValueError(f"Format de figure non supporté: {ext}")
+        data = content.encode('utf-8') if isinstance(content, str) else content
+        content_hash = hashlib.sha256(data).hexdigest()
+        figure_id = f"{content_hash}.{ext}"
+        if figure_id in self._known:
+            return figure_id
+
+        path = self._path(content_hash, ext)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Fichier temporaire dans le même répertoire puis renommage : un lecteur
+            # concurrent ne voit jamais de figure partiellement écrite
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as tmp:
+                    tmp.write(data)
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+
+        with self._lock:
+            self._known.add(figure_id)
+        return figure_id
+
+    def put_data_uri(self, data_uri: str) -> Optional[str]:
+        """data:image/(svg+xml|png);base64,... -> identifiant, None si ce n'est pas une telle URI"""
+        match = _DATA_URI_RE.match(data_uri or '')
+        if not match:
+            return None
+        try:
+            data = base64.b64decode(match.group('data'), validate=True)
+        except (binascii.Error, ValueError):
+            logger.warning("Invalid base64 payload in figure data URI")
+            return None
+        return self.put(data, _EXTENSIONS[match.group('media_type')])
+
+    def get(self, figure_id: str) -> Optional[Tuple[bytes, str]]:
+        """(contenu, type MIME), None si l'identifiant est invalide ou inconnu"""
+        parsed = parse_figure_id(figure_id)
+        if parsed is None:
+            return None
+        content_hash, ext = parsed
+        try:
+            return self._path(content_hash, ext).read_bytes(), MEDIA_TYPES[ext]
+        except FileNotFoundError:
+            return None
+
+    def store_formulas(self, html_content: str) -> str:
+        """Remplace les SVG de formules insérés dans le HTML par des <img> du store"""
+        html_out, _ = externalize_formulas(
+            html_content, url_for=lambda svg: figure_url(self.put(svg, 'svg')))
+        return html_out
+
+    def compact_exercise(self, exercise: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Forme stockée en base : les rendus (data URI, SVG) sont écrits dans le store et
+        remplacés par leur identifiant. Les valeurs déjà compactées sont laissées telles quelles.
+        """
+        for field, id_field in EXERCISE_FIGURE_FIELDS.items():
+            value = exercise.get(field)
+            if not value or not isinstance(value, str):
+                continue
+            if value.startswith('data:'):
+                figure_id = self.put_data_uri(value)
+            elif value.lstrip().startswith('<svg'):
+                figure_id = self.put(value, 'svg')
+            else:
+                figure_id = None
+            if figure_id:
+                exercise[id_field] = figure_id
+            if exercise.get(id_field):
+                exercise[field] = None
+        return exercise
+
+    def expand_exercise(self, exercise: Dict[str, Any]) -> Dict[str, Any]:
+        """Forme servie au frontend : URL de la figure (schema_img) ou balise <img> (figure_svg)"""
+        if exercise.get('schema_img_id'):
+            exercise['schema_img'] = figure_url(exercise['schema_img_id'])
+        if exercise.get('figure_svg_id'):
+            exercise['figure_svg'] = figure_img_tag(exercise['figure_svg_id'])
+        return exercise
+
+
+# Instance globale
+figure_store = FigureStore()
@@ -0,0 +1,62 @@
+"""
+Formula Dedup - Emit each distinct formula once per PDF export, through a url_fetcher
+
+Matplotlib embeds, in every formula SVG, a <defs> block with the outline of each glyph
+it uses (ids such as "DejaVuSans-31", derived from font and glyph index, hence stable).
+A corrigé with 200 fractions therefore carries the same digits 200 times.
+
+WeasyPrint resolves <use href="#id"> only inside the <svg> that contains it, so the glyph
+<defs> cannot be moved into a document-level sprite. For the PDF export, identical
+formulas are instead emitted once as "formula:" images resolved by a url_fetcher;
+WeasyPrint loads each URL only once per document.
+"""
+
+import hashlib
+import re
+from typing import Callable, Dict, Tuple
+
+FORMULA_URL_SCHEME = 'formula:'
+
+# Formula SVGs inserted by LaTeXToSVGRenderer.convert_text_with_latex
+_FORMULA_SVG_RE = re.compile(
+    r'(?P<open><span class="math-inline"[^>]*>|<div class="math-display"[^>]*>)\s*'
+    r'(?P<svg><svg\b.*?</svg>)',
+    re.DOTALL
+)
+
+
+def _formula_url(svg: str) -> str:
+    return FORMULA_URL_SCHEME + hashlib.sha1(svg.encode('utf-8')).hexdigest() + '.svg'
+
+
+def externalize_formulas(html_content: str,
+                         url_for: Callable[[str], str] = _formula_url) -> Tuple[str, Dict[str, bytes]]:
+    """
+    Replace inline formula SVGs by "formula:<hash>" images.
+    Returns the rewritten HTML and the URL -> SVG bytes mapping.
+    `url_for` maps a formula SVG to its URL (figure_store serves them over HTTP).
+    """
+    resources: Dict[str, bytes] = {}
+
+    def replace(match):
+        svg = match.group('svg')
+        url = url_for(svg)
+        resources.setdefault(url, svg.encode('utf-8'))
+        return match.group('open') + f'<img class="math-svg" src="{url}" alt="">'
+
+    return _FORMULA_SVG_RE.sub(replace, html_content), resources
+
+
+def make_formula_url_fetcher(resources: Dict[str, bytes], fallback: Callable) -> Callable:
+    """WeasyPrint url_fetcher serving externalized formulas, delegating other URLs"""
+    def fetcher(url, *args, **kwargs):
+        if url.startswith(FORMULA_URL_SCHEME):
+            return {'string': resources[url], 'mime_type': 'image/svg+xml'}
+        return fallback(url, *args, **kwargs)
+    return fetcher
+
+
+def prepare_pdf_html(html_content: str, fallback_fetcher: Callable) -> Tuple[str, Callable]:
+    """PDF export: HTML with each distinct formula as one "formula:" image, and the url_fetcher serving them"""
+    html_out, resources = externalize_formulas(html_content)
+    return html_out, make_formula_url_fetcher(resources, fallback_fetcher)
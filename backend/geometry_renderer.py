@@ -3,22 +3,27 @@ Geometry Renderer - Generate geometric figures as SVG from structured data
 Version améliorée avec rendu SVG de qualité MathALÉA
 """
 
+from __future__ import annotations
+
 import json
 import re
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-from matplotlib.patches import FancyBboxPatch
-import numpy as np
-from io import StringIO, BytesIO
 import base64
 import logging
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Dict, Any, List, Tuple, Optional, TYPE_CHECKING
+
+from lazy_imports import get_patches, get_numpy
+from figure_canvas import new_figure, figure_to_svg, figure_to_png
+
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+    from matplotlib.figure import Figure
 
 # Import du nouveau système SVG
 from geometry_svg_renderer import geometry_svg_renderer
-# Nouveaux imports pour l'architecture mathématique structurée
-from math_generation_service import MathGenerationService
-from math_text_service import MathTextService
+from figure_cache import memoize_figure
+from figure_registry import (
+    figure_registry, figure_type_of, svg_data_uri, png_data_uri, FORMAT_SVG, FORMAT_DATA_URI, FORMAT_PNG
+)
 
 logger = logging.getLogger(__name__)
 
@@ -27,14 +32,7 @@ class GeometryRenderer:
     """Converts structured geometric data to SVG figures"""
     
     def __init__(self):
-        # Configure matplotlib for high-quality geometric rendering
-        plt.rcParams.update({
-            'font.size': 12,
-            'font.family': 'serif',
-            'mathtext.fontset': 'cm',
-            'axes.linewidth': 1.2,
-            'lines.linewidth': 1.5
-        })
+        # matplotlib is loaded (and configured) on first render, see lazy_imports
         
         # Standard colors and styles
         self.colors = {
@@ -45,13 +43,14 @@ class GeometryRenderer:
             'highlight': '#0066CC'
         }
         
-        self.figure_renderers = {
-            'triangle_rectangle': self._render_right_triangle,
-            'triangle': self._render_triangle,
-            'carre': self._render_square,
-            'rectangle': self._render_rectangle,
-            'cercle': self._render_circle,
-            'parallelogramme': self._render_parallelogram
+        # matplotlib figures (fallback of the native SVG renderers), see figure_registry
+        self.matplotlib_figures = {
+            'triangle_rectangle': self._draw_right_triangle,
+            'triangle': self._draw_triangle,
+            'carre': self._draw_square,
+            'rectangle': self._draw_rectangle,
+            'cercle': self._draw_circle,
+            'parallelogramme': self._draw_parallelogram
         }
     
     def _get_smart_default_points(self, needed_count: int, figure_type: str = "") -> List[str]:
@@ -83,9 +82,9 @@ class GeometryRenderer:
         # Fallback si besoin de plus de points
         return [chr(65 + i) for i in range(needed_count)]  # A, B, C, D, E, ...
     
-    def _create_figure(self, width: float = 8, height: float = 6) -> Tuple[plt.Figure, plt.Axes]:
+    def _create_figure(self, width: float = 8, height: float = 6) -> Tuple[Figure, Axes]:
         """Create a clean matplotlib figure for geometric rendering"""
-        fig, ax = plt.subplots(figsize=(width, height))
+        fig, ax = new_figure(width, height)
         ax.set_aspect('equal')
         ax.axis('off')
         ax.grid(False)
@@ -96,7 +95,7 @@ class GeometryRenderer:
         
         return fig, ax
     
-    def _add_point(self, ax: plt.Axes, x: float, y: float, label: str, 
+    def _add_point(self, ax: Axes, x: float, y: float, label: str, 
                    offset: Tuple[float, float] = (0.2, 0.2)):
         """Add a labeled point to the figure"""
         # Draw point
@@ -108,10 +107,11 @@ class GeometryRenderer:
                 color=self.colors['text'], zorder=11,
                 ha='center', va='center')
     
-    def _add_right_angle_marker(self, ax: plt.Axes, vertex: Tuple[float, float], 
+    def _add_right_angle_marker(self, ax: Axes, vertex: Tuple[float, float], 
                                p1: Tuple[float, float], p2: Tuple[float, float], 
                                size: float = 0.3):
         """Add a right angle marker at vertex between p1 and p2"""
+        patches, np = get_patches(), get_numpy()
         vx, vy = vertex
         
         # Calculate unit vectors
@@ -126,15 +126,16 @@ class GeometryRenderer:
         square_p2 = square_corner + v2
         square_p3 = square_corner + v1 + v2
         
-        square = plt.Polygon([square_corner, square_p1, square_p3, square_p2], 
-                           fill=False, edgecolor=self.colors['line'], 
-                           linewidth=1, zorder=5)
+        square = patches.Polygon([square_corner, square_p1, square_p3, square_p2], 
+                               fill=False, edgecolor=self.colors['line'], 
+                               linewidth=1, zorder=5)
         ax.add_patch(square)
     
-    def _add_distance_mark(self, ax: plt.Axes, p1: Tuple[float, float], 
+    def _add_distance_mark(self, ax: Axes, p1: Tuple[float, float], 
                           p2: Tuple[float, float], label: str, 
                           offset: float = 0.2, side: str = 'auto'):
         """Add distance marking between two points"""
+        np = get_numpy()
         x1, y1 = p1
         x2, y2 = p2
         
@@ -168,7 +169,7 @@ class GeometryRenderer:
                    bbox=dict(boxstyle="round,pad=0.2", facecolor='white', 
                             edgecolor='none', alpha=0.8))
     
-    def _render_right_triangle_to_figure(self, fig: plt.Figure, ax: plt.Axes, data: Dict[str, Any]):
+    def _render_right_triangle_to_figure(self, fig: Figure, ax: Axes, data: Dict[str, Any]):
         """Render a right triangle with labeled vertices to existing figure"""
         
         # Default coordinates for right triangle
@@ -214,14 +215,14 @@ class GeometryRenderer:
                     if p1 in coords and p2 in coords:
                         self._add_distance_mark(ax, coords[p1], coords[p2], label)
     
-    def _render_right_triangle(self, data: Dict[str, Any]) -> str:
-        """Render a right triangle with labeled vertices"""
+    def _draw_right_triangle(self, data: Dict[str, Any]) -> Figure:
+        """Draw a right triangle with labeled vertices"""
         fig, ax = self._create_figure(6, 5)
         self._render_right_triangle_to_figure(fig, ax, data)
-        return self._figure_to_svg(fig)
+        return fig
     
-    def _render_triangle(self, data: Dict[str, Any]) -> str:
-        """Render a general triangle"""
+    def _draw_triangle(self, data: Dict[str, Any]) -> Figure:
+        """Draw a general triangle"""
         fig, ax = self._create_figure(6, 5)
         
         points = data.get('points', self._get_smart_default_points(3, 'triangle'))
@@ -242,10 +243,10 @@ class GeometryRenderer:
         for point, coord in coords.items():
             self._add_point(ax, coord[0], coord[1], point)
         
-        return self._figure_to_svg(fig)
+        return fig
     
-    def _render_square(self, data: Dict[str, Any]) -> str:
-        """Render a square"""
+    def _draw_square(self, data: Dict[str, Any]) -> Figure:
+        """Draw a square"""
         fig, ax = self._create_figure(5, 5)
         
         points = data.get('points', self._get_smart_default_points(4, 'rectangle'))
@@ -267,10 +268,10 @@ class GeometryRenderer:
         for point, coord in coords.items():
             self._add_point(ax, coord[0], coord[1], point)
         
-        return self._figure_to_svg(fig)
+        return fig
     
-    def _render_rectangle(self, data: Dict[str, Any]) -> str:
-        """Render a rectangle"""
+    def _draw_rectangle(self, data: Dict[str, Any]) -> Figure:
+        """Draw a rectangle"""
         fig, ax = self._create_figure(6, 4)
         
         points = data.get('points', self._get_smart_default_points(4, 'rectangle'))
@@ -292,10 +293,11 @@ class GeometryRenderer:
         for point, coord in coords.items():
             self._add_point(ax, coord[0], coord[1], point)
         
-        return self._figure_to_svg(fig)
+        return fig
     
-    def _render_circle(self, data: Dict[str, Any]) -> str:
-        """Render a circle with center and radius"""
+    def _draw_circle(self, data: Dict[str, Any]) -> Figure:
+        """Draw a circle with center and radius"""
+        patches = get_patches()
         fig, ax = self._create_figure(5, 5)
         
         center_label = data.get('centre', 'O')
@@ -305,8 +307,8 @@ class GeometryRenderer:
         center_coord = (2.5, 2.5)
         
         # Draw circle
-        circle = plt.Circle(center_coord, rayon, fill=False, 
-                          color=self.colors['line'], linewidth=2)
+        circle = patches.Circle(center_coord, rayon, fill=False, 
+                              color=self.colors['line'], linewidth=2)
         ax.add_patch(circle)
         
         # Add center point
@@ -329,10 +331,10 @@ class GeometryRenderer:
                    bbox=dict(boxstyle="round,pad=0.2", facecolor='white', 
                             edgecolor='none', alpha=0.8))
         
-        return self._figure_to_svg(fig)
+        return fig
     
-    def _render_parallelogram(self, data: Dict[str, Any]) -> str:
-        """Render a parallelogram"""
+    def _draw_parallelogram(self, data: Dict[str, Any]) -> Figure:
+        """Draw a parallelogram"""
         fig, ax = self._create_figure(6, 4)
         
         points = data.get('points', self._get_smart_default_points(4, 'rectangle'))
@@ -354,238 +356,57 @@ class GeometryRenderer:
         for point, coord in coords.items():
             self._add_point(ax, coord[0], coord[1], point)
         
-        return self._figure_to_svg(fig)
+        return fig
     
-    def _figure_to_svg(self, fig: plt.Figure) -> str:
+    def _figure_to_svg(self, fig: Figure) -> str:
         """Convert matplotlib figure to SVG string"""
-        svg_buffer = StringIO()
-        fig.savefig(svg_buffer, format='svg', bbox_inches='tight', 
-                   pad_inches=0.1, transparent=True, dpi=150)
-        plt.close(fig)
-        
-        svg_content = svg_buffer.getvalue()
-        
-        # Clean up SVG content
-        svg_content = re.sub(r'<\?xml[^>]*\?>', '', svg_content)
-        svg_content = re.sub(r'<!DOCTYPE[^>]*>', '', svg_content)
-        
-        return svg_content.strip()
+        return figure_to_svg(fig, bbox_inches='tight', pad_inches=0.1, transparent=True, dpi=150)
     
-    def _figure_to_base64(self, fig: plt.Figure) -> str:
+    def _figure_to_base64(self, fig: Figure) -> str:
         """Convert matplotlib figure to Base64 encoded PNG for web display"""
         try:
-            # Save figure to BytesIO buffer as PNG
-            buf = BytesIO()
-            fig.savefig(buf, format='png', bbox_inches='tight', 
-                       pad_inches=0.1, transparent=True, dpi=150,
-                       facecolor='white', edgecolor='none')
-            plt.close(fig)
+            png_data = figure_to_png(fig, bbox_inches='tight', 
+                                     pad_inches=0.1, transparent=True, dpi=150,
+                                     facecolor='white', edgecolor='none')
             
-            # Get PNG data and encode to Base64
-            buf.seek(0)
-            png_data = buf.getvalue()
+            # Encode PNG data to Base64
             base64_string = base64.b64encode(png_data).decode('utf-8')
             
             return base64_string
             
         except Exception as e:
             logger.error(f"Error converting figure to Base64: {e}")
-            plt.close(fig)
-            return ""
-    
-    def _svg_to_base64(self, svg_content: str) -> str:
-        """Convert SVG to Base64 encoded PNG for web display using new high-quality renderer"""
-        try:
-            # Pour l'affichage web, on peut soit :
-            # 1. Retourner le SVG directement (recommandé)
-            # 2. Convertir en PNG via cairosvg si nécessaire
-            
-            # Option 1: SVG direct (meilleure qualité)
-            svg_base64 = base64.b64encode(svg_content.encode('utf-8')).decode('utf-8')
-            return f"data:image/svg+xml;base64,{svg_base64}"
-            
-        except Exception as e:
-            logger.error(f"Error converting SVG to Base64: {e}")
             return ""
     
+    @memoize_figure("geometry_svg")
     def render_geometric_figure(self, schema_data: Dict[str, Any]) -> str:
         """Render a geometric figure from structured data as SVG (for PDF) - Version améliorée"""
-        figure_type = schema_data.get('figure', 'triangle')
+        figure_type = figure_type_of(schema_data, default='triangle')
         
-        # Nouveau système SVG pour une meilleure qualité (avec cache)
+        if not figure_registry.supports('geometry', figure_type, FORMAT_SVG):
+            logger.warning(f"Unknown figure type: {figure_type}")
+            return f'<span style="color: orange; font-style: italic;">[Figure non supportée: {figure_type}]</span>'
+        
+        # Nouveau système SVG, repli matplotlib (voir register_geometry_figures)
         try:
-            # Cache simple pour éviter les re-calculs identiques
-            cache_key = f"{figure_type}_{hash(str(sorted(schema_data.items())))}"
-            
-            if figure_type == 'rectangle':
-                return geometry_svg_renderer.render_rectangle(schema_data)
-            elif figure_type == 'triangle_rectangle':
-                return geometry_svg_renderer.render_triangle_rectangle(schema_data)
-            elif figure_type == 'triangle':
-                return geometry_svg_renderer.render_triangle(schema_data)
-            elif figure_type == 'cercle':
-                return geometry_svg_renderer.render_cercle(schema_data)
-            elif figure_type == 'mediatrice' or figure_type == 'construction_mediatrice':
-                return geometry_svg_renderer.render_mediatrice_construction(schema_data)
-            elif figure_type in self.figure_renderers:
-                # Fallback vers l'ancien système pour les autres types
-                return self.figure_renderers[figure_type](schema_data)
-            else:
-                logger.warning(f"Unknown figure type: {figure_type}")
-                return f'<span style="color: orange; font-style: italic;">[Figure non supportée: {figure_type}]</span>'
+            return figure_registry.render('geometry', figure_type, FORMAT_SVG, schema_data)
         except Exception as e:
             logger.error(f"Error rendering {figure_type}: {e}")
             return f'<span style="color: red; font-style: italic;">[Erreur rendu figure: {figure_type}]</span>'
     
+    @memoize_figure("geometry_base64")
     def render_geometry_to_base64(self, schema_data: Dict[str, Any]) -> str:
-        """Render a geometric figure from structured data as Base64 PNG (for web display) - Version améliorée"""
-        figure_type = schema_data.get('figure', 'triangle')
+        """Render a geometric figure from structured data as a data URI (for web display) - Version améliorée"""
+        figure_type = figure_type_of(schema_data, default='triangle')
+        
+        if not figure_registry.supports('geometry', figure_type, FORMAT_DATA_URI):
+            logger.warning(f"Unknown figure type for Base64: {figure_type}")
+            return ""
         
-        # Nouveau système SVG pour une meilleure qualité (converti en Base64)
         try:
-            if figure_type == 'rectangle':
-                svg_content = geometry_svg_renderer.render_rectangle(schema_data)
-                return self._svg_to_base64(svg_content)
-            elif figure_type == 'triangle_rectangle':
-                svg_content = geometry_svg_renderer.render_triangle_rectangle(schema_data)
-                return self._svg_to_base64(svg_content)
-            elif figure_type == 'triangle':
-                svg_content = geometry_svg_renderer.render_triangle(schema_data)
-                return self._svg_to_base64(svg_content)
-            elif figure_type == 'cercle':
-                svg_content = geometry_svg_renderer.render_cercle(schema_data)
-                return self._svg_to_base64(svg_content)
-            elif figure_type == 'mediatrice' or figure_type == 'construction_mediatrice':
-                svg_content = geometry_svg_renderer.render_mediatrice_construction(schema_data)
-                return self._svg_to_base64(svg_content)
+            return figure_registry.render('geometry', figure_type, FORMAT_DATA_URI, schema_data) or ""
         except Exception as e:
-            logger.error(f"Error with new SVG renderer for {figure_type}: {e}")
-            # Fallback vers l'ancien système
-            pass
-        
-        # Fallback vers l'ancien système matplotlib pour les autres types
-        if figure_type in self.figure_renderers:
-            try:
-                # Create figure and render based on type
-                if figure_type == 'triangle_rectangle':
-                    fig, ax = self._create_figure(6, 5)
-                    self._render_right_triangle_to_figure(fig, ax, schema_data)
-                    return self._figure_to_base64(fig)
-                
-                elif figure_type == 'triangle':
-                    fig, ax = self._create_figure(6, 5)
-                    points = schema_data.get('points', ['A', 'B', 'C'])
-                    # Default equilateral triangle coordinates
-                    coords = {
-                        points[0]: (1.5, 1),
-                        points[1]: (4.5, 1), 
-                        points[2]: (3, 3.5)
-                    }
-                    # Draw triangle
-                    triangle_coords = [coords[p] for p in points] + [coords[points[0]]]
-                    xs, ys = zip(*triangle_coords)
-                    ax.plot(xs, ys, color=self.colors['line'], linewidth=2, zorder=1)
-                    # Add points and labels
-                    for point, coord in coords.items():
-                        self._add_point(ax, coord[0], coord[1], point)
-                    return self._figure_to_base64(fig)
-                
-                elif figure_type == 'carre':
-                    fig, ax = self._create_figure(5, 5)
-                    points = schema_data.get('points', ['A', 'B', 'C', 'D'])
-                    # Square coordinates
-                    coords = {
-                        points[0]: (1, 1),
-                        points[1]: (3.5, 1),
-                        points[2]: (3.5, 3.5),
-                        points[3]: (1, 3.5)
-                    }
-                    # Draw square
-                    square_coords = [coords[p] for p in points] + [coords[points[0]]]
-                    xs, ys = zip(*square_coords)
-                    ax.plot(xs, ys, color=self.colors['line'], linewidth=2, zorder=1)
-                    # Add points and labels
-                    for point, coord in coords.items():
-                        self._add_point(ax, coord[0], coord[1], point)
-                    return self._figure_to_base64(fig)
-                
-                elif figure_type == 'rectangle':
-                    fig, ax = self._create_figure(6, 4)
-                    points = schema_data.get('points', ['A', 'B', 'C', 'D'])
-                    # Rectangle coordinates
-                    coords = {
-                        points[0]: (1, 1),
-                        points[1]: (4.5, 1),
-                        points[2]: (4.5, 2.5),
-                        points[3]: (1, 2.5)
-                    }
-                    # Draw rectangle
-                    rect_coords = [coords[p] for p in points] + [coords[points[0]]]
-                    xs, ys = zip(*rect_coords)
-                    ax.plot(xs, ys, color=self.colors['line'], linewidth=2, zorder=1)
-                    # Add points and labels
-                    for point, coord in coords.items():
-                        self._add_point(ax, coord[0], coord[1], point)
-                    return self._figure_to_base64(fig)
-                
-                elif figure_type == 'cercle':
-                    fig, ax = self._create_figure(5, 5)
-                    center_label = schema_data.get('centre', 'O')
-                    rayon = schema_data.get('rayon', 1.5)
-                    # Circle center
-                    center_coord = (2.5, 2.5)
-                    # Draw circle
-                    circle = plt.Circle(center_coord, rayon, fill=False, 
-                                      color=self.colors['line'], linewidth=2)
-                    ax.add_patch(circle)
-                    # Add center point
-                    self._add_point(ax, center_coord[0], center_coord[1], center_label)
-                    # Add radius line if specified
-                    if schema_data.get('montrer_rayon', True):
-                        radius_end = (center_coord[0] + rayon, center_coord[1])
-                        ax.plot([center_coord[0], radius_end[0]], 
-                               [center_coord[1], radius_end[1]], 
-                               color=self.colors['construction'], 
-                               linewidth=1.5, linestyle='--')
-                        # Add radius label
-                        mid_radius = ((center_coord[0] + radius_end[0])/2, 
-                                     (center_coord[1] + radius_end[1])/2)
-                        radius_label = schema_data.get('label_rayon', 'r')
-                        ax.text(mid_radius[0], mid_radius[1] + 0.2, radius_label, 
-                               fontsize=10, ha='center', va='center',
-                               bbox=dict(boxstyle="round,pad=0.2", facecolor='white', 
-                                        edgecolor='none', alpha=0.8))
-                    return self._figure_to_base64(fig)
-                
-                elif figure_type == 'parallelogramme':
-                    fig, ax = self._create_figure(6, 4)
-                    points = schema_data.get('points', ['A', 'B', 'C', 'D'])
-                    # Parallelogram coordinates
-                    coords = {
-                        points[0]: (1, 1),
-                        points[1]: (4, 1),
-                        points[2]: (4.5, 2.5),
-                        points[3]: (1.5, 2.5)
-                    }
-                    # Draw parallelogram
-                    para_coords = [coords[p] for p in points] + [coords[points[0]]]
-                    xs, ys = zip(*para_coords)
-                    ax.plot(xs, ys, color=self.colors['line'], linewidth=2, zorder=1)
-                    # Add points and labels
-                    for point, coord in coords.items():
-                        self._add_point(ax, coord[0], coord[1], point)
-                    return self._figure_to_base64(fig)
-                
-                else:
-                    # Fallback for any unsupported types
-                    logger.warning(f"Figure type {figure_type} not yet implemented for Base64 rendering")
-                    return ""
-                
-            except Exception as e:
-                logger.error(f"Error rendering {figure_type} to Base64: {e}")
-                return ""
-        else:
-            logger.warning(f"Unknown figure type for Base64: {figure_type}")
+            logger.error(f"Error rendering {figure_type} to Base64: {e}")
             return ""
     
     def extract_geometry_schema_from_text(self, text: str) -> Optional[Dict[str, Any]]:
@@ -628,10 +449,10 @@ class GeometryRenderer:
                 schema_data = json.loads(schema_json)
                 
                 if schema_data.get('type') == 'schema_geometrique':
-                    base64_image = self.render_geometry_to_base64(schema_data)
+                    image_uri = self.render_geometry_to_base64(schema_data)
                     
-                    if base64_image:
-                        return f'<div class="geometric-figure" style="text-align: center; margin: 15px 0;"><img src="data:image/png;base64,{base64_image}" alt="Schéma géométrique" style="max-width: 400px; height: auto;"/></div>'
+                    if image_uri:
+                        return f'<div class="geometric-figure" style="text-align: center; margin: 15px 0;"><img src="{image_uri}" alt="Schéma géométrique" style="max-width: 400px; height: auto;"/></div>'
                     else:
                         # Fallback to text description if Base64 generation fails
                         figure_name = schema_data.get('figure', 'figure')
@@ -680,5 +501,30 @@ class GeometryRenderer:
         return result
 
 
+def register_geometry_figures(renderer: GeometryRenderer) -> None:
+    """Profil 'geometry' : SVG natif (geometry_svg_renderer) puis repli matplotlib"""
+    native = {
+        'rectangle': geometry_svg_renderer.render_rectangle,
+        'triangle_rectangle': geometry_svg_renderer.render_triangle_rectangle,
+        'triangle': geometry_svg_renderer.render_triangle,
+        'cercle': geometry_svg_renderer.render_cercle,
+        'mediatrice_construction': geometry_svg_renderer.render_mediatrice_construction,
+    }
+    for figure_type, render in native.items():
+        figure_registry.register('geometry', figure_type, FORMAT_SVG, render)
+        figure_registry.register('geometry', figure_type, FORMAT_DATA_URI,
+                                 lambda data, render=render: svg_data_uri(render(data)), name=render.__name__)
+    
+    for figure_type, draw in renderer.matplotlib_figures.items():
+        figure_registry.register('geometry', figure_type, FORMAT_SVG,
+                                 lambda data, draw=draw: renderer._figure_to_svg(draw(data)), name=draw.__name__)
+        figure_registry.register('geometry', figure_type, FORMAT_PNG,
+                                 lambda data, draw=draw: renderer._figure_to_base64(draw(data)), name=draw.__name__)
+        figure_registry.register('geometry', figure_type, FORMAT_DATA_URI,
+                                 lambda data, draw=draw: png_data_uri(renderer._figure_to_base64(draw(data))),
+                                 name=draw.__name__)
+
+
 # Global instance
-geometry_renderer = GeometryRenderer()
\ No newline at end of file
+geometry_renderer = GeometryRenderer()
+register_geometry_figures(geometry_renderer)
\ No newline at end of file
@@ -4,11 +4,12 @@ Inspiré de la qualité MathALÉA avec rendu SVG vectoriel pur
 """
 
 import math
-import xml.etree.ElementTree as ET
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, List, Tuple, Optional, Any, Union
 from dataclasses import dataclass
 import logging
 
+from svg_builder import SVG_BACKENDS, SVGStringDocument, SVGElementTreeDocument
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -70,12 +71,25 @@ class Line:
         
         return Line(start_perp, end_perp, color="#FF6600", width=2.0)
 
+SVGDocument = Union[SVGStringDocument, SVGElementTreeDocument]
+
+# Style CSS intégré, identique pour toutes les figures
+GEOMETRY_STYLE = """
+        .geometry-line { fill: none; stroke-width: 1.5px; }
+        .geometry-construction { fill: none; stroke-width: 2px; stroke: #FF6600; }
+        .geometry-point { fill: #000000; }
+        .geometry-text { font-family: Arial, sans-serif; font-size: 14px; fill: #000000; font-weight: bold; }
+        .right-angle-mark { fill: none; stroke: #000000; stroke-width: 1px; }
+        """
+
 class GeometrySVGRenderer:
     """Rendu géométrique SVG de qualité MathALÉA"""
     
-    def __init__(self, width: int = 400, height: int = 300):
+    def __init__(self, width: int = 400, height: int = 300, backend: str = 'string'):
         self.width = width
         self.height = height
+        # 'string' : écriture directe du SVG (rapide) ; 'etree' : ancien backend ElementTree
+        self.document_class = SVG_BACKENDS[backend]
         self.margin = 40
         self.style_config = {
             'line_color': '#000000',
@@ -89,49 +103,33 @@ class GeometrySVGRenderer:
             'text_font': 'Arial, sans-serif'
         }
         
-    def create_svg_root(self) -> ET.Element:
-        """Crée l'élément SVG racine"""
-        svg = ET.Element('svg', {
-            'width': str(self.width),
-            'height': str(self.height),
-            'viewBox': f'0 0 {self.width} {self.height}',
-            'xmlns': 'http://www.w3.org/2000/svg'
-        })
-        
-        # Style CSS intégré
-        style = ET.SubElement(svg, 'style')
-        style.text = """
-        .geometry-line { fill: none; stroke-width: 1.5px; }
-        .geometry-construction { fill: none; stroke-width: 2px; stroke: #FF6600; }
-        .geometry-point { fill: #000000; }
-        .geometry-text { font-family: Arial, sans-serif; font-size: 14px; fill: #000000; font-weight: bold; }
-        .right-angle-mark { fill: none; stroke: #000000; stroke-width: 1px; }
-        """
-        
-        return svg
+    def create_svg_root(self) -> SVGDocument:
+        """Crée le document SVG (racine et style partagé)"""
+        return self.document_class(self.width, self.height, GEOMETRY_STYLE)
     
-    def add_line(self, svg: ET.Element, line: Line) -> None:
+    def add_line(self, svg: SVGDocument, line: Line) -> None:
         """Ajoute une ligne au SVG"""
-        line_elem = ET.SubElement(svg, 'line', {
-            'x1': str(line.start.x),
-            'y1': str(line.start.y),
-            'x2': str(line.end.x),
-            'y2': str(line.end.y),
+        attrs = {
+            'x1': line.start.x,
+            'y1': line.start.y,
+            'x2': line.end.x,
+            'y2': line.end.y,
             'stroke': line.color,
-            'stroke-width': str(line.width),
+            'stroke-width': line.width,
             'class': 'geometry-construction' if line.color == '#FF6600' else 'geometry-line'
-        })
+        }
         
         if line.style == "dashed":
-            line_elem.set('stroke-dasharray', '5,5')
+            attrs['stroke-dasharray'] = '5,5'
+        svg.element('line', attrs)
     
-    def add_point(self, svg: ET.Element, point: Point, show_label: bool = True) -> None:
+    def add_point(self, svg: SVGDocument, point: Point, show_label: bool = True) -> None:
         """Ajoute un point avec son label au SVG"""
         # Point circulaire
-        ET.SubElement(svg, 'circle', {
-            'cx': str(point.x),
-            'cy': str(point.y),
-            'r': str(self.style_config['point_radius']),
+        svg.element('circle', {
+            'cx': point.x,
+            'cy': point.y,
+            'r': self.style_config['point_radius'],
             'class': 'geometry-point'
         })
         
@@ -141,13 +139,13 @@ class GeometrySVGRenderer:
             label_x = point.x - 8
             label_y = point.y + 18
             
-            ET.SubElement(svg, 'text', {
-                'x': str(label_x),
-                'y': str(label_y),
+            svg.element('text', {
+                'x': label_x,
+                'y': label_y,
                 'class': 'geometry-text'
-            }).text = point.label
+            }, point.label)
     
-    def add_right_angle_mark(self, svg: ET.Element, vertex: Point, p1: Point, p2: Point, size: float = 12) -> None:
+    def add_right_angle_mark(self, svg: SVGDocument, vertex: Point, p1: Point, p2: Point, size: float = 12) -> None:
         """Ajoute un marqueur d'angle droit"""
         # Vecteurs depuis le vertex
         v1x, v1y = p1.x - vertex.x, p1.y - vertex.y
@@ -167,13 +165,17 @@ class GeometrySVGRenderer:
             corner3 = Point(vertex.x + v2x, vertex.y + v2y)
             
             # Dessiner le carré
-            path_data = f"M {vertex.x} {vertex.y} L {corner1.x} {corner1.y} L {corner2.x} {corner2.y} L {corner3.x} {corner3.y} Z"
-            ET.SubElement(svg, 'path', {
+            n = svg.num
+            path_data = (
+                f"M {n(vertex.x)} {n(vertex.y)} L {n(corner1.x)} {n(corner1.y)} "
+                f"L {n(corner2.x)} {n(corner2.y)} L {n(corner3.x)} {n(corner3.y)} Z"
+            )
+            svg.element('path', {
                 'd': path_data,
                 'class': 'right-angle-mark'
             })
     
-    def add_dimension_label(self, svg: ET.Element, line: Line, label: str, offset: float = 15) -> None:
+    def add_dimension_label(self, svg: SVGDocument, line: Line, label: str, offset: float = 15) -> None:
         """Ajoute une cote dimensionnelle à une ligne"""
         midpoint = line.midpoint()
         
@@ -192,9 +194,9 @@ class GeometrySVGRenderer:
             label_y = midpoint.y + perp_y * offset
             
             # Rectangle de fond pour le label
-            ET.SubElement(svg, 'rect', {
-                'x': str(label_x - 15),
-                'y': str(label_y - 8),
+            svg.element('rect', {
+                'x': label_x - 15,
+                'y': label_y - 8,
                 'width': '30',
                 'height': '16',
                 'fill': 'white',
@@ -203,13 +205,13 @@ class GeometrySVGRenderer:
             })
             
             # Texte du label
-            ET.SubElement(svg, 'text', {
-                'x': str(label_x),
-                'y': str(label_y + 4),
+            svg.element('text', {
+                'x': label_x,
+                'y': label_y + 4,
                 'text-anchor': 'middle',
                 'class': 'geometry-text',
                 'style': 'font-size: 12px;'
-            }).text = label
+            }, label)
     
     def render_rectangle(self, data: Dict[str, Any]) -> str:
         """Rendu d'un rectangle de qualité MathALÉA - Optimisé pour mobile"""
@@ -264,70 +266,64 @@ class GeometrySVGRenderer:
         # Ajouter les points avec labels SOUS/AU-DESSUS des sommets
         # P (bas-gauche) - label en bas
         self.add_point(svg, P, show_label=False)  # Point sans label automatique
-        text_p = ET.SubElement(svg, 'text', {
-            'x': str(P.x),
-            'y': str(P.y + 18),
+        svg.element('text', {
+            'x': P.x,
+            'y': P.y + 18,
             'text-anchor': 'middle',
             'class': 'geometry-text'
-        })
-        text_p.text = P.label
+        }, P.label)
         
         # Q (haut-gauche) - label en haut
         self.add_point(svg, Q, show_label=False)
-        text_q = ET.SubElement(svg, 'text', {
-            'x': str(Q.x),
-            'y': str(Q.y - 8),
+        svg.element('text', {
+            'x': Q.x,
+            'y': Q.y - 8,
             'text-anchor': 'middle',
             'class': 'geometry-text'
-        })
-        text_q.text = Q.label
+        }, Q.label)
         
         # R (haut-droite) - label en haut
         self.add_point(svg, R, show_label=False)
-        text_r = ET.SubElement(svg, 'text', {
-            'x': str(R.x),
-            'y': str(R.y - 8),
+        svg.element('text', {
+            'x': R.x,
+            'y': R.y - 8,
             'text-anchor': 'middle',
             'class': 'geometry-text'
-        })
-        text_r.text = R.label
+        }, R.label)
         
         # S (bas-droite) - label en bas
         self.add_point(svg, S, show_label=False)
-        text_s = ET.SubElement(svg, 'text', {
-            'x': str(S.x),
-            'y': str(S.y + 18),
+        svg.element('text', {
+            'x': S.x,
+            'y': S.y + 18,
             'text-anchor': 'middle',
             'class': 'geometry-text'
-        })
-        text_s.text = S.label
+        }, S.label)
         
         # Ajouter les cotes (longueurs) au milieu des côtés
         # Longueur en haut (côté QR)
         mid_top = Q.midpoint_to(R)
-        text_longueur = ET.SubElement(svg, 'text', {
-            'x': str(mid_top.x),
-            'y': str(mid_top.y - 15),
+        svg.element('text', {
+            'x': mid_top.x,
+            'y': mid_top.y - 15,
             'text-anchor': 'middle',
             'font-size': '15',
             'font-weight': 'bold',
             'class': 'geometry-text'
-        })
-        text_longueur.text = f"{longueur_math} cm"
+        }, f"{longueur_math} cm")
         
         # Largeur à gauche (côté PQ)
         mid_left = P.midpoint_to(Q)
-        text_largeur = ET.SubElement(svg, 'text', {
-            'x': str(mid_left.x - 30),
-            'y': str(mid_left.y + 5),
+        svg.element('text', {
+            'x': mid_left.x - 30,
+            'y': mid_left.y + 5,
             'text-anchor': 'middle',
             'font-size': '15',
             'font-weight': 'bold',
             'class': 'geometry-text'
-        })
-        text_largeur.text = f"{largeur_math} cm"
+        }, f"{largeur_math} cm")
         
-        return ET.tostring(svg, encoding='unicode')
+        return svg.to_string()
     
     def render_triangle_rectangle(self, data: Dict[str, Any]) -> str:
         """Rendu d'un triangle rectangle de qualité MathALÉA"""
@@ -382,7 +378,7 @@ class GeometrySVGRenderer:
                         line = Line(point_map[p1_name], point_map[p2_name])
                         self.add_dimension_label(svg, line, f"{longueur} cm")
         
-        return ET.tostring(svg, encoding='unicode')
+        return svg.to_string()
     
     def render_mediatrice_construction(self, data: Dict[str, Any]) -> str:
         """Rendu d'une construction de médiatrice comme MathALÉA"""
@@ -420,7 +416,7 @@ class GeometrySVGRenderer:
         # Marquer l'angle droit de la médiatrice
         self.add_right_angle_mark(svg, midpoint_jk, mediatrice.start, J, 8)
         
-        return ET.tostring(svg, encoding='unicode')
+        return svg.to_string()
     
     def render_triangle(self, data: Dict[str, Any]) -> str:
         """Rendu d'un triangle général de qualité MathALÉA"""
@@ -482,7 +478,7 @@ class GeometrySVGRenderer:
                         line = Line(point_map[p1_name], point_map[p2_name])
                         self.add_dimension_label(svg, line, f"{longueur}")
         
-        return ET.tostring(svg, encoding='unicode')
+        return svg.to_string()
     
     def render_cercle(self, data: Dict[str, Any]) -> str:
         """Rendu d'un cercle de qualité MathALÉA - Optimisé pour mobile"""
@@ -501,10 +497,10 @@ class GeometrySVGRenderer:
         rayon_graphique = max_radius
         
         # Cercle avec rayon graphique agrandi
-        ET.SubElement(svg, 'circle', {
-            'cx': str(center_x),
-            'cy': str(center_y), 
-            'r': str(rayon_graphique),
+        svg.element('circle', {
+            'cx': center_x,
+            'cy': center_y,
+            'r': rayon_graphique,
             'fill': 'none',
             'stroke': self.style_config['line_color'],
             'stroke-width': '2',  # Ligne plus épaisse pour mobile
@@ -512,32 +508,31 @@ class GeometrySVGRenderer:
         })
         
         # Point central (plus gros pour mobile)
-        circle = ET.SubElement(svg, 'circle', {
-            'cx': str(O.x),
-            'cy': str(O.y),
+        svg.element('circle', {
+            'cx': O.x,
+            'cy': O.y,
             'r': '4',  # Point plus gros
             'class': 'geometry-point'
         })
         
         # Label du centre (au-dessus du point)
-        text = ET.SubElement(svg, 'text', {
-            'x': str(O.x),
-            'y': str(O.y - 10),
+        svg.element('text', {
+            'x': O.x,
+            'y': O.y - 10,
             'text-anchor': 'middle',
             'class': 'geometry-text'
-        })
-        text.text = O.label
+        }, O.label)
         
         # Rayon (ligne depuis le centre vers la droite)
         rayon_end = Point(center_x + rayon_graphique, center_y)
         rayon_line = Line(O, rayon_end)
         
         # Ligne du rayon en pointillés
-        line_elem = ET.SubElement(svg, 'line', {
-            'x1': str(O.x),
-            'y1': str(O.y),
-            'x2': str(rayon_end.x),
-            'y2': str(rayon_end.y),
+        svg.element('line', {
+            'x1': O.x,
+            'y1': O.y,
+            'x2': rayon_end.x,
+            'y2': rayon_end.y,
             'stroke': self.style_config['line_color'],
             'stroke-width': '1.5',
             'stroke-dasharray': '5,5',
@@ -549,17 +544,16 @@ class GeometrySVGRenderer:
         
         # Label du rayon SOUS le cercle (bien espacé)
         label_y = center_y + rayon_graphique + 30  # 30px sous le cercle
-        text_label = ET.SubElement(svg, 'text', {
-            'x': str(center_x),
-            'y': str(label_y),
+        svg.element('text', {
+            'x': center_x,
+            'y': label_y,
             'text-anchor': 'middle',
             'font-size': '16',  # Police plus grande
             'font-weight': 'bold',
             'class': 'geometry-text'
-        })
-        text_label.text = f"r = {rayon_mathematique} cm"
+        }, f"r = {rayon_mathematique} cm")
         
-        return ET.tostring(svg, encoding='unicode')
+        return svg.to_string()
     
     def render_thales(self, data: Dict[str, Any]) -> str:
         """Rendu d'une configuration de Thalès de qualité MathALÉA"""
@@ -659,7 +653,7 @@ class GeometrySVGRenderer:
                     line = Line(point_map[p1_name], point_map[p2_name])
                     self.add_dimension_label(svg, line, f"{longueur}")
         
-        return ET.tostring(svg, encoding='unicode')
+        return svg.to_string()
 
 # Instance globale
 geometry_svg_renderer = GeometrySVGRenderer()
\ No newline at end of file
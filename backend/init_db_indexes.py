@@ -10,6 +10,8 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
 from pathlib import Path
 
+from db_indexes import ensure_indexes
+
 # Load environment variables
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -24,43 +26,7 @@ async def init_database_indexes():
         
         print("🔧 Initializing database indexes for Le Maître Mot...")
         
-        # 1. Unique index on login_sessions.user_email (one session per user)
-        print("Creating unique index on login_sessions.user_email...")
-        await db.login_sessions.create_index(
-            "user_email", 
-            unique=True,
-            name="unique_user_session"
-        )
-        print("✅ Unique session per user index created")
-        
-        # 2. TTL index on login_sessions.expires_at (auto-cleanup expired sessions)
-        print("Creating TTL index on login_sessions.expires_at...")
-        await db.login_sessions.create_index(
-            "expires_at",
-            expireAfterSeconds=0,  # Expire at the specified date
-            name="session_expiry_ttl"
-        )
-        print("✅ Session expiry TTL index created")
-        
-        # 3. TTL index on magic_tokens.expires_at (auto-cleanup expired tokens)
-        print("Creating TTL index on magic_tokens.expires_at...")
-        await db.magic_tokens.create_index(
-            "expires_at",
-            expireAfterSeconds=0,  # Expire at the specified date
-            name="magic_token_ttl"
-        )
-        print("✅ Magic token TTL index created")
-        
-        # 4. Index on pro_users.email for fast lookups
-        print("Creating index on pro_users.email...")
-        await db.pro_users.create_index(
-            "email",
-            unique=True,
-            name="unique_pro_user_email"
-        )
-        print("✅ Pro user unique email index created")
-        
-        # 5. Cleanup any duplicate sessions (in case they exist)
+        # 1. Cleanup any duplicate sessions first (they would block the unique index)
         print("Cleaning up any duplicate sessions...")
         
         # Find duplicate sessions
@@ -89,12 +55,20 @@ async def init_database_indexes():
         else:
             print("No duplicate sessions found")
         
+        # 2. Every index declared in db_indexes (also ensured at server startup)
+        print("Creating indexes declared in db_indexes.REQUIRED_INDEXES...")
+        report = await ensure_indexes(db)
+        for name, error in report.items():
+            status = "✅" if error is None else f"❌ {error}"
+            print(f"  {name}: {status}")
+        
         print("\n🎉 Database initialization completed successfully!")
         print("Security measures in place:")
         print("  ✅ One session per user (unique constraint)")
         print("  ✅ Automatic session cleanup on expiry")
         print("  ✅ Automatic magic token cleanup")
         print("  ✅ Pro user email uniqueness")
+        print("  ✅ Indexes for every hot query (documents, exports, tokens, templates, payments)")
         
         # Close connection
         client.close()
@@ -0,0 +1,168 @@
+"""
+Keyword Classifier - Classement d'un texte par mots-clés, en un seul passage
+
+Plusieurs analyses (type de carte d'un énoncé de Géographie, détection des exercices de
+géométrie, type et icône d'un exercice selon le chapitre) parcouraient le texte une fois
+par mot-clé et par catégorie (`any(k in texte for k in liste)`), la première catégorie
+trouvée l'emportant. Ici, tous les mots-clés d'une analyse sont compilés une fois en une
+seule expression régulière (alternative factorisée par préfixes communs) ; un seul
+parcours du texte, fait par le moteur `re`, donne toutes les catégories reconnues avec le
+nombre d'occurrences de chaque mot-clé :
+
+- une occurrence compte si elle commence un mot (« aire » ne se trouve plus dans
+  « nécessaire », « ue » dans « que ») ; les formes dérivées restent reconnues
+  (« triangles », « démographique » pour « démographi ») ; les mots-clés de trois
+  lettres ou moins doivent être des mots entiers (« vie » n'est pas « vient »)
+- les mots-clés contenus dans un mot-clé plus long reconnu comptent aussi (« afrique »
+  et « sud » dans « afrique du sud ») : les débuts sont calculés à la compilation, la
+  recherche reprend au premier début de mot intérieur
+- le score d'une catégorie est la somme des poids de ses occurrences ; la catégorie de
+  meilleur score l'emporte, l'ordre de déclaration ne départage que les égalités
+
+benchmarks/bench_keyword_classifier.py compare ce parcours aux anciennes recherches.
+"""
+
+import re
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+# Longueur maximale d'un mot-clé qui doit être un mot entier
+WHOLE_WORD_MAX_LENGTH = 3
+
+Keywords = Union[Iterable[str], Mapping[str, float]]
+
+# Caractère de mot : lettre ou chiffre (le « _ » de \w n'en est pas un)
+_WORD_CHAR = r'[^\W_]'
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum()
+
+
+def _is_whole_word_keyword(keyword: str) -> bool:
+    return len(keyword) <= WHOLE_WORD_MAX_LENGTH
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """
+    Alternative des mots-clés factorisée par préfixes communs (« afrique|afrique du sud|
+    asie » -> « a(?:frique(?: du sud|)|sie) ») : à chaque position, `re` ne teste qu'une
+    branche par caractère au lieu de chaque mot-clé. Le plus long mot-clé présent est
+    retenu ; un mot-clé court n'est retenu que s'il termine un mot.
+    """
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = keyword
+
+    def pattern(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + pattern(child) for char, child in sorted(node.items()) if char]
+        if '' in node:
+            # Fin de mot-clé en dernier : les mots-clés plus longs sont essayés d'abord
+            branches.append(f'(?!{_WORD_CHAR})' if _is_whole_word_keyword(node['']) else '')
+        if len(branches) == 1 and '' not in node:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')'
+
+    return pattern(trie)
+
+
+class KeywordClassifier:
+    """Catégories de mots-clés (éventuellement pondérés) compilées en une expression régulière"""
+
+    def __init__(self, categories: Mapping[str, Keywords],
+                 category_weights: Optional[Mapping[str, float]] = None):
+        self.categories = list(categories)
+        category_weights = category_weights or {}
+
+        # Mot-clé -> [(catégorie, poids)] (un mot-clé peut servir à plusieurs catégories)
+        self._targets: Dict[str, List[Tuple[str, float]]] = {}
+        for category, keywords in categories.items():
+            if not isinstance(keywords, Mapping):
+                keywords = dict.fromkeys(keywords, 1.0)
+            for keyword, weight in keywords.items():
+                keyword = keyword.lower()
+                if not keyword:
+                    continue
+                self._targets.setdefault(keyword, []).append(
+                    (category, weight * category_weights.get(category, 1.0))
+                )
+        self._build()
+
+    def _build(self) -> None:
+        keywords = sorted(self._targets, key=lambda keyword: (-len(keyword), keyword))
+        self._pattern = re.compile(f'(?<!{_WORD_CHAR})' + _trie_pattern(keywords)) if keywords else None
+
+        # Mot-clé reconnu -> mots-clés plus courts qui en sont le début, et position où
+        # reprendre la recherche : le premier début de mot qu'il contient (« du sud »
+        # dans « afrique du sud »)
+        self._prefixes: Dict[str, List[str]] = {}
+        self._resume: Dict[str, int] = {}
+        for outer in keywords:
+            prefixes = []
+            for keyword in keywords:
+                if len(keyword) >= len(outer) or not outer.startswith(keyword):
+                    continue
+                if _is_whole_word_keyword(keyword) and _is_word_char(outer[len(keyword)]):
+                    continue
+                prefixes.append(keyword)
+            self._prefixes[outer] = prefixes
+            self._resume[outer] = next(
+                (offset for offset in range(1, len(outer)) if not _is_word_char(outer[offset - 1])),
+                len(outer)
+            )
+
+    def find(self, text: str) -> List[Tuple[int, str]]:
+        """Occurrences (position, mot-clé) dans le texte, en un seul parcours, triées"""
+        if self._pattern is None:
+            return []
+        text = text.lower()
+        found = []
+        search = self._pattern.search
+        match = search(text)
+        while match is not None:
+            start, outer = match.start(), match.group()
+            found.append((start, outer))
+            found.extend((start, keyword) for keyword in self._prefixes[outer])
+            match = search(text, start + self._resume[outer])
+        found.sort()
+        return found
+
+    def matches(self, text: str) -> Dict[str, Dict[str, int]]:
+        """Catégorie -> {mot-clé: nombre d'occurrences}, pour les catégories reconnues"""
+        result: Dict[str, Dict[str, int]] = {}
+        for _, keyword in self.find(text):
+            for category, _ in self._targets[keyword]:
+                counts = result.setdefault(category, {})
+                counts[keyword] = counts.get(keyword, 0) + 1
+        return result
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """Catégorie -> somme des poids des occurrences de ses mots-clés"""
+        result: Dict[str, float] = {}
+        for _, keyword in self.find(text):
+            for category, weight in self._targets[keyword]:
+                result[category] = result.get(category, 0.0) + weight
+        return result
+
+    def classify_with_scores(self, text: str, default: Optional[str] = None) -> Tuple[Optional[str], Dict[str, float]]:
+        """Catégorie retenue (voir classify) et scores qui l'ont désignée, en un seul parcours"""
+        scores = self.scores(text)
+        if not scores:
+            return default, scores
+        best = max(range(len(self.categories)),
+                   key=lambda index: (scores.get(self.categories[index], 0.0), -index))
+        return self.categories[best], scores
+
+    def classify(self, text: str, default: Optional[str] = None) -> Optional[str]:
+        """Catégorie de meilleur score (la première déclarée en cas d'égalité), default sinon"""
+        return self.classify_with_scores(text, default)[0]
+
+    def matched_keywords(self, text: str, category: str) -> List[str]:
+        """Mots-clés d'une catégorie présents dans le texte, dans l'ordre d'apparition"""
+        seen = []
+        for _, keyword in self.find(text):
+            if keyword not in seen and any(target == category for target, _ in self._targets[keyword]):
+                seen.append(keyword)
+        return seen
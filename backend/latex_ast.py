@@ -0,0 +1,542 @@
+"""
+LaTeX AST - Single parse step for LaTeX formulas shared by the SVG, MathML and HTML renderers
+"""
+
+import hashlib
+import html
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Optional, Tuple
+
+
+class LatexParseError(ValueError):
+    """Raised when a formula uses a construct the parser does not understand"""
+
+
+# --- Expression tree -------------------------------------------------------
+
+@dataclass(frozen=True)
+class Node:
+    """Base class of every expression tree node"""
+
+
+@dataclass(frozen=True)
+class Row(Node):
+    """Sequence of nodes (LaTeX group / MathML mrow)"""
+    children: Tuple[Node, ...]
+
+
+@dataclass(frozen=True)
+class Number(Node):
+    value: str
+
+
+@dataclass(frozen=True)
+class Identifier(Node):
+    """Variable or named symbol (x, π, α...)"""
+    name: str
+    command: Optional[str] = None  # Original LaTeX command, e.g. "pi"
+
+
+@dataclass(frozen=True)
+class Operator(Node):
+    """Operator or punctuation (+, =, ×, ≤...)"""
+    symbol: str
+    command: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class Space(Node):
+    """Whitespace between two atoms of a row in the source ("5 cm"), kept for the HTML backend"""
+
+
+@dataclass(frozen=True)
+class Text(Node):
+    """Upright text from \\text{} / \\mathrm{}"""
+    value: str
+
+
+@dataclass(frozen=True)
+class Frac(Node):
+    numerator: Node
+    denominator: Node
+
+
+@dataclass(frozen=True)
+class Sqrt(Node):
+    body: Node
+    index: Optional[Node] = None
+
+
+@dataclass(frozen=True)
+class Scripts(Node):
+    """Base with optional subscript and/or superscript"""
+    base: Node
+    sub: Optional[Node] = None
+    sup: Optional[Node] = None
+
+
+@dataclass(frozen=True)
+class Fenced(Node):
+    """\\left( ... \\right) delimiters"""
+    left: str
+    right: str
+    body: Node
+
+
+@dataclass(frozen=True)
+class ParsedFormula:
+    """Cached parse result: normalized LaTeX, its content hash and the tree"""
+    key: str
+    latex: str
+    tree: Node
+
+
+# --- Symbol tables ---------------------------------------------------------
+
+IDENTIFIER_COMMANDS = {
+    'pi': 'π', 'alpha': 'α', 'beta': 'β', 'gamma': 'γ', 'delta': 'δ',
+    'epsilon': 'ε', 'theta': 'θ', 'lambda': 'λ', 'mu': 'μ', 'sigma': 'σ',
+    'omega': 'ω', 'phi': 'φ', 'Delta': 'Δ', 'Omega': 'Ω', 'infty': '∞',
+}
+
+OPERATOR_COMMANDS = {
+    'times': '×', 'div': '÷', 'cdot': '·', 'pm': '±', 'mp': '∓',
+    'leq': '≤', 'le': '≤', 'geq': '≥', 'ge': '≥', 'neq': '≠', 'ne': '≠',
+    'approx': '≈', 'degree': '°', 'circ': '°', 'in': '∈', 'to': '→',
+    'rightarrow': '→', 'Rightarrow': '⇒', 'Leftrightarrow': '⇔',
+    'parallel': '∥', 'perp': '⊥', 'angle': '∠', 'widehat': '^',
+}
+
+SPACING_COMMANDS = {',', ';', ':', '!', ' ', 'quad', 'qquad'}
+
+TEXT_COMMANDS = {'text', 'mathrm', 'textrm', 'operatorname', 'mbox'}
+
+FRAC_COMMANDS = {'frac', 'dfrac', 'tfrac'}
+
+# Commands kept verbatim by the normalizer (matplotlib mathtext understands them)
+_MATHTEXT_ALIASES = {'le': 'leq', 'ge': 'geq', 'ne': 'neq', 'degree': 'circ'}
+
+# Binary operators and relations, spaced in HTML unless used as a prefix ("x = 3 − 5", "−5")
+_SPACED_OPERATORS = set('+-=<>×÷·±∓≤≥≠≈∈→⇒⇔')
+
+# Operators after which a spaced operator is a prefix sign
+_PREFIX_CONTEXT = set('([{,;') | _SPACED_OPERATORS
+
+MINUS_SIGN = '\u2212'
+
+_CONTROL_WORD_RE = re.compile(r'\\[a-zA-Z]+')
+
+_TOKEN_RE = re.compile(r'\\[a-zA-Z]+|\\.|\d+(?:[.,]\d+)?|\s+|.', re.DOTALL)
+
+
+# --- Parser ----------------------------------------------------------------
+
+class _Parser:
+    """Recursive-descent parser over the LaTeX token stream"""
+
+    def __init__(self, source: str):
+        # Whitespace tokens are kept so that \text{...} preserves its spaces
+        self.tokens = _TOKEN_RE.findall(source)
+        self.pos = 0
+
+    def _skip_whitespace(self) -> None:
+        while self.pos < len(self.tokens) and self.tokens[self.pos].isspace():
+            self.pos += 1
+
+    def peek(self) -> Optional[str]:
+        self._skip_whitespace()
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def next(self) -> str:
+        token = self.peek()
+        if token is None:
+            raise LatexParseError("Unexpected end of formula")
+        self.pos += 1
+        return token
+
+    def expect(self, token: str) -> None:
+        found = self.next()
+        if found != token:
+            raise LatexParseError(f"Expected '{token}', found '{found}'")
+
+    def parse(self) -> Node:
+        row = self.parse_row(stop=None)
+        if self.peek() is not None:
+            raise LatexParseError(f"Unexpected token '{self.peek()}'")
+        return row
+
+    def parse_row(self, stop: Optional[str]) -> Node:
+        children = []
+        while True:
+            token = self.peek()
+            if token is None or token == stop or token == '\\right':
+                break
+            spaced = self._after_whitespace()
+            node = self.parse_scripts()
+            if node is not None:
+                if spaced and children:
+                    children.append(Space())
+                children.append(node)
+        return _make_row(children)
+
+    def _after_whitespace(self) -> bool:
+        """Is the next token preceded by a space (not the one ending a control word, as in TeX)?"""
+        if self.pos == 0 or not self.tokens[self.pos - 1].isspace():
+            return False
+        return self.pos < 2 or not _CONTROL_WORD_RE.fullmatch(self.tokens[self.pos - 2])
+
+    def parse_scripts(self) -> Optional[Node]:
+        base = self.parse_atom()
+        if base is None:
+            return None
+        sub = sup = None
+        while self.peek() in ('^', '_'):
+            marker = self.next()
+            argument = self.parse_argument()
+            if marker == '^':
+                if sup is not None:
+                    raise LatexParseError("Double superscript")
+                sup = argument
+            else:
+                if sub is not None:
+                    raise LatexParseError("Double subscript")
+                sub = argument
+        if sub is None and sup is None:
+            return base
+        return Scripts(base, sub, sup)
+
+    def parse_argument(self) -> Node:
+        """Argument of a command or script: a braced group or a single atom"""
+        if self.peek() == '{':
+            self.next()
+            row = self.parse_row(stop='}')
+            self.expect('}')
+            return row
+        atom = self.parse_atom()
+        if atom is None:
+            raise LatexParseError("Missing argument")
+        return atom
+
+    def parse_raw_group(self) -> str:
+        """Raw text of a braced group (for \\text{...})"""
+        self.expect('{')
+        depth, parts = 1, []
+        while True:
+            if self.pos >= len(self.tokens):
+                raise LatexParseError("Unterminated group")
+            token = self.tokens[self.pos]
+            self.pos += 1
+            if token == '{':
+                depth += 1
+            elif token == '}':
+                depth -= 1
+                if depth == 0:
+                    return ''.join(parts)
+            parts.append(token)
+
+    def parse_atom(self) -> Optional[Node]:
+        token = self.next()
+
+        if token == '{':
+            row = self.parse_row(stop='}')
+            self.expect('}')
+            return row
+        if token in ('}', '^', '_'):
+            raise LatexParseError(f"Unexpected '{token}'")
+        if token[0].isdigit():
+            return Number(token)
+        if token.isalpha():
+            return Identifier(token)
+        if token.startswith('\\'):
+            return self.parse_command(token[1:])
+        return Operator(token)
+
+    def parse_command(self, name: str) -> Optional[Node]:
+        if name in FRAC_COMMANDS:
+            numerator = self.parse_argument()
+            denominator = self.parse_argument()
+            return Frac(numerator, denominator)
+        if name == 'sqrt':
+            index = None
+            if self.peek() == '[':
+                self.next()
+                index = self.parse_row(stop=']')
+                self.expect(']')
+            return Sqrt(self.parse_argument(), index)
+        if name == 'left':
+            left = self._delimiter(self.next())
+            body = self.parse_row(stop=None)
+            self.expect('\\right')
+            right = self._delimiter(self.next())
+            return Fenced(left, right, body)
+        if name in TEXT_COMMANDS:
+            return Text(self.parse_raw_group())
+        if name in IDENTIFIER_COMMANDS:
+            return Identifier(IDENTIFIER_COMMANDS[name], command=name)
+        if name in OPERATOR_COMMANDS:
+            return Operator(OPERATOR_COMMANDS[name], command=_MATHTEXT_ALIASES.get(name, name))
+        if name in SPACING_COMMANDS:
+            return None
+        if name in ('{', '}', '%', '$', '&', '#', '_'):
+            return Operator(name)
+        raise LatexParseError(f"Unsupported command '\\{name}'")
+
+    @staticmethod
+    def _delimiter(token: str) -> str:
+        if token == '.':
+            return ''
+        if token in ('\\{', '\\}'):
+            return token[1]
+        if token == '\\|':
+            return '‖'
+        return token
+
+
+def _make_row(children) -> Node:
+    """Flatten nested rows and unwrap single-child rows"""
+    flat = []
+    for child in children:
+        if isinstance(child, Row):
+            flat.extend(child.children)
+        else:
+            flat.append(child)
+    if len(flat) == 1:
+        return flat[0]
+    return Row(tuple(flat))
+
+
+# --- Cache -----------------------------------------------------------------
+
+_CACHE_MAX_SIZE = 4096
+_cache: "OrderedDict[str, ParsedFormula]" = OrderedDict()
+_cache_lock = Lock()
+
+
+def _normalize_source(latex_code: str) -> str:
+    """Whitespace-insensitive form of the source, used for the content hash"""
+    return ' '.join(latex_code.split())
+
+
+def parse_latex(latex_code: str) -> ParsedFormula:
+    """
+    Parse a LaTeX formula (without delimiters) into a normalized expression tree.
+    Each distinct formula is parsed once per process; results are keyed by content hash.
+    Raises LatexParseError for unsupported constructs.
+    """
+    source = _normalize_source(latex_code)
+    key = hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return cached
+
+    tree = _Parser(source).parse()
+    formula = ParsedFormula(key=key, latex=to_latex(tree), tree=tree)
+
+    with _cache_lock:
+        _cache[key] = formula
+        if len(_cache) > _CACHE_MAX_SIZE:
+            _cache.popitem(last=False)
+    return formula
+
+
+def clear_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+
+# --- Backends --------------------------------------------------------------
+
+def to_latex(node: Node) -> str:
+    """Canonical LaTeX (accepted by matplotlib mathtext) for the SVG backend"""
+    if isinstance(node, Row):
+        return ''.join(_latex_item(child) for child in node.children)
+    return _latex_item(node)
+
+
+def _latex_group(node: Node) -> str:
+    return '{' + to_latex(node) + '}'
+
+
+def _latex_item(node: Node) -> str:
+    if isinstance(node, Space):
+        return ' '
+    if isinstance(node, Number):
+        return node.value
+    if isinstance(node, Identifier):
+        return f'\\{node.command} ' if node.command else node.name
+    if isinstance(node, Operator):
+        if node.command:
+            return f'\\{node.command} '
+        if node.symbol in ('{', '}', '%', '$', '&', '#', '_'):
+            return '\\' + node.symbol
+        return node.symbol
+    if isinstance(node, Text):
+        return '\\text{' + node.value + '}'
+    if isinstance(node, Frac):
+        return '\\frac' + _latex_group(node.numerator) + _latex_group(node.denominator)
+    if isinstance(node, Sqrt):
+        index = f'[{to_latex(node.index)}]' if node.index is not None else ''
+        return '\\sqrt' + index + _latex_group(node.body)
+    if isinstance(node, Scripts):
+        base = to_latex(node.base)
+        if isinstance(node.base, (Row, Scripts)):
+            base = '{' + base + '}'
+        result = base
+        if node.sub is not None:
+            result += '_' + _latex_group(node.sub)
+        if node.sup is not None:
+            result += '^' + _latex_group(node.sup)
+        return result
+    if isinstance(node, Fenced):
+        left = node.left or '.'
+        right = node.right or '.'
+        return f'\\left{_latex_delim(left)}{to_latex(node.body)}\\right{_latex_delim(right)}'
+    if isinstance(node, Row):
+        return '{' + to_latex(node) + '}'
+    raise TypeError(f"Unknown node {node!r}")
+
+
+def _latex_delim(delim: str) -> str:
+    if delim in ('{', '}'):
+        return '\\' + delim
+    if delim == '‖':
+        return '\\|'
+    return delim
+
+
+def _entity(char: str) -> str:
+    """Numeric character reference, same format as latex2mathml"""
+    return f'&#x{ord(char):05X};'
+
+
+def to_mathml(node: Node, display: str = 'inline') -> str:
+    """MathML backend (replaces latex2mathml in the PDF pipeline)"""
+    return (
+        f'<math xmlns="http://www.w3.org/1998/Math/MathML" display="{display}">'
+        f'<mrow>{_mathml_row(node)}</mrow></math>'
+    )
+
+
+def _mathml_row(node: Node) -> str:
+    if isinstance(node, Row):
+        return ''.join(_mathml(child) for child in node.children)
+    return _mathml(node)
+
+
+def _mathml_wrapped(node: Node) -> str:
+    return f'<mrow>{_mathml_row(node)}</mrow>'
+
+
+def _operator_symbol(symbol: str) -> str:
+    """Typographic minus sign (U+2212) instead of the ASCII hyphen"""
+    return MINUS_SIGN if symbol == '-' else symbol
+
+
+def _mathml(node: Node) -> str:
+    if isinstance(node, Space):
+        return ''
+    if isinstance(node, Number):
+        return f'<mn>{html.escape(node.value)}</mn>'
+    if isinstance(node, Identifier):
+        name = node.name if node.name.isascii() else ''.join(_entity(c) for c in node.name)
+        return f'<mi>{name}</mi>'
+    if isinstance(node, Operator):
+        symbol = _operator_symbol(node.symbol)
+        return f'<mo>{_entity(symbol) if len(symbol) == 1 else html.escape(symbol)}</mo>'
+    if isinstance(node, Text):
+        return f'<mtext>{html.escape(node.value)}</mtext>'
+    if isinstance(node, Frac):
+        return f'<mfrac>{_mathml_wrapped(node.numerator)}{_mathml_wrapped(node.denominator)}</mfrac>'
+    if isinstance(node, Sqrt):
+        if node.index is not None:
+            return f'<mroot>{_mathml_wrapped(node.body)}{_mathml_wrapped(node.index)}</mroot>'
+        return f'<msqrt>{_mathml_wrapped(node.body)}</msqrt>'
+    if isinstance(node, Scripts):
+        base = _mathml(node.base) if not isinstance(node.base, Row) else _mathml_wrapped(node.base)
+        if node.sub is not None and node.sup is not None:
+            return f'<msubsup>{base}{_mathml_wrapped(node.sub)}{_mathml_wrapped(node.sup)}</msubsup>'
+        if node.sup is not None:
+            return f'<msup>{base}{_mathml_wrapped(node.sup)}</msup>'
+        return f'<msub>{base}{_mathml_wrapped(node.sub)}</msub>'
+    if isinstance(node, Fenced):
+        left = f'<mo stretchy="true" fence="true" form="prefix">{_entity(node.left)}</mo>' if node.left else ''
+        right = f'<mo stretchy="true" fence="true" form="postfix">{_entity(node.right)}</mo>' if node.right else ''
+        return f'<mrow>{left}{_mathml_row(node.body)}{right}</mrow>'
+    if isinstance(node, Row):
+        return _mathml_wrapped(node)
+    raise TypeError(f"Unknown node {node!r}")
+
+
+def to_html(node: Node) -> str:
+    """HTML/CSS backend, using the classes styled by MathRenderer.get_math_css()"""
+    if not isinstance(node, Row):
+        return _html(node)
+    parts = []
+    previous, previous_spaced, space = None, False, False
+    for child in node.children:
+        if isinstance(child, Space):
+            space = True
+            continue
+        spaced = _is_infix_operator(child, previous)
+        if spaced:
+            parts.append(f' {_html(child)} ')
+        else:
+            # Source spacing between atoms, unless an infix operator already spaced them
+            if space and not previous_spaced:
+                parts.append(' ')
+            parts.append(_html(child))
+        previous, previous_spaced, space = child, spaced, False
+    return ''.join(parts)
+
+
+def _is_infix_operator(node: Node, previous: Optional[Node]) -> bool:
+    """Binary operator or relation between two operands ("a − b"), not a prefix sign ("−5")"""
+    if not isinstance(node, Operator) or node.symbol not in _SPACED_OPERATORS:
+        return False
+    if previous is None:
+        return False
+    return not (isinstance(previous, Operator) and previous.symbol in _PREFIX_CONTEXT)
+
+
+def _html(node: Node) -> str:
+    if isinstance(node, Number):
+        return html.escape(node.value)
+    if isinstance(node, Identifier):
+        return html.escape(node.name)
+    if isinstance(node, Operator):
+        return html.escape(_operator_symbol(node.symbol))
+    if isinstance(node, Text):
+        return html.escape(node.value)
+    if isinstance(node, Frac):
+        return (
+            '<span class="math-fraction">'
+            f'<span class="math-numerator">{to_html(node.numerator)}</span>'
+            f'<span class="math-denominator">{to_html(node.denominator)}</span>'
+            '</span>'
+        )
+    if isinstance(node, Sqrt):
+        index = f'<sup class="math-superscript">{to_html(node.index)}</sup>' if node.index is not None else ''
+        return f'<span class="math-sqrt">{index}√<span class="math-sqrt-content">{to_html(node.body)}</span></span>'
+    if isinstance(node, Scripts):
+        result = to_html(node.base)
+        if node.sub is not None:
+            result += f'<sub class="math-subscript">{to_html(node.sub)}</sub>'
+        if node.sup is not None:
+            result += f'<sup class="math-superscript">{to_html(node.sup)}</sup>'
+        return result
+    if isinstance(node, Fenced):
+        return f'{html.escape(node.left)}{to_html(node.body)}{html.escape(node.right)}'
+    if isinstance(node, Row):
+        return to_html(node)
+    raise TypeError(f"Unknown node {node!r}")
+
+
+def latex_to_mathml(latex_code: str, display: str = 'inline') -> str:
+    """Parse (cached) and convert a formula to MathML"""
+    return to_mathml(parse_latex(latex_code).tree, display)
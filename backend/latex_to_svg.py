@@ -6,11 +6,11 @@ import re
 import base64
 import hashlib
 from typing import Dict, Any
-import matplotlib.pyplot as plt
-import matplotlib.mathtext as mathtext
-from io import BytesIO
 import logging
 
+from latex_ast import parse_latex, LatexParseError
+from figure_canvas import new_figure, figure_to_svg
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,13 +20,7 @@ class LaTeXToSVGRenderer:
     def __init__(self, cache_dir: str = "/tmp/latex_cache"):
         self.cache_dir = cache_dir
         self.svg_cache = {}  # In-memory cache for this session
-        
-        # Configure matplotlib for high-quality math rendering
-        plt.rcParams.update({
-            'font.size': 14,
-            'mathtext.fontset': 'cm',  # Computer Modern fonts (LaTeX standard)
-            'mathtext.default': 'regular'
-        })
+        # matplotlib is loaded (and configured) on first render, see lazy_imports
     
     def _clean_latex(self, latex_code: str) -> str:
         """Clean and prepare LaTeX code for rendering"""
@@ -43,7 +37,7 @@ class LaTeXToSVGRenderer:
         """Convert LaTeX code to SVG string"""
         try:
             # Create a figure with transparent background
-            fig, ax = plt.subplots(figsize=(0.1, 0.1))
+            fig, ax = new_figure(0.1, 0.1)
             ax.axis('off')
             fig.patch.set_alpha(0)
             
@@ -64,22 +58,18 @@ class LaTeXToSVGRenderer:
             # Set tight layout
             fig.set_size_inches(bbox_inches.width + 0.1, bbox_inches.height + 0.1)
             
-            # Save to SVG
-            svg_buffer = BytesIO()
-            plt.savefig(svg_buffer, format='svg', 
-                       bbox_inches='tight', 
-                       pad_inches=0.02,
-                       transparent=True,
-                       dpi=300)
-            
-            plt.close(fig)
+            # Save to SVG (without XML declaration, for inline use) - glyphs written as
+            # paths (svg.fonttype is 'none' globally)
+            svg_content = figure_to_svg(fig,
+                                        text_as_paths=True,
+                                        bbox_inches='tight',
+                                        pad_inches=0.02,
+                                        transparent=True,
+                                        dpi=300)
             
-            # Get SVG content
-            svg_content = svg_buffer.getvalue().decode('utf-8')
-            
-            # Clean up SVG content (remove XML declaration for inline use)
-            svg_content = re.sub(r'<\?xml[^>]*\?>', '', svg_content)
-            svg_content = re.sub(r'<!DOCTYPE[^>]*>', '', svg_content)
+            # Matplotlib writes the source as <!-- $...$ -->: the $...$ pass of
+            # convert_text_with_latex would render it again inside the comment
+            svg_content = re.sub(r'<!--.*?-->', '', svg_content, flags=re.DOTALL)
             
             return svg_content.strip()
             
@@ -95,14 +85,21 @@ class LaTeXToSVGRenderer:
     def render_latex_expression(self, latex_code: str) -> str:
         """Render a single LaTeX expression to SVG"""
         cleaned_latex = self._clean_latex(latex_code)
-        cache_key = self._get_cache_key(cleaned_latex)
+        
+        # Parse once: the content hash keys the cache and the normalized
+        # LaTeX is what matplotlib receives (\dfrac -> \frac, \le -> \leq...)
+        try:
+            formula = parse_latex(cleaned_latex)
+            cache_key, render_latex = formula.key, formula.latex
+        except LatexParseError:
+            cache_key, render_latex = self._get_cache_key(cleaned_latex), cleaned_latex
         
         # Check cache first
         if cache_key in self.svg_cache:
             return self.svg_cache[cache_key]
         
         # Render to SVG
-        svg_content = self._latex_to_svg(cleaned_latex)
+        svg_content = self._latex_to_svg(render_latex)
         
         # Cache the result
         self.svg_cache[cache_key] = svg_content
@@ -0,0 +1,96 @@
+"""
+Lazy Imports - Accessors for heavy dependencies, loaded on first use instead of at startup
+
+weasyprint, matplotlib and numpy account for most of the backend import time; the LLM
+and Stripe integrations are only needed by a handful of routes. Each accessor imports
+its module once and returns it (functools.lru_cache keeps the loaded module).
+"""
+
+from functools import lru_cache
+
+# Global matplotlib settings, historically applied at import time by LaTeXToSVGRenderer,
+# GeometryRenderer then SchemaRenderer (in that order: later values win).
+MATPLOTLIB_RC_PARAMS = [
+    {  # LaTeXToSVGRenderer
+        'font.size': 14,
+        'mathtext.fontset': 'cm',  # Computer Modern fonts (LaTeX standard)
+        'mathtext.default': 'regular',
+    },
+    {  # GeometryRenderer
+        'font.size': 12,
+        'font.family': 'serif',
+        'mathtext.fontset': 'cm',
+        'axes.linewidth': 1.2,
+        'lines.linewidth': 1.5,
+    },
+    {  # SchemaRenderer
+        'font.size': 10,
+        'font.family': 'sans-serif',
+        'svg.fonttype': 'none',  # Keep text as text in SVG
+        'figure.figsize': (8, 6),
+    },
+    {  # Stable SVG ids (clip paths...): identical figures give identical SVG
+        'svg.hashsalt': 'le-maitre-mot',
+    },
+]
+
+
+@lru_cache(maxsize=None)
+def get_matplotlib():
+    """
+    matplotlib, configured once with MATPLOTLIB_RC_PARAMS. rcParams are global to the
+    process: they must not be modified afterwards (see figure_canvas, which only
+    switches svg.fonttype while writing a formula SVG, excluding other SVG exports).
+    """
+    import matplotlib
+    for rc_params in MATPLOTLIB_RC_PARAMS:
+        matplotlib.rcParams.update(rc_params)
+    return matplotlib
+
+
+@lru_cache(maxsize=None)
+def get_pyplot():
+    """matplotlib.pyplot (renderers use figure_canvas instead, which is thread-safe)"""
+    get_matplotlib()
+    import matplotlib.pyplot as plt
+    return plt
+
+
+@lru_cache(maxsize=None)
+def get_patches():
+    get_matplotlib()
+    import matplotlib.patches as patches
+    return patches
+
+
+@lru_cache(maxsize=None)
+def get_numpy():
+    import numpy
+    return numpy
+
+
+@lru_cache(maxsize=None)
+def get_weasyprint():
+    import weasyprint
+    return weasyprint
+
+
+@lru_cache(maxsize=None)
+def get_llm_chat():
+    """emergentintegrations.llm.chat (LlmChat, UserMessage)"""
+    from emergentintegrations.llm import chat
+    return chat
+
+
+@lru_cache(maxsize=None)
+def get_stripe_checkout():
+    """emergentintegrations.payments.stripe.checkout (StripeCheckout, CheckoutSessionRequest...)"""
+    from emergentintegrations.payments.stripe import checkout
+    return checkout
+
+
+@lru_cache(maxsize=None)
+def get_pil_image():
+    """PIL.Image (image downscaling for print, see pdf_url_fetcher)"""
+    from PIL import Image
+    return Image
@@ -0,0 +1,240 @@
+"""
+Map Assets - Copie locale des cartes de Géographie, recadrées par région
+
+Les documents cartographiques (document_search) pointaient vers Wikimedia : chaque export
+téléchargeait l'image, et cinq types de carte (monde, Europe, Asie, Amérique du Nord,
+Afrique) affichaient le même planisphère de 1200 px. Désormais :
+
+- chaque image source est téléchargée une seule fois dans MAP_ASSETS_DIR (ou déposée à
+  l'avance : `python map_assets.py` prépare toutes les cartes connues, pour un serveur ou
+  des tests hors ligne ; MAP_ASSETS_OFFLINE=1 interdit tout téléchargement)
+- les cartes régionales sont recadrées dans le planisphère (projection équirectangulaire :
+  une emprise en degrés correspond directement à un rectangle de pixels)
+- les images sont ramenées à la résolution d'impression (MAP_PRINT_WIDTH_CM à
+  MAP_PRINT_DPI), jamais agrandies
+- à l'export, url_fichier_direct est remplacée par le fichier local (file://) ; l'URL
+  d'origine reste dans url_source. Sans copie locale, l'URL distante est conservée.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlparse, unquote
+
+from pdf_url_fetcher import fetch_url
+
+logger = logging.getLogger(__name__)
+
+MAP_ASSETS_DIR = Path(os.environ.get('MAP_ASSETS_DIR', Path(__file__).parent / 'map_assets'))
+MAP_ASSETS_OFFLINE = os.environ.get('MAP_ASSETS_OFFLINE', '0') == '1'
+MAP_FETCH_TIMEOUT = float(os.environ.get('MAP_FETCH_TIMEOUT', '20'))
+MAP_FETCH_RETRY_AFTER = float(os.environ.get('MAP_FETCH_RETRY_AFTER', '600'))
+MAP_PRINT_DPI = int(os.environ.get('MAP_PRINT_DPI', '300'))
+MAP_PRINT_WIDTH_CM = float(os.environ.get('MAP_PRINT_WIDTH_CM', '17'))
+
+# Emprise des cartes régionales : (longitude ouest, latitude nord, longitude est, latitude sud)
+REGION_BOUNDS = {
+    'carte_europe': (-25.0, 72.0, 45.0, 34.0),
+    'carte_asie': (25.0, 78.0, 150.0, -12.0),
+    'carte_amerique_nord': (-170.0, 75.0, -50.0, 7.0),
+    'carte_afrique': (-20.0, 38.0, 55.0, -36.0),
+}
+
+# Documents déjà enregistrés sans champ type : région reconnue dans le titre
+_TITLE_REGIONS = (
+    ("amérique du nord", 'carte_amerique_nord'),
+    ("europe", 'carte_europe'),
+    ("asie", 'carte_asie'),
+    ("afrique", 'carte_afrique'),
+)
+
+_SAVE_OPTIONS = {
+    'JPEG': {'quality': 90, 'optimize': True},
+    'PNG': {'optimize': True},
+}
+
+
+def print_max_width(dpi: int = MAP_PRINT_DPI, width_cm: float = MAP_PRINT_WIDTH_CM) -> int:
+    """Largeur en pixels d'une carte imprimée sur width_cm à dpi points par pouce"""
+    return int(round(width_cm / 2.54 * dpi))
+
+
+def crop_box(bounds: Tuple[float, float, float, float], size: Tuple[int, int]) -> Tuple[int, int, int, int]:
+    """Rectangle de pixels (gauche, haut, droite, bas) d'une emprise sur un planisphère équirectangulaire"""
+    west, north, east, south = bounds
+    width, height = size
+    return (
+        int(round((west + 180.0) / 360.0 * width)),
+        int(round((90.0 - north) / 180.0 * height)),
+        int(round((east + 180.0) / 360.0 * width)),
+        int(round((90.0 - south) / 180.0 * height)),
+    )
+
+
+def region_of(document: Dict[str, Any]) -> Optional[str]:
+    """Type de carte régionale d'un document (champ type, sinon titre), None sinon"""
+    doc_type = document.get('type')
+    if doc_type in REGION_BOUNDS:
+        return doc_type
+    if doc_type:
+        return None
+    titre = (document.get('titre') or '').lower()
+    for hint, region in _TITLE_REGIONS:
+        if hint in titre:
+            return region
+    return None
+
+
+class MapAssetStore:
+    """Images des cartes sur disque : sources téléchargées une fois, recadrages, tailles d'impression"""
+
+    def __init__(self, root: Path = MAP_ASSETS_DIR, offline: bool = MAP_ASSETS_OFFLINE,
+                 max_width: int = None, fetch=fetch_url, timeout: float = MAP_FETCH_TIMEOUT,
+                 retry_after: float = MAP_FETCH_RETRY_AFTER):
+        self.root = Path(root)
+        self.offline = offline
+        self.max_width = max_width or print_max_width()
+        self.fetch = fetch
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._failures: Dict[str, float] = {}
+
+    # --- fichiers -----------------------------------------------------------------------
+
+    @staticmethod
+    def _suffix(url: str) -> str:
+        suffix = Path(unquote(urlparse(url).path)).suffix.lower()
+        return suffix if suffix in ('.png', '.jpg', '.jpeg') else '.png'
+
+    def source_path(self, url: str) -> Path:
+        digest = hashlib.sha256(url.encode('utf-8')).hexdigest()[:16]
+        return self.root / 'sources' / f"{digest}{self._suffix(url)}"
+
+    def asset_path(self, url: str, region: Optional[str] = None) -> Path:
+        source = self.source_path(url)
+        return self.root / 'print' / f"{region or 'full'}-{self.max_width}-{source.name}"
+
+    @staticmethod
+    def _write_atomic(path: Path, write) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                write(tmp)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    # --- sources ------------------------------------------------------------------------
+
+    def ensure_source(self, url: str) -> Optional[Path]:
+        """Image source sur disque (téléchargée si besoin), None si indisponible"""
+        path = self.source_path(url)
+        if path.exists():
+            return path
+        if self.offline:
+            return None
+
+        with self._lock:
+            failed_at = self._failures.get(url)
+        if failed_at is not None and time.monotonic() - failed_at < self.retry_after:
+            return None
+
+        try:
+            content, _ = self.fetch(url, self.timeout)
+            self._write_atomic(path, lambda f: f.write(content))
+        except Exception as e:
+            logger.warning(f"Map source not downloaded ({url}): {e}")
+            with self._lock:
+                self._failures[url] = time.monotonic()
+            return None
+        logger.info(f"Map source stored: {path.name} ({len(content)} bytes)")
+        return path
+
+    # --- images d'impression ------------------------------------------------------------
+
+    def ensure_asset(self, url: str, region: Optional[str] = None) -> Optional[Path]:
+        """Image d'impression (recadrée pour une région) ; None si la source est indisponible"""
+        path = self.asset_path(url, region)
+        if path.exists():
+            return path
+        source = self.ensure_source(url)
+        if source is None:
+            return None
+
+        from lazy_imports import get_pil_image
+        Image = get_pil_image()
+        with Image.open(source) as image:
+            image_format = image.format if image.format in _SAVE_OPTIONS else 'PNG'
+            if region is not None:
+                image = image.crop(crop_box(REGION_BOUNDS[region], image.size))
+            if image.width > self.max_width:
+                height = max(1, round(image.height * self.max_width / image.width))
+                image = image.resize((self.max_width, height), Image.LANCZOS)
+            if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            self._write_atomic(path, lambda f: image.save(f, image_format, **_SAVE_OPTIONS[image_format]))
+        return path
+
+    def localize(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        """Document dont l'image pointe vers le fichier local (document inchangé en cas d'échec)"""
+        url = document.get('url_fichier_direct')
+        if not url or urlparse(url).scheme not in ('http', 'https'):
+            return document
+
+        region = region_of(document)
+        try:
+            path = self.ensure_asset(url, region)
+        except Exception as e:
+            logger.warning(f"Map asset not prepared ({url}): {e}")
+            return document
+        if path is None:
+            return document
+
+        from lazy_imports import get_pil_image
+        with get_pil_image().open(path) as image:
+            width, height = image.size
+        return dict(
+            document,
+            url_fichier_direct=path.resolve().as_uri(),
+            url_source=document.get('url_source') or url,
+            largeur_px=width,
+            hauteur_px=height,
+        )
+
+    def prepare(self, documents: Dict[str, Dict[str, Any]]) -> int:
+        """Prépare les images de documents connus (cache de document_search) ; retourne leur nombre"""
+        prepared = 0
+        for doc_type, document in documents.items():
+            localized = self.localize(dict(document, type=document.get('type', doc_type)))
+            if (localized.get('url_fichier_direct') or '').startswith('file://'):
+                prepared += 1
+        return prepared
+
+
+# Instance globale
+map_asset_store = MapAssetStore()
+
+
+def localize_exercise_documents(exercises: Iterable[Dict[str, Any]], store: MapAssetStore = None) -> None:
+    """Remplace, dans les exercices à exporter, l'image des documents géographiques par sa copie locale"""
+    store = store or map_asset_store
+    for exercise in exercises:
+        if exercise.get('document'):
+            exercise['document'] = store.localize(exercise['document'])
+
+
+if __name__ == '__main__':
+    # Préparation hors ligne : sources téléchargées et recadrages générés dans MAP_ASSETS_DIR
+    logging.basicConfig(level=logging.INFO)
+    from document_search import document_searcher
+    count = MapAssetStore(offline=False).prepare(document_searcher.validated_documents_cache)
+    print(f"{count} cartes prêtes dans {MAP_ASSETS_DIR}")
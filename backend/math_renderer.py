@@ -6,6 +6,8 @@ import re
 import html
 from typing import Dict, Any
 
+from latex_ast import parse_latex, to_html, LatexParseError
+
 
 class MathRenderer:
     """Converts LaTeX math expressions to HTML/CSS for WeasyPrint PDF generation"""
@@ -91,7 +93,14 @@ class MathRenderer:
         return f'<span class="math-sqrt">√<span class="math-sqrt-content">{content}</span></span>'
     
     def _process_math_content(self, text: str) -> str:
-        """Process mathematical content with pattern replacements"""
+        """Process mathematical content, via the shared expression tree when it parses"""
+        try:
+            return to_html(parse_latex(text).tree)
+        except LatexParseError:
+            return self._process_math_patterns(text)
+    
+    def _process_math_patterns(self, text: str) -> str:
+        """Process mathematical content with pattern replacements (fallback)"""
         result = text
         
         # Process patterns in the right order (most complex first)
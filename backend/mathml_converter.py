@@ -0,0 +1,81 @@
+"""
+MathML Converter - LaTeX fragments to MathML for PDF export (hot path of every corrigé)
+"""
+
+import os
+import re
+from functools import lru_cache
+
+from latex_ast import latex_to_mathml
+from logger import get_logger
+
+logger = get_logger()
+
+# Set MATHML_TRACE=1 to log every rewritten text (very verbose on large corrigés)
+TRACE_ENABLED = os.getenv('MATHML_TRACE', '').lower() in ('1', 'true', 'yes')
+
+FRAGMENT_CACHE_SIZE = 2048
+
+# Broken fraction formats produced by the AI: "3 de 4", "3 par 4", "3/4" (URLs preserved)
+_WORD_FRACTION_RE = re.compile(r'(\d+)\s+(?:de|par)\s+(\d+)')
+_SLASH_FRACTION_RE = re.compile(r'(?<!http:)(?<!https:)(\d+)/(\d+)')
+
+# Single pass over \frac{a}{b} | \sqrt{c} | x^{e}
+_MATH_FRAGMENT_RE = re.compile(
+    r'\\frac\{(?P<num>[^}]+)\}\{(?P<den>[^}]+)\}'
+    r'|\\sqrt\{(?P<rad>[^}]+)\}'
+    r'|(?P<base>[a-zA-Z0-9]+)\^\{(?P<exp>[^}]+)\}'
+)
+
+
+@lru_cache(maxsize=FRAGMENT_CACHE_SIZE)
+def convert_fragment(kind: str, first: str, second: str = '') -> str:
+    """Convert one matched fragment to MathML, with the historical text fallback"""
+    if kind == 'frac':
+        latex_expr, fallback = f"\\frac{{{first}}}{{{second}}}", f"{first}/{second}"
+    elif kind == 'sqrt':
+        latex_expr, fallback = f"\\sqrt{{{first}}}", f"√({first})"
+    else:
+        latex_expr, fallback = f"{first}^{{{second}}}", f"{first}^{second}"
+
+    try:
+        return latex_to_mathml(latex_expr)
+    except Exception as e:
+        logger.warning(f"Failed to convert {kind} {latex_expr}: {e}")
+        return fallback
+
+
+def _replace_fragment(match) -> str:
+    if match.group('num') is not None:
+        return convert_fragment('frac', match.group('num'), match.group('den'))
+    if match.group('rad') is not None:
+        return convert_fragment('sqrt', match.group('rad'))
+    return convert_fragment('power', match.group('base'), match.group('exp'))
+
+
+def fix_broken_fractions(text: str) -> str:
+    """Rewrite "3 de 4", "3 par 4" and "3/4" as \\frac{3}{4}"""
+    text = _WORD_FRACTION_RE.sub(r'\\frac{\1}{\2}', text)
+    return _SLASH_FRACTION_RE.sub(r'\\frac{\1}{\2}', text)
+
+
+def process_math_content_for_pdf(text: str) -> str:
+    """Convert LaTeX mathematical expressions to MathML for PDF rendering"""
+    if not text:
+        return text
+
+    try:
+        fixed = fix_broken_fractions(text)
+        if TRACE_ENABLED and fixed != text:
+            logger.debug(f"🔧 Fixed broken fraction formats in text: {fixed[:100]}...")
+
+        return _MATH_FRAGMENT_RE.sub(_replace_fragment, fixed)
+
+    except Exception as e:
+        logger.error(f"Error processing math content for PDF: {e}")
+        return text  # Return original text on error
+
+
+def get_cache_info():
+    """Fragment cache statistics (hits, misses, maxsize, currsize)"""
+    return convert_fragment.cache_info()
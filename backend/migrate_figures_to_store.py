@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Migration script for Le Maître Mot
+Moves the figures embedded in existing documents (schema_img base64 data URIs,
+figure_svg markup) into the content-addressed figure store: exercises keep only
+schema_img_id / figure_svg_id, figures are served from /api/figures/{id}
+
+Usage: python migrate_figures_to_store.py [--dry-run]
+(--dry-run fills the figure store but leaves the documents unchanged)
+"""
+
+import asyncio
+import os
+import sys
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+from pathlib import Path
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+from figure_store import figure_store, EXERCISE_FIGURE_FIELDS
+
+
+def _inline_figures(exercise: dict) -> bool:
+    return any(
+        isinstance(exercise.get(field), str) and exercise[field] and not exercise.get(id_field)
+        for field, id_field in EXERCISE_FIGURE_FIELDS.items()
+    )
+
+
+async def migrate_figures(dry_run: bool = False):
+    """Store every inline figure once and replace it by its id"""
+    try:
+        # Connect to MongoDB
+        mongo_url = os.environ['MONGO_URL']
+        client = AsyncIOMotorClient(mongo_url)
+        db = client[os.environ['DB_NAME']]
+
+        print(f"🔧 Migrating document figures to {figure_store.root}{' (dry run)' if dry_run else ''}...")
+
+        query = {"$or": [
+            {f"exercises.{field}": {"$nin": [None, ""]}} for field in EXERCISE_FIGURE_FIELDS
+        ]}
+        scanned = migrated_docs = migrated_figures = bytes_saved = 0
+
+        async for doc in db.documents.find(query, {"_id": 1, "id": 1, "exercises": 1}):
+            scanned += 1
+            exercises = doc.get("exercises") or []
+            if not any(_inline_figures(exercise) for exercise in exercises):
+                continue
+
+            for exercise in exercises:
+                if not _inline_figures(exercise):
+                    continue
+                before = sum(len(exercise.get(field) or '') for field in EXERCISE_FIGURE_FIELDS)
+                figure_store.compact_exercise(exercise)
+                migrated_figures += sum(1 for id_field in EXERCISE_FIGURE_FIELDS.values() if exercise.get(id_field))
+                bytes_saved += before - sum(len(exercise.get(field) or '') for field in EXERCISE_FIGURE_FIELDS)
+
+            if not dry_run:
+                await db.documents.update_one({"_id": doc["_id"]}, {"$set": {"exercises": exercises}})
+            migrated_docs += 1
+            print(f"  ✅ Document {str(doc.get('id', doc['_id']))[:8]} migrated")
+
+        print(f"\n🎉 Migration completed: {migrated_docs}/{scanned} documents, "
+              f"{migrated_figures} figures, {bytes_saved / 1024:.1f} KB removed from MongoDB")
+
+        # Close connection
+        client.close()
+
+    except Exception as e:
+        print(f"❌ Error migrating figures: {e}")
+        raise
+
+if __name__ == "__main__":
+    asyncio.run(migrate_figures(dry_run="--dry-run" in sys.argv))
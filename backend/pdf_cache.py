@@ -0,0 +1,237 @@
+"""
+PDF Cache - PDF exportés, réutilisés tant que rien de ce qui les produit ne change
+
+Un même document est souvent exporté plusieurs fois à l'identique (double clic,
+nouveau téléchargement après une coupure réseau). La clé d'un PDF est l'empreinte de tout ce dont il dépend :
+
+- le document (en-tête et exercices entiers : une variation d'exercice, un document de
+  Géographie ou un barème modifié change la clé)
+- le type d'export, le nom et le contenu du template
+- la personnalisation Pro (template_config, empreinte du fichier logo compris :
+  un enregistrement de template qui modifie une valeur change la clé)
+- la date imprimée et la version des renderers (render_pipeline, formules, WeasyPrint)
+
+Les PDF sont stockés sur disque (PDF_CACHE_DIR, un répertoire par document) dans la
+limite de PDF_CACHE_MAX_MB ; les moins récemment servis sont supprimés en premier.
+Les entrées devenues inaccessibles sont aussi supprimées explicitement
+(invalidate_document après une variation, invalidate_owner après un enregistrement de template).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Optional, Union
+
+from render_pipeline import RENDER_PIPELINE_VERSION
+from pdf_worker_pool import FORMULA_EXPORT_MODE
+
+logger = logging.getLogger(__name__)
+
+PDF_CACHE_DIR = Path(os.environ.get('PDF_CACHE_DIR', Path(__file__).parent / 'pdf_cache'))
+PDF_CACHE_MAX_BYTES = int(float(os.environ.get('PDF_CACHE_MAX_MB', '256')) * 1024 * 1024)
+
+# Champs du document imprimés par les templates (hors exercices)
+DOCUMENT_FIELDS = ('matiere', 'niveau', 'chapitre', 'type_doc', 'difficulte', 'nb_exercices')
+
+# Champs d'un exercice jamais imprimés (figures de la version web, identifiants de stockage) ;
+# tous les autres entrent dans la clé
+EXERCISE_IGNORED_FIELDS = ('schema_img', 'schema_img_id', 'figure_svg', 'figure_svg_id')
+
+_UNSAFE_NAME_RE = re.compile(r'[^A-Za-z0-9_-]')
+
+
+@lru_cache(maxsize=1)
+def renderer_version() -> str:
+    """Version de la chaîne de rendu : un changement invalide tous les PDF en cache"""
+    try:
+        from importlib.metadata import version
+        weasyprint_version = version('weasyprint')
+    except Exception:
+        weasyprint_version = 'unknown'
+    return f"pipeline-{RENDER_PIPELINE_VERSION}/formulas-{FORMULA_EXPORT_MODE}/weasyprint-{weasyprint_version}"
+
+
+@lru_cache(maxsize=256)
+def _file_digest(path: str, mtime_ns: int, size: int) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def file_digest(path: Union[str, Path]) -> Optional[str]:
+    """Empreinte du contenu d'un fichier (mémoïsée tant qu'il n'est pas modifié)"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return _file_digest(str(path), stat.st_mtime_ns, stat.st_size)
+
+
+def exercise_digest(exercise: Dict[str, Any]) -> str:
+    """Empreinte d'un exercice : tous ses champs sauf EXERCISE_IGNORED_FIELDS"""
+    printed = {field: value for field, value in exercise.items() if field not in EXERCISE_IGNORED_FIELDS}
+    data = json.dumps(printed, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def owner_tag(user_email: Optional[str]) -> str:
+    """Propriétaire d'une entrée : empreinte de l'email Pro, 'guest' sinon"""
+    if not user_email:
+        return 'guest'
+    return hashlib.sha1(user_email.lower().encode('utf-8')).hexdigest()[:16]
+
+
+def _safe_name(value: str) -> str:
+    return _UNSAFE_NAME_RE.sub('_', str(value))[:64] or '_'
+
+
+class PDFCache:
+    """PDF sur disque, un répertoire par document, borné en taille (LRU par date d'accès)"""
+
+    def __init__(self, root: Union[str, Path] = PDF_CACHE_DIR, max_bytes: int = PDF_CACHE_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = Lock()
+        self._size: Optional[int] = None
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def key(self, document: Dict[str, Any], export_type: str, template_name: str, template_content: str,
+            template_config: Optional[Dict[str, Any]] = None, date_creation: str = '') -> str:
+        """Empreinte de toutes les entrées du rendu PDF"""
+        config = dict(template_config or {})
+        logo_url = config.get('logo_url') or ''
+        if logo_url.startswith('file://'):
+            config['logo_sha256'] = file_digest(logo_url[len('file://'):])
+        payload = {
+            'renderer': renderer_version(),
+            'document': {field: document.get(field) for field in DOCUMENT_FIELDS},
+            'exercises': [exercise_digest(exercise) for exercise in document.get('exercises') or []],
+            'export_type': export_type,
+            'template': template_name,
+            'template_sha256': hashlib.sha256(template_content.encode('utf-8')).hexdigest(),
+            'template_config': config,
+            'date_creation': date_creation,
+        }
+        data = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+    def _path(self, document_id: str, owner: str, key: str) -> Path:
+        return self.root / _safe_name(document_id) / f"{owner}-{key}.pdf"
+
+    def _current_size(self) -> int:
+        if self._size is None:
+            self._size = sum(path.stat().st_size for path in self.root.glob('*/*.pdf'))
+        return self._size
+
+    def get_path(self, document_id: str, owner: str, key: str) -> Optional[Path]:
+        """Fichier du PDF en cache (servi tel quel, sans le charger en mémoire)"""
+        path = self._path(document_id, owner, key)
+        try:
+            os.utime(path)  # date d'accès pour l'éviction LRU
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def get(self, document_id: str, owner: str, key: str) -> Optional[bytes]:
+        path = self.get_path(document_id, owner, key)
+        if path is None:
+            return None
+        try:
+            return path.read_bytes()
+        except OSError:
+            return None
+
+    def put(self, document_id: str, owner: str, key: str, content: bytes) -> None:
+        if len(content) > self.max_bytes:
+            return
+        path = self._path(document_id, owner, key)
+        with self._lock:
+            self._current_size()  # taille initiale lue avant l'écriture
+        tmp_path = None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as tmp:
+                tmp.write(content)
+            previous = path.stat().st_size if path.exists() else 0
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"PDF cache write failed: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return
+
+        with self._lock:
+            self._size += len(content) - previous
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Supprime les PDF les moins récemment servis jusqu'à repasser sous la limite"""
+        entries = []
+        for path in self.root.glob('*/*.pdf'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._size <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            self._size -= size
+            self.evictions += 1
+
+    def _remove(self, pattern: str) -> int:
+        removed = 0
+        with self._lock:
+            for path in self.root.glob(pattern):
+                try:
+                    size = path.stat().st_size
+                    path.unlink()
+                except OSError:
+                    continue
+                removed += 1
+                if self._size is not None:
+                    self._size -= size
+            self.invalidations += removed
+        return removed
+
+    def invalidate_document(self, document_id: str) -> int:
+        """Tous les PDF d'un document (exercice varié, document modifié)"""
+        return self._remove(f"{_safe_name(document_id)}/*.pdf")
+
+    def invalidate_owner(self, user_email: Optional[str]) -> int:
+        """Tous les PDF personnalisés d'un utilisateur Pro (template enregistré)"""
+        return self._remove(f"*/{owner_tag(user_email)}-*.pdf")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size_bytes': self._size if self._size is not None else 0,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Instance globale
+pdf_cache = PDFCache()
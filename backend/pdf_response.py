@@ -0,0 +1,99 @@
+"""
+PDF Response - Envoi des PDF exportés sans fichier temporaire
+
+Les exports écrivaient chaque PDF dans un NamedTemporaryFile(delete=False) puis le
+renvoyaient par FileResponse : une écriture et une relecture de plus par export, et des
+fichiers jamais supprimés (le disque se remplissait sous charge). Désormais :
+
+- pdf_response() : les octets rendus sont envoyés directement depuis la mémoire
+- zip_response() : plusieurs PDF (sujet + corrigé) dans une archive construite en mémoire
+- pdf_file_response() : un PDF du cache disque est envoyé depuis son fichier
+  (http.response.pathsend, donc sendfile, quand le serveur ASGI le propose ; lecture par
+  blocs sinon)
+- cleanup_temp_files() : supprime au démarrage les écritures interrompues (*.tmp) des
+  caches disque de l'application ; le répertoire temporaire du système, partagé avec
+  d'autres programmes, n'est pas parcouru
+"""
+
+import io
+import logging
+import os
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterable, Union
+from urllib.parse import quote
+
+from fastapi import Response
+from fastapi.responses import FileResponse
+
+logger = logging.getLogger(__name__)
+
+PDF_MEDIA_TYPE = 'application/pdf'
+ZIP_MEDIA_TYPE = 'application/zip'
+
+# Âge au-delà duquel un fichier temporaire est considéré comme abandonné
+TEMP_FILE_MAX_AGE = int(os.environ.get('TEMP_FILE_MAX_AGE', '3600'))
+
+
+def content_disposition(filename: str) -> str:
+    """En-tête attachment ; filename* (RFC 5987) pour les noms accentués (Mathématiques...)"""
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def pdf_response(pdf_bytes: bytes, filename: str) -> Response:
+    """PDF envoyé depuis la mémoire"""
+    return Response(
+        content=pdf_bytes,
+        media_type=PDF_MEDIA_TYPE,
+        headers={'Content-Disposition': content_disposition(filename)},
+    )
+
+
+def zip_response(files: Dict[str, bytes], filename: str) -> Response:
+    """Plusieurs PDF dans une archive ZIP construite en mémoire (sans compression : déjà compressés)"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    return Response(
+        content=buffer.getvalue(),
+        media_type=ZIP_MEDIA_TYPE,
+        headers={'Content-Disposition': content_disposition(filename)},
+    )
+
+
+def pdf_file_response(path: Union[str, Path], filename: str) -> FileResponse:
+    """PDF envoyé depuis un fichier du cache (sans le charger en mémoire)"""
+    return FileResponse(path, media_type=PDF_MEDIA_TYPE, filename=filename)
+
+
+def _remove_older_than(paths: Iterable[Path], max_age: float, now: float) -> int:
+    removed = 0
+    for path in paths:
+        try:
+            if now - path.stat().st_mtime < max_age:
+                continue
+            path.unlink()
+        except OSError:
+            continue
+        removed += 1
+    return removed
+
+
+def cleanup_temp_files(cache_dirs: Iterable[Union[str, Path]] = (),
+                       max_age: float = TEMP_FILE_MAX_AGE) -> int:
+    """
+    Supprime les fichiers *.tmp abandonnés depuis plus de max_age secondes dans les
+    répertoires de cache de l'application. Retourne le nombre de fichiers supprimés.
+    """
+    now = time.time()
+    removed = 0
+    for cache_dir in cache_dirs:
+        removed += _remove_older_than(Path(cache_dir).glob('**/*.tmp'), max_age, now)
+    if removed:
+        logger.info(f"Removed {removed} stale temporary files")
+    return removed
@@ -0,0 +1,24 @@
+"""
+PDF Stylesheets - Configuration de polices partagée par les mises en page d'un processus
+
+WeasyPrint reconstruisait sa configuration de polices (fontconfig, @font-face) à chaque
+export. Dans chaque processus du pool PDF, une seule FontConfiguration sert désormais à
+toutes les mises en page.
+
+Le CSS des templates reste dans le <head> du document : passé à render(stylesheets=...),
+il deviendrait une feuille d'origine « utilisateur » et changerait la cascade (les styles
+des SVG et les attributs style l'emporteraient, !important inversé). Son @import (Google
+Fonts) passe par le cache des ressources externes (pdf_url_fetcher) : il n'est plus
+téléchargé à chaque export.
+"""
+
+_font_config = None
+
+
+def font_configuration():
+    """FontConfiguration partagée par toutes les mises en page du processus"""
+    global _font_config
+    if _font_config is None:
+        from weasyprint.text.fonts import FontConfiguration
+        _font_config = FontConfiguration()
+    return _font_config
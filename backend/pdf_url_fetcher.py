@@ -0,0 +1,300 @@
+"""
+PDF URL Fetcher - Ressources externes des exports (logos, cartes, polices) mises en cache
+
+WeasyPrint résolvait à chaque export le logo Pro (file://) et téléchargeait les images
+des documents de Géographie (upload.wikimedia.org) ainsi que les polices des templates :
+une requête réseau par ressource et par export, et une mise en page bloquée si l'hôte
+ne répond pas. Le url_fetcher des processus du pool PDF :
+
+- garde les ressources en mémoire (URL_FETCH_MEMORY_MAX_MB) puis sur disque
+  (URL_FETCH_CACHE_DIR, URL_FETCH_CACHE_MAX_MB) : un nouvel export ne fait aucune requête
+- coupe les téléchargements après URL_FETCH_TIMEOUT secondes ; un échec est mémorisé
+  URL_FETCH_FAILURE_TTL secondes (l'image manque, la mise en page ne réattend pas)
+- réduit les images matricielles à PRINT_IMAGE_MAX_PX pixels de côté, déjà décodées et
+  ré-encodées une fois pour toutes (résolution d'impression)
+
+Un fichier local est identifié par son chemin, sa taille et sa date de modification :
+un nouveau logo enregistré au même chemin n'est pas servi depuis l'ancien cache.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+from urllib.parse import unquote, urlparse
+
+logger = logging.getLogger(__name__)
+
+URL_FETCH_CACHE_DIR = Path(os.environ.get('URL_FETCH_CACHE_DIR', Path(__file__).parent / 'url_cache'))
+URL_FETCH_CACHE_MAX_BYTES = int(float(os.environ.get('URL_FETCH_CACHE_MAX_MB', '128')) * 1024 * 1024)
+URL_FETCH_MEMORY_MAX_BYTES = int(float(os.environ.get('URL_FETCH_MEMORY_MAX_MB', '32')) * 1024 * 1024)
+URL_FETCH_TIMEOUT = float(os.environ.get('URL_FETCH_TIMEOUT', '3'))
+URL_FETCH_FAILURE_TTL = float(os.environ.get('URL_FETCH_FAILURE_TTL', '300'))
+PRINT_IMAGE_MAX_PX = int(os.environ.get('PRINT_IMAGE_MAX_PX', '1600'))
+
+USER_AGENT = 'LeMaitreMot-PDF/1.0 (export PDF)'
+
+MIME_EXTENSIONS = {
+    'image/png': 'png',
+    'image/jpeg': 'jpg',
+    'image/gif': 'gif',
+    'image/webp': 'webp',
+    'image/svg+xml': 'svg',
+    'text/css': 'css',
+    'font/woff2': 'woff2',
+    'font/woff': 'woff',
+    'font/ttf': 'ttf',
+}
+EXTENSION_MIMES = {extension: mime for mime, extension in MIME_EXTENSIONS.items()}
+EXTENSION_MIMES['jpeg'] = 'image/jpeg'
+
+# Formats ré-encodés après réduction (les autres, GIF animés compris, restent tels quels)
+_DOWNSCALED_FORMATS = {'image/png': 'PNG', 'image/jpeg': 'JPEG', 'image/webp': 'WEBP'}
+
+Resource = Tuple[bytes, str]
+
+
+def _mime_from_path(path: str) -> str:
+    return EXTENSION_MIMES.get(path.rsplit('.', 1)[-1].lower(), 'application/octet-stream')
+
+
+def fetch_url(url: str, timeout: float = URL_FETCH_TIMEOUT) -> Resource:
+    """Téléchargement (http, https) ou lecture (file) d'une ressource : (octets, type MIME)"""
+    parsed = urlparse(url)
+    if parsed.scheme == 'file':
+        path = unquote(parsed.path)
+        with open(path, 'rb') as f:
+            return f.read(), _mime_from_path(path)
+
+    request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        mime_type = response.headers.get_content_type() or _mime_from_path(parsed.path)
+        return response.read(), mime_type
+
+
+def downscale_image(content: bytes, mime_type: str, max_px: int = PRINT_IMAGE_MAX_PX) -> bytes:
+    """Image réduite à max_px pixels de côté (inchangée si plus petite ou non décodable)"""
+    image_format = _DOWNSCALED_FORMATS.get(mime_type)
+    if image_format is None or max_px <= 0:
+        return content
+    try:
+        from lazy_imports import get_pil_image
+        Image = get_pil_image()
+        with Image.open(io.BytesIO(content)) as image:
+            if max(image.size) <= max_px:
+                return content
+            image.thumbnail((max_px, max_px), Image.LANCZOS)
+            if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            output = io.BytesIO()
+            options = {'quality': 85, 'optimize': True} if image_format in ('JPEG', 'WEBP') else {'optimize': True}
+            image.save(output, image_format, **options)
+    except Exception as e:
+        logger.warning(f"Image kept at full size ({mime_type}): {e}")
+        return content
+    downscaled = output.getvalue()
+    return downscaled if len(downscaled) < len(content) else content
+
+
+class CachedURLFetcher:
+    """url_fetcher WeasyPrint avec cache mémoire + disque, délai court et images réduites"""
+
+    def __init__(self, fallback: Optional[Callable] = None,
+                 cache_dir: Union[str, Path, None] = URL_FETCH_CACHE_DIR,
+                 memory_bytes: int = URL_FETCH_MEMORY_MAX_BYTES,
+                 disk_bytes: int = URL_FETCH_CACHE_MAX_BYTES,
+                 timeout: float = URL_FETCH_TIMEOUT,
+                 failure_ttl: float = URL_FETCH_FAILURE_TTL,
+                 max_px: int = PRINT_IMAGE_MAX_PX,
+                 fetch: Callable[[str, float], Resource] = fetch_url):
+        self.fallback = fallback
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.timeout = timeout
+        self.failure_ttl = failure_ttl
+        self.max_px = max_px
+        self.fetch = fetch
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Resource]" = OrderedDict()
+        self._memory_size = 0
+        self._disk_size: Optional[int] = None
+        self._failures: Dict[str, float] = {}
+        self.memory_hits = self.disk_hits = self.fetches = self.failures = 0
+
+    # --- clés -------------------------------------------------------------------------
+
+    @staticmethod
+    def _key(url: str) -> Optional[str]:
+        parsed = urlparse(url)
+        if parsed.scheme in ('http', 'https'):
+            identity = url
+        elif parsed.scheme == 'file':
+            try:
+                stat = os.stat(unquote(parsed.path))
+            except OSError:
+                return None
+            identity = f"{url}|{stat.st_size}|{stat.st_mtime_ns}"
+        else:
+            return None
+        return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+    def _disk_path(self, key: str, mime_type: str) -> Path:
+        extension = MIME_EXTENSIONS.get(mime_type, 'bin')
+        return self.cache_dir / key[:2] / f"{key}.{extension}"
+
+    # --- mémoire ----------------------------------------------------------------------
+
+    def _memory_get(self, key: str) -> Optional[Resource]:
+        with self._lock:
+            resource = self._memory.get(key)
+            if resource is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+            return resource
+
+    def _memory_put(self, key: str, resource: Resource) -> None:
+        size = len(resource[0])
+        if size > self.memory_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_size -= len(previous[0])
+            self._memory[key] = resource
+            self._memory_size += size
+            while self._memory_size > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_size -= len(evicted[0])
+
+    # --- disque -----------------------------------------------------------------------
+
+    def _disk_get(self, key: str) -> Optional[Resource]:
+        if self.cache_dir is None:
+            return None
+        for path in self.cache_dir.glob(f"{key[:2]}/{key}.*"):
+            if path.suffix == '.tmp':
+                continue
+            try:
+                content = path.read_bytes()
+                os.utime(path)  # date d'accès pour l'éviction LRU
+            except OSError:
+                continue
+            with self._lock:
+                self.disk_hits += 1
+            extension = path.suffix[1:]
+            return content, EXTENSION_MIMES.get(extension, 'application/octet-stream')
+        return None
+
+    def _disk_put(self, key: str, resource: Resource) -> None:
+        if self.cache_dir is None or len(resource[0]) > self.disk_bytes:
+            return
+        path = self._disk_path(key, resource[1])
+        tmp_path = None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as tmp:
+                tmp.write(resource[0])
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"URL cache write failed: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return
+
+        with self._lock:
+            if self._disk_size is None:
+                self._disk_size = sum(p.stat().st_size for p in self.cache_dir.glob('*/*') if p.suffix != '.tmp')
+            else:
+                self._disk_size += len(resource[0])
+            if self._disk_size > self.disk_bytes:
+                self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        entries = []
+        for path in self.cache_dir.glob('*/*'):
+            if path.suffix == '.tmp':
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        self._disk_size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._disk_size <= self.disk_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            self._disk_size -= size
+
+    # --- url_fetcher --------------------------------------------------------------------
+
+    def get(self, url: str) -> Optional[Resource]:
+        """Ressource en cache ou téléchargée ; None pour les URL non gérées (data:, formula:...)"""
+        key = self._key(url)
+        if key is None:
+            return None
+
+        resource = self._memory_get(key) or self._disk_get(key)
+        if resource is not None:
+            self._memory_put(key, resource)
+            return resource
+
+        with self._lock:
+            failed_at = self._failures.get(key)
+        if failed_at is not None and time.monotonic() - failed_at < self.failure_ttl:
+            raise OSError(f"Recent failure, not fetched again: {url}")
+
+        try:
+            content, mime_type = self.fetch(url, self.timeout)
+        except Exception:
+            with self._lock:
+                self.failures += 1
+                self._failures[key] = time.monotonic()
+            raise
+        with self._lock:
+            self.fetches += 1
+            self._failures.pop(key, None)
+
+        resource = (downscale_image(content, mime_type, self.max_px), mime_type)
+        self._memory_put(key, resource)
+        self._disk_put(key, resource)
+        return resource
+
+    def __call__(self, url: str, *args, **kwargs) -> Dict[str, Any]:
+        resource = self.get(url)
+        if resource is None:
+            if self.fallback is None:
+                from lazy_imports import get_weasyprint
+                self.fallback = get_weasyprint().default_url_fetcher
+            return self.fallback(url, *args, **kwargs)
+        content, mime_type = resource
+        return {'string': content, 'mime_type': mime_type, 'redirected_url': url}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_size,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'fetches': self.fetches,
+                'failures': self.failures,
+            }
+
+
+# Instance globale (une par processus du pool PDF ; le cache disque est partagé)
+url_fetcher = CachedURLFetcher()
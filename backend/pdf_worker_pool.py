@@ -0,0 +1,324 @@
+"""
+PDF Worker Pool - Mise en page WeasyPrint dans des processus dédiés
+
+write_pdf() appelé dans un handler async bloquait la boucle d'événements (health checks
+et requêtes des autres utilisateurs compris) pendant toute la mise en page. Les exports
+passent désormais par un pool borné de processus, pré-chauffés au démarrage :
+
+- PDF_WORKERS processus, chacun ne traite qu'un export à la fois
+- au plus PDF_QUEUE_LIMIT exports en attente ; au-delà, PDFPoolSaturated (-> 503 + Retry-After)
+- un export qui dépasse PDF_RENDER_TIMEOUT secondes est interrompu : son processus est
+  tué puis remplacé
+- un processus est recyclé après PDF_WORKER_MAX_JOBS exports (mémoire de WeasyPrint)
+- un job peut porter plusieurs documents (html_batch_to_pdf_bytes, merged_html_to_pdf_bytes) :
+  les gros exports (fiches par élève) n'occupent pas toute la file
+
+Taille du pool, attente en file et temps de rendu sont exposés par stats()
+(endpoint /api/metrics/render).
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PDF_WORKERS = int(os.environ.get('PDF_WORKERS', str(min(2, os.cpu_count() or 1))))
+PDF_QUEUE_LIMIT = int(os.environ.get('PDF_QUEUE_LIMIT', '8'))
+PDF_RENDER_TIMEOUT = float(os.environ.get('PDF_RENDER_TIMEOUT', '60'))
+PDF_WORKER_MAX_JOBS = int(os.environ.get('PDF_WORKER_MAX_JOBS', '200'))
+PDF_RETRY_AFTER = int(os.environ.get('PDF_RETRY_AFTER', '5'))
+
+# Formules dans le PDF : "shared" = formules identiques chargées une seule fois par WeasyPrint
+FORMULA_EXPORT_MODE = os.environ.get('FORMULA_EXPORT_MODE', 'shared')
+
+# Première mise en page faite par chaque processus au démarrage (polices, CSS par défaut)
+WARMUP_HTML = '<html><body><p>Le Maître Mot</p></body></html>'
+
+
+class PDFRenderError(RuntimeError):
+    """Échec de la mise en page dans un processus du pool"""
+
+
+class PDFRenderTimeout(PDFRenderError):
+    """Mise en page interrompue après PDF_RENDER_TIMEOUT secondes"""
+
+
+class PDFPoolSaturated(Exception):
+    """Tous les processus sont occupés et la file d'attente est pleine"""
+
+    def __init__(self, retry_after: int = PDF_RETRY_AFTER):
+        super().__init__(f"PDF worker pool saturated, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+def _weasyprint_html(html_content: str):
+    from lazy_imports import get_weasyprint
+    from formula_dedup import prepare_pdf_html
+    from pdf_url_fetcher import url_fetcher as cached_url_fetcher
+
+    weasyprint = get_weasyprint()
+    if FORMULA_EXPORT_MODE == 'inline':
+        return weasyprint.HTML(string=html_content, url_fetcher=cached_url_fetcher)
+    # Formules partagées (formula_dedup), puis cache des logos, cartes et images distantes
+    html_content, url_fetcher = prepare_pdf_html(html_content, cached_url_fetcher)
+    return weasyprint.HTML(string=html_content, url_fetcher=url_fetcher)
+
+
+def _render_document(html_content: str):
+    from pdf_stylesheets import font_configuration
+
+    # CSS du template laissé dans le document (origine « auteur »), voir pdf_stylesheets
+    return _weasyprint_html(html_content).render(font_config=font_configuration())
+
+
+def html_to_pdf_bytes(html_content: str) -> bytes:
+    """Render export HTML to PDF with WeasyPrint"""
+    return _render_document(html_content).write_pdf()
+
+
+def html_batch_to_pdf_bytes(html_contents: List[str]) -> List[bytes]:
+    """Plusieurs exports dans un seul job du pool : un PDF par document HTML"""
+    return [html_to_pdf_bytes(html_content) for html_content in html_contents]
+
+
+def merged_html_to_pdf_bytes(html_contents: List[str]) -> bytes:
+    """Plusieurs documents HTML mis en page à la suite dans un seul PDF (livret)"""
+    documents = [_render_document(html_content) for html_content in html_contents]
+    pages = [page for document in documents for page in document.pages]
+    return documents[0].copy(pages).write_pdf()
+
+
+def _worker_main(conn, render_function: Callable[[Any], Any], warmup_html: Optional[str]) -> None:
+    """
+    Boucle d'un processus du pool : un job (fonction, contenu) à la fois, None pour s'arrêter.
+    Fonction None : render_function du pool.
+    """
+    if warmup_html is not None:
+        try:
+            render_function(warmup_html)
+        except Exception:
+            pass  # l'erreur réapparaîtra sur le premier vrai export, avec son message
+
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if job is None:
+            break
+        job_function, payload = job
+        try:
+            conn.send((True, (job_function or render_function)(payload)))
+        except Exception as e:
+            conn.send((False, f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    __slots__ = ('process', 'conn', 'jobs')
+
+    def __init__(self, context, render_function, warmup_html):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn, render_function, warmup_html),
+            name='pdf-worker', daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+
+    def stop(self, timeout: float = 1.0) -> None:
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        self.kill()
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class _Timing:
+    __slots__ = ('count', 'total', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def report(self) -> Dict[str, float]:
+        return {
+            'mean_ms': round(self.total * 1000 / self.count, 3) if self.count else 0.0,
+            'max_ms': round(self.max * 1000, 3),
+        }
+
+
+class PDFWorkerPool:
+    """Pool borné de processus de rendu PDF, avec file d'attente limitée et timeouts"""
+
+    def __init__(self, size: int = PDF_WORKERS, max_queue: int = PDF_QUEUE_LIMIT,
+                 timeout: float = PDF_RENDER_TIMEOUT, max_jobs: int = PDF_WORKER_MAX_JOBS,
+                 render_function: Callable[[str], bytes] = html_to_pdf_bytes,
+                 warmup_html: Optional[str] = WARMUP_HTML, retry_after: int = PDF_RETRY_AFTER):
+        self.size = max(1, size)
+        self.max_queue = max(0, max_queue)
+        self.timeout = timeout
+        self.max_jobs = max_jobs
+        self.retry_after = retry_after
+        self.render_function = render_function
+        self.warmup_html = warmup_html
+
+        self._lock = Lock()
+        self._context = multiprocessing.get_context('spawn')
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._workers: List[_Worker] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+
+        self.jobs = self.errors = self.timeouts = self.rejected = self.restarts = 0
+        self._queue_wait = _Timing()
+        self._render_time = _Timing()
+
+    @property
+    def started(self) -> bool:
+        return self._executor is not None
+
+    def start(self) -> None:
+        """Lance (et pré-chauffe) les processus ; sans effet si le pool tourne déjà"""
+        with self._lock:
+            if self._executor is not None:
+                return
+            for _ in range(self.size):
+                worker = _Worker(self._context, self.render_function, self.warmup_html)
+                self._workers.append(worker)
+                self._idle.put(worker)
+            # Un thread par export admis : il attend un processus libre puis sa réponse
+            self._executor = ThreadPoolExecutor(max_workers=self.size + self.max_queue,
+                                                thread_name_prefix='pdf-pool')
+        logger.info(f"PDF worker pool started: {self.size} processes, queue limit {self.max_queue}")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+            workers, self._workers = self._workers, []
+            self._idle = queue.Queue()
+        if executor is not None:
+            executor.shutdown(wait=False)
+        for worker in workers:
+            worker.stop()
+
+    def _replace(self, worker: _Worker) -> None:
+        """Tue un processus (timeout, plantage, recyclage) et le remplace"""
+        worker.kill()
+        replacement = _Worker(self._context, self.render_function, self.warmup_html)
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+            self._workers.append(replacement)
+            self.restarts += 1
+        self._idle.put(replacement)
+
+    def render_sync(self, html_content: Any, render_function: Optional[Callable[[Any], Any]] = None,
+                    timeout: Optional[float] = None) -> Any:
+        """
+        Rendu bloquant (thread appelant) dans un processus du pool. render_function
+        (fonction de module, importable par les processus) remplace celle du pool pour
+        ce job ; timeout remplace PDF_RENDER_TIMEOUT (jobs de plusieurs documents).
+        """
+        self.start()
+        timeout = self.timeout if timeout is None else timeout
+        queued_at = time.perf_counter()
+        worker = self._idle.get()
+        started_at = time.perf_counter()
+
+        try:
+            worker.conn.send((render_function, html_content))
+            if not worker.conn.poll(timeout):
+                with self._lock:
+                    self.timeouts += 1
+                self._replace(worker)
+                worker = None
+                raise PDFRenderTimeout(f"PDF rendering exceeded {timeout:g}s")
+            ok, payload = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            # Processus mort pendant la mise en page (mémoire, signal)
+            if worker is not None:
+                self._replace(worker)
+                worker = None
+            with self._lock:
+                self.errors += 1
+            raise PDFRenderError(f"PDF worker crashed: {e}") from e
+        finally:
+            if worker is not None:
+                worker.jobs += 1
+                if worker.jobs >= self.max_jobs:
+                    self._replace(worker)
+                else:
+                    self._idle.put(worker)
+            with self._lock:
+                self.jobs += 1
+                self._queue_wait.add(started_at - queued_at)
+                self._render_time.add(time.perf_counter() - started_at)
+
+        if not ok:
+            with self._lock:
+                self.errors += 1
+            raise PDFRenderError(payload)
+        return payload
+
+    async def render(self, html_content: Any, render_function: Optional[Callable[[Any], Any]] = None,
+                     timeout: Optional[float] = None) -> Any:
+        """
+        Rendu sans bloquer la boucle d'événements. PDFPoolSaturated si tous les processus
+        sont occupés et que PDF_QUEUE_LIMIT exports attendent déjà.
+        """
+        self.start()
+        with self._lock:
+            if self._pending >= self.size + self.max_queue:
+                self.rejected += 1
+                raise PDFPoolSaturated(self.retry_after)
+            self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, self.render_sync, html_content, render_function, timeout
+            )
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            busy = len(self._workers) - self._idle.qsize() if self._workers else 0
+            return {
+                'size': self.size,
+                'alive': sum(worker.process.is_alive() for worker in self._workers),
+                'busy': busy,
+                'queued': max(0, self._pending - busy),
+                'queue_limit': self.max_queue,
+                'jobs': self.jobs,
+                'errors': self.errors,
+                'timeouts': self.timeouts,
+                'rejected': self.rejected,
+                'restarts': self.restarts,
+                'queue_wait': self._queue_wait.report(),
+                'render_time': self._render_time.report(),
+            }
+
+
+# Instance globale (démarrée au startup de l'application)
+pdf_worker_pool = PDFWorkerPool()
@@ -0,0 +1,233 @@
+"""
+Render Pipeline - Rendu unique des exercices en artefacts versionnés
+
+Le même contenu était rendu à la création, à chaque listing (/api/documents) et à chaque
+export PDF (deux passes de conversion, schéma rendu deux fois). L'étape de rendu produit
+désormais, par exercice, un artefact immuable :
+
+- 'web' : énoncé et solution en HTML pour le frontend (formules servies par figure_store)
+- 'pdf' : énoncé, solution et options QCM en HTML pour les templates WeasyPrint
+- 'figure_svg' : SVG du schéma géométrique (donnees.schema)
+
+Les SVG des artefacts sont minifiés par svg_optimizer ; les octets gagnés sont gardés
+dans l'artefact ('svg_bytes', par version) et sommés par document (svg_report).
+
+L'artefact est identifié par l'empreinte du contenu source de l'exercice et par
+RENDER_PIPELINE_VERSION ; il est gardé dans un LRU en mémoire et dans la collection
+Mongo `render_artifacts`. Listing et export lisent les artefacts au lieu de re-rendre.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+from latex_to_svg import latex_renderer
+from geometry_renderer import geometry_renderer
+from render_schema import schema_renderer
+from mathml_converter import process_math_content_for_pdf
+from figure_store import figure_store
+from figure_cache import get_cache
+from svg_optimizer import optimize_html_svgs
+
+logger = logging.getLogger(__name__)
+
+# À incrémenter quand la sortie d'un renderer change : les anciens artefacts ne sont plus lus
+RENDER_PIPELINE_VERSION = 2
+
+ARTIFACTS_COLLECTION = 'render_artifacts'
+
+# Champs source d'un exercice : tout ce dont dépendent les rendus
+_SOURCE_FIELDS = ('type', 'enonce', 'solution', 'donnees')
+
+
+def process_exercise_content(content: str) -> str:
+    """
+    Processes the exercise content to render both LaTeX and geometric schemas.
+    This centralizes all content processing logic for consistency.
+    """
+    if not content or not isinstance(content, str):
+        return content if isinstance(content, str) else ""
+
+    # 1. Process legacy geometric schemas (for backward compatibility)
+    try:
+        content = geometry_renderer.process_geometric_schemas_for_web(content)
+    except Exception as e:
+        logger.error(f"Error processing legacy geometric schemas: {e}")
+
+    # 2. Process LaTeX formulas
+    try:
+        content = latex_renderer.convert_latex_to_svg(content)
+    except Exception as e:
+        logger.error(f"Error processing LaTeX: {e}")
+
+    return content
+
+
+class _SVGBytes:
+    """Octets SVG avant/après optimisation d'une version de l'artefact"""
+
+    def __init__(self):
+        self.bytes_in = self.bytes_out = 0
+
+    def optimize(self, html: str) -> str:
+        html, bytes_in, bytes_out = optimize_html_svgs(html)
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+        return html
+
+    def report(self) -> List[int]:
+        return [self.bytes_in, self.bytes_out]
+
+
+def artifact_key(exercise: Dict[str, Any]) -> str:
+    """Empreinte du contenu source de l'exercice et de la version du pipeline"""
+    source = {field: exercise.get(field) for field in _SOURCE_FIELDS}
+    payload = json.dumps([RENDER_PIPELINE_VERSION, source], sort_keys=True,
+                         ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _render_solution(solution: Any, render) -> Dict[str, Any]:
+    rendered: Dict[str, Any] = {}
+    if not isinstance(solution, dict):
+        return rendered
+    if solution.get('resultat'):
+        rendered['resultat'] = render(solution['resultat'])
+    if solution.get('etapes') and isinstance(solution['etapes'], list):
+        rendered['etapes'] = [render(step) for step in solution['etapes']]
+    return rendered
+
+
+class RenderPipeline:
+    """Rendu des exercices en artefacts, mémoïsés en mémoire et dans Mongo"""
+
+    def __init__(self):
+        self.cache = get_cache('render_artifacts')
+
+    def render(self, exercise: Dict[str, Any], key: Optional[str] = None) -> Dict[str, Any]:
+        """Artefact complet (web, pdf, figure) d'un exercice"""
+        enonce = exercise.get('enonce')
+        donnees = exercise.get('donnees') if isinstance(exercise.get('donnees'), dict) else {}
+        web_bytes, pdf_bytes = _SVGBytes(), _SVGBytes()
+
+        def web_html(text: str) -> str:
+            return figure_store.store_formulas(web_bytes.optimize(process_exercise_content(text)))
+
+        def pdf_html(text: str) -> str:
+            return pdf_bytes.optimize(
+                latex_renderer.convert_latex_to_svg(geometry_renderer.process_geometric_schemas(text)))
+
+        pdf_options = None
+        if exercise.get('type') == 'qcm' and donnees.get('options'):
+            pdf_options = [pdf_html(option) for option in donnees['options']]
+
+        figure_svg = ''
+        if donnees.get('schema'):
+            try:
+                figure_svg = pdf_bytes.optimize(schema_renderer.render_to_svg(donnees['schema']) or '')
+            except Exception as e:
+                logger.error(f"Error rendering schema for artifact: {e}")
+
+        return {
+            '_id': key or artifact_key(exercise),
+            'version': RENDER_PIPELINE_VERSION,
+            'web': {
+                'enonce': web_html(enonce) if enonce else enonce,
+                'solution': _render_solution(exercise.get('solution'), web_html),
+            },
+            'pdf': {
+                'enonce': pdf_html(process_math_content_for_pdf(process_exercise_content(enonce))) if enonce else enonce,
+                'solution': _render_solution(exercise.get('solution'),
+                                             lambda text: pdf_html(process_exercise_content(text))),
+                'options': pdf_options,
+            },
+            'figure_svg': figure_svg,
+            'svg_bytes': {'web': web_bytes.report(), 'pdf': pdf_bytes.report()},
+        }
+
+    def _render_all(self, exercises: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [self.render(exercise, key) for key, exercise in exercises.items()]
+
+    async def artifacts_for(self, db, exercises: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Artefacts des exercices, dans l'ordre : LRU, puis Mongo (une requête), puis rendu
+        des manquants (enregistrés dans Mongo). Sans base joignable, le rendu est seulement
+        gardé en mémoire.
+        """
+        keys = [artifact_key(exercise) for exercise in exercises]
+        found: Dict[str, Dict[str, Any]] = {}
+        for key in keys:
+            artifact = self.cache.get(key)
+            if artifact is not None:
+                found[key] = artifact
+
+        missing = sorted(set(keys) - set(found))
+        if missing and db is not None:
+            try:
+                async for artifact in db[ARTIFACTS_COLLECTION].find({'_id': {'$in': missing}}):
+                    found[artifact['_id']] = artifact
+                    self.cache.put(artifact['_id'], artifact)
+            except Exception as e:
+                logger.warning(f"Render artifacts lookup failed, rendering again: {e}")
+
+        # Rendu (LaTeX, schémas, MathML) hors de la boucle d'événements
+        to_render = {key: exercise for key, exercise in zip(keys, exercises) if key not in found}
+        rendered = await asyncio.to_thread(self._render_all, to_render) if to_render else []
+        for artifact in rendered:
+            found[artifact['_id']] = artifact
+            self.cache.put(artifact['_id'], artifact)
+
+        if rendered and db is not None:
+            try:
+                # ordered=False : un artefact déjà inséré par une requête concurrente
+                # (même clé, même contenu) n'empêche pas l'insertion des autres
+                await db[ARTIFACTS_COLLECTION].insert_many([dict(artifact) for artifact in rendered], ordered=False)
+            except Exception as e:
+                logger.debug(f"Render artifacts not all stored: {e}")
+
+        return [found[key] for key in keys]
+
+
+def apply_artifact(exercise: Dict[str, Any], artifact: Dict[str, Any], flavor: str) -> Dict[str, Any]:
+    """Remplace le contenu de l'exercice par sa version rendue ('web' ou 'pdf')"""
+    rendered = artifact[flavor]
+    if rendered.get('enonce'):
+        exercise['enonce'] = rendered['enonce']
+
+    solution = exercise.get('solution')
+    if isinstance(solution, dict):
+        if 'resultat' in rendered['solution']:
+            solution['resultat'] = rendered['solution']['resultat']
+        if 'etapes' in rendered['solution']:
+            solution['etapes'] = list(rendered['solution']['etapes'])
+
+    if flavor == 'pdf':
+        if rendered.get('options') is not None:
+            exercise['donnees']['options'] = list(rendered['options'])
+        exercise['schema_svg'] = artifact['figure_svg']
+    return exercise
+
+
+def svg_report(artifacts: List[Dict[str, Any]], flavor: str) -> Dict[str, Any]:
+    """Octets SVG d'un document avant/après optimisation, pour une version ('web' ou 'pdf')"""
+    bytes_in = sum(artifact.get('svg_bytes', {}).get(flavor, [0, 0])[0] for artifact in artifacts)
+    bytes_out = sum(artifact.get('svg_bytes', {}).get(flavor, [0, 0])[1] for artifact in artifacts)
+    return {
+        'svg_bytes_in': bytes_in,
+        'svg_bytes_out': bytes_out,
+        'svg_bytes_saved': bytes_in - bytes_out,
+    }
+
+
+async def render_exercises(db, exercises: List[Dict[str, Any]], flavor: str) -> Dict[str, Any]:
+    """Applique aux exercices (dictionnaires) leurs artefacts rendus ; renvoie le bilan SVG du document"""
+    artifacts = await render_pipeline.artifacts_for(db, exercises)
+    for exercise, artifact in zip(exercises, artifacts):
+        apply_artifact(exercise, artifact, flavor)
+    return svg_report(artifacts, flavor)
+
+
+# Instance globale
+render_pipeline = RenderPipeline()
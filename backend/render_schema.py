@@ -2,28 +2,46 @@
 Schema Rendering Module - Convert JSON geometric schemas to SVG images
 """
 
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-import numpy as np
-from io import StringIO
+import os
 import logging
 from logger import get_logger, log_execution_time, log_schema_processing
+from lazy_imports import get_patches
+from figure_canvas import new_figure, figure_to_svg
+from figure_cache import memoize_figure
+from schema_svg_renderer import schema_svg_renderer
+from figure_registry import figure_registry, figure_type_of, ANY_FIGURE, FORMAT_SVG
 
 logger = get_logger()
 
+# 'native' : SVG écrit directement (schema_svg_renderer), matplotlib en repli ;
+# 'matplotlib' : rendu historique uniquement
+SCHEMA_RENDER_BACKEND = os.environ.get('SCHEMA_RENDER_BACKEND', 'native')
+
 class SchemaRenderer:
     """Converts JSON schema descriptions to SVG figures"""
+    # matplotlib is loaded (and configured for clean SVG output) on first
+    # render, see lazy_imports
+    
+    def __init__(self, backend: str = SCHEMA_RENDER_BACKEND):
+        self.backend = backend
+        # Registry profile: native SVG then matplotlib, or matplotlib only
+        self.profile = 'schema' if backend == 'native' else 'schema_matplotlib'
     
-    def __init__(self):
-        # Configure matplotlib for clean SVG output
-        plt.rcParams.update({
-            'font.size': 10,
-            'font.family': 'sans-serif',
-            'svg.fonttype': 'none',  # Keep text as text in SVG
-            'figure.figsize': (8, 6)
-        })
+    def matplotlib_renderers(self) -> dict:
+        """matplotlib renderers by schema type (registered in figure_registry)"""
+        return {
+            'cylindre': self._render_cylindre,
+            'triangle': self._render_triangle,
+            'triangle_rectangle': self._render_triangle_rectangle,
+            'rectangle': self._render_rectangle,
+            'carre': self._render_carre,
+            'cercle': self._render_cercle,
+            'pyramide': self._render_pyramide,
+            ANY_FIGURE: self._render_generic_polygon,
+        }
     
     @log_execution_time("render_to_svg")
+    @memoize_figure("schema_svg", variant=lambda renderer: renderer.profile)
     def render_to_svg(self, schema_data: dict) -> str:
         """
         Convert schema JSON to SVG string
@@ -36,7 +54,7 @@ class SchemaRenderer:
             logger.debug("No schema data provided or invalid format")
             return ""
         
-        schema_type = schema_data.get("type", "").lower()
+        schema_type = figure_type_of(schema_data)
         logger.info(
             "Starting SVG rendering",
             module_name="render_schema",
@@ -45,21 +63,7 @@ class SchemaRenderer:
         )
         
         try:
-            if schema_type == "cylindre":
-                return self._render_cylindre(schema_data)
-            elif schema_type == "triangle":
-                return self._render_triangle(schema_data)
-            elif schema_type == "triangle_rectangle":
-                return self._render_triangle_rectangle(schema_data)
-            elif schema_type == "rectangle":
-                return self._render_rectangle(schema_data)
-            elif schema_type == "carre":
-                return self._render_carre(schema_data)
-            elif schema_type == "cercle":
-                return self._render_cercle(schema_data)
-            elif schema_type == "pyramide":
-                return self._render_pyramide(schema_data)
-            else:
+            if not figure_registry.supports(self.profile, schema_type, FORMAT_SVG, exact=True):
                 logger.warning(
                     "Unsupported schema type - falling back to generic polygon",
                     module_name="render_schema",
@@ -67,9 +71,8 @@ class SchemaRenderer:
                     schema_type=schema_type,
                     status="unsupported_fallback"
                 )
-                # Try generic polygon fallback for unsupported types
-                return self._render_generic_polygon(schema_data)
-                
+            return figure_registry.render(self.profile, schema_type, FORMAT_SVG, schema_data) or ""
+        
         except Exception as e:
             logger.error(
                 "Error rendering schema",
@@ -86,7 +89,8 @@ class SchemaRenderer:
     
     def _render_cylindre(self, data: dict) -> str:
         """Render a cylinder with given radius and height"""
-        fig, ax = plt.subplots(figsize=(6, 8))
+        patches = get_patches()
+        fig, ax = new_figure(6, 8)
         
         rayon = data.get("rayon", 3)
         hauteur = data.get("hauteur", 5)
@@ -121,7 +125,7 @@ class SchemaRenderer:
     
     def _render_triangle(self, data: dict) -> str:
         """Render a triangle"""
-        fig, ax = plt.subplots(figsize=(6, 6))
+        fig, ax = new_figure(6, 6)
         
         # Get points or use defaults
         points = data.get("points", ["A", "B", "C"])
@@ -230,7 +234,7 @@ class SchemaRenderer:
     
     def _render_triangle_rectangle(self, data: dict) -> str:
         """Render a right triangle with proper right angle marker"""
-        fig, ax = plt.subplots(figsize=(6, 6))
+        fig, ax = new_figure(6, 6)
         
         # Get points or use defaults
         points = data.get("points", ["A", "B", "C"])
@@ -327,7 +331,8 @@ class SchemaRenderer:
     
     def _render_rectangle(self, data: dict) -> str:
         """Render a rectangle"""
-        fig, ax = plt.subplots(figsize=(6, 4))
+        patches = get_patches()
+        fig, ax = new_figure(6, 4)
         
         longueur = data.get("longueur", 6)
         largeur = data.get("largeur", 4)
@@ -351,7 +356,8 @@ class SchemaRenderer:
     
     def _render_carre(self, data: dict) -> str:
         """Render a square"""
-        fig, ax = plt.subplots(figsize=(5, 5))
+        patches = get_patches()
+        fig, ax = new_figure(5, 5)
         
         cote = data.get("cote", 4)
         
@@ -373,7 +379,8 @@ class SchemaRenderer:
     
     def _render_cercle(self, data: dict) -> str:
         """Render a circle"""
-        fig, ax = plt.subplots(figsize=(6, 6))
+        patches = get_patches()
+        fig, ax = new_figure(6, 6)
         
         rayon = data.get("rayon", 3)
         
@@ -400,7 +407,7 @@ class SchemaRenderer:
     
     def _render_pyramide(self, data: dict) -> str:
         """Render a pyramid"""
-        fig, ax = plt.subplots(figsize=(6, 6))
+        fig, ax = new_figure(6, 6)
         
         base = data.get("base", "carre")
         hauteur = data.get("hauteur", 5)
@@ -437,19 +444,11 @@ class SchemaRenderer:
     
     def _fig_to_svg(self, fig) -> str:
         """Convert matplotlib figure to SVG string"""
-        svg_buffer = StringIO()
-        fig.savefig(svg_buffer, format='svg', bbox_inches='tight', 
-                   facecolor='white', edgecolor='none')
-        plt.close(fig)  # Free memory
-        
-        svg_content = svg_buffer.getvalue()
-        svg_buffer.close()
-        
-        return svg_content
+        return figure_to_svg(fig, bbox_inches='tight', facecolor='white', edgecolor='none')
     
     def _render_generic_polygon(self, data: dict) -> str:
         """Generic fallback renderer for unsupported schema types"""
-        fig, ax = plt.subplots(figsize=(6, 6))
+        fig, ax = new_figure(6, 6)
         
         schema_type = data.get("type", "unknown")
         points = data.get("points", [])
@@ -504,5 +503,16 @@ class SchemaRenderer:
             logger.warning(f"Not enough points for polygon: {len(points)}")
             return ""
 
+def register_schema_figures(renderer: SchemaRenderer) -> None:
+    """Profils 'schema' (SVG natif puis repli matplotlib) et 'schema_matplotlib'"""
+    native = schema_svg_renderer.renderers()
+    for schema_type, render in renderer.matplotlib_renderers().items():
+        if schema_type in native:
+            figure_registry.register('schema', schema_type, FORMAT_SVG, native[schema_type])
+        figure_registry.register('schema', schema_type, FORMAT_SVG, render)
+        figure_registry.register('schema_matplotlib', schema_type, FORMAT_SVG, render)
+
+
 # Global instance
-schema_renderer = SchemaRenderer()
\ No newline at end of file
+schema_renderer = SchemaRenderer()
+register_schema_figures(schema_renderer)
\ No newline at end of file
@@ -0,0 +1,340 @@
+"""
+Schema SVG Renderer - Rendu SVG natif des schémas de SchemaRenderer
+
+Mêmes figures que les versions matplotlib de render_schema.py (cylindre, pyramide,
+triangle, triangle rectangle, rectangle, carré, cercle, polygone générique), écrites
+directement en SVG avec svg_builder : pas de figure matplotlib à créer, mettre en page
+puis sérialiser. Les coordonnées sont exprimées en unités mathématiques (y vers le haut)
+puis projetées dans le document par un Viewport.
+"""
+
+import math
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from svg_builder import SVGStringDocument
+from figure_registry import ANY_FIGURE
+
+logger = logging.getLogger(__name__)
+
+Coord = Tuple[float, float]
+
+# Couleurs des versions matplotlib
+FILL_COLORS = {
+    'cylindre': '#ADD8E6',   # lightblue
+    'polygone': '#ADD8E6',
+    'generique': '#D3D3D3',  # lightgray
+    'rectangle': '#90EE90',  # lightgreen
+    'carre': '#FFFFE0',      # lightyellow
+    'cercle': '#F08080',     # lightcoral
+}
+
+SCHEMA_STYLE = """
+        .schema-title { font-family: sans-serif; font-size: 16px; font-weight: bold; text-anchor: middle; }
+        .schema-edge { fill: none; stroke: #000000; stroke-width: 2px; stroke-linejoin: round; }
+        .schema-fill { stroke: none; }
+        .schema-hidden { fill: none; stroke: #000000; stroke-width: 1.5px; stroke-dasharray: 5,4; }
+        .schema-outline { fill: none; stroke: #0000FF; stroke-width: 2px; stroke-linejoin: round; }
+        .schema-mark { fill: none; stroke: #000000; stroke-width: 1px; }
+        .schema-point { fill: #FF0000; }
+        .schema-label { font-family: sans-serif; font-size: 14px; font-weight: bold; }
+        .schema-dim { font-family: sans-serif; font-size: 13px; }
+        .schema-dim-box { fill: #FFFFFF; fill-opacity: 0.8; stroke: #999999; stroke-width: 0.5px; }
+        """
+
+# Taille maximale de la zone de dessin (px) et marges
+MAX_DRAWING_SIZE = 320
+MARGIN = 30
+TITLE_HEIGHT = 30
+
+
+def parse_coordinate(value: Any) -> Optional[Coord]:
+    """'(0,3)' -> (0.0, 3.0) ; None si la chaîne n'est pas une coordonnée"""
+    if not isinstance(value, str):
+        return None
+    try:
+        x, y = map(float, value.strip().strip("()").split(","))
+    except ValueError:
+        return None
+    return (x, y)
+
+
+def circle_coords(points: List[str], radius: float = 3) -> Dict[str, Coord]:
+    """Points répartis régulièrement sur un cercle (polygones sans coordonnées)"""
+    return {
+        point: (radius * math.cos(2 * math.pi * i / len(points)), radius * math.sin(2 * math.pi * i / len(points)))
+        for i, point in enumerate(points)
+    }
+
+
+class Viewport:
+    """Projection des unités mathématiques (y vers le haut) vers les pixels du document"""
+
+    def __init__(self, xmin: float, xmax: float, ymin: float, ymax: float, title: str = ''):
+        span_x = max(xmax - xmin, 1e-9)
+        span_y = max(ymax - ymin, 1e-9)
+        self.scale = min(MAX_DRAWING_SIZE / span_x, MAX_DRAWING_SIZE / span_y)
+        self.xmin = xmin
+        self.ymax = ymax
+        self.top = MARGIN + (TITLE_HEIGHT if title else 0)
+        self.width = math.ceil(span_x * self.scale + 2 * MARGIN)
+        self.height = math.ceil(span_y * self.scale + self.top + MARGIN)
+        self.svg = SVGStringDocument(self.width, self.height, SCHEMA_STYLE)
+        if title:
+            self.svg.element('text', {'x': self.width / 2, 'y': MARGIN, 'class': 'schema-title'}, title)
+
+    @classmethod
+    def around(cls, coords: List[Coord], padding: float, title: str = '') -> 'Viewport':
+        xs = [x for x, _ in coords]
+        ys = [y for _, y in coords]
+        return cls(min(xs) - padding, max(xs) + padding, min(ys) - padding, max(ys) + padding, title)
+
+    def px(self, x: float, y: float) -> Coord:
+        return (MARGIN + (x - self.xmin) * self.scale, self.top + (self.ymax - y) * self.scale)
+
+    def path(self, coords: List[Coord], closed: bool = False) -> str:
+        num = self.svg.num
+        commands = []
+        for i, (x, y) in enumerate(coords):
+            px, py = self.px(x, y)
+            commands.append(f"{'M' if i == 0 else 'L'}{num(px)},{num(py)}")
+        return ' '.join(commands) + (' Z' if closed else '')
+
+    # --- Primitives -------------------------------------------------------
+
+    def polyline(self, coords: List[Coord], css_class: str = 'schema-edge', closed: bool = False) -> None:
+        self.svg.element('path', {'d': self.path(coords, closed), 'class': css_class})
+
+    def polygon(self, coords: List[Coord], fill: str, opacity: float, css_class: str = 'schema-edge') -> None:
+        self.svg.element('path', {
+            'd': self.path(coords, closed=True), 'class': css_class,
+            'style': f'fill: {fill}; fill-opacity: {opacity}',
+        })
+
+    def point(self, x: float, y: float, label: str = '', css_class: str = 'schema-point') -> None:
+        cx, cy = self.px(x, y)
+        self.svg.element('circle', {'cx': cx, 'cy': cy, 'r': 4, 'class': css_class})
+        if label:
+            self.svg.element('text', {'x': cx - 6, 'y': cy - 8, 'class': 'schema-label', 'text-anchor': 'end'}, label)
+
+    def text(self, x: float, y: float, label: str, anchor: str = 'middle', rotate: bool = False) -> None:
+        tx, ty = self.px(x, y)
+        attrs = {'x': tx, 'y': ty, 'class': 'schema-dim', 'text-anchor': anchor}
+        if rotate:
+            attrs['transform'] = f'rotate(-90 {self.svg.num(tx)} {self.svg.num(ty)})'
+        self.svg.element('text', attrs, label)
+
+    def boxed_text(self, x: float, y: float, label: str) -> None:
+        """Cote encadrée (équivalent du bbox arrondi de matplotlib)"""
+        tx, ty = self.px(x, y)
+        width = 7.5 * len(label) + 8
+        self.svg.element('rect', {
+            'x': tx - width / 2, 'y': ty - 13, 'width': width, 'height': 18, 'rx': 4, 'class': 'schema-dim-box'
+        })
+        self.svg.element('text', {'x': tx, 'y': ty, 'class': 'schema-dim', 'text-anchor': 'middle'}, label)
+
+    def ellipse(self, x: float, y: float, rx: float, ry: float, fill: str = 'none', css_class: str = 'schema-edge') -> None:
+        cx, cy = self.px(x, y)
+        self.svg.element('ellipse', {
+            'cx': cx, 'cy': cy, 'rx': rx * self.scale, 'ry': ry * self.scale,
+            'class': css_class, 'style': f'fill: {fill}',
+        })
+
+    def half_ellipse(self, x: float, y: float, rx: float, ry: float, front: bool, css_class: str) -> None:
+        """Moitié avant (bas) ou arrière (haut) d'une ellipse horizontale"""
+        num = self.svg.num
+        (x1, y1), (x2, _) = self.px(x - rx, y), self.px(x + rx, y)
+        sweep = 0 if front else 1
+        self.svg.element('path', {
+            'd': f"M{num(x1)},{num(y1)} A{num(rx * self.scale)},{num(ry * self.scale)} 0 0 {sweep} {num(x2)},{num(y1)}",
+            'class': css_class,
+        })
+
+    def right_angle(self, x: float, y: float, size: float = 0.3) -> None:
+        self.polyline([(x, y + size), (x + size, y + size), (x + size, y)], 'schema-mark')
+
+    def to_string(self) -> str:
+        return self.svg.to_string()
+
+
+class SchemaSVGRenderer:
+    """Rendu SVG natif des schémas (une méthode par type, même contrat que SchemaRenderer)"""
+
+    def renderers(self) -> Dict[str, Callable[[dict], Optional[str]]]:
+        """
+        Renderers par type (enregistrés dans figure_registry par render_schema). Chacun
+        renvoie le SVG, "" si les données sont inutilisables (comme la version matplotlib),
+        None si le cas n'est pas couvert en natif (repli matplotlib).
+        """
+        return {
+            'cylindre': self.render_cylindre,
+            'pyramide': self.render_pyramide,
+            'triangle': self.render_triangle,
+            'triangle_rectangle': self.render_triangle_rectangle,
+            'rectangle': self.render_rectangle,
+            'carre': self.render_carre,
+            'cercle': self.render_cercle,
+            ANY_FIGURE: self.render_generic_polygon,
+        }
+
+    # --- Solides (croquis en perspective) ----------------------------------
+
+    def render_cylindre(self, data: dict) -> str:
+        rayon = data.get("rayon", 3)
+        hauteur = data.get("hauteur", 5)
+        ry = rayon * 0.15
+
+        view = Viewport(-rayon * 1.2, rayon * 2.2, -rayon * 0.6, hauteur + ry + rayon * 0.1, 'Cylindre')
+        fill = FILL_COLORS['cylindre']
+        # Surface latérale puis bases : arrière caché en pointillés, avant et dessus en traits pleins
+        view.polygon([(-rayon, 0), (-rayon, hauteur), (rayon, hauteur), (rayon, 0)], fill, 1, 'schema-fill')
+        view.ellipse(0, 0, rayon, ry, fill, 'schema-fill')
+        view.polyline([(-rayon, 0), (-rayon, hauteur)])
+        view.polyline([(rayon, 0), (rayon, hauteur)])
+        view.half_ellipse(0, 0, rayon, ry, front=False, css_class='schema-hidden')
+        view.half_ellipse(0, 0, rayon, ry, front=True, css_class='schema-edge')
+        view.ellipse(0, hauteur, rayon, ry, fill)
+        # Rayon de la base
+        view.polyline([(0, 0), (rayon, 0)], 'schema-hidden')
+        view.point(0, 0, css_class='schema-point')
+
+        view.text(rayon + 0.3, hauteur / 2, f'h = {hauteur} cm', anchor='start')
+        view.text(0, -rayon * 0.45, f'r = {rayon} cm')
+        return view.to_string()
+
+    def render_pyramide(self, data: dict) -> Optional[str]:
+        if data.get("base", "carre") != "carre":
+            return None
+        hauteur = data.get("hauteur", 5)
+        cote = data.get("cote", 4)
+
+        # Base carrée en perspective cavalière (fuyantes à 45°, réduites de moitié)
+        depth = cote * 0.5 * math.cos(math.pi / 4)
+        a, b = (0, 0), (cote, 0)
+        c, d = (cote + depth, depth), (depth, depth)
+        centre = ((cote + depth) / 2, depth / 2)
+        apex = (centre[0], centre[1] + hauteur)
+
+        view = Viewport.around([a, b, c, d, apex], cote * 0.35, 'Pyramide')
+        view.polyline([a, d, c], 'schema-hidden')
+        view.polyline([d, apex], 'schema-hidden')
+        view.polyline([centre, apex], 'schema-hidden')
+        view.polygon([a, b, apex], FILL_COLORS['polygone'], 0.3)
+        view.polygon([b, c, apex], FILL_COLORS['polygone'], 0.15)
+        view.right_angle(centre[0], centre[1], size=cote * 0.08)
+
+        view.point(*apex, label='S')
+        view.text(cote / 2, -cote * 0.15, f'{cote} cm')
+        view.text(apex[0] + 0.2, (centre[1] + apex[1]) / 2, f'h = {hauteur} cm', anchor='start')
+        return view.to_string()
+
+    # --- Figures planes ---------------------------------------------------
+
+    def render_rectangle(self, data: dict) -> str:
+        longueur = data.get("longueur", 6)
+        largeur = data.get("largeur", 4)
+
+        view = Viewport(-1, longueur + 1, -1, largeur + 1, 'Rectangle')
+        view.polygon([(0, 0), (longueur, 0), (longueur, largeur), (0, largeur)], FILL_COLORS['rectangle'], 1)
+        view.text(longueur / 2, -0.5, f'{longueur} cm')
+        view.text(-0.4, largeur / 2, f'{largeur} cm', rotate=True)
+        return view.to_string()
+
+    def render_carre(self, data: dict) -> str:
+        cote = data.get("cote", 4)
+
+        view = Viewport(-1, cote + 1, -1, cote + 1, 'Carré')
+        view.polygon([(0, 0), (cote, 0), (cote, cote), (0, cote)], FILL_COLORS['carre'], 1)
+        view.text(cote / 2, -0.5, f'{cote} cm')
+        return view.to_string()
+
+    def render_cercle(self, data: dict) -> str:
+        rayon = data.get("rayon", 3)
+
+        view = Viewport(-rayon * 1.2, rayon * 1.2, -rayon * 1.2, rayon * 1.2, 'Cercle')
+        view.ellipse(0, 0, rayon, rayon, FILL_COLORS['cercle'])
+        view.polyline([(0, 0), (rayon, 0)], 'schema-hidden')
+        view.text(rayon / 2, rayon * 0.1, f'r = {rayon} cm')
+        view.point(0, 0, label='O')
+        return view.to_string()
+
+    def _draw_polygon_figure(self, title: str, coords: Dict[str, Coord], outline: List[str],
+                             data: dict, fill: str, opacity: float) -> str:
+        """Polygone, sommets étiquetés, cotes des segments et angles droits"""
+        view = Viewport.around(list(coords.values()), 1, title)
+        view.polygon([coords[p] for p in outline], fill, opacity, 'schema-outline')
+
+        for segment in data.get("segments", []):
+            if len(segment) >= 3 and isinstance(segment[2], dict):
+                p1, p2, props = segment[0], segment[1], segment[2]
+                longueur = props.get("longueur")
+                if longueur and p1 in coords and p2 in coords:
+                    (x1, y1), (x2, y2) = coords[p1], coords[p2]
+                    view.boxed_text((x1 + x2) / 2, (y1 + y2) / 2 - 0.3, f'{longueur} cm')
+
+        for angle in data.get("angles", []):
+            if len(angle) >= 2 and isinstance(angle[1], dict):
+                point, props = angle[0], angle[1]
+                if props.get("angle_droit") and point in coords:
+                    view.right_angle(*coords[point])
+
+        for point in outline:
+            view.point(*coords[point], label=point)
+        return view.to_string()
+
+    def render_triangle(self, data: dict) -> str:
+        points = data.get("points", ["A", "B", "C"])
+        if len(points) == 3:
+            coords = dict(zip(points, [(0, 3), (0, 0), (4, 0)]))
+        elif len(points) == 4:
+            coords = dict(zip(points, [(0, 3), (0, 0), (4, 0), (4, 3)]))
+        else:
+            coords = circle_coords(points)
+
+        for point, value in data.get("labels", {}).items():
+            coord = parse_coordinate(value)
+            if coord is not None:
+                coords[point] = coord
+
+        missing_points = [p for p in points if p not in coords]
+        if missing_points or not points:
+            logger.warning(f"Missing coordinates for points {missing_points}, cannot render figure")
+            return ""
+
+        return self._draw_polygon_figure('Triangle', coords, points, data, FILL_COLORS['polygone'], 0.3)
+
+    def render_triangle_rectangle(self, data: dict) -> str:
+        points = data.get("points", ["A", "B", "C"])[:3]
+        if len(points) < 3:
+            return ""
+        coords = dict(zip(points, [(0, 4), (0, 0), (3, 0)]))
+
+        for point, value in data.get("labels", {}).items():
+            coord = parse_coordinate(value)
+            if coord is not None and point in coords:
+                coords[point] = coord
+
+        data = dict(data)
+        if not data.get("angles"):
+            # Angle droit par défaut au deuxième sommet (B dans ABC)
+            data["angles"] = [[points[1], {"angle_droit": True}]]
+        return self._draw_polygon_figure(
+            'Triangle Rectangle', coords, points, data, FILL_COLORS['polygone'], 0.3
+        )
+
+    def render_generic_polygon(self, data: dict) -> str:
+        points = data.get("points", [])
+        if len(points) < 3:
+            logger.warning(f"Not enough points for polygon: {len(points)}")
+            return ""
+        coords = circle_coords(points)
+        for point, value in data.get("labels", {}).items():
+            coord = parse_coordinate(value)
+            if coord is not None and point in coords:
+                coords[point] = coord
+
+        title = f'{str(data.get("type", "unknown")).title()} (générique)'
+        return self._draw_polygon_figure(title, coords, points, data, FILL_COLORS['generique'], 0.2)
+
+
+schema_svg_renderer = SchemaSVGRenderer()
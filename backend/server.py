@@ -1,32 +1,45 @@
 from fastapi import FastAPI, APIRouter, HTTPException, Response, Depends, BackgroundTasks, Request, Form, UploadFile, File
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, EmailStr
 from typing import List, Optional, Dict
 import uuid
 from datetime import datetime, timezone, timedelta
-from emergentintegrations.llm.chat import LlmChat, UserMessage
-from emergentintegrations.payments.stripe.checkout import StripeCheckout, CheckoutSessionResponse, CheckoutStatusResponse, CheckoutSessionRequest
 import json
 import re
-import tempfile
-import weasyprint
-from jinja2 import Template
+from functools import lru_cache
 from latex_to_svg import latex_renderer
 from geometry_renderer import geometry_renderer
 from render_schema import schema_renderer
+from lazy_imports import get_llm_chat, get_stripe_checkout
+from pdf_worker_pool import (
+    pdf_worker_pool, PDFPoolSaturated, PDFRenderTimeout, html_batch_to_pdf_bytes, merged_html_to_pdf_bytes
+)
+from pdf_cache import pdf_cache, owner_tag
+from template_engine import template_engine
+from pdf_response import pdf_response, pdf_file_response, zip_response, cleanup_temp_files
+from pdf_url_fetcher import URL_FETCH_CACHE_DIR
+from map_assets import map_asset_store, localize_exercise_documents
+from keyword_classifier import KeywordClassifier
+from db_indexes import ensure_indexes
+import warmup
+import figure_cache
+from figure_store import figure_store, figure_url, figure_img_tag, IMMUTABLE_CACHE_CONTROL
+from figure_registry import figure_registry
+from render_pipeline import process_exercise_content, render_pipeline, render_exercises
+from class_set import build_variant, split_evenly, CLASS_SET_MAX_VARIANTS
+from svg_optimizer import svg_savings
 # Nouveaux imports pour l'architecture mathématique structurée (réorganisés)
 from services.math_generation_service import MathGenerationService
 from services.math_text_service import MathTextService
 from routes.math_routes import generate_math_exercises_new_architecture
-import requests
-import latex2mathml.converter
 from logger import get_logger, log_execution_time, log_ai_generation, log_schema_processing, log_user_context, log_quota_check
 from curriculum_data import (
     CURRICULUM_DATA, 
@@ -48,7 +61,7 @@ from curriculum_complete import (
     log_feature_flag_access,
     process_math_content_for_pdf
 )
-from document_search import search_educational_document
+from document_search import search_educational_document, document_searcher
 
 ROOT_DIR = Path(__file__).parent
 TEMPLATES_DIR = ROOT_DIR / 'templates'
@@ -56,13 +69,21 @@ load_dotenv(ROOT_DIR / '.env')
 
 # Template loading function
 def load_template(template_name: str) -> str:
-    """Load HTML template from templates directory"""
-    template_path = TEMPLATES_DIR / f"{template_name}.html"
-    if not template_path.exists():
-        raise FileNotFoundError(f"Template {template_name}.html not found in {TEMPLATES_DIR}")
-    
-    with open(template_path, 'r', encoding='utf-8') as f:
-        return f.read()
+    """Source of an HTML template from the templates directory (compiled once by template_engine)"""
+    return template_engine.get_source(template_name)
+
+async def render_pdf(html_content, render_function=None, timeout: Optional[float] = None):
+    """Render export HTML to PDF in the WeasyPrint process pool (the event loop is never blocked)"""
+    try:
+        return await pdf_worker_pool.render(html_content, render_function=render_function, timeout=timeout)
+    except PDFPoolSaturated as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Trop d'exports en cours, réessayez dans quelques secondes",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except PDFRenderTimeout:
+        raise HTTPException(status_code=504, detail="La mise en page du PDF a dépassé le temps maximal")
 
 # Icon mapping for exercises - Professional cascading logic
 EXERCISE_ICON_MAPPING = {
@@ -146,6 +167,50 @@ EXERCISE_ICON_MAPPING = {
     "default": "book-open"
 }
 
+# (type, icon) of an exercise from its chapter or statement, per subject: every keyword
+# set is compiled once and scored in a single pass (see keyword_classifier)
+CHAPTER_TYPE_CLASSIFIERS = {
+    "Physique-Chimie": KeywordClassifier({
+        ("chemistry", "flask"): ["matière", "transformation", "constitution", "chimie"],
+        ("energy", "battery"): ["énergie", "conversion", "transfert"],
+        ("physics", "zap"): ["mouvement", "interaction", "force"],
+        ("waves", "radio"): ["signal", "signaux", "onde", "communiquer"],
+    }),
+    "SVT": KeywordClassifier({
+        ("biology", "dna"): ["vivant", "évolution", "génétique", "vie"],
+        ("geology", "mountain"): ["terre", "planète", "géologique", "enjeux"],
+        ("ecology", "globe"): ["environnement", "écosystème", "action humaine"],
+        ("health", "heart"): ["corps", "santé", "humain"],
+    }),
+    "Géographie": KeywordClassifier({
+        ("urban", "building-2"): ["ville", "urbain", "habitat", "loger", "bâti"],
+        ("demographic", "users"): ["population", "démographi", "mobilité", "humain"],
+        ("geographic", "globe"): ["monde", "mondial", "mondialisation", "planète"],
+        ("geographic", "compass"): ["territoire", "espace", "lieu", "région"],
+    }),
+}
+CHAPTER_DEFAULT_TYPES = {
+    "Physique-Chimie": ("experimental", "atom"),
+    "SVT": ("analysis", "leaf"),
+    "Géographie": ("cartographic", "map"),
+}
+MATH_CHAPTER_TYPES = KeywordClassifier({
+    "geometry": ["géométrie", "pythagore", "thalès", "trigonométrie", "triangle", "volume"],
+    "algebra": ["équation", "fonction", "fraction", "algèbre", "calcul"],
+    "statistics": ["statistique", "probabilité"],
+})
+MATH_STATEMENT_TYPES = KeywordClassifier({
+    ("geometry", "triangle-ruler"): ["triangle", "cercle", "carré", "rectangle", "géométrique", "angle", "côté", "volume", "aire"],
+    ("algebra", "calculator"): ["équation", "fonction", "fraction", "calcul", "nombre", "résoudre", "simplifier"],
+    ("statistics", "bar-chart"): ["statistique", "moyenne", "graphique", "données", "probabilité", "hasard"],
+})
+# Statements that get a geometric schema (second AI pass)
+GEOMETRY_SCHEMA_KEYWORDS = KeywordClassifier({
+    "geometry": ["triangle", "cercle", "carré", "rectangle", "parallélogramme",
+                 "géométrie", "figure", "pythagore", "thalès", "trigonométrie",
+                 "angle", "périmètre", "aire", "longueur", "côté", "hypoténuse"],
+})
+
 def enrich_exercise_with_icon(exercise_data: dict, chapitre: str, matiere: str = None) -> dict:
     """
     Professional cascading icon enrichment logic extended for Physique-Chimie and SVT:
@@ -157,65 +222,13 @@ def enrich_exercise_with_icon(exercise_data: dict, chapitre: str, matiere: str =
     """
     logger = get_logger()
     
-    # Priority 1: Matiere-specific logic FIRST
-    if matiere == "Physique-Chimie":
-        logger.info(f"🧪 Enriching Physique-Chimie exercise for chapter: {chapitre}")
-        if any(word in chapitre.lower() for word in ["matière", "transformation", "constitution", "chimie"]):
-            exercise_data["type"] = "chemistry"
-            exercise_data["icone"] = "flask"
-        elif any(word in chapitre.lower() for word in ["énergie", "conversion", "transfert"]):
-            exercise_data["type"] = "energy"  
-            exercise_data["icone"] = "battery"
-        elif any(word in chapitre.lower() for word in ["mouvement", "interaction", "force"]):
-            exercise_data["type"] = "physics"
-            exercise_data["icone"] = "zap"
-        elif any(word in chapitre.lower() for word in ["signal", "onde", "communiquer"]):
-            exercise_data["type"] = "waves"
-            exercise_data["icone"] = "radio"
-        else:
-            exercise_data["type"] = "experimental"
-            exercise_data["icone"] = "atom"
-        logger.info(f"🧪 Assigned type: {exercise_data['type']}, icon: {exercise_data['icone']}")
-        return exercise_data
-            
-    elif matiere == "SVT":
-        logger.info(f"🌱 Enriching SVT exercise for chapter: {chapitre}")
-        if any(word in chapitre.lower() for word in ["vivant", "évolution", "génétique", "vie"]):
-            exercise_data["type"] = "biology"
-            exercise_data["icone"] = "dna"
-        elif any(word in chapitre.lower() for word in ["terre", "planète", "géologique", "enjeux"]):
-            exercise_data["type"] = "geology"
-            exercise_data["icone"] = "mountain"
-        elif any(word in chapitre.lower() for word in ["environnement", "écosystème", "action humaine"]):
-            exercise_data["type"] = "ecology"
-            exercise_data["icone"] = "globe"
-        elif any(word in chapitre.lower() for word in ["corps", "santé", "humain"]):
-            exercise_data["type"] = "health"
-            exercise_data["icone"] = "heart"
-        else:
-            exercise_data["type"] = "analysis"
-            exercise_data["icone"] = "leaf"
-        logger.info(f"🌱 Assigned type: {exercise_data['type']}, icon: {exercise_data['icone']}")
-        return exercise_data
-    
-    elif matiere == "Géographie":
-        logger.info(f"🗺️ Enriching Géographie exercise for chapter: {chapitre}")
-        if any(word in chapitre.lower() for word in ["ville", "urbain", "habitat", "loger", "bâti"]):
-            exercise_data["type"] = "urban"
-            exercise_data["icone"] = "building-2"
-        elif any(word in chapitre.lower() for word in ["population", "démographi", "mobilité", "humain"]):
-            exercise_data["type"] = "demographic"
-            exercise_data["icone"] = "users"
-        elif any(word in chapitre.lower() for word in ["monde", "mondial", "mondialisation", "planète"]):
-            exercise_data["type"] = "geographic"
-            exercise_data["icone"] = "globe"
-        elif any(word in chapitre.lower() for word in ["territoire", "espace", "lieu", "région"]):
-            exercise_data["type"] = "geographic"
-            exercise_data["icone"] = "compass"
-        else:
-            exercise_data["type"] = "cartographic"
-            exercise_data["icone"] = "map"
-        logger.info(f"🗺️ Assigned type: {exercise_data['type']}, icon: {exercise_data['icone']}")
+    # Priority 1: Matiere-specific logic FIRST (best-scoring chapter keywords)
+    if matiere in CHAPTER_TYPE_CLASSIFIERS:
+        logger.info(f"Enriching {matiere} exercise for chapter: {chapitre}")
+        exercise_data["type"], exercise_data["icone"] = CHAPTER_TYPE_CLASSIFIERS[matiere].classify(
+            chapitre, default=CHAPTER_DEFAULT_TYPES[matiere]
+        )
+        logger.info(f"Assigned type: {exercise_data['type']}, icon: {exercise_data['icone']}")
         return exercise_data
     
     # Priority 2: Use type from AI if provided and valid (existing logic for Mathématiques)
@@ -230,32 +243,15 @@ def enrich_exercise_with_icon(exercise_data: dict, chapitre: str, matiere: str =
         exercise_data["icone"] = EXERCISE_ICON_MAPPING[chapitre]
         # Infer type from chapter for Mathématiques
         if matiere == "Mathématiques":
-            if any(geo_word in chapitre.lower() for geo_word in ["géométrie", "pythagore", "thalès", "trigonométrie", "triangle", "volume"]):
-                exercise_data["type"] = "geometry"
-            elif any(alg_word in chapitre.lower() for alg_word in ["équation", "fonction", "fraction", "algèbre", "calcul"]):
-                exercise_data["type"] = "algebra"
-            elif any(stat_word in chapitre.lower() for stat_word in ["statistique", "probabilité"]):
-                exercise_data["type"] = "statistics"
-            else:
-                exercise_data["type"] = "text"
+            exercise_data["type"] = MATH_CHAPTER_TYPES.classify(chapitre, default="text")
         return exercise_data
     
     # Priority 4: Content-based detection (for unknown chapters) - mainly for Mathématiques
-    enonce = exercise_data.get("enonce", "").lower()
     if matiere == "Mathématiques":
-        if any(geo_word in enonce for geo_word in ["triangle", "cercle", "carré", "rectangle", "géométrique", "angle", "côté", "volume", "aire"]):
-            exercise_data["type"] = "geometry"
-            exercise_data["icone"] = "triangle-ruler"
-        elif any(alg_word in enonce for alg_word in ["équation", "fonction", "fraction", "calcul", "nombre", "résoudre", "simplifier"]):
-            exercise_data["type"] = "algebra" 
-            exercise_data["icone"] = "calculator"
-        elif any(stat_word in enonce for stat_word in ["statistique", "moyenne", "graphique", "données", "probabilité", "hasard"]):
-            exercise_data["type"] = "statistics"
-            exercise_data["icone"] = "bar-chart"
-        else:
-            # Priority 5: Default fallback
-            exercise_data["type"] = "text"
-            exercise_data["icone"] = EXERCISE_ICON_MAPPING["default"]
+        # Priority 5: Default fallback
+        exercise_data["type"], exercise_data["icone"] = MATH_STATEMENT_TYPES.classify(
+            exercise_data.get("enonce", ""), default=("text", EXERCISE_ICON_MAPPING["default"])
+        )
     else:
         # For non-math subjects, use matiere fallback
         fallback_icon = EXERCISE_ICON_MAPPING.get(matiere, EXERCISE_ICON_MAPPING["default"])
@@ -288,16 +284,9 @@ def process_schema_to_base64(schema: Optional[dict]) -> Optional[str]:
     )
     
     try:
-        # Convert schema to geometry_renderer format - FIX STRUCTURE
-        geometry_schema = {
-            "type": "schema_geometrique",
-            "figure": schema.get("type", "triangle"),
-            # CRITICAL: Pass schema data directly, not nested in "donnees"
-            **schema  # Spread all schema properties at root level
-        }
-        
-        # Render to Base64 for web display
-        base64_image = geometry_renderer.render_geometry_to_base64(geometry_schema)
+        # Render to a data URI for web display: the schema is passed as is, the figure
+        # type is read from its "type" key (see figure_registry.figure_type_of)
+        base64_image = geometry_renderer.render_geometry_to_base64(schema)
         
         if base64_image:
             logger.info(
@@ -325,28 +314,6 @@ def process_schema_to_base64(schema: Optional[dict]) -> Optional[str]:
         logger.error(f"❌ Error processing schema to Base64: {e}")
         return None
 
-def process_exercise_content(content: str) -> str:
-    """
-    Processes the exercise content to render both LaTeX and geometric schemas.
-    This centralizes all content processing logic for consistency.
-    """
-    if not content or not isinstance(content, str):
-        return content if isinstance(content, str) else ""
-    
-    # 1. Process legacy geometric schemas (for backward compatibility)
-    try:
-        content = geometry_renderer.process_geometric_schemas_for_web(content)
-    except Exception as e:
-        logger.error(f"Error processing legacy geometric schemas: {e}")
-    
-    # 2. Process LaTeX formulas
-    try:
-        content = latex_renderer.convert_latex_to_svg(content)
-    except Exception as e:
-        logger.error(f"Error processing LaTeX: {e}")
-    
-    return content
-
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
@@ -455,10 +422,12 @@ class Exercise(BaseModel):
     icone: Optional[str] = "book-open"  # Icon identifier for frontend
     # NEW: Separate geometric schema field (clean design) 
     geometric_schema: Optional[dict] = None  # Geometric schema data separate from text
-    # CRITICAL: Base64 schema image for frontend display
-    schema_img: Optional[str] = None  # Base64 PNG image for web display
+    # CRITICAL: Schema image for frontend display
+    schema_img: Optional[str] = None  # Figure URL (/api/figures/...) for web display, not stored
+    schema_img_id: Optional[str] = None  # figure_store id "<sha256>.<ext>" (stored)
     # NEW: SVG figure for geometry rendering
-    figure_svg: Optional[str] = None  # SVG string for geometric figures
+    figure_svg: Optional[str] = None  # <img> of the stored SVG for web display, not stored
+    figure_svg_id: Optional[str] = None  # figure_store id "<sha256>.svg" (stored)
     # NEW: Geographic document for Geography exercises
     document: Optional[dict] = None  # Educational document metadata for Geography
     # NEW: Mathematical specification for new architecture
@@ -552,6 +521,21 @@ class ExportRequest(BaseModel):
     guest_id: Optional[str] = None
     template_style: Optional[str] = "classique"  # Style d'export choisi
 
+# Combined export: both PDFs in one ZIP
+BUNDLE_EXPORT_TYPES = ("sujet", "corrige")
+
+class ExportBundleRequest(BaseModel):
+    document_id: str
+    guest_id: Optional[str] = None
+    template_style: Optional[str] = "classique"
+
+class ClassSetRequest(BaseModel):
+    document_id: str
+    guest_id: Optional[str] = None
+    nb_variants: int = Field(..., ge=1, le=CLASS_SET_MAX_VARIANTS)  # One version per student
+    template_style: Optional[str] = "classique"
+    seed: int = 0  # Same seed, same versions
+
 class AdvancedPDFOptions(BaseModel):
     page_format: str = "A4"  # A4, A4_compact, US_Letter
     margin_preset: str = "standard"  # standard, compact, generous
@@ -1353,7 +1337,7 @@ async def generate_geometry_schema_with_ai(enonce: str) -> str:
     
     try:
         # Create LLM chat instance with faster model
-        chat = LlmChat(
+        chat = get_llm_chat().LlmChat(
             api_key=emergent_key,
             session_id=f"schema_gen_{uuid.uuid4()}",
             system_message="""En tant que moteur de génération de schémas géométriques PRÉCIS, tu dois créer un schéma qui CORRESPOND EXACTEMENT à l'énoncé de l'exercice.
@@ -1433,7 +1417,7 @@ Si l'énoncé mentionne une figure géométrique (triangle, rectangle, cercle, e
 Réponds UNIQUEMENT avec le JSON complet, JAMAIS null pour un énoncé géométrique.
 """
 
-        user_message = UserMessage(text=prompt)
+        user_message = get_llm_chat().UserMessage(text=prompt)
         
         # Set shorter timeout for faster response
         import asyncio
@@ -1929,7 +1913,7 @@ FORMAT JSON REQUIS:
         system_msg = instruction
     
     # Create LLM chat instance with faster model
-    chat = LlmChat(
+    chat = get_llm_chat().LlmChat(
         api_key=emergent_key,
         session_id=f"exercise_gen_{uuid.uuid4()}",
         system_message=f"""{system_msg}
@@ -2004,7 +1988,7 @@ JSON OBLIGATOIRE:
     example = examples.get(chapitre, f"Exercice {chapitre}")
     
     try:
-        user_message = UserMessage(text=f"Génère {nb_exercices} exercices. Exemple: {example}")
+        user_message = get_llm_chat().UserMessage(text=f"Génère {nb_exercices} exercices. Exemple: {example}")
         
         # FIRST PASS: Generate the exercise content
         logger.debug("Starting first AI pass - exercise content generation")
@@ -2068,17 +2052,15 @@ JSON OBLIGATOIRE:
             # SECOND PASS: Generate geometric schema if this is a geometry exercise
             if matiere.lower() == "mathématiques":
                 # Check if the exercise might need a geometric schema
-                geometry_keywords = ["triangle", "cercle", "carré", "rectangle", "parallélogramme", 
-                                   "géométrie", "figure", "pythagore", "thalès", "trigonométrie", 
-                                   "angle", "périmètre", "aire", "longueur", "côté", "hypoténuse"]
+                detected_keywords = GEOMETRY_SCHEMA_KEYWORDS.matched_keywords(enonce, "geometry")
                 
-                if any(keyword in enonce.lower() for keyword in geometry_keywords):
+                if detected_keywords:
                     logger.info(
                         "Geometry keywords detected, starting schema generation",
                         module_name="generation",
                         func_name="schema_detection",
                         enonce_preview=enonce[:100],
-                        detected_keywords=[kw for kw in geometry_keywords if kw in enonce.lower()]
+                        detected_keywords=detected_keywords
                     )
                     
                     # Generate schema with second AI call
@@ -2209,6 +2191,7 @@ JSON OBLIGATOIRE:
             schema_data = ex_data.get("geometric_schema", None)
             donnees_to_store = None
             schema_img_base64 = None
+            schema_img_id = None
             
             if schema_data is not None:
                 # Store schema in donnees for PDF processing
@@ -2229,6 +2212,8 @@ JSON OBLIGATOIRE:
                         schema_type=schema_data.get('type'),
                         base64_length=len(schema_img_base64)
                     )
+                    # Rendered once into the figure store, served by URL
+                    schema_img_id = figure_store.put_data_uri(schema_img_base64)
             
             exercise = Exercise(
                 type=ex_data.get("type", "ouvert"),
@@ -2243,8 +2228,9 @@ JSON OBLIGATOIRE:
                 icone=ex_data.get("icone", EXERCISE_ICON_MAPPING["default"]),
                 # NEW: Clean geometric schema field (separate from text)
                 geometric_schema=ex_data.get("geometric_schema", None),
-                # CRITICAL: Base64 schema image for frontend
-                schema_img=schema_img_base64,
+                # CRITICAL: Schema image for frontend (figure store URL)
+                schema_img=figure_url(schema_img_id) if schema_img_id else schema_img_base64,
+                schema_img_id=schema_img_id,
                 # NEW: Geographic document for Geography exercises
                 document=ex_data.get("document", None)
             )
@@ -2348,7 +2334,9 @@ async def generate_math_exercises_new_architecture(
                         gen_ex.spec.figure_geometrique
                     )
                     if svg_data:
-                        exercise_dict["figure_svg"] = svg_data
+                        figure_svg_id = figure_store.put(svg_data, 'svg')
+                        exercise_dict["figure_svg_id"] = figure_svg_id
+                        exercise_dict["figure_svg"] = figure_img_tag(figure_svg_id)
                         logger.info(f"✅ SVG généré pour {gen_ex.spec.figure_geometrique.type}")
                 except Exception as e:
                     logger.warning(f"⚠️ Échec rendu SVG: {e}")
@@ -2604,29 +2592,26 @@ def get_template_colors_and_fonts(template_config: dict) -> dict:
         }
     }
 
-async def generate_advanced_pdf(document: dict, content: str, export_type: str, template_config: dict, options: AdvancedPDFOptions) -> bytes:
-    """Generate PDF with advanced layout options"""
-    # Get layout settings
-    page_format = PDF_LAYOUT_OPTIONS["page_formats"].get(options.page_format, PDF_LAYOUT_OPTIONS["page_formats"]["A4"])
-    margins = options.custom_margins or PDF_LAYOUT_OPTIONS["margin_presets"].get(options.margin_preset, PDF_LAYOUT_OPTIONS["margin_presets"]["standard"])
-    
-    # Build CSS with advanced options
-    advanced_css = f"""
+@lru_cache(maxsize=64)
+def advanced_pdf_css(width: str, height: str, margin_top: str, margin_bottom: str,
+                     margin_left: str, margin_right: str, font_scaling: float) -> str:
+    """CSS of the advanced export options, built once per combination"""
+    return f"""
         @page {{
-            size: {page_format.get('width', '21cm')} {page_format.get('height', '29.7cm')};
-            margin-top: {margins['top']};
-            margin-bottom: {margins['bottom']};
-            margin-left: {margins['left']};
-            margin-right: {margins['right']};
+            size: {width} {height};
+            margin-top: {margin_top};
+            margin-bottom: {margin_bottom};
+            margin-left: {margin_left};
+            margin-right: {margin_right};
         }}
         
         body {{
-            font-size: {11 * options.font_scaling}pt;
-            line-height: {1.4 * options.font_scaling};
+            font-size: {11 * font_scaling}pt;
+            line-height: {1.4 * font_scaling};
         }}
         
         .header {{
-            font-size: {18 * options.font_scaling}pt;
+            font-size: {18 * font_scaling}pt;
         }}
         
         .exercise-number {{
@@ -2635,18 +2620,27 @@ async def generate_advanced_pdf(document: dict, content: str, export_type: str,
             margin-top: 20px;
         }}
     """
+
+async def generate_advanced_pdf(document: dict, content: str, export_type: str, template_config: dict, options: AdvancedPDFOptions) -> bytes:
+    """Generate PDF with advanced layout options"""
+    # Get layout settings
+    page_format = PDF_LAYOUT_OPTIONS["page_formats"].get(options.page_format, PDF_LAYOUT_OPTIONS["page_formats"]["A4"])
+    margins = options.custom_margins or PDF_LAYOUT_OPTIONS["margin_presets"].get(options.margin_preset, PDF_LAYOUT_OPTIONS["margin_presets"]["standard"])
+    
+    # CSS of the per-request options, inlined in the template <head> (same options, same text)
+    advanced_css = advanced_pdf_css(
+        page_format.get('width', '21cm'), page_format.get('height', '29.7cm'),
+        margins['top'], margins['bottom'], margins['left'], margins['right'],
+        options.font_scaling
+    )
     
     # Use Pro template if available
     if template_config:
         template_style = TEMPLATE_STYLES.get(template_config.get('template_style', 'minimaliste'), TEMPLATE_STYLES['minimaliste'])
         template_colors = get_template_colors_and_fonts(template_config)
         
-        if export_type == "sujet":
-            template_content = load_template("sujet_pro")
-        else:
-            template_content = load_template("corrige_pro")
-        
-        html_content = Template(template_content).render(
+        template_name = "sujet_pro" if export_type == "sujet" else "corrige_pro"
+        html_content = template_engine.get_template(template_name).render(
             document={
                 **document,
                 'exercices': content,
@@ -2685,7 +2679,7 @@ async def generate_advanced_pdf(document: dict, content: str, export_type: str,
         """
     
     # Generate PDF
-    pdf_bytes = weasyprint.HTML(string=html_content).write_pdf()
+    pdf_bytes = await render_pdf(html_content)
     return pdf_bytes
 
 # API Routes
@@ -3125,7 +3119,12 @@ async def generate_document(request: GenerateRequest):
         doc_dict = document.dict()
         # Convert datetime for MongoDB
         doc_dict['created_at'] = doc_dict['created_at'].isoformat()
+        # Figures are stored by id only, see figure_store
+        for exercise in doc_dict['exercises']:
+            figure_store.compact_exercise(exercise)
         await db.documents.insert_one(doc_dict)
+        # Render artifacts now: listing and export read them instead of rendering again
+        await render_pipeline.artifacts_for(db, doc_dict['exercises'])
         
         # Return the document (already processed during generation)
         return {"document": document}
@@ -3566,6 +3565,9 @@ async def save_user_template(
             
             await db.user_templates.insert_one(template.dict())
         
+        # Cached personalized PDFs were keyed on the previous configuration
+        pdf_cache.invalidate_owner(user_email)
+        
         logger.info(f"Template saved for user: {user_email}")
         return {
             "message": "Template sauvegardé avec succès",
@@ -3754,12 +3756,329 @@ async def serve_logo(filename: str):
         logger.error(f"Error serving logo {filename}: {e}")
         raise HTTPException(status_code=500, detail="Erreur lors du chargement du logo")
 
+async def resolve_export_user(http_request: Request):
+    """Session token -> (is_pro_user, user_email, template_config) for PDF exports"""
+    logger = get_logger()
+
+    # Check authentication - ONLY session token method (no legacy email fallback)
+    session_token = http_request.headers.get("X-Session-Token")
+    is_pro_user = False
+    user_email = None
+    template_config = {}
+
+    # Authenticate using session token only
+    if session_token:
+        logger.info(f"Session token provided: {session_token[:20]}...")
+        email = await validate_session_token(session_token)
+        if email:
+            logger.info(f"Session token validated for email: {email}")
+            is_pro, user = await check_user_pro_status(email)
+            is_pro_user = is_pro
+            user_email = email
+            logger.info(f"Pro status check result - email: {email}, is_pro: {is_pro}")
+
+            # Load user template configuration if Pro
+            if is_pro:
+                logger.info(f"Loading template config for Pro user: {email}")
+                try:
+                    template_doc = await db.user_templates.find_one({"user_email": email})
+                    logger.info(f"🔍 Raw template doc from DB: {template_doc}")
+                    if template_doc:
+                        template_config = {
+                            'template_style': template_doc.get('template_style', 'minimaliste'),
+                            'professor_name': template_doc.get('professor_name'),
+                            'school_name': template_doc.get('school_name'),
+                            'school_year': template_doc.get('school_year'),
+                            'footer_text': template_doc.get('footer_text'),
+                            'logo_url': template_doc.get('logo_url'),
+                            'logo_filename': template_doc.get('logo_filename')
+                        }
+                        logger.info(f"🔍 Processed template config for {email}: {template_config}")
+
+                        # Vérifier si on a des données réelles
+                        has_real_data = any([
+                            template_config.get('professor_name'),
+                            template_config.get('school_name'),
+                            template_config.get('school_year'),
+                            template_config.get('footer_text')
+                        ])
+                        logger.info(f"🔍 Template has real data: {has_real_data}")
+                    else:
+                        # Default template for Pro users
+                        template_config = {'template_style': 'minimaliste'}
+                        logger.info(f"Using default template for Pro user {email}")
+                except Exception as e:
+                    logger.error(f"Error loading template config: {e}")
+                    template_config = {'template_style': 'minimaliste'}
+            else:
+                logger.info(f"User {email} is not Pro - using standard PDF generation")
+        else:
+            logger.info("Session token validation failed - treating as guest")
+    else:
+        logger.info("No session token provided - treating as guest user")
+
+    return is_pro_user, user_email, template_config
+
+async def enforce_export_quota(is_pro_user: bool, guest_id: Optional[str], exports: int = 1):
+    """Guests need `exports` remaining exports (Pro users have unlimited exports)"""
+    if is_pro_user:
+        return
+
+    # Check guest quota
+    if not guest_id:
+        raise HTTPException(status_code=400, detail="Guest ID required for non-Pro users")
+
+    quota_status = await check_guest_quota(guest_id)
+
+    if quota_status["quota_exceeded"] or quota_status["exports_remaining"] < exports:
+        raise HTTPException(status_code=402, detail={
+            "error": "quota_exceeded",
+            "message": "Limite de 3 exports gratuits atteinte. Passez à l'abonnement Pro pour continuer.",
+            "action": "upgrade_required"
+        })
+
+async def load_export_document(document_id: str) -> dict:
+    """Read the document to export (404 if missing) and check its geographic documents"""
+    logger = get_logger()
+
+    # Find the document
+    doc = await db.documents.find_one({"id": document_id})
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document non trouvé")
+
+    # Geographic documents are checked before rendering (content itself is
+    # rendered once by render_pipeline, see render_export_pdfs)
+    if 'exercises' in doc:
+        for exercise in doc['exercises']:
+            # NOUVEAU: Process geographic document if present
+            if exercise.get('document'):
+                doc_data = exercise['document']
+                logger.info(
+                    "🗺️ Processing geographic document for PDF export",
+                    module_name="export",
+                    func_name="process_geographic_document",
+                    doc_id=document_id,
+                    exercise_id=exercise.get('id', 'unknown'),
+                    document_title=doc_data.get('titre', 'Unknown'),
+                    document_type=doc_data.get('type', 'Unknown'),
+                    has_image=bool(doc_data.get('url_fichier_direct')),
+                    image_url=doc_data.get('url_fichier_direct', 'No URL')[:100] if doc_data.get('url_fichier_direct') else None,
+                    licence_type=doc_data.get('licence', {}).get('type', 'Unknown'),
+                    licence_attribution=doc_data.get('licence', {}).get('notice_attribution', 'No attribution')[:50] if doc_data.get('licence', {}).get('notice_attribution') else None
+                )
+
+                # Validate document data for PDF rendering
+                if not doc_data.get('url_fichier_direct'):
+                    logger.warning(
+                        "⚠️ Geographic document missing image URL",
+                        module_name="export",
+                        func_name="document_validation",
+                        doc_id=document_id,
+                        document_title=doc_data.get('titre', 'Unknown')
+                    )
+
+                if not doc_data.get('licence', {}).get('notice_attribution'):
+                    logger.warning(
+                        "⚠️ Geographic document missing attribution",
+                        module_name="export",
+                        func_name="document_validation",
+                        doc_id=document_id,
+                        document_title=doc_data.get('titre', 'Unknown')
+                    )
+            else:
+                logger.debug(
+                    "No geographic document for exercise",
+                    module_name="export",
+                    func_name="process_geographic_document",
+                    exercise_id=exercise.get('id', 'unknown')
+                )
+
+    # Convert to Document object
+    if isinstance(doc.get('created_at'), str):
+        doc['created_at'] = datetime.fromisoformat(doc['created_at'])
+    return doc
+
+def resolve_export_style(requested_style: Optional[str], is_pro_user: bool):
+    """Requested export style -> (style id, EXPORT_TEMPLATE_STYLES entry), classique as fallback"""
+    logger = get_logger()
+
+    # NEW TEMPLATE STYLE SYSTEM - Choose template based on requested style
+    requested_style = requested_style or "classique"
+    logger.info(f"🎨 TEMPLATE STYLE EXPORT - Requested style: {requested_style}, Pro user: {is_pro_user}")
+
+    # Validate style permission
+    if requested_style not in EXPORT_TEMPLATE_STYLES:
+        logger.warning(f"Invalid template style: {requested_style}, falling back to classique")
+        requested_style = "classique"
+
+    style_config = EXPORT_TEMPLATE_STYLES[requested_style]
+
+    # Check if user has permission for this style
+    if "free" not in style_config["available_for"] and not is_pro_user:
+        logger.info(f"Style {requested_style} is Pro-only, user is not Pro. Using classique instead.")
+        requested_style = "classique"
+        style_config = EXPORT_TEMPLATE_STYLES["classique"]
+
+    return requested_style, style_config
+
+def build_export_context(document: Document, is_pro_user: bool, template_config: dict) -> dict:
+    """Jinja2 render context shared by the sujet and corrigé templates"""
+    logger = get_logger()
+
+    # Prepare render context
+    render_context = {
+        'document': document,
+        'date_creation': datetime.now(timezone.utc).strftime("%d/%m/%Y"),
+    }
+
+    # Add Pro personalization if available
+    if is_pro_user and template_config:
+        render_context['template_config'] = template_config
+        render_context['school_name'] = template_config.get('school_name')
+        render_context['professor_name'] = template_config.get('professor_name')
+        render_context['school_year'] = template_config.get('school_year')
+        render_context['footer_text'] = template_config.get('footer_text')
+        render_context['logo_filename'] = template_config.get('logo_filename')
+
+        # Convert logo URL to absolute file path for WeasyPrint
+        logo_url = template_config.get('logo_url')
+        if logo_url and logo_url.startswith('/uploads/'):
+            logo_file_path = ROOT_DIR / logo_url[1:]  # Remove leading slash
+            if logo_file_path.exists():
+                absolute_logo_url = f"file://{logo_file_path}"
+                render_context['logo_url'] = absolute_logo_url
+                template_config['logo_url'] = absolute_logo_url
+                logger.info(f"✅ Logo converted for WeasyPrint: {logo_file_path}")
+            else:
+                logger.warning(f"⚠️ Logo file not found: {logo_file_path}")
+                render_context['logo_url'] = None
+                template_config['logo_url'] = None
+        else:
+            render_context['logo_url'] = logo_url
+
+        logger.info(f"🔍 FINAL RENDER CONTEXT FOR PRO USER:")
+        logger.info(f"   school_name: {render_context.get('school_name')}")
+        logger.info(f"   professor_name: {render_context.get('professor_name')}")
+        logger.info(f"   logo_url: {render_context.get('logo_url')}")
+
+    return render_context
+
+async def render_export_pdfs(doc: dict, export_types: List[str], style_config: dict, render_context: dict,
+                             cache_owner: str, template_config: Optional[dict]) -> Dict[str, tuple]:
+    """
+    PDF of each export type -> (cached file path, None) or (None, fresh PDF bytes).
+    Exercise artifacts are loaded once for all types, and the layouts run in parallel
+    in the WeasyPrint process pool.
+    """
+    logger = get_logger()
+    document_id = doc['id']
+    results = {}
+    to_render = []
+
+    for export_type in export_types:
+        # Choose the correct template file
+        if export_type == "sujet":
+            template_name = style_config["sujet_template"]
+        else:
+            template_name = style_config["corrige_template"]
+        logger.info(f"📄 Using template: {template_name} for export: {export_type}")
+
+        # Same document, template and personalization: the PDF is served from the cache
+        # (the export is still recorded by the caller for the guest quota)
+        cache_key = pdf_cache.key(
+            document=doc,
+            export_type=export_type,
+            template_name=template_name,
+            template_content=load_template(template_name),
+            template_config=template_config,
+            date_creation=render_context['date_creation']
+        )
+        cached_path = pdf_cache.get_path(document_id, cache_owner, cache_key)
+        if cached_path is not None:
+            logger.info(
+                "PDF served from cache",
+                module_name="export",
+                func_name="render_export_pdfs",
+                doc_id=document_id,
+                export_type=export_type
+            )
+            results[export_type] = (cached_path, None)
+        else:
+            to_render.append((export_type, template_name, cache_key))
+
+    if not to_render:
+        return results
+
+    # Convert document to dict for processing (to avoid Pydantic read-only issues)
+    document_dict = render_context['document'].dict()
+
+    # PDF rendering of statements, solutions, QCM options and schemas: artifacts
+    # rendered once per content by render_pipeline
+    logger.info("🔬 Loading rendered exercise artifacts...")
+    exercises = document_dict.get('exercises', [])
+    svg_report = await render_exercises(db, exercises, 'pdf')
+    # Geography maps: local print-size copies (regional crops) instead of Wikimedia URLs
+    await asyncio.to_thread(localize_exercise_documents, exercises)
+    context = dict(render_context, document=document_dict)
+
+    for i, exercise in enumerate(exercises, start=1):
+        schema_data = (exercise.get('donnees') or {}).get('schema')
+        if schema_data:
+            log_schema_processing(schema_data.get('type', 'unknown'), bool(exercise.get('schema_svg')),
+                                  doc_id=document_id)
+        logger.info(f"[EXPORT][PDF] Exercice {i} - schema_svg length = {len(exercise.get('schema_svg', ''))}")
+
+    # Render HTML using Jinja2
+    logger.info("🔧 Generating PDF with WeasyPrint...")
+    html_contents = [
+        template_engine.get_template(template_name).render(**context)
+        for _, template_name, _ in to_render
+    ]
+
+    logger.info("✅ Mathematical expressions converted to SVG")
+
+    # Generate PDFs with WeasyPrint (one pool process per layout)
+    pdfs = await asyncio.gather(*(render_pdf(html_content) for html_content in html_contents))
+
+    for (export_type, _, cache_key), html_content, pdf_bytes in zip(to_render, html_contents, pdfs):
+        logger.info(
+            "SVG optimization report",
+            module_name="export",
+            func_name="render_export_pdfs",
+            doc_id=document_id,
+            export_type=export_type,
+            html_bytes=len(html_content.encode('utf-8')),
+            pdf_bytes=len(pdf_bytes),
+            **svg_report
+        )
+        pdf_cache.put(document_id, cache_owner, cache_key, pdf_bytes)
+        results[export_type] = (None, pdf_bytes)
+
+    return results
+
+async def record_guest_export(document_id: str, export_type: str, guest_id: Optional[str],
+                              user_email: Optional[str], is_pro_user: bool, template_config: dict):
+    """Track export for guest quota (only for non-Pro users)"""
+    if is_pro_user or not guest_id:
+        return
+    export_record = {
+        "id": str(uuid.uuid4()),
+        "document_id": document_id,
+        "export_type": export_type,
+        "guest_id": guest_id,
+        "user_email": user_email,
+        "is_pro": is_pro_user,
+        "template_used": template_config.get('template_style') if template_config else 'standard',
+        "created_at": datetime.now(timezone.utc)
+    }
+    await db.exports.insert_one(export_record)
+
 @api_router.post("/export")
 @log_execution_time("export_pdf")
 async def export_pdf(request: ExportRequest, http_request: Request):
     """Export document as PDF using unified WeasyPrint approach"""
     logger = get_logger()
-    
+
     logger.info(
         "Starting PDF export",
         module_name="export",
@@ -3768,386 +4087,177 @@ async def export_pdf(request: ExportRequest, http_request: Request):
         export_type=request.export_type,
         template_style=getattr(request, 'template_style', 'default')
     )
-    
+
     try:
-        # Check authentication - ONLY session token method (no legacy email fallback)
-        session_token = http_request.headers.get("X-Session-Token")
-        is_pro_user = False
-        user_email = None
-        template_config = {}
-        
-        # Authenticate using session token only
-        if session_token:
-            logger.info(f"Session token provided: {session_token[:20]}...")
-            email = await validate_session_token(session_token)
-            if email:
-                logger.info(f"Session token validated for email: {email}")
-                is_pro, user = await check_user_pro_status(email)
-                is_pro_user = is_pro
-                user_email = email
-                logger.info(f"Pro status check result - email: {email}, is_pro: {is_pro}")
-                
-                # Load user template configuration if Pro
-                if is_pro:
-                    logger.info(f"Loading template config for Pro user: {email}")
-                    try:
-                        template_doc = await db.user_templates.find_one({"user_email": email})
-                        logger.info(f"🔍 Raw template doc from DB: {template_doc}")
-                        if template_doc:
-                            template_config = {
-                                'template_style': template_doc.get('template_style', 'minimaliste'),
-                                'professor_name': template_doc.get('professor_name'),
-                                'school_name': template_doc.get('school_name'),
-                                'school_year': template_doc.get('school_year'),
-                                'footer_text': template_doc.get('footer_text'),
-                                'logo_url': template_doc.get('logo_url'),
-                                'logo_filename': template_doc.get('logo_filename')
-                            }
-                            logger.info(f"🔍 Processed template config for {email}: {template_config}")
-                            
-                            # Vérifier si on a des données réelles
-                            has_real_data = any([
-                                template_config.get('professor_name'),
-                                template_config.get('school_name'),
-                                template_config.get('school_year'),
-                                template_config.get('footer_text')
-                            ])
-                            logger.info(f"🔍 Template has real data: {has_real_data}")
-                        else:
-                            # Default template for Pro users
-                            template_config = {'template_style': 'minimaliste'}
-                            logger.info(f"Using default template for Pro user {email}")
-                    except Exception as e:
-                        logger.error(f"Error loading template config: {e}")
-                        template_config = {'template_style': 'minimaliste'}
-                else:
-                    logger.info(f"User {email} is not Pro - using standard PDF generation")
-            else:
-                logger.info("Session token validation failed - treating as guest")
-        else:
-            logger.info("No session token provided - treating as guest user")
-        
-        # Pro users have unlimited exports
-        if not is_pro_user:
-            # Check guest quota
-            if not request.guest_id:
-                raise HTTPException(status_code=400, detail="Guest ID required for non-Pro users")
-                
-            quota_status = await check_guest_quota(request.guest_id)
-            
-            if quota_status["quota_exceeded"]:
-                raise HTTPException(status_code=402, detail={
-                    "error": "quota_exceeded", 
-                    "message": "Limite de 3 exports gratuits atteinte. Passez à l'abonnement Pro pour continuer.",
-                    "action": "upgrade_required"
-                })
-        
-        # Find the document
-        doc = await db.documents.find_one({"id": request.document_id})
-        if not doc:
-            raise HTTPException(status_code=404, detail="Document non trouvé")
-        
-        # CRITICAL: Process geometric schemas and LaTeX before PDF generation
-        
-        if 'exercises' in doc:
-            for exercise in doc['exercises']:
-                if 'enonce' in exercise and exercise['enonce']:
-                    exercise['enonce'] = process_exercise_content(exercise['enonce'])
-                    # Convert LaTeX math to MathML for PDF rendering
-                    exercise['enonce'] = process_math_content_for_pdf(exercise['enonce'])
-                
-                # NEW: Generate SVG for schema if present in donnees
-                if exercise.get('donnees') and isinstance(exercise['donnees'], dict):
-                    schema_data = exercise['donnees'].get('schema')
-                    if schema_data:
-                        schema_type = schema_data.get('type', 'unknown')
-                        logger.info(
-                            "Generating SVG for PDF schema",
-                            module_name="export",
-                            func_name="generate_svg",
-                            doc_id=request.document_id,
-                            schema_type=schema_type
-                        )
-                        
-                        svg_content = schema_renderer.render_to_svg(schema_data)
-                        if svg_content:
-                            exercise['schema_svg'] = svg_content
-                            logger.info(
-                                "SVG generated successfully for PDF",
-                                module_name="export",
-                                func_name="generate_svg",
-                                doc_id=request.document_id,
-                                schema_type=schema_type,
-                                svg_length=len(svg_content),
-                                status="success"
-                            )
-                            log_schema_processing(schema_type, True, doc_id=request.document_id)
-                        else:
-                            logger.warning(
-                                "Failed to generate SVG for PDF schema",
-                                module_name="export",
-                                func_name="generate_svg",
-                                doc_id=request.document_id,
-                                schema_type=schema_type,
-                                status="failed"
-                            )
-                            log_schema_processing(schema_type, False, doc_id=request.document_id)
-                            exercise['schema_svg'] = ""
-                    else:
-                        exercise['schema_svg'] = ""
-                else:
-                    exercise['schema_svg'] = ""
-                
-                # NOUVEAU: Process geographic document if present
-                if exercise.get('document'):
-                    doc_data = exercise['document']
-                    logger.info(
-                        "🗺️ Processing geographic document for PDF export",
-                        module_name="export",
-                        func_name="process_geographic_document",
-                        doc_id=request.document_id,
-                        exercise_id=exercise.get('id', 'unknown'),
-                        document_title=doc_data.get('titre', 'Unknown'),
-                        document_type=doc_data.get('type', 'Unknown'),
-                        has_image=bool(doc_data.get('url_fichier_direct')),
-                        image_url=doc_data.get('url_fichier_direct', 'No URL')[:100] if doc_data.get('url_fichier_direct') else None,
-                        licence_type=doc_data.get('licence', {}).get('type', 'Unknown'),
-                        licence_attribution=doc_data.get('licence', {}).get('notice_attribution', 'No attribution')[:50] if doc_data.get('licence', {}).get('notice_attribution') else None
-                    )
-                    
-                    # Validate document data for PDF rendering
-                    if not doc_data.get('url_fichier_direct'):
-                        logger.warning(
-                            "⚠️ Geographic document missing image URL",
-                            module_name="export",
-                            func_name="document_validation",
-                            doc_id=request.document_id,
-                            document_title=doc_data.get('titre', 'Unknown')
-                        )
-                    
-                    if not doc_data.get('licence', {}).get('notice_attribution'):
-                        logger.warning(
-                            "⚠️ Geographic document missing attribution",
-                            module_name="export",
-                            func_name="document_validation",
-                            doc_id=request.document_id,
-                            document_title=doc_data.get('titre', 'Unknown')
-                        )
-                else:
-                    logger.debug(
-                        "No geographic document for exercise",
-                        module_name="export",
-                        func_name="process_geographic_document",
-                        exercise_id=exercise.get('id', 'unknown')
-                    )
-                
-                # Process solution if it exists
-                if exercise.get('solution'):
-                    if exercise['solution'].get('resultat'):
-                        exercise['solution']['resultat'] = process_exercise_content(exercise['solution']['resultat'])
-                        
-                    if exercise['solution'].get('etapes') and isinstance(exercise['solution']['etapes'], list):
-                        exercise['solution']['etapes'] = [
-                            process_exercise_content(step) for step in exercise['solution']['etapes']
-                        ]
-            
+        is_pro_user, user_email, template_config = await resolve_export_user(http_request)
+        await enforce_export_quota(is_pro_user, request.guest_id)
 
-        # Convert to Document object
-        if isinstance(doc.get('created_at'), str):
-            doc['created_at'] = datetime.fromisoformat(doc['created_at'])
+        doc = await load_export_document(request.document_id)
         document = Document(**doc)
-        
-        # NEW TEMPLATE STYLE SYSTEM - Choose template based on requested style
-        requested_style = request.template_style or "classique"
-        logger.info(f"🎨 TEMPLATE STYLE EXPORT - Requested style: {requested_style}, Pro user: {is_pro_user}")
-        
-        # Validate style permission
-        if requested_style not in EXPORT_TEMPLATE_STYLES:
-            logger.warning(f"Invalid template style: {requested_style}, falling back to classique")
-            requested_style = "classique"
-        
-        style_config = EXPORT_TEMPLATE_STYLES[requested_style]
-        
-        # Check if user has permission for this style
-        if "free" not in style_config["available_for"] and not is_pro_user:
-            logger.info(f"Style {requested_style} is Pro-only, user is not Pro. Using classique instead.")
-            requested_style = "classique"
-            style_config = EXPORT_TEMPLATE_STYLES["classique"]
-        
-        # Choose the correct template file
-        if request.export_type == "sujet":
-            template_name = style_config["sujet_template"]
-        else:
-            template_name = style_config["corrige_template"]
-        
-        logger.info(f"📄 Using template: {template_name} for style: {requested_style}")
-        template_content = load_template(template_name)
-        
-        # Prepare render context
-        render_context = {
-            'document': document,
-            'date_creation': datetime.now(timezone.utc).strftime("%d/%m/%Y"),
-        }
-        
-        # Add Pro personalization if available
-        if is_pro_user and template_config:
-            render_context['template_config'] = template_config
-            render_context['school_name'] = template_config.get('school_name')
-            render_context['professor_name'] = template_config.get('professor_name')
-            render_context['school_year'] = template_config.get('school_year')
-            render_context['footer_text'] = template_config.get('footer_text')
-            render_context['logo_filename'] = template_config.get('logo_filename')
-            
-            # Convert logo URL to absolute file path for WeasyPrint
-            logo_url = template_config.get('logo_url')
-            if logo_url and logo_url.startswith('/uploads/'):
-                logo_file_path = ROOT_DIR / logo_url[1:]  # Remove leading slash
-                if logo_file_path.exists():
-                    absolute_logo_url = f"file://{logo_file_path}"
-                    render_context['logo_url'] = absolute_logo_url
-                    template_config['logo_url'] = absolute_logo_url
-                    logger.info(f"✅ Logo converted for WeasyPrint: {logo_file_path}")
-                else:
-                    logger.warning(f"⚠️ Logo file not found: {logo_file_path}")
-                    render_context['logo_url'] = None
-                    template_config['logo_url'] = None
-            else:
-                render_context['logo_url'] = logo_url
-            
-            logger.info(f"🔍 FINAL RENDER CONTEXT FOR PRO USER:")
-            logger.info(f"   school_name: {render_context.get('school_name')}")
-            logger.info(f"   professor_name: {render_context.get('professor_name')}")
-            logger.info(f"   logo_url: {render_context.get('logo_url')}")
-       
+        requested_style, style_config = resolve_export_style(request.template_style, is_pro_user)
+        render_context = build_export_context(document, is_pro_user, template_config)
+
         # Generate filename with style suffix
         filename = f"LeMaitremot_{document.type_doc}_{document.matiere}_{document.niveau}_{request.export_type}_{requested_style}.pdf"
-        
-        # Process LaTeX expressions in document before rendering
-        logger.info("🔬 Converting LaTeX expressions to SVG...")
-        
-        # Convert document to dict for processing (to avoid Pydantic read-only issues)
-        document_dict = document.dict()
-        
-        # Process each exercise and convert LaTeX to SVG
-        try:
-            for exercise in document_dict.get('exercises', []):
-                # Process exercise statement
-                if 'enonce' in exercise and exercise['enonce']:
-                    # First process geometric schemas, then LaTeX
-                    exercise['enonce'] = geometry_renderer.process_geometric_schemas(exercise['enonce'])
-                    exercise['enonce'] = latex_renderer.convert_latex_to_svg(exercise['enonce'])
-                
-                # Process QCM options if they exist
-                if (exercise.get('type') == 'qcm' and 
-                    exercise.get('donnees') and 
-                    exercise['donnees'].get('options')):
-                    exercise['donnees']['options'] = [
-                        latex_renderer.convert_latex_to_svg(
-                            geometry_renderer.process_geometric_schemas(option)
-                        )
-                        for option in exercise['donnees']['options']
-                    ]
-                
-                # Process solution if it exists
-                if exercise.get('solution'):
-                    # Process result
-                    if exercise['solution'].get('resultat'):
-                        processed_result = geometry_renderer.process_geometric_schemas(
-                            exercise['solution']['resultat']
-                        )
-                        exercise['solution']['resultat'] = latex_renderer.convert_latex_to_svg(
-                            processed_result
-                        )
-                    # Process steps
-                    if exercise['solution'].get('etapes') and isinstance(exercise['solution']['etapes'], list):
-                        exercise['solution']['etapes'] = [
-                            latex_renderer.convert_latex_to_svg(
-                                geometry_renderer.process_geometric_schemas(step)
-                            )
-                            for step in exercise['solution']['etapes']
-                        ]
-        
-        except Exception as e:
-            logger.error(f"Error during LaTeX to SVG conversion: {e}")
-            # Continue with original document if conversion fails
-            document_dict = document.dict()
-        
-        # Update render context with processed document
-        render_context['document'] = document_dict
-        
-        # Generate SVG schemas for each exercise (before template render)
-        exercises = document_dict.get('exercises', [])
-        for i, exercise in enumerate(exercises, start=1):
-            schema_data = None
-            
-            # Check for schema in donnees
-            if exercise.get('donnees') and isinstance(exercise.get('donnees'), dict):
-                schema_data = exercise.get('donnees').get('schema')
-            
-            if schema_data:
-                try:
-                    svg_content = schema_renderer.render_to_svg(schema_data)
-                    if svg_content:
-                        exercise['schema_svg'] = svg_content
-                        logger.info(f"[EXPORT][PDF] Generated SVG for Exercice {i} - schema_svg length = {len(svg_content)}")
-                    else:
-                        logger.warning(f"[EXPORT][PDF] Failed to render schema for Exercice {i}")
-                except Exception as e:
-                    logger.error(f"[EXPORT][PDF] Error rendering schema for Exercice {i}: {e}")
-        
-        # Log schema_svg presence for debugging
-        for i, ex in enumerate(exercises, start=1):
-            schema_svg_length = len(ex.get('schema_svg', ''))
-            logger.info(f"[EXPORT][PDF] Exercice {i} - schema_svg length = {schema_svg_length}")
-        
-        # Render HTML using Jinja2
-        logger.info("🔧 Generating PDF with WeasyPrint...")
-        template = Template(template_content)
-        html_content = template.render(**render_context)
-        
-        logger.info("✅ Mathematical expressions converted to SVG")
-        
-        # Generate PDF with WeasyPrint
-        pdf_bytes = weasyprint.HTML(string=html_content).write_pdf()
-        
-        # Create temporary file
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-        temp_file.write(pdf_bytes)
-        temp_file.close()
-        
-        # Track export for guest quota (only for non-Pro users)
-        if not is_pro_user and request.guest_id:
-            export_record = {
-                "id": str(uuid.uuid4()),
-                "document_id": request.document_id,
-                "export_type": request.export_type,
-                "guest_id": request.guest_id,
-                "user_email": user_email,
-                "is_pro": is_pro_user,
-                "template_used": template_config.get('template_style') if template_config else 'standard',
-                "created_at": datetime.now(timezone.utc)
-            }
-            await db.exports.insert_one(export_record)
-        
-        logger.info(f"✅ PDF generated successfully: {filename}")
-        
-        return FileResponse(
-            temp_file.name,
-            media_type='application/pdf',
-            filename=filename
+
+        results = await render_export_pdfs(
+            doc, [request.export_type], style_config, render_context,
+            cache_owner=owner_tag(user_email if is_pro_user else None),
+            template_config=template_config if is_pro_user else None
         )
-        
+        cached_path, pdf_bytes = results[request.export_type]
+
+        await record_guest_export(request.document_id, request.export_type, request.guest_id,
+                                  user_email, is_pro_user, template_config)
+
+        logger.info(f"✅ PDF generated successfully: {filename}")
+
+        # Cached PDF sent from its file, fresh PDF straight from memory (no temporary file)
+        if cached_path is not None:
+            return pdf_file_response(cached_path, filename)
+        return pdf_response(pdf_bytes, filename)
+
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error exporting PDF: {e}")
         raise HTTPException(status_code=500, detail="Erreur lors de l'export PDF")
-        
+
+@api_router.post("/export/bundle")
+@log_execution_time("export_bundle")
+async def export_bundle(request: ExportBundleRequest, http_request: Request):
+    """Export the sujet and the corrigé in one ZIP: document, formulas and figures are processed once"""
+    logger = get_logger()
+
+    logger.info(
+        "Starting sujet + corrigé export",
+        module_name="export",
+        func_name="export_bundle",
+        doc_id=request.document_id,
+        template_style=request.template_style
+    )
+
+    try:
+        is_pro_user, user_email, template_config = await resolve_export_user(http_request)
+        # The bundle counts as two exports, like the two separate downloads it replaces
+        await enforce_export_quota(is_pro_user, request.guest_id, exports=len(BUNDLE_EXPORT_TYPES))
+
+        doc = await load_export_document(request.document_id)
+        document = Document(**doc)
+        requested_style, style_config = resolve_export_style(request.template_style, is_pro_user)
+        render_context = build_export_context(document, is_pro_user, template_config)
+
+        results = await render_export_pdfs(
+            doc, list(BUNDLE_EXPORT_TYPES), style_config, render_context,
+            cache_owner=owner_tag(user_email if is_pro_user else None),
+            template_config=template_config if is_pro_user else None
+        )
+
+        basename = f"LeMaitremot_{document.type_doc}_{document.matiere}_{document.niveau}"
+        files = {}
+        for export_type in BUNDLE_EXPORT_TYPES:
+            cached_path, pdf_bytes = results[export_type]
+            files[f"{basename}_{export_type}_{requested_style}.pdf"] = (
+                pdf_bytes if pdf_bytes is not None else cached_path.read_bytes()
+            )
+            await record_guest_export(request.document_id, export_type, request.guest_id,
+                                      user_email, is_pro_user, template_config)
+
+        filename = f"{basename}_{requested_style}.zip"
+        logger.info(f"✅ Sujet + corrigé generated successfully: {filename}")
+        return zip_response(files, filename)
+
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error exporting PDF: {e}")
-        raise HTTPException(status_code=500, detail="Erreur lors de l'export PDF")
+        logger.error(f"Error exporting sujet + corrigé: {e}")
+        raise HTTPException(status_code=500, detail="Erreur lors de l'export sujet + corrigé")
+
+@api_router.post("/export/class-set")
+@log_execution_time("export_class_set")
+async def export_class_set(request: ClassSetRequest, http_request: Request):
+    """One version of the sheet per student (same exercises, other values) plus a corrigé booklet, as a ZIP"""
+    logger = get_logger()
+
+    try:
+        is_pro_user, user_email, template_config = await resolve_export_user(http_request)
+        # Each version counts as one export, like the bundle counts its two PDFs
+        await enforce_export_quota(is_pro_user, request.guest_id, exports=request.nb_variants)
+
+        doc = await load_export_document(request.document_id)
+        document = Document(**doc)
+        requested_style, style_config = resolve_export_style(request.template_style, is_pro_user)
+        render_context = build_export_context(document, is_pro_user, template_config)
+        sujet_template = template_engine.get_template(style_config["sujet_template"])
+        corrige_template = template_engine.get_template(style_config["corrige_template"])
+
+        # Variants re-sampled from spec_mathematique; their artifacts are one-off and kept
+        # in memory only (db=None). Sampling, rendering and templating run in worker
+        # threads, all variants at once
+        def sample_variant(index):
+            return Document(**build_variant(doc, index, request.seed)).dict()
+
+        def render_variant_html(variant):
+            context = dict(render_context, document=variant)
+            return sujet_template.render(**context), corrige_template.render(**context)
+
+        async def prepare_variant(index):
+            variant = await asyncio.to_thread(sample_variant, index)
+            await render_exercises(None, variant['exercises'], 'pdf')
+            return await asyncio.to_thread(render_variant_html, variant)
+
+        prepared = await asyncio.gather(*(prepare_variant(index) for index in range(1, request.nb_variants + 1)))
+        sujets = [sujet for sujet, _ in prepared]
+        corriges = [corrige for _, corrige in prepared]
+
+        # Sujets spread over the pool processes (one job per batch), corrigés laid out
+        # in a single booklet at the same time
+        batches = split_evenly(sujets, pdf_worker_pool.size)
+        jobs = [
+            render_pdf(batch, html_batch_to_pdf_bytes, timeout=pdf_worker_pool.timeout * len(batch))
+            for batch in batches
+        ]
+        jobs.append(render_pdf(corriges, merged_html_to_pdf_bytes, timeout=pdf_worker_pool.timeout * len(corriges)))
+        *batch_pdfs, booklet = await asyncio.gather(*jobs)
+
+        basename = f"LeMaitremot_{document.type_doc}_{document.matiere}_{document.niveau}"
+        files = {}
+        sujet_pdfs = [pdf for batch in batch_pdfs for pdf in batch]
+        for index, pdf_bytes in enumerate(sujet_pdfs, start=1):
+            files[f"{basename}_version_{index:02d}_sujet.pdf"] = pdf_bytes
+        files[f"{basename}_corriges_{requested_style}.pdf"] = booklet
+
+        # Record export (guests: one per version, for their quota)
+        if is_pro_user:
+            await db.exports.insert_one({
+                "id": str(uuid.uuid4()),
+                "document_id": request.document_id,
+                "export_type": "class_set",
+                "nb_variants": request.nb_variants,
+                "user_email": user_email,
+                "is_pro": True,
+                "template_used": requested_style,
+                "created_at": datetime.now(timezone.utc)
+            })
+        for _ in range(request.nb_variants):
+            await record_guest_export(request.document_id, "class_set", request.guest_id,
+                                      user_email, is_pro_user, template_config)
+
+        logger.info(
+            "Class set generated",
+            module_name="export",
+            func_name="export_class_set",
+            doc_id=request.document_id,
+            nb_variants=request.nb_variants,
+            pool_jobs=len(jobs)
+        )
+        return zip_response(files, f"{basename}_{request.nb_variants}_versions.zip")
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error exporting class set: {e}")
+        raise HTTPException(status_code=500, detail="Erreur lors de l'export des versions élèves")
 
 @api_router.post("/export/advanced")
 async def export_pdf_advanced(request: EnhancedExportRequest, http_request: Request):
@@ -4225,11 +4335,6 @@ async def export_pdf_advanced(request: EnhancedExportRequest, http_request: Requ
             document, content, request.export_type, template_config, advanced_opts
         )
         
-        # Create temporary file
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-        temp_file.write(pdf_content)
-        temp_file.close()
-        
         # Generate filename
         filename = f"LeMaitremot_{request.export_type}_{document['matiere']}_{document['niveau']}_advanced.pdf"
         
@@ -4248,11 +4353,7 @@ async def export_pdf_advanced(request: EnhancedExportRequest, http_request: Requ
         
         logger.info(f"✅ Advanced PDF generated successfully: {filename}")
         
-        return FileResponse(
-            temp_file.name,
-            media_type='application/pdf',
-            filename=filename
-        )
+        return pdf_response(pdf_content, filename)
         
     except HTTPException:
         raise
@@ -4304,7 +4405,7 @@ async def create_checkout_session(request: CheckoutRequest, http_request: Reques
         # Initialize Stripe
         host_url = str(http_request.base_url).rstrip('/')
         webhook_url = f"{host_url}/api/webhook/stripe"
-        stripe_checkout = StripeCheckout(api_key=stripe_secret_key, webhook_url=webhook_url)
+        stripe_checkout = get_stripe_checkout().StripeCheckout(api_key=stripe_secret_key, webhook_url=webhook_url)
         
         # Build URLs from frontend origin
         success_url = f"{request.origin_url}/success?session_id={{CHECKOUT_SESSION_ID}}"
@@ -4320,7 +4421,7 @@ async def create_checkout_session(request: CheckoutRequest, http_request: Reques
         }
         
         # Create checkout session request
-        checkout_request = CheckoutSessionRequest(
+        checkout_request = get_stripe_checkout().CheckoutSessionRequest(
             amount=package["amount"],
             currency=package["currency"],
             success_url=success_url,
@@ -4364,7 +4465,7 @@ async def get_checkout_status(session_id: str):
     """Get checkout session status"""
     try:
         # Initialize Stripe
-        stripe_checkout = StripeCheckout(api_key=stripe_secret_key, webhook_url="")
+        stripe_checkout = get_stripe_checkout().StripeCheckout(api_key=stripe_secret_key, webhook_url="")
         
         # Get status from Stripe
         status = await stripe_checkout.get_checkout_status(session_id)
@@ -4480,7 +4581,7 @@ async def stripe_webhook(request: Request):
             raise HTTPException(status_code=400, detail="Missing Stripe signature")
         
         # Initialize Stripe
-        stripe_checkout = StripeCheckout(api_key=stripe_secret_key, webhook_url="")
+        stripe_checkout = get_stripe_checkout().StripeCheckout(api_key=stripe_secret_key, webhook_url="")
         
         # Handle webhook
         webhook_response = await stripe_checkout.handle_webhook(body, stripe_signature)
@@ -4565,9 +4666,11 @@ async def get_documents(guest_id: str = None):
             # Apply professional content processing to ensure consistency
             # Process all content systematically to handle both old and new documents
             if 'exercises' in doc:
+                # Rendered once per content (render_pipeline), read back on every listing
+                await render_exercises(db, doc['exercises'], 'web')
                 for exercise in doc['exercises']:
-                    if 'enonce' in exercise and exercise['enonce']:
-                        exercise['enonce'] = process_exercise_content(exercise['enonce'])
+                    # Figures are stored by id: served by URL from /api/figures
+                    figure_store.expand_exercise(exercise)
                     
                     # schema_img is now generated during exercise creation, no need to process again
                     if exercise.get('schema_img'):
@@ -4578,16 +4681,6 @@ async def get_documents(guest_id: str = None):
                             doc_id=str(doc.get('id', 'unknown'))[:8],
                             has_schema_img=bool(exercise.get('schema_img'))
                         )
-
-                    # Process solution if it exists
-                    if exercise.get('solution'):
-                        if exercise['solution'].get('resultat'):
-                            exercise['solution']['resultat'] = process_exercise_content(exercise['solution']['resultat'])
-                                
-                        if exercise['solution'].get('etapes') and isinstance(exercise['solution']['etapes'], list):
-                            exercise['solution']['etapes'] = [
-                                process_exercise_content(step) for step in exercise['solution']['etapes']
-                            ]
         
         # Clean up MongoDB-specific fields that can't be JSON serialized
         for doc in documents:
@@ -4629,14 +4722,18 @@ async def vary_exercise(document_id: str, exercise_index: int):
             # Update the specific exercise
             # Convert Exercise object to dict for MongoDB storage
             exercise_dict = exercises[0].dict() if hasattr(exercises[0], 'dict') else exercises[0]
+            # Figures are stored by id only, see figure_store
+            figure_store.compact_exercise(exercise_dict)
             doc["exercises"][exercise_index] = exercise_dict
             await db.documents.update_one(
                 {"id": document_id},
                 {"$set": {"exercises": doc["exercises"]}}
             )
+            # Cached PDFs of the previous version can no longer be requested
+            pdf_cache.invalidate_document(document_id)
             
-            # Return the exercise as dict for JSON serialization
-            return {"exercise": exercise_dict}
+            # Return the exercise as dict for JSON serialization (figures served by URL)
+            return {"exercise": figure_store.expand_exercise(dict(exercise_dict))}
         
         raise HTTPException(status_code=500, detail="Impossible de générer une variation")
         
@@ -4646,6 +4743,41 @@ async def vary_exercise(document_id: str, exercise_index: int):
         logger.error(f"Error varying exercise: {e}")
         raise HTTPException(status_code=500, detail="Erreur lors de la génération de la variation")
 
+@api_router.get("/health/ready")
+async def readiness():
+    """Readiness probe: 503 until the optional startup warm-up has finished"""
+    report = warmup.warmup_state.report()
+    return JSONResponse(status_code=200 if report['ready'] else 503, content=report)
+
+@api_router.get("/metrics/render")
+async def render_metrics():
+    """Caches de rendu des figures (taille, taux de succès) et temps de rendu par type"""
+    return {
+        "figure_cache": figure_cache.get_stats(),
+        "figure_registry": figure_registry.stats(),
+        "svg_optimizer": svg_savings.stats(),
+        "pdf_pool": pdf_worker_pool.stats(),
+        "pdf_cache": pdf_cache.stats(),
+        "templates": template_engine.stats(),
+    }
+
+@api_router.get("/figures/{figure_id}")
+async def get_figure(figure_id: str, request: Request):
+    """Figure or formula from the content-addressed store: the URL never changes content"""
+    stored = figure_store.get(figure_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Figure introuvable")
+    content, media_type = stored
+    headers = {
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "ETag": f'"{figure_id}"',
+        "X-Content-Type-Options": "nosniff",
+        "Content-Security-Policy": "default-src 'none'; style-src 'unsafe-inline'",
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, media_type=media_type, headers=headers)
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -4664,6 +4796,64 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Pro personalization templates (generate_advanced_pdf)
+PRO_TEMPLATES = ("sujet_pro", "corrige_pro")
+
+def export_template_names() -> List[str]:
+    return [
+        name
+        for style in EXPORT_TEMPLATE_STYLES.values()
+        for name in (style["sujet_template"], style["corrige_template"])
+    ]
+
+@app.on_event("startup")
+async def precompile_templates():
+    """Compile every export template once; exports then only read the in-memory cache"""
+    template_engine.precompile(export_template_names() + list(PRO_TEMPLATES))
+
+@app.on_event("startup")
+async def create_database_indexes():
+    """Indexes of every hot query (db_indexes.REQUIRED_INDEXES), created in background"""
+    app.state.index_task = asyncio.create_task(ensure_indexes(db))
+
+@app.on_event("startup")
+async def remove_stale_temp_files():
+    """PDF temp files leaked by earlier versions and interrupted cache writes"""
+    loop = asyncio.get_running_loop()
+    loop.run_in_executor(None, lambda: cleanup_temp_files([pdf_cache.root, figure_store.root, URL_FETCH_CACHE_DIR, map_asset_store.root]))
+
+@app.on_event("startup")
+async def prepare_geography_maps():
+    """Download map sources and build the regional crops once, in background"""
+    loop = asyncio.get_running_loop()
+    loop.run_in_executor(None, lambda: map_asset_store.prepare(document_searcher.validated_documents_cache))
+
+@app.on_event("startup")
+async def start_pdf_pool():
+    """Spawn the WeasyPrint processes; each one warms up (fonts, default CSS) on its own"""
+    pdf_worker_pool.start()
+
+@app.on_event("startup")
+async def warmup_renderers():
+    """Opt-in warm-up (WARMUP_ON_STARTUP=1), run in background so startup is not blocked"""
+    if not warmup.is_enabled():
+        warmup.warmup_state.disable()
+        return
+
+    export_templates = export_template_names()
+    loop = asyncio.get_running_loop()
+    loop.run_in_executor(
+        None, lambda: warmup.run_warmup(export_templates, template_engine.get_template, pdf_worker_pool.render_sync)
+    )
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    client.close()
+
+@app.on_event("shutdown")
+async def close_document_search_session():
+    await document_searcher.close()
+
+@app.on_event("shutdown")
+async def shutdown_pdf_pool():
+    pdf_worker_pool.shutdown()
\ No newline at end of file
@@ -7,6 +7,8 @@ import logging
 from typing import Dict, Any, Optional
 from models.math_models import GeometricFigure
 from geometry_svg_renderer import GeometrySVGRenderer
+from figure_cache import memoize_figure
+from figure_registry import figure_registry, normalize_figure_type, FORMAT_SVG
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +18,17 @@ class GeometryRenderService:
     def __init__(self):
         self.renderer = GeometrySVGRenderer(width=400, height=300)
     
+    def figure_renderers(self) -> Dict[str, Any]:
+        """Rendus par type de figure (enregistrés dans figure_registry, profil 'figure_model')"""
+        return {
+            "triangle_rectangle": self._render_triangle_rectangle,
+            "rectangle": self._render_rectangle,
+            "cercle": self._render_cercle,
+            "triangle": self._render_triangle,
+            "thales": self._render_thales,
+        }
+    
+    @memoize_figure("geometric_figure_svg", to_schema=lambda figure: figure.model_dump())
     def render_figure_to_svg(self, figure: GeometricFigure) -> Optional[str]:
         """
         Convertit une GeometricFigure en SVG
@@ -27,23 +40,14 @@ class GeometryRenderService:
             Chaîne SVG ou None en cas d'erreur
         """
         try:
-            figure_type = figure.type.lower()
+            figure_type = normalize_figure_type(figure.type)
             
-            # Dispatcher selon le type de figure
-            if figure_type == "triangle_rectangle":
-                return self._render_triangle_rectangle(figure)
-            elif figure_type == "rectangle":
-                return self._render_rectangle(figure)
-            elif figure_type == "cercle":
-                return self._render_cercle(figure)
-            elif figure_type == "triangle":
-                return self._render_triangle(figure)
-            elif figure_type == "thales":
-                return self._render_thales(figure)
-            else:
+            if not figure_registry.supports("figure_model", figure_type, FORMAT_SVG):
                 logger.warning(f"Type de figure non supporté: {figure_type}")
                 return None
-                
+            
+            return figure_registry.render("figure_model", figure_type, FORMAT_SVG, figure)
+            
         except Exception as e:
             logger.error(f"Erreur lors du rendu SVG: {e}", exc_info=True)
             return None
@@ -162,5 +166,11 @@ class GeometryRenderService:
         return self.renderer.render_thales(data)
 
 
+def register_figure_models(service: GeometryRenderService) -> None:
+    for figure_type, render in service.figure_renderers().items():
+        figure_registry.register("figure_model", figure_type, FORMAT_SVG, render)
+
+
 # Instance globale
 geometry_render_service = GeometryRenderService()
+register_figure_models(geometry_render_service)
@@ -6,7 +6,7 @@ Génère specs mathématiques complètes avec solutions calculées (SANS IA)
 import random
 import math
 from fractions import Fraction
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 import logging
 from models.math_models import (
     MathExerciseSpec, MathExerciseType, DifficultyLevel, 
@@ -18,7 +18,11 @@ logger = logging.getLogger(__name__)
 class MathGenerationService:
     """Service de génération d'exercices mathématiques structurés"""
     
-    def __init__(self):
+    def __init__(self, seed: Optional[int] = None):
+        # Générateur pseudo-aléatoire propre à l'instance : une même graine redonne
+        # les mêmes exercices (variantes reproductibles d'une fiche)
+        self.rng = random.Random(seed)
+        
         # Points utilisables pour la géométrie (éviter ABC en premier)
         self.geometry_points_sets = [
             ["D", "E", "F"],
@@ -49,7 +53,7 @@ class MathGenerationService:
         specs = []
         for i in range(nb_exercices):
             # Choisir un type d'exercice
-            exercise_type = random.choice(exercise_types)
+            exercise_type = self.rng.choice(exercise_types)
             
             # Générer la spec selon le type
             spec = self._generate_spec_by_type(
@@ -61,6 +65,12 @@ class MathGenerationService:
             
         return specs
     
+    def regenerate_spec(self, spec: MathExerciseSpec) -> MathExerciseSpec:
+        """Nouvelle spec de même type, niveau, chapitre et difficulté (autres valeurs)"""
+        return self._generate_spec_by_type(
+            spec.niveau, spec.chapitre, spec.type_exercice, DifficultyLevel(spec.difficulte).value
+        )
+    
     def _map_chapter_to_types(self, chapitre: str, niveau: str) -> List[MathExerciseType]:
         """Mappe les chapitres aux types d'exercices appropriés"""
         
@@ -180,12 +190,12 @@ class MathGenerationService:
         
         # Choisir un triplet selon la difficulté
         if difficulte == "facile":
-            a, b, c = random.choice(triplets_faciles)
+            a, b, c = self.rng.choice(triplets_faciles)
         else:
-            a, b, c = random.choice(triplets_difficiles)
+            a, b, c = self.rng.choice(triplets_difficiles)
         
         # Décider quel côté calculer
-        calcul_type = random.choice(["hypotenuse", "cote"])
+        calcul_type = self.rng.choice(["hypotenuse", "cote"])
         
         if calcul_type == "hypotenuse":
             # CAS 1 : Calculer l'hypoténuse
@@ -269,10 +279,10 @@ class MathGenerationService:
         """Génère un exercice de calculs avec nombres relatifs"""
         
         if difficulte == "facile":
-            operandes = [random.randint(-10, 10) for _ in range(3)]
+            operandes = [self.rng.randint(-10, 10) for _ in range(3)]
             operations_list = ["+", "-"]
         else:
-            operandes = [random.randint(-20, 20) for _ in range(4)]
+            operandes = [self.rng.randint(-20, 20) for _ in range(4)]
             operations_list = ["+", "-", "*"] if difficulte == "difficile" else ["+", "-"]
         
         # Construire l'expression et stocker les opérations
@@ -280,7 +290,7 @@ class MathGenerationService:
         operations_used = []
         
         for i in range(1, len(operandes)):
-            op = random.choice(operations_list)
+            op = self.rng.choice(operations_list)
             operations_used.append(op)
             operand = operandes[i]
             
@@ -353,11 +363,11 @@ class MathGenerationService:
         """Génère une équation du premier degré"""
         
         # Choisir la solution d'abord (pour éviter fractions complexes)
-        x_solution = random.randint(1, 10) if difficulte == "facile" else random.randint(-5, 15)
+        x_solution = self.rng.randint(1, 10) if difficulte == "facile" else self.rng.randint(-5, 15)
         
         # Générer coefficients
-        a = random.randint(2, 8)
-        b = random.randint(-10, 10)
+        a = self.rng.randint(2, 8)
+        b = self.rng.randint(-10, 10)
         
         # Calculer c pour que x_solution soit la solution
         c = a * x_solution + b
@@ -404,16 +414,16 @@ class MathGenerationService:
         
         if difficulte == "facile":
             # Fractions simples avec dénominateurs petits
-            num1, den1 = random.randint(1, 5), random.choice([2, 3, 4, 5])
-            num2, den2 = random.randint(1, 5), random.choice([2, 3, 4, 5])
+            num1, den1 = self.rng.randint(1, 5), self.rng.choice([2, 3, 4, 5])
+            num2, den2 = self.rng.randint(1, 5), self.rng.choice([2, 3, 4, 5])
         else:
-            num1, den1 = random.randint(1, 10), random.randint(2, 12)
-            num2, den2 = random.randint(1, 10), random.randint(2, 12)
+            num1, den1 = self.rng.randint(1, 10), self.rng.randint(2, 12)
+            num2, den2 = self.rng.randint(1, 10), self.rng.randint(2, 12)
         
         frac1 = Fraction(num1, den1)
         frac2 = Fraction(num2, den2)
         
-        operation = random.choice(["+", "-"])
+        operation = self.rng.choice(["+", "-"])
         
         if operation == "+":
             resultat = frac1 + frac2
@@ -451,13 +461,13 @@ class MathGenerationService:
         """Génère un exercice de calculs avec nombres décimaux"""
         
         if difficulte == "facile":
-            a = round(random.uniform(1, 20), 1)
-            b = round(random.uniform(1, 20), 1)
+            a = round(self.rng.uniform(1, 20), 1)
+            b = round(self.rng.uniform(1, 20), 1)
         else:
-            a = round(random.uniform(5, 50), 2)
-            b = round(random.uniform(5, 50), 2)
+            a = round(self.rng.uniform(5, 50), 2)
+            b = round(self.rng.uniform(5, 50), 2)
         
-        operation = random.choice(["+", "-", "*"])
+        operation = self.rng.choice(["+", "-", "*"])
         
         if operation == "+":
             resultat = round(a + b, 2)
@@ -502,8 +512,8 @@ class MathGenerationService:
         points = self._get_next_geometry_points()
         
         # Générer deux angles, le troisième se déduit
-        angle1 = random.randint(30, 80)
-        angle2 = random.randint(30, 80)
+        angle1 = self.rng.randint(30, 80)
+        angle2 = self.rng.randint(30, 80)
         angle3 = 180 - angle1 - angle2
         
         # Vérifier que le troisième angle est valide
@@ -551,12 +561,12 @@ class MathGenerationService:
         """Génère un exercice de proportionnalité"""
         
         # Coefficient de proportionnalité
-        k = random.randint(2, 8)
+        k = self.rng.randint(2, 8)
         
         # Valeurs du tableau
-        val1 = random.randint(3, 10)
-        val2 = random.randint(12, 25)
-        val3 = random.randint(5, 15)  # Valeur à trouver
+        val1 = self.rng.randint(3, 10)
+        val2 = self.rng.randint(12, 25)
+        val3 = self.rng.randint(5, 15)  # Valeur à trouver
         
         resultat1 = val1 * k
         resultat2 = val2 * k
@@ -592,11 +602,11 @@ class MathGenerationService:
     def _gen_perimetre_aire(self, niveau: str, chapitre: str, difficulte: str) -> MathExerciseSpec:
         """Génère un exercice de périmètres et aires"""
         
-        figure_type = random.choice(["rectangle", "carre", "cercle"])
+        figure_type = self.rng.choice(["rectangle", "carre", "cercle"])
         
         if figure_type == "rectangle":
-            longueur = random.randint(8, 20)
-            largeur = random.randint(4, 12)
+            longueur = self.rng.randint(8, 20)
+            largeur = self.rng.randint(4, 12)
             perimetre = 2 * (longueur + largeur)
             aire = longueur * largeur
             
@@ -636,7 +646,7 @@ class MathGenerationService:
             )
         
         elif figure_type == "carre":
-            cote = random.randint(5, 15)
+            cote = self.rng.randint(5, 15)
             perimetre = 4 * cote
             aire = cote * cote
             
@@ -675,7 +685,7 @@ class MathGenerationService:
             )
         
         else:  # cercle
-            rayon = random.randint(3, 10)
+            rayon = self.rng.randint(3, 10)
             perimetre = round(2 * math.pi * rayon, 2)
             aire = round(math.pi * rayon * rayon, 2)
             
@@ -715,8 +725,8 @@ class MathGenerationService:
         points_set2 = self._get_next_geometry_points()  # D, E, F
         points = points_set1 + [points_set2[0]]  # A, B, C, D (4 points pour rectangle)
         
-        longueur = random.randint(8, 20)
-        largeur = random.randint(4, 12)
+        longueur = self.rng.randint(8, 20)
+        largeur = self.rng.randint(4, 12)
         
         figure = GeometricFigure(
             type="rectangle",
@@ -763,10 +773,10 @@ class MathGenerationService:
         if difficulte == "facile":
             solides = ["cube", "pave"]
         
-        solide = random.choice(solides)
+        solide = self.rng.choice(solides)
         
         if solide == "cube":
-            arete = random.randint(3, 12)
+            arete = self.rng.randint(3, 12)
             volume = arete ** 3
             
             etapes = [
@@ -794,9 +804,9 @@ class MathGenerationService:
             )
         
         elif solide == "pave":
-            longueur = random.randint(5, 15)
-            largeur = random.randint(4, 12)
-            hauteur = random.randint(3, 10)
+            longueur = self.rng.randint(5, 15)
+            largeur = self.rng.randint(4, 12)
+            hauteur = self.rng.randint(3, 10)
             volume = longueur * largeur * hauteur
             
             etapes = [
@@ -826,8 +836,8 @@ class MathGenerationService:
             )
         
         elif solide == "cylindre":
-            rayon = random.randint(3, 10)
-            hauteur = random.randint(5, 15)
+            rayon = self.rng.randint(3, 10)
+            hauteur = self.rng.randint(5, 15)
             volume = round(math.pi * rayon * rayon * hauteur, 2)
             
             etapes = [
@@ -857,9 +867,9 @@ class MathGenerationService:
             )
         
         else:  # prisme
-            base_longueur = random.randint(5, 12)
-            base_largeur = random.randint(4, 10)
-            hauteur = random.randint(6, 15)
+            base_longueur = self.rng.randint(5, 12)
+            base_largeur = self.rng.randint(4, 10)
+            hauteur = self.rng.randint(6, 15)
             aire_base = base_longueur * base_largeur
             volume = aire_base * hauteur
             
@@ -895,11 +905,11 @@ class MathGenerationService:
         
         # Générer une série de données
         if difficulte == "facile":
-            nb_valeurs = random.randint(5, 8)
-            valeurs = [random.randint(5, 20) for _ in range(nb_valeurs)]
+            nb_valeurs = self.rng.randint(5, 8)
+            valeurs = [self.rng.randint(5, 20) for _ in range(nb_valeurs)]
         else:
-            nb_valeurs = random.randint(8, 12)
-            valeurs = [random.randint(0, 30) for _ in range(nb_valeurs)]
+            nb_valeurs = self.rng.randint(8, 12)
+            valeurs = [self.rng.randint(0, 30) for _ in range(nb_valeurs)]
         
         # Calculs statistiques
         moyenne = round(sum(valeurs) / len(valeurs), 2)
@@ -974,7 +984,7 @@ class MathGenerationService:
             }
         ]
         
-        situation = random.choice(situations)
+        situation = self.rng.choice(situations)
         
         probabilite = situation["issues_favorables"] / situation["nb_issues"]
         probabilite_fraction = Fraction(situation["issues_favorables"], situation["nb_issues"])
@@ -1010,11 +1020,11 @@ class MathGenerationService:
     def _gen_puissances(self, niveau: str, chapitre: str, difficulte: str) -> MathExerciseSpec:
         """Génère un exercice sur les puissances"""
         
-        type_calcul = random.choice(["calcul_simple", "produit", "quotient"])
+        type_calcul = self.rng.choice(["calcul_simple", "produit", "quotient"])
         
         if type_calcul == "calcul_simple":
-            base = random.randint(2, 10)
-            exposant = random.randint(2, 5) if difficulte == "facile" else random.randint(3, 6)
+            base = self.rng.randint(2, 10)
+            exposant = self.rng.randint(2, 5) if difficulte == "facile" else self.rng.randint(3, 6)
             resultat = base ** exposant
             
             etapes = [
@@ -1041,9 +1051,9 @@ class MathGenerationService:
             )
         
         elif type_calcul == "produit":
-            base = random.randint(2, 8)
-            exp1 = random.randint(2, 4)
-            exp2 = random.randint(2, 4)
+            base = self.rng.randint(2, 8)
+            exp1 = self.rng.randint(2, 4)
+            exp2 = self.rng.randint(2, 4)
             exp_somme = exp1 + exp2
             resultat = base ** exp_somme
             
@@ -1075,9 +1085,9 @@ class MathGenerationService:
             )
         
         else:  # quotient
-            base = random.randint(2, 8)
-            exp1 = random.randint(4, 7)
-            exp2 = random.randint(2, exp1-1)  # exp2 < exp1 pour éviter exposants négatifs
+            base = self.rng.randint(2, 8)
+            exp1 = self.rng.randint(4, 7)
+            exp2 = self.rng.randint(2, exp1-1)  # exp2 < exp1 pour éviter exposants négatifs
             exp_diff = exp1 - exp2
             resultat = base ** exp_diff
             
@@ -1111,10 +1121,10 @@ class MathGenerationService:
     def _gen_cercle(self, niveau: str, chapitre: str, difficulte: str) -> MathExerciseSpec:
         """Génère un exercice sur les cercles (périmètre, aire)"""
         
-        type_calcul = random.choice(["perimetre", "aire", "rayon_depuis_perimetre"])
+        type_calcul = self.rng.choice(["perimetre", "aire", "rayon_depuis_perimetre"])
         
         if type_calcul == "perimetre":
-            rayon = random.randint(3, 15)
+            rayon = self.rng.randint(3, 15)
             perimetre = round(2 * math.pi * rayon, 2)
             
             etapes = [
@@ -1150,7 +1160,7 @@ class MathGenerationService:
             )
         
         elif type_calcul == "aire":
-            rayon = random.randint(3, 12)
+            rayon = self.rng.randint(3, 12)
             aire = round(math.pi * rayon * rayon, 2)
             
             etapes = [
@@ -1187,7 +1197,7 @@ class MathGenerationService:
             )
         
         else:  # rayon depuis périmètre
-            rayon = random.randint(5, 12)
+            rayon = self.rng.randint(5, 12)
             perimetre = round(2 * math.pi * rayon, 2)
             
             etapes = [
@@ -1237,13 +1247,13 @@ class MathGenerationService:
         # Choisir des rapports simples
         if difficulte == "facile":
             rapports = [2, 3, 4]
-            k = random.choice(rapports)
+            k = self.rng.choice(rapports)
         else:
-            k = random.randint(2, 5)
+            k = self.rng.randint(2, 5)
         
         # Longueurs
-        AD = random.randint(3, 8)
-        AE = random.randint(3, 8)
+        AD = self.rng.randint(3, 8)
+        AE = self.rng.randint(3, 8)
         
         # DB = k × AD (pour que AB = AD + DB)
         DB = k * AD
@@ -1254,7 +1264,7 @@ class MathGenerationService:
         AC = AE + EC
         
         # DE = BC / k (proportionnalité)
-        BC = random.randint(10, 20)
+        BC = self.rng.randint(10, 20)
         DE = round(BC / (k + 1), 2)
         
         # Configuration : points[0]=A (sommet), points[1]=B, points[2]=C (base)
@@ -1319,15 +1329,15 @@ class MathGenerationService:
         }
         
         if difficulte == "facile":
-            angle = random.choice([30, 45, 60])
+            angle = self.rng.choice([30, 45, 60])
         else:
-            angle = random.randint(25, 70)
+            angle = self.rng.randint(25, 70)
         
-        type_calcul = random.choice(["cote_oppose", "cote_adjacent", "hypotenuse"])
+        type_calcul = self.rng.choice(["cote_oppose", "cote_adjacent", "hypotenuse"])
         
         if type_calcul == "cote_oppose":
             # Calculer le côté opposé avec sin
-            hypotenuse = random.randint(10, 20)
+            hypotenuse = self.rng.randint(10, 20)
             
             if angle in angles_remarquables:
                 sin_angle = angles_remarquables[angle]["sin"]
@@ -1350,7 +1360,7 @@ class MathGenerationService:
             
         elif type_calcul == "cote_adjacent":
             # Calculer le côté adjacent avec cos
-            hypotenuse = random.randint(10, 20)
+            hypotenuse = self.rng.randint(10, 20)
             
             if angle in angles_remarquables:
                 cos_angle = angles_remarquables[angle]["cos"]
@@ -1371,7 +1381,7 @@ class MathGenerationService:
             resultat = cote_adjacent
             
         else:  # hypotenuse
-            cote_oppose = random.randint(5, 12)
+            cote_oppose = self.rng.randint(5, 12)
             
             if angle in angles_remarquables:
                 sin_angle = angles_remarquables[angle]["sin"]
@@ -9,7 +9,7 @@ import logging
 from typing import List, Optional
 from models.math_models import MathExerciseSpec, MathTextGeneration, GeneratedMathExercise
 from utils import get_emergent_key
-from emergentintegrations.llm.chat import LlmChat, UserMessage
+from lazy_imports import get_llm_chat
 from services.text_normalizer import normalizer
 
 logger = logging.getLogger(__name__)
@@ -17,8 +17,9 @@ logger = logging.getLogger(__name__)
 class MathTextService:
     """Service de rédaction IA pour exercices mathématiques"""
     
-    def __init__(self):
-        self.emergent_key = get_emergent_key()
+    def __init__(self, use_ai: bool = True):
+        # use_ai=False : rédaction par templates uniquement (aucune clé requise)
+        self.emergent_key = get_emergent_key() if use_ai else None
     
     async def generate_text_for_specs(
         self, 
@@ -73,13 +74,14 @@ class MathTextService:
         
         # Appel IA
         try:
-            chat = LlmChat(
+            llm = get_llm_chat()
+            chat = llm.LlmChat(
                 api_key=self.emergent_key,
                 session_id=f"math_text_{hash(str(spec.parametres))}",
                 system_message=system_message
             ).with_model('openai', 'gpt-4o')
             
-            user_message = UserMessage(text=user_prompt)
+            user_message = llm.UserMessage(text=user_prompt)
             response = await asyncio.wait_for(
                 chat.send_message(user_message),
                 timeout=30.0
@@ -302,6 +304,10 @@ Tu réponds UNIQUEMENT en JSON avec les champs : "enonce", "explication_prof", "
         
         return True
     
+    def generate_template_text(self, spec: MathExerciseSpec) -> MathTextGeneration:
+        """Rédaction sans IA, par les templates d'énoncés (variantes d'une fiche)"""
+        return self._generate_fallback_text(spec)
+    
     def _generate_fallback_text(self, spec: MathExerciseSpec) -> MathTextGeneration:
         """Génère un texte de fallback sans IA"""
         
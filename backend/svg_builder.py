@@ -0,0 +1,113 @@
+"""
+SVG Builder - Documents SVG construits par concaténation de chaînes
+
+Backend rapide des renderers géométriques : le balisage est écrit directement dans une
+liste de fragments (joints une seule fois à la fin) au lieu de construire puis sérialiser
+un arbre ElementTree. Les nombres sont formatés en précision fixe (2 décimales, zéros
+inutiles supprimés). SVGElementTreeDocument conserve l'ancien backend, avec la même API.
+"""
+
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, Optional
+
+SVG_NAMESPACE = 'http://www.w3.org/2000/svg'
+
+# Précision des coordonnées : 0,01 px, invisible à l'écran comme à l'impression
+DEFAULT_PRECISION = 2
+
+_ATTR_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', '\n': '&#10;'})
+_TEXT_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+_NUMBER_TYPES = (int, float)
+
+
+def format_number(value: float, precision: int = DEFAULT_PRECISION) -> str:
+    """120.0 -> '120', 66.666666 -> '66.67', -0.001 -> '0'"""
+    if value.__class__ is int:
+        return str(value)
+    text = '%.*f' % (precision, value)
+    if '.' in text:
+        text = text.rstrip('0').rstrip('.')
+    return '0' if text == '-0' else text
+
+
+def escape_attr(value: str) -> str:
+    return value.translate(_ATTR_ESCAPES)
+
+
+def escape_text(value: str) -> str:
+    return value.translate(_TEXT_ESCAPES)
+
+
+class SVGStringDocument:
+    """Document SVG écrit en flux dans une liste de fragments"""
+
+    __slots__ = ('_parts', 'precision')
+
+    def __init__(self, width: int, height: int, style: str = '', precision: int = DEFAULT_PRECISION):
+        self.precision = precision
+        self._parts = [
+            f'<svg xmlns="{SVG_NAMESPACE}" width="{width}" height="{height}" viewBox="0 0 {width} {height}">'
+        ]
+        if style:
+            self._parts.append(f'<style>{style}</style>')
+
+    def num(self, value: float) -> str:
+        return format_number(value, self.precision)
+
+    def element(self, tag: str, attrs: Dict[str, Any], text: Optional[str] = None) -> None:
+        """Ajoute un élément ; les valeurs numériques sont formatées en précision fixe"""
+        precision = self.precision
+        markup = ''.join([
+            f' {name}="{format_number(value, precision)}"' if value.__class__ in _NUMBER_TYPES
+            else f' {name}="{str(value).translate(_ATTR_ESCAPES)}"'
+            for name, value in attrs.items()
+        ])
+        if text is None:
+            self._parts.append(f'<{tag}{markup}/>')
+        else:
+            self._parts.append(f'<{tag}{markup}>{str(text).translate(_TEXT_ESCAPES)}</{tag}>')
+    
+    def raw(self, markup: str) -> None:
+        """Ajoute du balisage déjà formé (groupes, defs...)"""
+        self._parts.append(markup)
+
+    def to_string(self) -> str:
+        return ''.join(self._parts) + '</svg>'
+
+
+class SVGElementTreeDocument:
+    """Ancien backend ElementTree, même API que SVGStringDocument"""
+
+    def __init__(self, width: int, height: int, style: str = '', precision: Optional[int] = None):
+        self.precision = precision
+        self.root = ET.Element('svg', {
+            'width': str(width),
+            'height': str(height),
+            'viewBox': f'0 0 {width} {height}',
+            'xmlns': SVG_NAMESPACE
+        })
+        if style:
+            ET.SubElement(self.root, 'style').text = style
+
+    def num(self, value: float) -> str:
+        return str(value) if self.precision is None else format_number(value, self.precision)
+
+    def element(self, tag: str, attrs: Dict[str, Any], text: Optional[str] = None) -> None:
+        node = ET.SubElement(self.root, tag, {
+            name: self.num(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else str(value)
+            for name, value in attrs.items()
+        })
+        if text is not None:
+            node.text = str(text)
+
+    def raw(self, markup: str) -> None:
+        self.root.append(ET.fromstring(markup))
+
+    def to_string(self) -> str:
+        return ET.tostring(self.root, encoding='unicode')
+
+
+SVG_BACKENDS = {
+    'string': SVGStringDocument,
+    'etree': SVGElementTreeDocument,
+}
@@ -0,0 +1,164 @@
+"""
+SVG Optimizer - Minification des SVG avant insertion dans le HTML (web et WeasyPrint)
+
+Les SVG matplotlib (figures, formules) et ElementTree portent des flottants en pleine
+précision, un bloc <metadata> RDF, des commentaires, des identifiants de groupes jamais
+référencés et le même attribut style="..." répété sur chaque élément. L'optimisation :
+
+- arrondit les coordonnées (chemins, points, positions) à SVG_PRECISION décimales
+- supprime métadonnées, commentaires, espaces entre balises et identifiants non référencés
+- compacte les données de chemin ("M 0 22.284 \\nL ..." -> "M0 22.28L...")
+- regroupe les styles répétés dans des classes ; le nom de classe dérive du contenu du
+  style, si bien que plusieurs SVG insérés dans la même page ne peuvent pas se contredire
+
+Elle est appliquée une seule fois par artefact (render_pipeline) ; les octets gagnés
+sont comptés par document et au total (endpoint /api/metrics/render).
+"""
+
+import hashlib
+import os
+import re
+from threading import Lock
+from typing import Dict, Tuple
+
+from svg_builder import format_number
+
+# Décimales conservées : 0,01 unité utilisateur (pt pour matplotlib), invisible à l'impression
+SVG_PRECISION = int(os.environ.get('SVG_PRECISION', '2'))
+
+_SVG_RE = re.compile(r'<svg\b.*?</svg>', re.DOTALL)
+_METADATA_RE = re.compile(r'<metadata>.*?</metadata>', re.DOTALL)
+_COMMENT_RE = re.compile(r'<!--.*?-->', re.DOTALL)
+_BETWEEN_TAGS_RE = re.compile(r'>\s+<')
+_NUMBER_RE = re.compile(r'-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+_PATH_DATA_RE = re.compile(r'(\s(?:d|points)=")([^"]*)(")')
+_COORDINATE_ATTR_RE = re.compile(r'(\s(?:x|y|x1|y1|x2|y2|cx|cy|r|rx|ry)=")(-?[\d.]+)(")')
+_PATH_COMMAND_SPACE_RE = re.compile(r'\s*([MmLlHhVvCcSsQqTtAaZz])\s*')
+_SPACES_RE = re.compile(r'\s+')
+_ID_RE = re.compile(r'\sid="([^"]+)"')
+_REFERENCE_RE = re.compile(r'#([^"\s)]+)')
+_TAG_STYLE_RE = re.compile(r'<[a-zA-Z][^>]*?\sstyle="([^"]*)"[^>]*>')
+_STYLE_ATTR_RE = re.compile(r'\sstyle="([^"]*)"')
+_LONG_HEX_RE = re.compile(r'#([0-9a-fA-F])\1([0-9a-fA-F])\2([0-9a-fA-F])\3\b')
+_SVG_OPEN_RE = re.compile(r'<svg\b[^>]*>')
+
+
+def _round_numbers(text: str, precision: int) -> str:
+    return _NUMBER_RE.sub(lambda match: format_number(float(match.group(0)), precision), text)
+
+
+def _compact_path(data: str, precision: int) -> str:
+    data = _round_numbers(data, precision)
+    data = _PATH_COMMAND_SPACE_RE.sub(r'\1', data)
+    return _SPACES_RE.sub(' ', data).strip()
+
+
+def minify_style(style: str) -> str:
+    """'fill: none; stroke: #000000' -> 'fill:none;stroke:#000'"""
+    declarations = []
+    for declaration in style.split(';'):
+        name, _, value = declaration.partition(':')
+        if name.strip() and value.strip():
+            declarations.append(f"{name.strip()}:{_SPACES_RE.sub(' ', value.strip())}")
+    return _LONG_HEX_RE.sub(r'#\1\2\3', ';'.join(declarations))
+
+
+def _style_class(style: str) -> str:
+    return 's-' + hashlib.sha1(style.encode('utf-8')).hexdigest()[:7]
+
+
+def _merge_styles(svg: str) -> str:
+    """Styles répétés -> classes, quand le remplacement fait gagner des octets"""
+    counts: Dict[str, int] = {}
+    for match in _TAG_STYLE_RE.finditer(svg):
+        if ' class="' not in match.group(0):
+            counts[match.group(1)] = counts.get(match.group(1), 0) + 1
+
+    classes = {}
+    for style, count in counts.items():
+        # style="X" (len + 8) devient class="s-xxxxxxx" (18), plus la règle .s-xxxxxxx{X} (len + 11)
+        if count * (len(style) - 10) > len(style) + 11:
+            classes[style] = _style_class(style)
+    if not classes:
+        return svg
+
+    def replace_tag(match):
+        tag = match.group(0)
+        css_class = classes.get(match.group(1))
+        if css_class is None or ' class="' in tag:
+            return tag
+        return _STYLE_ATTR_RE.sub(f' class="{css_class}"', tag, count=1)
+
+    svg = _TAG_STYLE_RE.sub(replace_tag, svg)
+    rules = ''.join(f'.{css_class}{{{style}}}' for style, css_class in classes.items())
+    opening = _SVG_OPEN_RE.search(svg)
+    return svg[:opening.end()] + f'<defs><style>{rules}</style></defs>' + svg[opening.end():]
+
+
+def optimize_svg(svg: str, precision: int = SVG_PRECISION) -> str:
+    """Version minifiée d'un document SVG, au rendu identique"""
+    if not svg or '<svg' not in svg:
+        return svg
+
+    svg = _METADATA_RE.sub('', svg)
+    svg = _COMMENT_RE.sub('', svg)
+    svg = _BETWEEN_TAGS_RE.sub('><', svg).strip()
+
+    svg = _PATH_DATA_RE.sub(lambda m: m.group(1) + _compact_path(m.group(2), precision) + m.group(3), svg)
+    svg = _COORDINATE_ATTR_RE.sub(lambda m: m.group(1) + _round_numbers(m.group(2), precision) + m.group(3), svg)
+    svg = _STYLE_ATTR_RE.sub(lambda m: f' style="{minify_style(m.group(1))}"', svg)
+
+    # Identifiants de groupes matplotlib (figure_1, axes_1, text_3...) jamais référencés
+    referenced = set(_REFERENCE_RE.findall(svg))
+    svg = _ID_RE.sub(lambda m: m.group(0) if m.group(1) in referenced else '', svg)
+
+    return _merge_styles(svg)
+
+
+class SVGSavings:
+    """Octets avant/après optimisation, cumulés (thread-safe)"""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.documents = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def record(self, bytes_in: int, bytes_out: int) -> None:
+        with self._lock:
+            self.documents += 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                'svg_documents': self.documents,
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+                'saved_ratio': round(1 - self.bytes_out / self.bytes_in, 4) if self.bytes_in else 0.0,
+            }
+
+
+svg_savings = SVGSavings()
+
+
+def optimize_svg_report(svg: str) -> Tuple[str, int, int]:
+    """(SVG optimisé, octets avant, octets après)"""
+    optimized = optimize_svg(svg)
+    bytes_in, bytes_out = len(svg.encode('utf-8')), len(optimized.encode('utf-8'))
+    svg_savings.record(bytes_in, bytes_out)
+    return optimized, bytes_in, bytes_out
+
+
+def optimize_html_svgs(html: str) -> Tuple[str, int, int]:
+    """Optimise chaque SVG inséré dans un fragment HTML : (HTML, octets SVG avant, après)"""
+    totals = [0, 0]
+
+    def replace(match):
+        optimized, bytes_in, bytes_out = optimize_svg_report(match.group(0))
+        totals[0] += bytes_in
+        totals[1] += bytes_out
+        return optimized
+
+    return _SVG_RE.sub(replace, html), totals[0], totals[1]
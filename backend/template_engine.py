@@ -0,0 +1,113 @@
+"""
+Template Engine - Templates d'export Jinja2 compilés une seule fois
+
+Chaque export relisait templates/<nom>.html sur disque puis construisait un
+jinja2.Template (analyse + compilation) à partir de la chaîne. Les templates passent
+désormais par un unique jinja2.Environment :
+
+- FileSystemLoader sur templates/, templates compilés conservés en mémoire
+  (un dictionnaire : aucun accès disque sur le chemin d'export)
+- cache de bytecode sur disque (TEMPLATE_BYTECODE_DIR) : un redémarrage ne recompile pas
+- TEMPLATE_AUTO_RELOAD=1 (développement uniquement) : un template modifié sur disque
+  est rechargé au prochain export
+
+Les templates d'export et Pro sont précompilés au démarrage (precompile).
+"""
+
+import logging
+import os
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterable, List, Tuple, Union
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template, TemplateNotFound
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_DIR = Path(__file__).parent / 'templates'
+TEMPLATE_BYTECODE_DIR = Path(os.environ.get('TEMPLATE_BYTECODE_DIR', Path(__file__).parent / 'jinja_cache'))
+
+
+def auto_reload_enabled() -> bool:
+    return os.getenv('TEMPLATE_AUTO_RELOAD', '').lower() in ('1', 'true', 'yes')
+
+
+class TemplateEngine:
+    """Environment Jinja2 unique ; get_template() est une lecture de dictionnaire"""
+
+    def __init__(self, templates_dir: Union[str, Path] = TEMPLATES_DIR,
+                 bytecode_dir: Union[str, Path, None] = TEMPLATE_BYTECODE_DIR,
+                 auto_reload: bool = None):
+        self.templates_dir = Path(templates_dir)
+        self.auto_reload = auto_reload_enabled() if auto_reload is None else auto_reload
+
+        bytecode_cache = None
+        if bytecode_dir is not None:
+            try:
+                Path(bytecode_dir).mkdir(parents=True, exist_ok=True)
+                bytecode_cache = FileSystemBytecodeCache(str(bytecode_dir))
+            except OSError as e:
+                logger.warning(f"Template bytecode cache disabled: {e}")
+
+        # Mêmes options que jinja2.Template(source) : le rendu des exports est inchangé
+        self.environment = Environment(
+            loader=FileSystemLoader(str(self.templates_dir), encoding='utf-8'),
+            auto_reload=self.auto_reload,
+            bytecode_cache=bytecode_cache,
+            cache_size=-1,
+        )
+        self._lock = Lock()
+        self._templates: Dict[str, Tuple[Template, str]] = {}
+        self.compilations = 0
+
+    def _load(self, template_name: str) -> Tuple[Template, str]:
+        filename = f"{template_name}.html"
+        try:
+            template = self.environment.get_template(filename)
+            source, _, _ = self.environment.loader.get_source(self.environment, filename)
+        except TemplateNotFound:
+            raise FileNotFoundError(f"Template {filename} not found in {self.templates_dir}")
+        entry = (template, source)
+        with self._lock:
+            self._templates[template_name] = entry
+            self.compilations += 1
+        return entry
+
+    def _entry(self, template_name: str) -> Tuple[Template, str]:
+        entry = self._templates.get(template_name)
+        if entry is None or (self.auto_reload and not entry[0].is_up_to_date):
+            entry = self._load(template_name)
+        return entry
+
+    def get_template(self, template_name: str) -> Template:
+        """Template compilé (FileSystemLoader au premier appel, dictionnaire ensuite)"""
+        return self._entry(template_name)[0]
+
+    def get_source(self, template_name: str) -> str:
+        """Source du template, tel que compilé"""
+        return self._entry(template_name)[1]
+
+    def precompile(self, template_names: Iterable[str]) -> List[str]:
+        """Compile les templates au démarrage ; retourne ceux qui sont introuvables"""
+        missing = []
+        for template_name in dict.fromkeys(template_names):
+            try:
+                self._load(template_name)
+            except FileNotFoundError:
+                missing.append(template_name)
+        if missing:
+            logger.warning(f"Templates not found during precompilation: {', '.join(missing)}")
+        logger.info(f"Precompiled {len(self._templates)} export templates (auto_reload={self.auto_reload})")
+        return missing
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                'templates': len(self._templates),
+                'compilations': self.compilations,
+                'auto_reload': self.auto_reload,
+            }
+
+
+# Instance globale
+template_engine = TemplateEngine()
@@ -0,0 +1,164 @@
+"""
+Tests des versions élèves d'une fiche (ré-échantillonnage reproductible, export ZIP)
+"""
+
+import asyncio
+import io
+import os
+import sys
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Ajouter le chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'test_database')
+
+import matplotlib
+matplotlib.use('Agg')
+
+import server
+from class_set import build_variant, split_evenly, variant_seed, template_text_service
+from models.math_models import GeneratedMathExercise
+from services.math_generation_service import MathGenerationService
+
+
+def make_document():
+    specs = MathGenerationService(seed=1).generate_math_exercise_specs('4e', 'Fractions', 'facile', 2)
+    exercises = [
+        GeneratedMathExercise(spec=spec, texte=template_text_service.generate_template_text(spec)).to_exercise_dict()
+        for spec in specs
+    ]
+    exercises[0]['id'] = 'ex-1'
+    exercises.append({
+        'id': 'ex-texte', 'type': 'ouvert', 'difficulte': 'facile',
+        'enonce': "Rédiger une phrase avec le mot fraction.", 'solution': {'etapes': [], 'resultat': '-'},
+    })
+    return {
+        'id': 'doc-class', 'type_doc': 'exercices', 'matiere': 'Mathématiques', 'niveau': '4e',
+        'chapitre': 'Fractions', 'difficulte': 'facile', 'nb_exercices': 3, 'exercises': exercises,
+    }
+
+
+class TestVariants:
+    """Tests du ré-échantillonnage des exercices"""
+
+    def test_same_structure_other_values(self):
+        document = make_document()
+        first, second = build_variant(document, 1), build_variant(document, 2)
+        for variant in (first, second):
+            assert [exercise['spec_mathematique']['type_exercice'] for exercise in variant['exercises'][:2]] == \
+                   [exercise['spec_mathematique']['type_exercice'] for exercise in document['exercises'][:2]]
+        assert [e['enonce'] for e in first['exercises'][:2]] != [e['enonce'] for e in second['exercises'][:2]]
+        assert first['type_doc'] == 'exercices – version 01'
+        assert first['exercises'][0]['id'] == 'ex-1-v01'
+
+    def test_exercise_without_spec_is_kept(self):
+        document = make_document()
+        variant = build_variant(document, 3)
+        assert variant['exercises'][2]['enonce'] == document['exercises'][2]['enonce']
+
+    def test_reproducible(self):
+        document = make_document()
+        assert build_variant(document, 4) == build_variant(document, 4)
+        assert build_variant(document, 4, base_seed=7) != build_variant(document, 4)
+        assert variant_seed('doc', 1) != variant_seed('doc', 2)
+
+    def test_split_evenly(self):
+        assert split_evenly(list(range(7)), 3) == [[0, 1, 2], [3, 4], [5, 6]]
+        assert split_evenly([1], 4) == [[1]]
+        assert split_evenly([], 2) == []
+
+
+class FakeCollection:
+    def __init__(self, documents=()):
+        self.documents = list(documents)
+        self.inserted = []
+
+    async def find_one(self, query):
+        for document in self.documents:
+            if all(document.get(field) == value for field, value in query.items()):
+                return dict(document)
+        return None
+
+    async def insert_one(self, record):
+        self.inserted.append(record)
+
+
+class FakeDatabase:
+    def __init__(self, document):
+        self.collections = {'documents': FakeCollection([document])}
+
+    def __getattr__(self, name):
+        return self.collections.setdefault(name, FakeCollection())
+
+
+@pytest.fixture
+def class_set_env(monkeypatch):
+    jobs = []
+    database = FakeDatabase(make_document())
+
+    async def pro_user(http_request):
+        return True, 'prof@example.com', {'template_style': 'minimaliste'}
+
+    async def fake_render_pdf(html_content, render_function=None, timeout=None):
+        jobs.append((render_function.__name__, len(html_content), timeout))
+        await asyncio.sleep(0)
+        if render_function is server.html_batch_to_pdf_bytes:
+            return [f"%PDF {html.count('version')}".encode() for html in html_content]
+        return b"%PDF booklet"
+
+    monkeypatch.setattr(server, 'db', database)
+    monkeypatch.setattr(server, 'resolve_export_user', pro_user)
+    monkeypatch.setattr(server, 'render_pdf', fake_render_pdf)
+    return TestClient(server.app), database, jobs
+
+
+class TestClassSetExport:
+    """Tests de l'endpoint /api/export/class-set"""
+
+    def test_zip_of_versions_and_booklet(self, class_set_env):
+        client, database, jobs = class_set_env
+        response = client.post('/api/export/class-set', json={'document_id': 'doc-class', 'nb_variants': 5})
+
+        assert response.status_code == 200
+        names = zipfile.ZipFile(io.BytesIO(response.content)).namelist()
+        assert names[:5] == [f'LeMaitremot_exercices_Mathématiques_4e_version_{i:02d}_sujet.pdf' for i in range(1, 6)]
+        assert names[5] == 'LeMaitremot_exercices_Mathématiques_4e_corriges_classique.pdf'
+        # Un job par processus du pool pour les sujets, un pour le livret de corrigés
+        batch_jobs = [job for job in jobs if job[0] == 'html_batch_to_pdf_bytes']
+        assert len(batch_jobs) == min(5, server.pdf_worker_pool.size)
+        assert sum(size for _, size, _ in batch_jobs) == 5
+        assert jobs[-1][:2] == ('merged_html_to_pdf_bytes', 5)
+        assert database.exports.inserted[0]['nb_variants'] == 5
+
+    def test_guests_spend_one_export_per_version(self, class_set_env, monkeypatch):
+        client, database, _ = class_set_env
+
+        async def guest(http_request):
+            return False, None, {}
+
+        async def two_exports_left(guest_id):
+            return {'quota_exceeded': False, 'exports_remaining': 2}
+
+        monkeypatch.setattr(server, 'resolve_export_user', guest)
+        monkeypatch.setattr(server, 'check_guest_quota', two_exports_left)
+
+        response = client.post('/api/export/class-set', json={'document_id': 'doc-class', 'nb_variants': 2})
+        assert response.status_code == 400
+
+        request = {'document_id': 'doc-class', 'nb_variants': 3, 'guest_id': 'guest-1'}
+        assert client.post('/api/export/class-set', json=request).status_code == 402
+        assert database.exports.inserted == []
+
+        request['nb_variants'] = 2
+        assert client.post('/api/export/class-set', json=request).status_code == 200
+        assert [record['guest_id'] for record in database.exports.inserted] == ['guest-1', 'guest-1']
+
+    def test_variant_count_is_bounded(self, class_set_env):
+        client, _, _ = class_set_env
+        response = client.post('/api/export/class-set', json={'document_id': 'doc-class', 'nb_variants': 0})
+        assert response.status_code == 422
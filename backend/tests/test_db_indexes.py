@@ -0,0 +1,157 @@
+"""
+Tests des index MongoDB : déclaration, création idempotente au démarrage, plans des requêtes fréquentes
+"""
+
+import asyncio
+import os
+import sys
+import uuid
+
+import pytest
+
+# Ajouter le chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_indexes import (
+    REQUIRED_INDEXES, HOT_QUERIES, IndexSpec, HotQuery,
+    covering_index, has_collection_scan, ensure_indexes, explain_query
+)
+
+
+class FakeCollection:
+    def __init__(self, database, name):
+        self.database, self.name = database, name
+
+    async def create_index(self, keys, **options):
+        if options['name'] in self.database.failing:
+            raise RuntimeError('E11000 duplicate key error')
+        self.database.indexes[(self.name, options['name'])] = (keys, options)
+        return options['name']
+
+
+class FakeDatabase:
+    def __init__(self, failing=()):
+        self.indexes = {}
+        self.failing = set(failing)
+
+    def __getitem__(self, name):
+        return FakeCollection(self, name)
+
+
+class TestDeclaredIndexes:
+    """Tests statiques : chaque requête fréquente a son index"""
+
+    @pytest.mark.parametrize('query', HOT_QUERIES, ids=lambda q: f"{q.collection}:{q.description}")
+    def test_every_hot_query_is_covered(self, query):
+        assert covering_index(query) is not None
+
+    def test_index_names_unique(self):
+        names = [(index.collection, index.name) for index in REQUIRED_INDEXES]
+        assert len(names) == len(set(names))
+
+    def test_legacy_indexes_kept(self):
+        # Noms et options d'init_db_indexes.py : pas de conflit avec les index déjà créés
+        by_name = {index.name: index for index in REQUIRED_INDEXES}
+        assert by_name['unique_user_session'].options() == {'name': 'unique_user_session', 'unique': True}
+        assert by_name['session_expiry_ttl'].options() == {'name': 'session_expiry_ttl', 'expireAfterSeconds': 0}
+        assert by_name['magic_token_ttl'].expire_after_seconds == 0
+        assert by_name['unique_pro_user_email'].unique
+
+    def test_uncovered_query_detected(self):
+        assert covering_index(HotQuery('documents', 'by subject', {'matiere': 'SVT'})) is None
+
+    def test_sort_must_follow_equality_fields(self):
+        query = HotQuery('documents', 'guest history', {'guest_id': 'g'}, sort=(('created_at', -1),))
+        guest_only = IndexSpec('documents', (('guest_id', 1),), 'guest_only')
+        guest_recent = IndexSpec('documents', (('guest_id', 1), ('created_at', 1)), 'guest_recent')
+
+        assert covering_index(query, [guest_only]) is None
+        # Sens inverse : l'index est parcouru à rebours
+        assert covering_index(query, [guest_only, guest_recent]) is guest_recent
+
+
+class TestExplain:
+    """Lecture des plans explain()"""
+
+    def test_index_scan(self):
+        explain = {'queryPlanner': {'winningPlan': {
+            'stage': 'LIMIT', 'inputStage': {'stage': 'FETCH', 'inputStage': {'stage': 'IXSCAN'}}
+        }}}
+        assert not has_collection_scan(explain)
+
+    def test_collection_scan(self):
+        explain = {'queryPlanner': {'winningPlan': {'stage': 'SORT', 'inputStage': {'stage': 'COLLSCAN'}}}}
+        assert has_collection_scan(explain)
+
+    def test_sbe_plan_and_or_branches(self):
+        explain = {'queryPlanner': {'winningPlan': {'queryPlan': {
+            'stage': 'OR', 'inputStages': [{'stage': 'IXSCAN'}, {'stage': 'COLLSCAN'}]
+        }}}}
+        assert has_collection_scan(explain)
+
+
+class TestEnsureIndexes:
+    """Création au démarrage"""
+
+    def test_all_indexes_created(self):
+        database = FakeDatabase()
+
+        report = asyncio.run(ensure_indexes(database))
+
+        assert set(report) == {index.name for index in REQUIRED_INDEXES}
+        assert all(error is None for error in report.values())
+        keys, options = database.indexes[('exports', 'exports_guest_recent')]
+        assert keys == [('guest_id', 1), ('created_at', -1)]
+
+    def test_idempotent(self):
+        database = FakeDatabase()
+        asyncio.run(ensure_indexes(database))
+        first = dict(database.indexes)
+
+        asyncio.run(ensure_indexes(database))
+
+        assert database.indexes == first
+
+    def test_failure_does_not_stop_other_indexes(self):
+        database = FakeDatabase(failing={'documents_id'})
+
+        report = asyncio.run(ensure_indexes(database))
+
+        assert 'duplicate key' in report['documents_id']
+        assert report['payment_transactions_session'] is None
+        assert ('payment_transactions', 'payment_transactions_session') in database.indexes
+
+
+class TestQueryPlans:
+    """Avec une base MongoDB de test (TEST_MONGO_URL) : aucune requête fréquente en COLLSCAN"""
+
+    @pytest.fixture
+    def mongo_db(self):
+        mongo_url = os.environ.get('TEST_MONGO_URL')
+        if not mongo_url:
+            pytest.skip("TEST_MONGO_URL not set (MongoDB test server required)")
+        return mongo_url, f"test_indexes_{uuid.uuid4().hex[:8]}"
+
+    def test_no_collection_scan(self, mongo_db):
+        from motor.motor_asyncio import AsyncIOMotorClient
+        mongo_url, db_name = mongo_db
+
+        async def scenario():
+            client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=2000)
+            db = client[db_name]
+            try:
+                report = await ensure_indexes(db)
+                # Deuxième passage : sans effet ni erreur
+                report_again = await ensure_indexes(db)
+                plans = {query.description: await explain_query(db, query) for query in HOT_QUERIES}
+            finally:
+                await client.drop_database(db_name)
+                client.close()
+            return report, report_again, plans
+
+        report, report_again, plans = asyncio.run(scenario())
+
+        assert all(error is None for error in report.values())
+        assert all(error is None for error in report_again.values())
+        scans = [description for description, plan in plans.items() if has_collection_scan(plan)]
+        assert scans == []
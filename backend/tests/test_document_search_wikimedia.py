@@ -0,0 +1,158 @@
+"""
+Tests des appels Wikimedia de DocumentSearcher (session partagée, métadonnées groupées, cache)
+"""
+
+import asyncio
+import os
+import sys
+
+# Ajouter le chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from document_search import DocumentSearcher, TTLCache
+
+TITLES = ["File:Europe map.svg", "File:Europe_relief.png", "File:No info.svg"]
+
+
+class FakeResponse:
+    def __init__(self, data, status=200):
+        self.data, self.status = data, status
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def json(self):
+        return self.data
+
+
+class FakeSession:
+    """Session aiohttp de test : répond à la recherche et à la requête imageinfo groupée"""
+
+    closed = False
+
+    def __init__(self):
+        self.requests = []
+
+    def get(self, url, params):
+        self.requests.append(params)
+        if params.get("list") == "search":
+            return FakeResponse({"query": {"search": [{"title": title} for title in TITLES]}})
+        titles = params["titles"].split("|")
+        pages = {}
+        for index, title in enumerate(titles):
+            page = {"title": title.replace("_", " ")}
+            if "No info" not in title:
+                page["imageinfo"] = [{"url": f"https://upload.wikimedia.org/{index}.png",
+                                      "width": 1500, "height": 900, "mime": "image/png"}]
+            pages[str(index)] = page
+        normalized = [{"from": t, "to": t.replace("_", " ")} for t in titles if "_" in t]
+        return FakeResponse({"query": {"normalized": normalized, "pages": pages}})
+
+    async def close(self):
+        self.closed = True
+
+
+def make_searcher():
+    searcher = DocumentSearcher()
+    searcher._session = FakeSession()
+    return searcher
+
+
+class TestWikimediaSearch:
+    """Tests de la recherche Wikimedia"""
+
+    def test_metadata_fetched_in_one_batched_request(self):
+        searcher = make_searcher()
+
+        results = asyncio.run(searcher._search_wikimedia_commons("carte_europe", [], "français"))
+
+        requests = searcher._session.requests
+        assert len(requests) == 2
+        assert requests[1]["titles"] == "|".join(TITLES)
+        # Ordre de la recherche conservé, fichiers sans imageinfo écartés
+        assert [r["titre"] for r in results] == ["Europe map.svg", "Europe relief.png"]
+        assert results[1]["url_page_commons"].endswith("File:Europe_relief.png")
+
+    def test_search_served_from_cache(self):
+        searcher = make_searcher()
+
+        first = asyncio.run(searcher._search_wikimedia_commons("carte_europe", [], "français"))
+        first[0]["titre"] = "modifié par l'appelant"
+        second = asyncio.run(searcher._search_wikimedia_commons("carte_europe", [], "français"))
+
+        assert len(searcher._session.requests) == 2
+        assert second[0]["titre"] == "Europe map.svg"
+
+    def test_cached_metadata_not_requested_again(self):
+        searcher = make_searcher()
+        asyncio.run(searcher._get_files_metadata(TITLES[:1]))
+
+        asyncio.run(searcher._get_files_metadata(TITLES))
+
+        assert [r["titles"] for r in searcher._session.requests] == [TITLES[0], "|".join(TITLES[1:])]
+
+    def test_http_error_returns_no_result(self):
+        searcher = make_searcher()
+        searcher._session.get = lambda url, params: FakeResponse({}, status=503)
+
+        assert asyncio.run(searcher._search_wikimedia_commons("carte_europe", [], "français")) == []
+        # Échec non mis en cache : la prochaine recherche réessaie
+        assert len(searcher.search_cache._entries) == 0
+
+    def test_metadata_failure_not_cached(self):
+        searcher = make_searcher()
+        search = searcher._session.get
+
+        def failing_imageinfo(url, params):
+            if params.get("prop") == "imageinfo":
+                raise TimeoutError()
+            return search(url, params)
+        searcher._session.get = failing_imageinfo
+
+        assert asyncio.run(searcher._search_wikimedia_commons("carte_europe", [], "français")) == []
+        assert len(searcher.search_cache._entries) == 0
+        assert len(searcher.metadata_cache._entries) == 0
+
+
+class TestSession:
+    """Tests de la session HTTP partagée"""
+
+    def test_single_session_reused_and_closed(self):
+        searcher = DocumentSearcher()
+
+        async def scenario():
+            first = await searcher._get_session()
+            second = await searcher._get_session()
+            await searcher.close()
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        assert first is second
+        assert first.closed
+        assert first.timeout.total is not None
+        assert searcher._session is None
+
+
+class TestTTLCache:
+    """Tests du cache à durée de vie limitée"""
+
+    def test_entries_expire(self):
+        cache = TTLCache(ttl=0)
+        cache.put("a", 1)
+        assert cache.get("a") is None
+        assert "a" not in cache
+
+    def test_bounded(self):
+        cache = TTLCache(ttl=60, max_entries=2)
+        for key in "abc":
+            cache.put(key, key)
+        assert "a" not in cache
+        assert cache.get("c") == "c"
+
+    def test_none_value_cached(self):
+        cache = TTLCache(ttl=60)
+        cache.put("missing", None)
+        assert "missing" in cache
@@ -0,0 +1,161 @@
+"""
+Tests de l'export combiné sujet + corrigé (/api/export/bundle)
+
+Base Mongo et pool WeasyPrint remplacés par des doublures : on vérifie que le document
+est préparé une seule fois et que les deux mises en page sont lancées ensemble.
+"""
+
+import asyncio
+import io
+import os
+import sys
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Ajouter le chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'test_database')
+
+import matplotlib
+matplotlib.use('Agg')
+
+import server
+from pdf_cache import PDFCache
+
+DOCUMENT = {
+    'id': 'doc-bundle',
+    'user_session_id': 'session',
+    'type_doc': 'exercices',
+    'matiere': 'Mathématiques',
+    'niveau': '4e',
+    'chapitre': 'Fractions',
+    'difficulte': 'facile',
+    'nb_exercices': 1,
+    'exercises': [{
+        'id': 'ex-1',
+        'type': 'ouvert',
+        'enonce': r"Calculer \(\frac{1}{2} + \frac{1}{4}\)",
+        'difficulte': 'facile',
+        'solution': {'etapes': [r"\(\frac{2}{4} + \frac{1}{4}\)"], 'resultat': r"\(\frac{3}{4}\)"},
+    }],
+}
+
+
+class FakeCollection:
+    def __init__(self, documents=()):
+        self.documents = list(documents)
+        self.inserted = []
+
+    async def find_one(self, query):
+        for document in self.documents:
+            if all(document.get(field) == value for field, value in query.items()):
+                return dict(document)
+        return None
+
+    async def count_documents(self, query):
+        return sum(1 for record in self.inserted if record.get('guest_id') == query.get('guest_id'))
+
+    async def insert_one(self, record):
+        self.inserted.append(record)
+
+    def find(self, query):
+        async def cursor():
+            return
+            yield
+        return cursor()
+
+    async def insert_many(self, documents, ordered=True):
+        pass
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.collections = {'documents': FakeCollection([DOCUMENT])}
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, FakeCollection())
+
+    def __getattr__(self, name):
+        return self[name]
+
+
+@pytest.fixture
+def export_env(monkeypatch, tmp_path):
+    calls = {'render_exercises': 0, 'layouts': [], 'concurrent': 0, 'max_concurrent': 0}
+    database = FakeDatabase()
+    render_exercises = server.render_exercises
+
+    async def counting_render_exercises(db, exercises, flavor):
+        calls['render_exercises'] += 1
+        return await render_exercises(None, exercises, flavor)
+
+    async def fake_render_pdf(html_content):
+        calls['concurrent'] += 1
+        calls['max_concurrent'] = max(calls['max_concurrent'], calls['concurrent'])
+        await asyncio.sleep(0.05)
+        calls['concurrent'] -= 1
+        calls['layouts'].append(html_content)
+        return f"%PDF-{len(calls['layouts'])}".encode()
+
+    monkeypatch.setattr(server, 'db', database)
+    monkeypatch.setattr(server, 'render_exercises', counting_render_exercises)
+    monkeypatch.setattr(server, 'render_pdf', fake_render_pdf)
+    monkeypatch.setattr(server, 'pdf_cache', PDFCache(tmp_path / 'pdf_cache'))
+    return TestClient(server.app), database, calls
+
+
+class TestExportBundle:
+    """Tests de l'export sujet + corrigé en une requête"""
+
+    def test_zip_with_both_pdfs(self, export_env):
+        client, database, calls = export_env
+        response = client.post('/api/export/bundle', json={'document_id': 'doc-bundle', 'guest_id': 'guest-1'})
+
+        assert response.status_code == 200
+        assert response.headers['content-type'] == 'application/zip'
+        names = zipfile.ZipFile(io.BytesIO(response.content)).namelist()
+        assert names == [
+            'LeMaitremot_exercices_Mathématiques_4e_sujet_classique.pdf',
+            'LeMaitremot_exercices_Mathématiques_4e_corrige_classique.pdf',
+        ]
+        # Artefacts chargés une fois, deux mises en page simultanées
+        assert calls['render_exercises'] == 1
+        assert len(calls['layouts']) == 2 and calls['max_concurrent'] == 2
+        # Quota invité : deux exports enregistrés
+        assert [record['export_type'] for record in database.exports.inserted] == ['sujet', 'corrige']
+
+    def test_bundle_served_from_cache(self, export_env):
+        client, _, calls = export_env
+        first = client.post('/api/export/bundle', json={'document_id': 'doc-bundle', 'guest_id': 'guest-2'})
+        # Cache partagé entre invités (aucune personnalisation)
+        second = client.post('/api/export/bundle', json={'document_id': 'doc-bundle', 'guest_id': 'guest-2b'})
+
+        assert second.status_code == 200
+        assert calls['render_exercises'] == 1 and len(calls['layouts']) == 2
+        first_files = zipfile.ZipFile(io.BytesIO(first.content))
+        second_files = zipfile.ZipFile(io.BytesIO(second.content))
+        assert [first_files.read(name) for name in first_files.namelist()] == \
+               [second_files.read(name) for name in second_files.namelist()]
+
+    def test_guest_needs_two_remaining_exports(self, export_env):
+        client, database, _ = export_env
+        database.exports.inserted = [{'guest_id': 'guest-3'}, {'guest_id': 'guest-3'}]
+        response = client.post('/api/export/bundle', json={'document_id': 'doc-bundle', 'guest_id': 'guest-3'})
+        assert response.status_code == 402
+
+    def test_unknown_document(self, export_env):
+        client, _, _ = export_env
+        response = client.post('/api/export/bundle', json={'document_id': 'absent', 'guest_id': 'guest-4'})
+        assert response.status_code == 404
+
+    def test_single_export_still_works(self, export_env):
+        client, database, calls = export_env
+        response = client.post('/api/export', json={
+            'document_id': 'doc-bundle', 'export_type': 'corrige', 'guest_id': 'guest-5'})
+        assert response.status_code == 200 and response.content == b'%PDF-1'
+        assert 'corrige_classique.pdf' in response.headers['content-disposition']
+        assert len(database.exports.inserted) == 1
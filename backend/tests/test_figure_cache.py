@@ -0,0 +1,108 @@
+"""
+Tests de la mémoïsation des rendus de figures (forme canonique des schémas, LRU, statistiques)
+"""
+
+import sys
+import os
+
+# Ajouter le chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import figure_cache
+from figure_cache import FigureCache, canonicalize, schema_hash, memoize_figure
+from geometry_renderer import geometry_renderer
+from models.math_models import GeometricFigure
+from services.geometry_render_service import GeometryRenderService
+
+
+class TestCanonicalSchema:
+    """Tests de la forme canonique"""
+
+    def test_key_order_does_not_matter(self):
+        assert schema_hash({'a': 1, 'b': [1, 2]}) == schema_hash({'b': [1, 2], 'a': 1})
+
+    def test_float_noise_is_normalized(self):
+        assert canonicalize(0.1 + 0.2) == 0.3
+        assert schema_hash({'rayon': 0.1 + 0.2}) == schema_hash({'rayon': 0.3})
+
+    def test_spellings_rendered_differently_stay_distinct(self):
+        # Le libellé reprend l'écriture du schéma ("2,5 cm", "2.5 cm", "5.0 cm")
+        reference = schema_hash({'rayon': 5})
+        for variant in (5.0, "5", "5 cm", "5,0 cm"):
+            assert schema_hash({'rayon': variant}) != reference
+        assert schema_hash({'longueur': "2,5"}) != schema_hash({'longueur': 2.5})
+
+    def test_distinct_values_stay_distinct(self):
+        assert schema_hash({'rayon': 5}) != schema_hash({'rayon': 6})
+        assert schema_hash({'rayon': "5 m"}) != schema_hash({'rayon': 5})
+        assert canonicalize({'points': ['A', 'B'], 'visible': True}) == {'points': ['A', 'B'], 'visible': True}
+
+
+class TestFigureCache:
+    """Tests du LRU et du décorateur"""
+
+    def test_lru_is_bounded_and_counts(self):
+        cache = FigureCache('test', max_size=2)
+        cache.put('a', '1')
+        cache.put('b', '2')
+        assert cache.get('a') == '1'
+        cache.put('c', '3')
+        assert cache.get('b') is None
+        stats = cache.stats()
+        assert stats['size'] == 2
+        assert stats['evictions'] == 1
+        assert stats['hits'] == 1 and stats['misses'] == 1
+        assert stats['hit_rate'] == 0.5
+
+    def test_decorator_renders_once_per_canonical_schema(self):
+        calls = []
+
+        class Renderer:
+            @memoize_figure('test_decorator')
+            def render(self, schema):
+                calls.append(schema)
+                return f"<svg>{schema['rayon']}</svg>" if schema.get('rayon') else ""
+
+        renderer = Renderer()
+        assert renderer.render({'rayon': '2,5', 'unite': 'cm'}) == '<svg>2,5</svg>'
+        assert renderer.render({'unite': 'cm', 'rayon': '2,5'}) == '<svg>2,5</svg>'
+        assert calls == [{'rayon': '2,5', 'unite': 'cm'}]
+        # Another spelling is rendered as written, not served the cached label
+        assert renderer.render({'rayon': 2.5, 'unite': 'cm'}) == '<svg>2.5</svg>'
+        # Failed renders are not cached
+        renderer.render({})
+        renderer.render({})
+        assert len(calls) == 4
+        assert Renderer.render.cache.stats()['hits'] == 1
+
+    def test_geometry_renderer_is_memoized(self):
+        figure_cache.clear_all()
+        schema = {'type': 'schema_geometrique', 'figure': 'rectangle', 'longueur': 8, 'largeur': 5}
+        first = geometry_renderer.render_geometric_figure(schema)
+        second = geometry_renderer.render_geometric_figure(
+            {'largeur': 5, 'longueur': 8, 'figure': 'rectangle', 'type': 'schema_geometrique'}
+        )
+        assert first == second
+        assert first.startswith('<svg')
+        assert figure_cache.get_stats()['geometry_svg']['hits'] == 1
+
+    def test_length_spellings_keep_their_label(self):
+        from render_schema import schema_renderer
+        figure_cache.clear_all()
+
+        def render(longueur):
+            return schema_renderer.render_to_svg(
+                {'type': 'triangle', 'points': ['A', 'B', 'C'], 'segments': [['A', 'B', {'longueur': longueur}]]}
+            )
+
+        assert render('2,5') != render(2.5)
+        assert figure_cache.get_stats()['schema_svg']['hits'] == 0
+
+    def test_geometric_figure_models_are_memoized(self):
+        figure_cache.clear_all()
+        service = GeometryRenderService()
+        figure = GeometricFigure(type='cercle', points=['O'], longueurs_connues={'rayon': 3})
+        svg = service.render_figure_to_svg(figure)
+        assert svg
+        assert service.render_figure_to_svg(figure.model_copy()) == svg
+        assert figure_cache.get_stats()['geometric_figure_svg']['hits'] == 1
@@ -0,0 +1,93 @@
+"""
+Tests du rendu matplotlib sans état global : rendus concurrents identiques aux rendus séquentiels
+"""
+
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Ajouter le chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lazy_imports import get_matplotlib
+from figure_canvas import new_figure, figure_to_svg, _font_type_lock
+from latex_to_svg import latex_renderer
+from geometry_renderer import GeometryRenderer
+from render_schema import SchemaRenderer
+
+geometry = GeometryRenderer()
+schemas = SchemaRenderer(backend='matplotlib')
+
+# Chaque tâche mélange formules (texte en chemins) et figures (texte en texte)
+TASKS = [
+    ('formule', lambda: latex_renderer._latex_to_svg(r'\frac{3}{5}+\sqrt{2}')),
+    ('formule', lambda: latex_renderer._latex_to_svg(r'x^{2}-4x+4=0')),
+    ('carre', lambda: geometry._figure_to_svg(geometry._draw_square({'points': ['A', 'B', 'C', 'D']}))),
+    ('cercle', lambda: geometry._figure_to_svg(geometry._draw_circle({'rayon': 1.5}))),
+    ('parallelogramme_png', lambda: geometry.render_geometry_to_base64.__wrapped__(
+        geometry, {'figure': 'parallelogramme', 'points': ['A', 'B', 'C', 'D']})),
+    ('cylindre', lambda: schemas._render_cylindre({'rayon': 3, 'hauteur': 5})),
+    ('triangle', lambda: schemas._render_triangle({'points': ['A', 'B', 'C'], 'segments': [['A', 'B', {'longueur': 3}]]})),
+    ('cercle_schema', lambda: schemas._render_cercle({'rayon': 2})),
+]
+
+
+class TestFigureCanvas:
+    """Tests du rendu matplotlib orienté objet"""
+
+    def test_figures_are_not_registered_in_pyplot(self):
+        import matplotlib.pyplot as plt
+        before = plt.get_fignums()
+        for _, render in TASKS:
+            render()
+        assert plt.get_fignums() == before
+
+    def test_rendering_does_not_modify_rcparams(self):
+        rc_params = get_matplotlib().rcParams
+        before = dict(rc_params)
+        latex_renderer._latex_to_svg(r'\frac{1}{2}')
+        assert dict(rc_params) == before
+        assert rc_params['svg.fonttype'] == 'none'
+
+    def test_text_as_paths_is_per_figure(self):
+        def render(text_as_paths):
+            fig, ax = new_figure(1, 1)
+            ax.text(0.5, 0.5, 'AB')
+            return figure_to_svg(fig, text_as_paths=text_as_paths)
+
+        assert '<text' not in render(True)
+        assert '<text' in render(False)
+
+    def test_output_is_reproducible(self):
+        for _, render in TASKS:
+            assert render() == render()
+
+    def test_concurrent_rendering_is_identical(self):
+        """Stress : les mêmes rendus exécutés en parallèle dans un pool de threads"""
+        expected = [render() for _, render in TASKS]
+        assert all(expected)
+
+        jobs = list(range(len(TASKS))) * 12
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda index: (index, TASKS[index][1]()), jobs))
+
+        for index, output in results:
+            assert output == expected[index], f"Rendu concurrent différent : {TASKS[index][0]}"
+
+    def test_figure_exports_do_not_wait_for_each_other(self):
+        """Un export SVG sans formule n'attend pas les autres ; un export de formule les attend"""
+        def figure():
+            fig, ax = new_figure(1, 1)
+            ax.text(0.5, 0.5, 'AB')
+            return fig
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            # Export d'une autre figure en cours
+            with _font_type_lock.shared():
+                svg = pool.submit(figure_to_svg, figure()).result(timeout=10)
+                formula = pool.submit(figure_to_svg, figure(), text_as_paths=True)
+                time.sleep(0.2)
+                assert not formula.done()
+            assert '<text' in svg
+            assert '<text' not in formula.result(timeout=10)
@@ -0,0 +1,109 @@
+"""
+Tests du registre unique des renderers de figures
+"""
+
+import sys
+import os
+
+import pytest
+
+# Ajouter le chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import figure_cache
+from figure_registry import (
+    FigureRegistry, UnknownFigureType, figure_registry, normalize_figure_type, figure_type_of,
+    ANY_FIGURE, FORMAT_SVG, FORMAT_DATA_URI, FORMAT_PNG
+)
+from geometry_renderer import geometry_renderer
+from render_schema import schema_renderer
+from models.math_models import GeometricFigure
+from services.geometry_render_service import geometry_render_service
+
+
+class TestFigureTypes:
+    """Tests de la normalisation des types"""
+
+    @pytest.mark.parametrize("value, expected", [
+        ('Carré', 'carre'),
+        (' Triangle rectangle ', 'triangle_rectangle'),
+        ('triangle-rectangle', 'triangle_rectangle'),
+        ('mediatrice', 'mediatrice_construction'),
+        ('construction_mediatrice', 'mediatrice_construction'),
+        (None, ''),
+    ])
+    def test_normalize_figure_type(self, value, expected):
+        assert normalize_figure_type(value) == expected
+
+    def test_figure_type_of(self):
+        assert figure_type_of({'type': 'schema_geometrique', 'figure': 'Rectangle'}) == 'rectangle'
+        assert figure_type_of({'type': 'cylindre'}) == 'cylindre'
+        assert figure_type_of({'type': 'schema_geometrique'}, default='triangle') == 'triangle'
+
+
+class TestFigureRegistry:
+    """Tests de la résolution et des chaînes de renderers"""
+
+    def test_chain_falls_back_on_none_and_errors(self):
+        registry = FigureRegistry()
+
+        def failing(data):
+            raise ValueError("boom")
+
+        registry.register('p', 'carre', FORMAT_SVG, lambda data: None, name='declines')
+        registry.register('p', 'carre', FORMAT_SVG, failing)
+        registry.register('p', 'carre', FORMAT_SVG, lambda data: '<svg/>', name='fallback')
+        assert registry.render('p', 'carre', FORMAT_SVG, {}) == '<svg/>'
+
+        stats = registry.stats()['p/carre/svg']
+        assert stats['failing']['errors'] == 1
+        assert stats['fallback']['renders'] == 1
+
+    def test_last_error_is_raised(self):
+        registry = FigureRegistry()
+        registry.register('p', 'carre', FORMAT_SVG, lambda data: 1 / 0)
+        with pytest.raises(ZeroDivisionError):
+            registry.render('p', 'carre', FORMAT_SVG, {})
+
+    def test_wildcard_and_unknown_types(self):
+        registry = FigureRegistry()
+        registry.register('p', ANY_FIGURE, FORMAT_SVG, lambda data: 'generic')
+        assert registry.render('p', 'hexagone', FORMAT_SVG, {}) == 'generic'
+        assert registry.supports('p', 'hexagone', FORMAT_SVG)
+        assert not registry.supports('p', 'hexagone', FORMAT_SVG, exact=True)
+        with pytest.raises(UnknownFigureType):
+            registry.render('p', 'hexagone', FORMAT_PNG, {})
+
+    def test_profiles_are_registered_at_import(self):
+        assert {'rectangle', 'carre', 'mediatrice_construction', 'parallelogramme'} <= set(
+            figure_registry.figure_types('geometry', FORMAT_DATA_URI))
+        assert 'cylindre' in figure_registry.figure_types('schema', FORMAT_SVG)
+        assert 'thales' in figure_registry.figure_types('figure_model', FORMAT_SVG)
+
+
+class TestEntryPoints:
+    """Les trois points d'entrée passent par le registre"""
+
+    def setup_method(self):
+        figure_cache.clear_all()
+
+    def test_geometry_base64_always_returns_a_data_uri(self):
+        svg_uri = geometry_renderer.render_geometry_to_base64({'type': 'rectangle', 'longueur': 5, 'largeur': 3})
+        png_uri = geometry_renderer.render_geometry_to_base64({'figure': 'Carré', 'points': ['A', 'B', 'C', 'D']})
+        assert svg_uri.startswith('data:image/svg+xml;base64,')
+        assert png_uri.startswith('data:image/png;base64,')
+        assert figure_registry.stats()['geometry/carre/data_uri']['_draw_square']['renders'] >= 1
+
+    def test_geometry_unknown_type(self):
+        assert 'Figure non supportée' in geometry_renderer.render_geometric_figure({'figure': 'hexagone'})
+        assert geometry_renderer.render_geometry_to_base64({'figure': 'hexagone'}) == ""
+
+    def test_schema_renderer(self):
+        assert '5 cm' in schema_renderer.render_to_svg({'type': 'Carré', 'cote': 5})
+        assert 'Hexagone (générique)' in schema_renderer.render_to_svg(
+            {'type': 'hexagone', 'points': ['A', 'B', 'C', 'D', 'E', 'F']})
+
+    def test_figure_model_service(self):
+        figure = GeometricFigure(type='Rectangle', points=['A', 'B', 'C', 'D'], longueurs_connues={'AB': 5, 'BC': 3})
+        assert geometry_render_service.render_figure_to_svg(figure).startswith('<svg')
+        assert geometry_render_service.render_figure_to_svg(GeometricFigure(type='hexagone', points=[])) is None
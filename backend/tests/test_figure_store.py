@@ -0,0 +1,124 @@
+"""
+Tests du stockage des figures adressé par contenu
+"""
+
+import asyncio
+import base64
+import sys
+import os
+from types import SimpleNamespace
+
+import pytest
+
+# Ajouter le chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from figure_store import FigureStore, figure_url, parse_figure_id
+from latex_to_svg import latex_renderer
+
+SVG = '<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10"><rect width="10" height="10"/></svg>'
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FigureStore(tmp_path)
+
+
+class TestFigureStore:
+    """Tests de l'écriture et de la lecture des figures"""
+
+    def test_put_is_content_addressed(self, store, tmp_path):
+        figure_id = store.put(SVG, 'svg')
+        assert parse_figure_id(figure_id) is not None
+        assert store.put(SVG.encode('utf-8'), 'svg') == figure_id
+        assert store.get(figure_id) == (SVG.encode('utf-8'), 'image/svg+xml')
+        assert len(list(tmp_path.rglob('*.svg'))) == 1
+        assert not list(tmp_path.rglob('*.tmp'))
+
+    def test_get_rejects_unknown_and_invalid_ids(self, store):
+        assert store.get('0' * 64 + '.svg') is None
+        assert store.get('../../etc/passwd') is None
+        assert store.get(store.put(SVG).replace('.svg', '.png')) is None
+        with pytest.raises(ValueError):
+            store.put(SVG, 'gif')
+
+    def test_put_data_uri(self, store):
+        png = b'\x89PNG\r\n\x1a\nfake'
+        figure_id = store.put_data_uri('data:image/png;base64,' + base64.b64encode(png).decode('ascii'))
+        assert figure_id.endswith('.png')
+        assert store.get(figure_id) == (png, 'image/png')
+        assert store.put_data_uri('data:image/png;base64,@@@') is None
+        assert store.put_data_uri('/api/figures/abc.svg') is None
+
+
+class TestExerciseFigures:
+    """Tests des formes stockée (identifiants) et servie (URL) des exercices"""
+
+    def test_compact_then_expand(self, store):
+        data_uri = 'data:image/svg+xml;base64,' + base64.b64encode(SVG.encode('utf-8')).decode('ascii')
+        exercise = store.compact_exercise({'schema_img': data_uri, 'figure_svg': SVG})
+
+        assert exercise['schema_img'] is None and exercise['figure_svg'] is None
+        assert exercise['schema_img_id'] == exercise['figure_svg_id']
+
+        store.expand_exercise(exercise)
+        assert exercise['schema_img'] == figure_url(exercise['schema_img_id'])
+        assert f'src="{figure_url(exercise["figure_svg_id"])}"' in exercise['figure_svg']
+
+    def test_compact_is_idempotent(self, store):
+        exercise = store.compact_exercise({'figure_svg': SVG})
+        expanded = store.expand_exercise(dict(exercise))
+        assert store.compact_exercise(expanded) == exercise
+
+    def test_exercise_without_figure(self, store):
+        assert store.compact_exercise({'enonce': 'x', 'schema_img': None}) == {'enonce': 'x', 'schema_img': None}
+
+    def test_store_formulas(self, store):
+        html = latex_renderer.convert_latex_to_svg(r"Calculer \(\frac{1}{2}\) puis \(\frac{1}{2}\)")
+        stored = store.store_formulas(html)
+        assert '<svg' not in stored
+        assert stored.count('src="/api/figures/') == 2
+        figure_id = stored.split('src="/api/figures/')[1].split('"')[0]
+        content, media_type = store.get(figure_id)
+        assert content.startswith(b'<svg') and media_type == 'image/svg+xml'
+
+
+class FakeDocuments:
+    """Collection documents de test (find_one / update_one)"""
+
+    def __init__(self, document):
+        self.document = document
+        self.updates = []
+
+    async def find_one(self, query):
+        return dict(self.document) if self.document['id'] == query['id'] else None
+
+    async def update_one(self, query, update):
+        self.updates.append(update['$set'])
+
+
+class TestVariationStorage:
+    """Une variation d'exercice est enregistrée sous forme compacte, comme à la génération"""
+
+    def test_vary_stores_figure_ids(self, store, monkeypatch):
+        os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+        os.environ.setdefault('DB_NAME', 'test_figure_store')
+        import server
+
+        documents = FakeDocuments({'id': 'doc-1', 'matiere': 'Mathématiques', 'niveau': '4e',
+                                   'chapitre': 'Aires', 'type_doc': 'exercices', 'difficulte': 'facile',
+                                   'exercises': [{'enonce': 'ancien'}]})
+
+        async def generate_exercises_with_ai(*args):
+            return [{'enonce': 'Aire du carré', 'figure_svg': SVG}]
+
+        monkeypatch.setattr(server, 'db', SimpleNamespace(documents=documents))
+        monkeypatch.setattr(server, 'figure_store', store)
+        monkeypatch.setattr(server, 'generate_exercises_with_ai', generate_exercises_with_ai)
+
+        response = asyncio.run(server.vary_exercise('doc-1', 0))
+
+        stored = documents.updates[0]['exercises'][0]
+        assert stored['figure_svg'] is None and stored['figure_svg_id']
+        assert store.get(stored['figure_svg_id'])[0] == SVG.encode('utf-8')
+        assert figure_url(stored['figure_svg_id']) in response['exercise']['figure_svg']
@@ -0,0 +1,50 @@
+"""
+Tests du partage des formules identiques dans l'export PDF
+"""
+
+import sys
+import os
+
+# Ajouter le chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+matplotlib.use('Agg')
+
+from lazy_imports import get_pyplot
+from latex_to_svg import latex_renderer
+from formula_dedup import (
+    externalize_formulas, make_formula_url_fetcher, FORMULA_URL_SCHEME
+)
+
+
+def build_html():
+    steps = [r"\(\frac{1}{2}\)", r"\(\frac{12}{21}\)", r"\(\frac{1}{2}\)"]
+    body = "".join(f"<p>{latex_renderer.convert_latex_to_svg(step)}</p>" for step in steps)
+    return f"<html><body>{body}</body></html>"
+
+
+class TestFormulaDedup:
+    """Tests du partage des formules dans le PDF"""
+
+    def test_formulas_use_glyph_paths(self):
+        """Les glyphes sont des chemins réutilisables même si svg.fonttype vaut 'none'"""
+        assert get_pyplot().rcParams['svg.fonttype'] == 'none'
+        svg = latex_renderer.render_latex_expression(r"\frac{3}{5}")
+        assert '<path id="' in svg
+        assert '<use xlink:href="#' in svg
+        assert '<!--' not in svg
+
+    def test_pdf_mode_deduplicates_identical_formulas(self):
+        html_out, resources = externalize_formulas(build_html())
+        assert '<svg' not in html_out
+        assert html_out.count(f'src="{FORMULA_URL_SCHEME}') == 3
+        assert len(resources) == 2
+
+    def test_url_fetcher_serves_formulas_and_delegates(self):
+        _, resources = externalize_formulas(build_html())
+        fetcher = make_formula_url_fetcher(resources, lambda url: {'string': b'other'})
+
+        url = next(iter(resources))
+        assert fetcher(url)['mime_type'] == 'image/svg+xml'
+        assert fetcher('file:///logo.png') == {'string': b'other'}
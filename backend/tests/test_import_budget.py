@@ -0,0 +1,72 @@
+"""
+Budget de temps d'import du backend (python -X importtime)
+
+Les dépendances lourdes (weasyprint, matplotlib, numpy...) doivent être chargées à la
+demande via lazy_imports : un redémarrage ou un nouveau pod doit démarrer vite.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Budget cumulé de "import server", en millisecondes (surchargeable pour les machines lentes)
+IMPORT_BUDGET_MS = int(os.getenv('IMPORT_BUDGET_MS', '2000'))
+
+LAZY_MODULES = ['weasyprint', 'matplotlib', 'numpy', 'latex2mathml', 'emergentintegrations', 'PIL']
+
+# Anciennes copies racine des services (doublons de services/)
+DUPLICATE_MODULES = ['math_generation_service', 'math_text_service']
+
+
+def import_report(module: str):
+    """Retourne {module: (self_us, cumulative_us)} pour un import dans un interpréteur neuf"""
+    env = dict(os.environ)
+    env.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+    env.setdefault('DB_NAME', 'import_budget_test')
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120
+    )
+    if proc.returncode != 0:
+        # Une erreur d'import est un échec du test (pas un environnement à ignorer)
+        traceback = [line for line in proc.stderr.splitlines() if not line.startswith('import time:')]
+        pytest.fail(f"import {module} a échoué :\n" + '\n'.join(traceback[-30:]))
+
+    report = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        report[name.strip()] = (int(self_us), int(cumulative_us))
+    return report
+
+
+def slowest(report, count: int = 15) -> str:
+    rows = sorted(report.items(), key=lambda item: item[1][1], reverse=True)[:count]
+    return '\n'.join(f"{cumulative / 1000:8.1f} ms  {name}" for name, (_, cumulative) in rows)
+
+
+class TestImportBudget:
+    """Temps de démarrage du serveur"""
+
+    @pytest.fixture(scope='class')
+    def server_imports(self):
+        return import_report('server')
+
+    def test_heavy_dependencies_are_lazy(self, server_imports):
+        loaded = [name for name in LAZY_MODULES if name in server_imports]
+        assert not loaded, f"Chargés au démarrage : {loaded}\n{slowest(server_imports)}"
+
+    def test_duplicate_modules_not_loaded(self, server_imports):
+        loaded = [name for name in DUPLICATE_MODULES if name in server_imports]
+        assert not loaded, f"Doublons chargés : {loaded}"
+
+    def test_startup_within_budget(self, server_imports):
+        total_ms = server_imports['server'][1] / 1000
+        assert total_ms <= IMPORT_BUDGET_MS, (
+            f"import server : {total_ms:.0f} ms > budget {IMPORT_BUDGET_MS} ms\n{slowest(server_imports)}"
+        )
@@ -0,0 +1,130 @@
+"""
+Tests du classement par mots-clés (expression régulière compilée, limites de mots, scores pondérés)
+"""
+
+import os
+import random
+import sys
+
+# Ajouter le chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_classifier import KeywordClassifier
+from document_search import DocumentSearcher, document_type_classifier
+
+
+def naive_find(keywords, text):
+    """Occurrences en début de mot, recherchées mot-clé par mot-clé (référence)"""
+    text = text.lower()
+    found = []
+    for keyword in keywords:
+        start = text.find(keyword)
+        while start != -1:
+            end = start + len(keyword)
+            starts_word = start == 0 or not text[start - 1].isalnum()
+            ends_word = len(keyword) > 3 or end == len(text) or not text[end].isalnum()
+            if starts_word and ends_word:
+                found.append((start, keyword))
+            start = text.find(keyword, start + 1)
+    return sorted(found)
+
+
+class TestKeywordSearch:
+    """Tests de la recherche de tous les mots-clés en un passage"""
+
+    def test_overlapping_keywords(self):
+        classifier = KeywordClassifier({"a": ["afrique", "afrique du sud"], "b": ["sud"]})
+
+        assert classifier.find("L'Afrique du Sud") == [(2, "afrique"), (2, "afrique du sud"), (13, "sud")]
+
+    def test_same_results_as_naive_search(self):
+        keywords = ["he", "she", "his", "hers", "aire", "aires", "angle", "rectangle", "ue", "que", "u e",
+                    "e que", "a b", "b c d", "c"]
+        classifier = KeywordClassifier({"all": keywords})
+        rng = random.Random(7)
+        for _ in range(500):
+            text = "".join(rng.choice("heisrauqctgnlbd ,'") for _ in range(60))
+            assert sorted(classifier.find(text)) == naive_find(keywords, text)
+
+    def test_keyword_starting_inside_a_longer_match(self):
+        classifier = KeywordClassifier({"a": ["afrique du", "du sud"]})
+
+        assert classifier.find("Afrique du Sud") == [(0, "afrique du"), (8, "du sud")]
+
+    def test_word_start_required(self):
+        classifier = KeywordClassifier({"geometry": ["aire", "angle"], "europe": ["ue"]})
+
+        assert classifier.matches("Il est nécessaire que le salaire augmente") == {}
+        assert classifier.matches("Les aires des rectangles ; un angle de l'UE") == {
+            "geometry": {"aire": 1, "angle": 1},
+            "europe": {"ue": 1},
+        }
+
+    def test_short_keywords_are_whole_words(self):
+        classifier = KeywordClassifier({"biology": ["vie", "vivant"], "usa": ["usa"]})
+
+        assert classifier.matches("Il devient vieux ; usage") == {}
+        assert classifier.matches("La vie, le vivant, les USA.") == {
+            "biology": {"vie": 1, "vivant": 1},
+            "usa": {"usa": 1},
+        }
+
+    def test_counts_and_matched_keywords(self):
+        classifier = KeywordClassifier({"geometry": ["triangle", "côté"], "algebra": ["calcul"]})
+        text = "Triangle ABC : calculer chaque côté du triangle, côté par côté."
+
+        assert classifier.matches(text)["geometry"] == {"triangle": 2, "côté": 3}
+        assert classifier.matched_keywords(text, "geometry") == ["triangle", "côté"]
+
+
+class TestScoring:
+    """Tests du score pondéré qui remplace « la première catégorie trouvée »"""
+
+    def test_best_score_wins(self):
+        classifier = KeywordClassifier({"france": ["paris"], "asie": ["tokyo", "japon"]})
+
+        assert classifier.classify("De Paris à Tokyo : le Japon") == "asie"
+
+    def test_declaration_order_breaks_ties(self):
+        classifier = KeywordClassifier({"france": ["paris"], "asie": ["tokyo"]})
+
+        assert classifier.classify("Paris, Tokyo") == "france"
+
+    def test_keyword_and_category_weights(self):
+        classifier = KeywordClassifier(
+            {"region": {"europe": 1.0}, "monde": {"monde": 1.0, "planisphère": 2.0}},
+            category_weights={"monde": 0.5},
+        )
+
+        assert classifier.scores("L'Europe dans le monde") == {"region": 1.0, "monde": 0.5}
+        assert classifier.classify("L'Europe dans le monde") == "region"
+        assert classifier.classify("Un planisphère, l'Europe") == "region"
+        assert classifier.classify("Rien à signaler", default="monde") == "monde"
+
+
+class TestDocumentTypeAnalysis:
+    """Type de carte déduit de l'énoncé de Géographie"""
+
+    def test_region_detection(self):
+        searcher = DocumentSearcher()
+        cases = {
+            "Situez Tokyo et Osaka sur la carte du Japon.": "carte_asie",
+            "Les pays de l'Union européenne et l'espace Schengen.": "carte_europe",
+            "Le Nil traverse l'Égypte.": "carte_afrique",
+            "Les océans et les continents du monde.": "carte_monde",
+            "Réponds à la question suivante.": "carte_monde",
+        }
+        for enonce, doc_type in cases.items():
+            assert searcher._analyze_content_for_document_type(enonce) == doc_type, enonce
+
+    def test_no_substring_false_positive(self):
+        # « que » contenait « ue » (Union européenne) avec l'ancienne recherche par sous-chaîne
+        assert document_type_classifier.classify("Explique pourquoi les continents bougent") == "carte_monde"
+
+    def test_region_outweighs_world_keyword(self):
+        enonce = "Montre la place de la Chine dans la mondialisation."
+        assert document_type_classifier.classify(enonce) == "carte_asie"
+
+    def test_dominant_region_wins(self):
+        enonce = "Un touriste français visite Pékin, Shanghai puis la Grande Muraille de Chine."
+        assert document_type_classifier.classify(enonce) == "carte_asie"
@@ -0,0 +1,71 @@
+"""
+Tests de l'arbre LaTeX partagé (parse unique, backends SVG / MathML / HTML)
+"""
+
+import pytest
+import sys
+import os
+
+# Ajouter le chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from latex_ast import (
+    parse_latex, to_latex, to_mathml, to_html, latex_to_mathml,
+    LatexParseError, Frac, Scripts, Sqrt
+)
+
+
+class TestLatexAST:
+    """Tests du parseur et des backends"""
+
+    def test_parse_is_cached_by_content_hash(self):
+        """Deux écritures équivalentes partagent la même entrée de cache"""
+        first = parse_latex(r'\frac{3}{4}')
+        second = parse_latex(r'\frac{3}{4}  ')
+        assert first is second
+        assert first.key == second.key
+
+    def test_tree_structure(self):
+        """Fractions, racines et exposants produisent les bons noeuds"""
+        assert isinstance(parse_latex(r'\dfrac{1}{2}').tree, Frac)
+        assert isinstance(parse_latex(r'\sqrt[3]{8}').tree, Sqrt)
+        assert isinstance(parse_latex('x^{2}').tree, Scripts)
+
+    def test_normalized_latex(self):
+        """La forme normalisée est acceptée par matplotlib"""
+        assert parse_latex(r'\dfrac 1 2').latex == r'\frac{1}{2}'
+        assert parse_latex('x^2').latex == 'x^{2}'
+
+    def test_mathml_matches_latex2mathml_format(self):
+        """Le MathML reste identique à celui de latex2mathml"""
+        expected = (
+            '<math xmlns="http://www.w3.org/1998/Math/MathML" display="inline">'
+            '<mrow><mfrac><mrow><mn>3</mn></mrow><mrow><mn>4</mn></mrow></mfrac></mrow></math>'
+        )
+        assert latex_to_mathml(r'\frac{3}{4}') == expected
+        assert '<mi>&#x003C0;</mi>' in latex_to_mathml(r'2\pi')
+        assert '<mo>&#x0002B;</mo>' in to_mathml(parse_latex('a+b').tree)
+
+    def test_html_backend(self):
+        """Le backend HTML utilise les classes CSS de MathRenderer"""
+        rendered = to_html(parse_latex(r'\frac{a}{b} + x^{2}').tree)
+        assert '<span class="math-numerator">a</span>' in rendered
+        assert '<sup class="math-superscript">2</sup>' in rendered
+
+    def test_html_spacing_and_minus_sign(self):
+        """Espaces de la source et autour des opérateurs conservés, signe moins typographique"""
+        assert to_html(parse_latex('x = 3 - 5 cm').tree) == 'x = 3 \u2212 5 cm'
+        assert to_html(parse_latex('x=3-5').tree) == 'x = 3 \u2212 5'
+        assert to_html(parse_latex(r'(-2) \leq x').tree) == '(\u22122) ≤ x'
+        assert '<mo>&#x02212;</mo>' in latex_to_mathml('a-b')
+
+    def test_round_trip(self):
+        """Reparser la forme normalisée donne le même arbre"""
+        for source in (r'\left( \frac{1}{2} \right)^{2} \times \sqrt{x}', r'5 \text{ cm} = a \, b'):
+            formula = parse_latex(source)
+            assert parse_latex(to_latex(formula.tree)).tree == formula.tree
+
+    @pytest.mark.parametrize("source", [r'\frac{1}', r'\unknown{x}', 'x^', '{a'])
+    def test_invalid_formulas_raise(self, source):
+        with pytest.raises(LatexParseError):
+            parse_latex(source)
@@ -0,0 +1,161 @@
+"""
+Tests des cartes de Géographie locales (source téléchargée une fois, recadrages régionaux)
+"""
+
+import io
+import os
+import sys
+from urllib.parse import unquote, urlparse
+
+# Ajouter le chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from map_assets import MapAssetStore, crop_box, region_of, localize_exercise_documents, REGION_BOUNDS
+from document_search import DocumentSearcher
+
+WORLD_URL = 'https://upload.wikimedia.org/wikipedia/commons/thumb/8/83/Equirectangular_projection_SW.jpg/1200px-Equirectangular_projection_SW.jpg'
+
+
+def world_map(width=1200, height=600) -> bytes:
+    """Planisphère de test : la moitié est (longitudes positives) en rouge, l'ouest en bleu"""
+    image = Image.new('RGB', (width, height), (0, 0, 255))
+    image.paste((255, 0, 0), (width // 2, 0, width, height))
+    output = io.BytesIO()
+    image.save(output, 'JPEG')
+    return output.getvalue()
+
+
+class CountingFetch:
+    def __init__(self, content=None, error=None):
+        self.content = content if content is not None else world_map()
+        self.error = error
+        self.calls = 0
+
+    def __call__(self, url, timeout):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return self.content, 'image/jpeg'
+
+
+def local_image(document):
+    return Image.open(unquote(urlparse(document['url_fichier_direct']).path))
+
+
+class TestCropBox:
+    """Tests des emprises régionales"""
+
+    def test_equirectangular_mapping(self):
+        assert crop_box((-180.0, 90.0, 180.0, -90.0), (1200, 600)) == (0, 0, 1200, 600)
+        assert crop_box((0.0, 90.0, 90.0, 0.0), (1200, 600)) == (600, 0, 900, 300)
+
+    def test_regions_inside_world(self):
+        for bounds in REGION_BOUNDS.values():
+            left, top, right, bottom = crop_box(bounds, (1200, 600))
+            assert 0 <= left < right <= 1200
+            assert 0 <= top < bottom <= 600
+
+    def test_region_from_type_or_title(self):
+        assert region_of({'type': 'carte_asie'}) == 'carte_asie'
+        assert region_of({'type': 'carte_monde', 'titre': "Carte du monde pour l'Europe"}) is None
+        assert region_of({'titre': "Carte du monde pour l'Amérique du Nord (fallback)"}) == 'carte_amerique_nord'
+        assert region_of({'titre': 'Planisphère avec continents et océans'}) is None
+
+
+class TestMapAssetStore:
+    """Tests du stockage local des cartes"""
+
+    def test_source_downloaded_once(self, tmp_path):
+        fetch = CountingFetch()
+        store = MapAssetStore(root=tmp_path, fetch=fetch)
+        document = {'type': 'carte_europe', 'url_fichier_direct': WORLD_URL, 'titre': 'Europe'}
+
+        first = store.localize(document)
+        second = store.localize(dict(document, type='carte_asie'))
+        MapAssetStore(root=tmp_path, fetch=fetch).localize(document)
+
+        assert fetch.calls == 1
+        assert first['url_fichier_direct'].startswith('file://')
+        assert first['url_source'] == WORLD_URL
+        assert first['url_fichier_direct'] != second['url_fichier_direct']
+
+    def test_regional_crop(self, tmp_path):
+        store = MapAssetStore(root=tmp_path, fetch=CountingFetch())
+
+        asia = store.localize({'type': 'carte_asie', 'url_fichier_direct': WORLD_URL})
+        america = store.localize({'type': 'carte_amerique_nord', 'url_fichier_direct': WORLD_URL})
+
+        with local_image(asia) as image:
+            assert image.size == (asia['largeur_px'], asia['hauteur_px'])
+            assert image.width < 1200
+            # Asie : surtout à l'est du méridien de Greenwich
+            assert image.getpixel((image.width - 1, image.height // 2))[0] > 200
+        with local_image(america) as image:
+            assert image.getpixel((image.width // 2, image.height // 2))[2] > 200
+
+    def test_world_map_resized_to_print_width(self, tmp_path):
+        store = MapAssetStore(root=tmp_path, fetch=CountingFetch(), max_width=600)
+
+        world = store.localize({'type': 'carte_monde', 'url_fichier_direct': WORLD_URL})
+
+        assert (world['largeur_px'], world['hauteur_px']) == (600, 300)
+
+    def test_offline_without_source_keeps_remote_url(self, tmp_path):
+        fetch = CountingFetch()
+        store = MapAssetStore(root=tmp_path, fetch=fetch, offline=True)
+        document = {'type': 'carte_afrique', 'url_fichier_direct': WORLD_URL}
+
+        assert store.localize(document) is document
+        assert fetch.calls == 0
+
+    def test_prepackaged_source_used_offline(self, tmp_path):
+        store = MapAssetStore(root=tmp_path, offline=True)
+        source = store.source_path(WORLD_URL)
+        source.parent.mkdir(parents=True)
+        source.write_bytes(world_map())
+
+        localized = store.localize({'type': 'carte_afrique', 'url_fichier_direct': WORLD_URL})
+
+        assert localized['url_fichier_direct'].startswith('file://')
+
+    def test_download_failure_not_retried(self, tmp_path):
+        fetch = CountingFetch(error=OSError('timed out'))
+        store = MapAssetStore(root=tmp_path, fetch=fetch)
+        document = {'type': 'carte_monde', 'url_fichier_direct': WORLD_URL}
+
+        assert store.localize(document) is document
+        assert store.localize(document) is document
+        assert fetch.calls == 1
+
+    def test_exercise_documents_localized(self, tmp_path):
+        store = MapAssetStore(root=tmp_path, fetch=CountingFetch())
+        exercises = [
+            {'id': 'ex1', 'document': {'type': 'carte_europe', 'url_fichier_direct': WORLD_URL}},
+            {'id': 'ex2', 'document': None},
+            {'id': 'ex3'},
+        ]
+
+        localize_exercise_documents(exercises, store)
+
+        assert exercises[0]['document']['url_fichier_direct'].startswith('file://')
+        assert exercises[1]['document'] is None
+
+    def test_prepare_known_documents(self, tmp_path):
+        store = MapAssetStore(root=tmp_path, fetch=CountingFetch())
+        searcher = DocumentSearcher()
+        world_maps = {key: doc for key, doc in searcher.validated_documents_cache.items() if key != 'carte_france'}
+
+        assert store.prepare(world_maps) == len(world_maps)
+        assert len(list((tmp_path / 'print').iterdir())) == len(world_maps)
+
+
+class TestDocumentSearchType:
+    """Le type de carte est conservé dans les métadonnées du document"""
+
+    def test_cached_and_fallback_documents_typed(self):
+        searcher = DocumentSearcher()
+        assert searcher._check_cache('carte_asie', [])['type'] == 'carte_asie'
+        assert 'type' not in searcher.validated_documents_cache['carte_asie']
+        assert searcher._get_fallback_document('inconnu', {})['type'] == 'carte_monde'
@@ -0,0 +1,56 @@
+"""
+Tests de la conversion LaTeX -> MathML utilisée par l'export PDF
+"""
+
+import sys
+import os
+
+# Ajouter le chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mathml_converter import process_math_content_for_pdf, convert_fragment, get_cache_info
+import curriculum_complete
+import curriculum_data
+
+
+FRAC_3_4 = (
+    '<math xmlns="http://www.w3.org/1998/Math/MathML" display="inline">'
+    '<mrow><mfrac><mrow><mn>3</mn></mrow><mrow><mn>4</mn></mrow></mfrac></mrow></math>'
+)
+
+
+class TestMathMLConverter:
+    """Tests de process_math_content_for_pdf"""
+
+    def test_curriculum_modules_share_implementation(self):
+        assert curriculum_complete.process_math_content_for_pdf is process_math_content_for_pdf
+        assert curriculum_data.process_math_content_for_pdf is process_math_content_for_pdf
+
+    def test_broken_fractions_are_fixed(self):
+        assert process_math_content_for_pdf("3 de 4") == FRAC_3_4
+        assert process_math_content_for_pdf("3 par 4") == FRAC_3_4
+        assert process_math_content_for_pdf("3/4") == FRAC_3_4
+
+    def test_urls_are_preserved(self):
+        text = "Voir https://example.org/12/34"
+        assert "https://example.org" in process_math_content_for_pdf(text)
+
+    def test_single_pass_handles_all_fragments(self):
+        result = process_math_content_for_pdf(r"\frac{1}{2} puis \sqrt{16} et x^{2}")
+        assert "<mfrac>" in result
+        assert "<msqrt>" in result
+        assert "<msup><mi>x</mi>" in result
+        assert "\\" not in result
+
+    def test_fallback_on_unparseable_fragment(self):
+        assert process_math_content_for_pdf(r"\sqrt{\unknown}") == "√(\\unknown)"
+
+    def test_fragments_are_memoized(self):
+        convert_fragment('frac', '7', '9')
+        hits = get_cache_info().hits
+        process_math_content_for_pdf(r"\frac{7}{9}")
+        assert get_cache_info().hits == hits + 1
+
+    def test_empty_text(self):
+        assert process_math_content_for_pdf("") == ""
+        assert process_math_content_for_pdf(None) is None
@@ -0,0 +1,126 @@
+"""
+Tests du cache des PDF exportés (clé, éviction par taille, invalidation)
+"""
+
+import copy
+import os
+import sys
+import time
+
+import pytest
+
+# Ajouter le chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_cache import PDFCache, owner_tag
+
+DOCUMENT = {
+    'id': 'doc-1',
+    'matiere': 'Mathématiques',
+    'niveau': '4e',
+    'chapitre': 'Fractions',
+    'type_doc': 'exercices',
+    'difficulte': 'moyen',
+    'nb_exercices': 1,
+    'created_at': '2024-01-01T00:00:00',
+    'exercises': [{'type': 'ouvert', 'enonce': 'Calculer 1/2 + 1/4', 'solution': {'resultat': '3/4'}}],
+}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PDFCache(tmp_path / 'pdf', max_bytes=1000)
+
+
+def key(cache, **overrides):
+    options = dict(document=DOCUMENT, export_type='sujet', template_name='sujet_classique',
+                   template_content='<html>{{ document.matiere }}</html>', template_config=None,
+                   date_creation='01/01/2024')
+    options.update(overrides)
+    return cache.key(**options)
+
+
+class TestPDFCacheKey:
+    """Tests des entrées de la clé"""
+
+    def test_key_depends_on_every_input(self, cache, tmp_path):
+        varied = copy.deepcopy(DOCUMENT)
+        varied['exercises'][0]['enonce'] = 'Calculer 1/3 + 1/6'
+        keys = {
+            key(cache),
+            key(cache, document=varied),
+            key(cache, export_type='corrige'),
+            key(cache, template_name='sujet_academique'),
+            key(cache, template_content='<html>modifié</html>'),
+            key(cache, template_config={'school_name': 'Collège Camus'}),
+            key(cache, date_creation='02/01/2024'),
+        }
+        assert len(keys) == 7
+
+    def test_key_ignores_fields_not_rendered(self, cache):
+        moved = dict(DOCUMENT, created_at='2025-06-01T00:00:00', exercises=[
+            dict(DOCUMENT['exercises'][0], schema_img_id='abc.svg')])
+        assert key(cache, document=moved) == key(cache)
+
+    def test_every_printed_exercise_field_is_part_of_the_key(self, cache):
+        reference = key(cache)
+        for field, value in (('document', {'titre': 'Carte de l\'Europe', 'licence': {'type': 'CC-BY'}}),
+                             ('icone', 'map'), ('bareme', [{'etape': 'Calcul', 'points': 2.0}]),
+                             ('difficulte', 'difficile')):
+            changed = dict(DOCUMENT, exercises=[dict(DOCUMENT['exercises'][0], **{field: value})])
+            assert key(cache, document=changed) != reference, field
+
+    def test_logo_content_is_part_of_the_key(self, cache, tmp_path):
+        logo = tmp_path / 'logo.png'
+        logo.write_bytes(b'logo v1')
+        config = {'logo_url': f'file://{logo}'}
+        first = key(cache, template_config=config)
+        assert key(cache, template_config=config) == first
+
+        logo.write_bytes(b'logo v2, plus long')
+        assert key(cache, template_config=config) != first
+
+
+class TestPDFCacheStorage:
+    """Tests du stockage sur disque"""
+
+    def test_put_get_and_stats(self, cache):
+        owner = owner_tag(None)
+        assert cache.get('doc-1', owner, 'k1') is None
+        cache.put('doc-1', owner, 'k1', b'%PDF-1')
+        assert cache.get('doc-1', owner, 'k1') == b'%PDF-1'
+        assert cache.get('doc-1', owner_tag('prof@example.com'), 'k1') is None
+        stats = cache.stats()
+        assert stats['hits'] == 1 and stats['misses'] == 2 and stats['size_bytes'] == 6
+
+    def test_get_path_serves_the_file(self, cache):
+        owner = owner_tag(None)
+        assert cache.get_path('doc-1', owner, 'k1') is None
+        cache.put('doc-1', owner, 'k1', b'%PDF-1')
+        assert cache.get_path('doc-1', owner, 'k1').read_bytes() == b'%PDF-1'
+        assert not list(cache.root.glob('**/*.tmp'))
+
+    def test_least_recently_served_are_evicted(self, cache):
+        owner = owner_tag(None)
+        for index in range(2):
+            cache.put(f'doc-{index}', owner, 'k', b'x' * 400)
+            time.sleep(0.01)
+        # doc-0 vient d'être servi : doc-1 devient le moins récent
+        cache.get('doc-0', owner, 'k')
+        cache.put('doc-2', owner, 'k', b'x' * 400)
+
+        assert cache.get('doc-1', owner, 'k') is None
+        assert cache.get('doc-0', owner, 'k') is not None
+        assert cache.get('doc-2', owner, 'k') is not None
+        assert cache.stats()['size_bytes'] == 800 and cache.stats()['evictions'] == 1
+
+    def test_invalidation(self, cache):
+        pro = owner_tag('prof@example.com')
+        cache.put('doc-1', pro, 'k1', b'%PDF')
+        cache.put('doc-1', owner_tag(None), 'k1', b'%PDF')
+        cache.put('doc-2', pro, 'k2', b'%PDF')
+
+        assert cache.invalidate_owner('Prof@Example.com') == 2
+        assert cache.get('doc-1', owner_tag(None), 'k1') == b'%PDF'
+        assert cache.invalidate_document('doc-1') == 1
+        assert cache.stats()['size_bytes'] == 0
@@ -0,0 +1,91 @@
+"""
+Tests de l'envoi des PDF exportés (mémoire, fichier du cache) et du nettoyage des temporaires
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# Ajouter le chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_response import pdf_response, pdf_file_response, cleanup_temp_files, content_disposition
+
+PDF = b"%PDF-1.7 test"
+
+
+def make_client(tmp_path):
+    app = FastAPI()
+    cached = tmp_path / 'cached.pdf'
+    cached.write_bytes(PDF)
+
+    @app.get("/memory")
+    async def memory():
+        return pdf_response(PDF, "LeMaitremot_exercices_Mathématiques_4e_sujet.pdf")
+
+    @app.get("/cached")
+    async def from_cache():
+        return pdf_file_response(cached, "sujet.pdf")
+
+    return TestClient(app)
+
+
+class TestPDFResponse:
+    """Tests des réponses PDF"""
+
+    def test_memory_response(self, tmp_path):
+        before = set(os.listdir(tmp_path))
+        response = make_client(tmp_path).get("/memory")
+        assert response.status_code == 200 and response.content == PDF
+        assert response.headers['content-type'] == 'application/pdf'
+        assert response.headers['content-length'] == str(len(PDF))
+        assert "filename*=utf-8''LeMaitremot_exercices_Math%C3%A9matiques_4e_sujet.pdf" in response.headers['content-disposition']
+        assert set(os.listdir(tmp_path)) == before | {'cached.pdf'}
+
+    def test_file_response(self, tmp_path):
+        response = make_client(tmp_path).get("/cached")
+        assert response.status_code == 200 and response.content == PDF
+        assert response.headers['content-disposition'] == 'attachment; filename="sujet.pdf"'
+
+    def test_content_disposition_ascii(self):
+        assert content_disposition("sujet.pdf") == 'attachment; filename="sujet.pdf"'
+
+
+class TestCleanup:
+    """Tests du nettoyage des fichiers temporaires abandonnés"""
+
+    def test_stale_files_removed(self, tmp_path):
+        cache_dir = tmp_path / 'cache'
+        (cache_dir / 'doc').mkdir(parents=True)
+        old = time.time() - 7200
+        stale = [cache_dir / 'doc' / 'tmpcd34.tmp']
+        for path in stale:
+            path.write_bytes(b'x')
+            os.utime(path, (old, old))
+        kept = [cache_dir / 'doc' / 'tmpfresh.tmp', cache_dir / 'doc' / 'owner-key.pdf']
+        for path in kept:
+            path.write_bytes(b'x')
+        os.utime(kept[1], (old, old))
+
+        assert cleanup_temp_files([cache_dir], max_age=3600) == 1
+        assert not any(path.exists() for path in stale)
+        assert all(path.exists() for path in kept)
+
+    def test_system_temp_dir_left_alone(self, tmp_path, monkeypatch):
+        # tmp*.pdf d'autres programmes dans le répertoire temporaire partagé
+        monkeypatch.setenv('TMPDIR', str(tmp_path))
+        tempfile.tempdir = None
+        try:
+            foreign = tmp_path / 'tmpab12.pdf'
+            foreign.write_bytes(b'x')
+            old = time.time() - 7200
+            os.utime(foreign, (old, old))
+
+            assert cleanup_temp_files([], max_age=3600) == 0
+            assert foreign.exists()
+        finally:
+            tempfile.tempdir = None
@@ -0,0 +1,60 @@
+"""
+Tests du CSS des templates dans la mise en page PDF (origine « auteur » conservée)
+"""
+
+import os
+import sys
+
+# Ajouter le chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lazy_imports
+import pdf_stylesheets
+import pdf_worker_pool
+from template_engine import TemplateEngine
+
+
+class FakeHTML:
+    """weasyprint.HTML de test : garde le HTML reçu et les options de render()"""
+
+    instances = []
+
+    def __init__(self, string, url_fetcher=None):
+        self.string = string
+        FakeHTML.instances.append(self)
+
+    def render(self, **options):
+        self.render_options = options
+        return self
+
+
+class FakeWeasyPrint:
+    HTML = FakeHTML
+
+
+class TestTemplateCss:
+    """Le CSS du template est lu par WeasyPrint dans le document, pas en feuille utilisateur"""
+
+    def test_head_styles_kept_in_document(self, monkeypatch):
+        font_config = object()
+        monkeypatch.setattr(lazy_imports, 'get_weasyprint', lambda: FakeWeasyPrint)
+        monkeypatch.setattr(pdf_stylesheets, '_font_config', font_config)
+        FakeHTML.instances.clear()
+
+        engine = TemplateEngine(bytecode_dir=None, auto_reload=False)
+        html = engine.get_template('sujet_classique').render(
+            document={'matiere': 'Mathématiques', 'type_doc': 'exercices', 'exercises': []},
+            date_creation='01/01/2026'
+        )
+        pdf_worker_pool._render_document(html)
+
+        rendered = FakeHTML.instances[-1]
+        head = rendered.string.split('</head>')[0]
+        assert '<style' in head and '@import' in head
+        assert 'stylesheets' not in rendered.render_options
+        assert rendered.render_options['font_config'] is font_config
+
+    def test_font_configuration_shared(self, monkeypatch):
+        font_config = object()
+        monkeypatch.setattr(pdf_stylesheets, '_font_config', font_config)
+        assert pdf_stylesheets.font_configuration() is pdf_stylesheets.font_configuration() is font_config
@@ -0,0 +1,142 @@
+"""
+Tests du url_fetcher des exports PDF (cache mémoire + disque, échecs mémorisés, images réduites)
+"""
+
+import io
+import os
+import sys
+import time
+
+import pytest
+
+# Ajouter le chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_url_fetcher import CachedURLFetcher, downscale_image
+
+MAP_URL = 'https://upload.wikimedia.org/wikipedia/commons/carte.png'
+
+
+def png_bytes(width: int, height: int) -> bytes:
+    from PIL import Image
+    output = io.BytesIO()
+    Image.new('RGB', (width, height), (200, 30, 30)).save(output, 'PNG')
+    return output.getvalue()
+
+
+class FakeFetch:
+    """fetch_url de test : compte les téléchargements"""
+
+    def __init__(self, content=b'<svg/>', mime_type='image/svg+xml', error=None):
+        self.content, self.mime_type, self.error = content, mime_type, error
+        self.calls = []
+
+    def __call__(self, url, timeout):
+        self.calls.append((url, timeout))
+        if self.error is not None:
+            raise self.error
+        return self.content, self.mime_type
+
+
+def make_fetcher(tmp_path, fetch, **kwargs):
+    return CachedURLFetcher(fallback=lambda url, *a, **k: {'string': b'fallback', 'url': url},
+                            cache_dir=tmp_path / 'url_cache', fetch=fetch, **kwargs)
+
+
+class TestCachedURLFetcher:
+    """Tests des ressources mises en cache"""
+
+    def test_repeated_fetch_served_from_memory(self, tmp_path):
+        fetch = FakeFetch()
+        fetcher = make_fetcher(tmp_path, fetch, timeout=1.5)
+
+        first = fetcher(MAP_URL)
+        second = fetcher(MAP_URL)
+
+        assert first == {'string': b'<svg/>', 'mime_type': 'image/svg+xml', 'redirected_url': MAP_URL}
+        assert second == first
+        assert fetch.calls == [(MAP_URL, 1.5)]
+        assert fetcher.stats()['memory_hits'] == 1
+
+    def test_disk_cache_shared_between_processes(self, tmp_path):
+        make_fetcher(tmp_path, FakeFetch())(MAP_URL)
+
+        fetch = FakeFetch()
+        other_process = make_fetcher(tmp_path, fetch)
+        result = other_process(MAP_URL)
+
+        assert result['string'] == b'<svg/>'
+        assert result['mime_type'] == 'image/svg+xml'
+        assert fetch.calls == []
+        assert other_process.stats()['disk_hits'] == 1
+
+    def test_failure_not_retried_before_ttl(self, tmp_path):
+        fetch = FakeFetch(error=OSError('timed out'))
+        fetcher = make_fetcher(tmp_path, fetch, failure_ttl=60)
+
+        for _ in range(3):
+            with pytest.raises(OSError):
+                fetcher(MAP_URL)
+        assert len(fetch.calls) == 1
+
+        fetcher.failure_ttl = 0
+        fetch.error = None
+        assert fetcher(MAP_URL)['string'] == b'<svg/>'
+        assert len(fetch.calls) == 2
+
+    def test_other_schemes_use_fallback(self, tmp_path):
+        fetch = FakeFetch()
+        fetcher = make_fetcher(tmp_path, fetch)
+
+        assert fetcher('data:image/png;base64,AAAA') == {'string': b'fallback', 'url': 'data:image/png;base64,AAAA'}
+        assert fetcher('file:///nonexistent/logo.png')['string'] == b'fallback'
+        assert fetch.calls == []
+
+    def test_local_logo_change_invalidates(self, tmp_path):
+        logo = tmp_path / 'logo.png'
+        logo.write_bytes(b'old logo')
+        fetcher = make_fetcher(tmp_path, lambda url, timeout: (open(url[len('file://'):], 'rb').read(), 'image/png'),
+                               max_px=0)
+        url = f'file://{logo}'
+
+        assert fetcher(url)['string'] == b'old logo'
+        logo.write_bytes(b'new logo, bigger')
+        os.utime(logo, ns=(time.time_ns() + 10**9, time.time_ns() + 10**9))
+        assert fetcher(url)['string'] == b'new logo, bigger'
+
+    def test_memory_and_disk_bounded(self, tmp_path):
+        fetch = FakeFetch(content=b'x' * 100)
+        fetcher = make_fetcher(tmp_path, fetch, memory_bytes=250, disk_bytes=250)
+
+        for index in range(5):
+            fetcher(f'https://example.org/{index}.svg')
+
+        stats = fetcher.stats()
+        assert stats['memory_entries'] == 2
+        assert stats['memory_bytes'] <= 250
+        cached_files = [p for p in (tmp_path / 'url_cache').glob('*/*')]
+        assert sum(p.stat().st_size for p in cached_files) <= 250
+
+    def test_large_image_downscaled_once(self, tmp_path):
+        fetch = FakeFetch(content=png_bytes(3200, 1600), mime_type='image/png')
+        fetcher = make_fetcher(tmp_path, fetch, max_px=800)
+
+        from PIL import Image
+        content = fetcher(MAP_URL)['string']
+        assert Image.open(io.BytesIO(content)).size == (800, 400)
+        assert fetcher(MAP_URL)['string'] == content
+        assert len(fetch.calls) == 1
+
+
+class TestDownscaleImage:
+    """Tests de la réduction à la résolution d'impression"""
+
+    def test_small_image_unchanged(self):
+        content = png_bytes(100, 50)
+        assert downscale_image(content, 'image/png', max_px=800) == content
+
+    def test_non_raster_unchanged(self):
+        assert downscale_image(b'<svg/>', 'image/svg+xml', max_px=10) == b'<svg/>'
+
+    def test_undecodable_unchanged(self):
+        assert downscale_image(b'not a png', 'image/png', max_px=10) == b'not a png'
@@ -0,0 +1,150 @@
+"""
+Tests du pool de processus de rendu PDF (file bornée, timeouts, métriques)
+
+Les fonctions de rendu sont définies au niveau du module : les processus du pool
+(démarrés en 'spawn') les importent par leur nom.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+# Ajouter le chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_worker_pool import PDFWorkerPool, PDFRenderError, PDFRenderTimeout, PDFPoolSaturated
+
+
+def echo_render(html_content):
+    return f"%PDF {html_content} pid={os.getpid()}".encode('utf-8')
+
+
+def slow_render(html_content):
+    time.sleep(float(html_content))
+    return b"%PDF slow"
+
+
+def failing_render(html_content):
+    raise ValueError(f"layout failed: {html_content}")
+
+
+def crashing_render(html_content):
+    os._exit(1)
+
+
+def batch_render(html_contents):
+    return [f"%PDF {html_content}".encode('utf-8') for html_content in html_contents]
+
+
+def make_pool(render_function, **kwargs):
+    options = dict(size=1, max_queue=0, timeout=10, warmup_html=None, render_function=render_function)
+    options.update(kwargs)
+    return PDFWorkerPool(**options)
+
+
+class TestRendering:
+    """Tests du rendu et des erreurs"""
+
+    def test_render_in_worker_process(self):
+        pool = make_pool(echo_render)
+        try:
+            pdf = asyncio.run(pool.render("doc"))
+            assert pdf.startswith(b"%PDF doc") and f"pid={os.getpid()}".encode() not in pdf
+            stats = pool.stats()
+            assert stats['jobs'] == 1 and stats['alive'] == 1 and stats['busy'] == 0
+        finally:
+            pool.shutdown()
+
+    def test_render_error_is_reported(self):
+        pool = make_pool(failing_render)
+        try:
+            with pytest.raises(PDFRenderError, match="ValueError: layout failed: doc"):
+                pool.render_sync("doc")
+            assert pool.stats()['errors'] == 1 and pool.stats()['restarts'] == 0
+        finally:
+            pool.shutdown()
+
+    def test_crashed_worker_is_replaced(self):
+        pool = make_pool(crashing_render)
+        try:
+            with pytest.raises(PDFRenderError, match="crashed"):
+                pool.render_sync("doc")
+            assert pool.stats()['restarts'] == 1 and pool.stats()['alive'] == 1
+        finally:
+            pool.shutdown()
+
+    def test_job_with_its_own_render_function(self):
+        pool = make_pool(echo_render)
+        try:
+            assert pool.render_sync(["a", "b"], render_function=batch_render) == [b"%PDF a", b"%PDF b"]
+            assert asyncio.run(pool.render(["c"], render_function=batch_render)) == [b"%PDF c"]
+            assert pool.render_sync("doc").startswith(b"%PDF doc pid=")
+        finally:
+            pool.shutdown()
+
+    def test_workers_are_recycled(self):
+        pool = make_pool(echo_render, max_jobs=2)
+        try:
+            pids = {pool.render_sync("doc").split(b"pid=")[1] for _ in range(4)}
+            assert len(pids) == 2 and pool.stats()['restarts'] == 2
+        finally:
+            pool.shutdown()
+
+
+class TestLimits:
+    """Tests de la file bornée et des timeouts"""
+
+    def test_timeout_kills_runaway_layout(self):
+        pool = make_pool(slow_render, timeout=0.5)
+        try:
+            start = time.perf_counter()
+            with pytest.raises(PDFRenderTimeout):
+                pool.render_sync("30")
+            assert time.perf_counter() - start < 10
+            assert pool.stats()['timeouts'] == 1 and pool.stats()['restarts'] == 1
+            # Le processus de remplacement traite l'export suivant
+            assert pool.render_sync("0") == b"%PDF slow"
+            # Délai propre à un job (plusieurs documents)
+            assert pool.render_sync("0.8", timeout=5) == b"%PDF slow"
+        finally:
+            pool.shutdown()
+
+    def test_saturated_pool_rejects(self):
+        pool = make_pool(slow_render, size=1, max_queue=1)
+        pool.start()
+
+        async def scenario():
+            jobs = [asyncio.ensure_future(pool.render("0.5")) for _ in range(3)]
+            return await asyncio.gather(*jobs, return_exceptions=True)
+
+        try:
+            results = asyncio.run(scenario())
+            rejected = [result for result in results if isinstance(result, PDFPoolSaturated)]
+            assert len(rejected) == 1 and rejected[0].retry_after == pool.retry_after
+            assert results.count(b"%PDF slow") == 2
+            stats = pool.stats()
+            assert stats['rejected'] == 1 and stats['queue_wait']['max_ms'] > 0
+        finally:
+            pool.shutdown()
+
+    def test_event_loop_is_not_blocked(self):
+        pool = make_pool(slow_render)
+        pool.start()
+
+        async def scenario():
+            ticks = 0
+            job = asyncio.ensure_future(pool.render("0.5"))
+            while not job.done():
+                await asyncio.sleep(0.01)
+                ticks += 1
+            return await job, ticks
+
+        try:
+            pdf, ticks = asyncio.run(scenario())
+            assert pdf == b"%PDF slow" and ticks >= 10
+            assert pool.stats()['render_time']['max_ms'] >= 500
+        finally:
+            pool.shutdown()
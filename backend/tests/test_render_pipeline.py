@@ -0,0 +1,137 @@
+"""
+Tests du pipeline de rendu unique des exercices (artefacts web / pdf / figure)
+"""
+
+import asyncio
+import copy
+import sys
+import os
+import threading
+
+# Ajouter le chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import render_pipeline
+from render_pipeline import RenderPipeline, artifact_key, apply_artifact
+
+EXERCISE = {
+    'type': 'qcm',
+    'enonce': r"Calculer \(\frac{1}{2} + \frac{1}{4}\)",
+    'solution': {'etapes': [r"\(\frac{2}{4} + \frac{1}{4}\)"], 'resultat': r"\(\frac{3}{4}\)"},
+    'donnees': {'options': [r"\(\frac{3}{4}\)", "1"], 'schema': {'type': 'carre', 'cote': 4}},
+}
+
+
+class FakeCollection:
+    """Collection Mongo minimale (find $in / insert_many) pour compter les accès"""
+
+    def __init__(self):
+        self.documents = {}
+        self.finds = 0
+
+    def find(self, query):
+        self.finds += 1
+        wanted = query['_id']['$in']
+
+        async def cursor():
+            for key in wanted:
+                if key in self.documents:
+                    yield self.documents[key]
+        return cursor()
+
+    async def insert_many(self, documents, ordered=True):
+        for document in documents:
+            self.documents[document['_id']] = document
+
+
+class FakeDatabase(dict):
+    def __missing__(self, name):
+        return self.setdefault(name, FakeCollection())
+
+
+class TestArtifacts:
+    """Tests du contenu des artefacts"""
+
+    def test_artifact_key(self):
+        changed = dict(EXERCISE, enonce="Autre énoncé")
+        assert artifact_key(EXERCISE) == artifact_key(copy.deepcopy(EXERCISE))
+        assert artifact_key(EXERCISE) != artifact_key(changed)
+        # Champs non rendus (figures stockées, identifiants) sans effet sur la clé
+        assert artifact_key(EXERCISE) == artifact_key(dict(EXERCISE, id='x', schema_img_id='y'))
+
+    def test_render_all_flavors(self):
+        artifact = RenderPipeline().render(EXERCISE)
+        assert '/api/figures/' in artifact['web']['enonce'] and '<svg' not in artifact['web']['enonce']
+        assert '<svg' in artifact['pdf']['enonce']
+        assert len(artifact['pdf']['options']) == 2 and '<svg' in artifact['pdf']['options'][0]
+        assert '<svg' in artifact['pdf']['solution']['resultat']
+        assert artifact['figure_svg'].startswith('<svg')
+
+    def test_apply_artifact(self):
+        artifact = RenderPipeline().render(EXERCISE)
+        exercise = apply_artifact(copy.deepcopy(EXERCISE), artifact, 'pdf')
+        assert exercise['schema_svg'] == artifact['figure_svg']
+        assert exercise['donnees']['options'] == artifact['pdf']['options']
+        # L'artefact (partagé via le LRU) n'est pas modifié par l'exercice
+        exercise['solution']['etapes'].append('x')
+        assert len(artifact['pdf']['solution']['etapes']) == 1
+
+
+class TestArtifactStorage:
+    """Tests du rendu unique : LRU, puis Mongo, puis rendu"""
+
+    def count_renders(self, monkeypatch, pipeline):
+        calls = []
+        render = pipeline.render
+
+        def counting(exercise, key=None):
+            calls.append(key)
+            return render(exercise, key)
+        monkeypatch.setattr(pipeline, 'render', counting)
+        return calls
+
+    def test_rendered_once_without_database(self, monkeypatch):
+        pipeline = RenderPipeline()
+        pipeline.cache.clear()
+        calls = self.count_renders(monkeypatch, pipeline)
+
+        first = asyncio.run(pipeline.artifacts_for(None, [EXERCISE, copy.deepcopy(EXERCISE)]))
+        second = asyncio.run(pipeline.artifacts_for(None, [EXERCISE]))
+        assert len(calls) == 1
+        assert first[0] is first[1] is second[0]
+
+    def test_missing_rendered_off_event_loop(self, monkeypatch):
+        pipeline = RenderPipeline()
+        pipeline.cache.clear()
+        render = pipeline.render
+        threads = []
+
+        def recording(exercise, key=None):
+            threads.append(threading.get_ident())
+            return render(exercise, key)
+        monkeypatch.setattr(pipeline, 'render', recording)
+
+        async def scenario():
+            await pipeline.artifacts_for(None, [EXERCISE])
+            return threading.get_ident()
+
+        loop_thread = asyncio.run(scenario())
+        assert threads and loop_thread not in threads
+
+    def test_artifacts_read_back_from_database(self, monkeypatch):
+        db = FakeDatabase()
+        pipeline = RenderPipeline()
+        pipeline.cache.clear()
+        asyncio.run(pipeline.artifacts_for(db, [EXERCISE]))
+        assert artifact_key(EXERCISE) in db[render_pipeline.ARTIFACTS_COLLECTION].documents
+
+        # Autre processus : LRU vide, l'artefact vient de Mongo sans nouveau rendu
+        pipeline.cache.clear()
+        calls = self.count_renders(monkeypatch, pipeline)
+        artifacts = asyncio.run(pipeline.artifacts_for(db, [EXERCISE]))
+        assert calls == [] and artifacts[0]['_id'] == artifact_key(EXERCISE)
+
+    def test_version_change_invalidates(self, monkeypatch):
+        key = artifact_key(EXERCISE)
+        monkeypatch.setattr(render_pipeline, 'RENDER_PIPELINE_VERSION', render_pipeline.RENDER_PIPELINE_VERSION + 1)
+        assert artifact_key(EXERCISE) != key
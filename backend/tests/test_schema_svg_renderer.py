@@ -0,0 +1,89 @@
+"""
+Tests du rendu SVG natif des schémas (SchemaRenderer sans matplotlib)
+"""
+
+import re
+import sys
+import os
+import xml.etree.ElementTree as ET
+
+import pytest
+
+# Ajouter le chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from render_schema import SchemaRenderer
+from schema_svg_renderer import schema_svg_renderer, parse_coordinate
+from figure_registry import ANY_FIGURE
+
+SCHEMAS = {
+    'cylindre': {'type': 'cylindre', 'rayon': 3, 'hauteur': 5},
+    'pyramide': {'type': 'pyramide', 'base': 'carre', 'cote': 4, 'hauteur': 5},
+    'triangle': {'type': 'triangle', 'points': ['A', 'B', 'C'], 'segments': [['A', 'B', {'longueur': 3}]]},
+    'triangle_rectangle': {'type': 'triangle_rectangle', 'points': ['A', 'B', 'C']},
+    'rectangle': {'type': 'rectangle', 'longueur': 6, 'largeur': 4},
+    'carre': {'type': 'carre', 'cote': 4},
+    'cercle': {'type': 'cercle', 'rayon': 3},
+    'hexagone': {'type': 'hexagone', 'points': ['A', 'B', 'C', 'D', 'E', 'F']},
+}
+
+SVG = '{http://www.w3.org/2000/svg}'
+
+
+def render_native(schema_type, data):
+    renderers = schema_svg_renderer.renderers()
+    return renderers.get(schema_type, renderers[ANY_FIGURE])(data)
+
+
+def texts(svg: str):
+    return [element.text for element in ET.fromstring(svg).iter(f'{SVG}text')]
+
+
+class TestSchemaSVGRenderer:
+    """Tests des renderers natifs"""
+
+    @pytest.mark.parametrize("schema_type", list(SCHEMAS))
+    def test_drawing_fits_in_document(self, schema_type):
+        svg = render_native(schema_type, SCHEMAS[schema_type])
+        root = ET.fromstring(svg)
+        width, height = float(root.get('width')), float(root.get('height'))
+        for element in root.iter():
+            for name in ('x', 'cx'):
+                if element.get(name) is not None:
+                    assert 0 <= float(element.get(name)) <= width
+            for name in ('y', 'cy'):
+                if element.get(name) is not None:
+                    assert 0 <= float(element.get(name)) <= height
+            for x, y in re.findall(r'[ML](-?[\d.]+),(-?[\d.]+)', element.get('d', '')):
+                assert 0 <= float(x) <= width and 0 <= float(y) <= height
+
+    def test_labels_match_matplotlib_version(self):
+        assert 'h = 5 cm' in texts(schema_svg_renderer.render_cylindre(SCHEMAS['cylindre']))
+        assert 'r = 3 cm' in texts(schema_svg_renderer.render_cylindre(SCHEMAS['cylindre']))
+        assert {'6 cm', '4 cm', 'Rectangle'} <= set(texts(schema_svg_renderer.render_rectangle(SCHEMAS['rectangle'])))
+        assert {'A', 'B', 'C', '3 cm'} <= set(texts(schema_svg_renderer.render_triangle(SCHEMAS['triangle'])))
+        assert 'Hexagone (générique)' in texts(render_native('hexagone', SCHEMAS['hexagone']))
+
+    def test_right_triangle_has_default_right_angle(self):
+        svg = schema_svg_renderer.render_triangle_rectangle(SCHEMAS['triangle_rectangle'])
+        assert 'class="schema-mark"' in svg
+
+    def test_invalid_data_returns_empty(self):
+        assert schema_svg_renderer.render_triangle({'points': []}) == ""
+        assert render_native('inconnu', {'points': ['A']}) == ""
+
+    def test_parse_coordinate(self):
+        assert parse_coordinate("(0,3)") == (0.0, 3.0)
+        assert parse_coordinate("(a,b)") is None
+        assert parse_coordinate(None) is None
+
+    def test_schema_renderer_uses_native_backend(self):
+        svg = SchemaRenderer().render_to_svg({'type': 'carre', 'cote': 7})
+        assert svg.startswith('<svg')
+        assert 'matplotlib' not in svg
+        assert '7 cm' in svg
+
+    def test_unsupported_pyramid_base_falls_back_to_matplotlib(self):
+        assert schema_svg_renderer.render_pyramide({'base': 'triangle'}) is None
+        svg = SchemaRenderer().render_to_svg({'type': 'pyramide', 'base': 'hexagone', 'hauteur': 9})
+        assert 'matplotlib' in svg.lower()
@@ -0,0 +1,76 @@
+"""
+Tests du backend SVG par chaînes et de son équivalence avec le backend ElementTree
+"""
+
+import re
+import sys
+import os
+import xml.etree.ElementTree as ET
+
+import pytest
+
+# Ajouter le chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from svg_builder import SVGStringDocument, format_number
+from geometry_svg_renderer import GeometrySVGRenderer
+
+FIGURES = {
+    'rectangle': {'longueur': 8, 'largeur': 5, 'points': ['A', 'B', 'C', 'D']},
+    'triangle_rectangle': {
+        'points': ['A', 'B', 'C'],
+        'segments': [['A', 'B', {'longueur': 3}], ['B', 'C', {'longueur': 4}]],
+    },
+    'triangle': {'points': ['A', 'B', 'C'], 'type': 'equilateral', 'segments': [['A', 'B', {'longueur': 5}]]},
+    'cercle': {'rayon': 3, 'centre': 'O'},
+    'thales': {
+        'points': ['A', 'B', 'C', 'D', 'E'],
+        'longueurs_connues': {'AD': 2, 'DB': 4, 'AE': 3, 'EC': 6},
+        'segments': [['A', 'D', {'longueur': 2}]],
+    },
+    'mediatrice_construction': {},
+}
+
+_NUMBER_RE = re.compile(r'^-?\d+(\.\d+)?$')
+
+
+def normalize(svg: str):
+    """Éléments, attributs (nombres arrondis au centième) et textes, dans l'ordre du document"""
+    def value(text):
+        if _NUMBER_RE.match(text):
+            return round(float(text), 2)
+        return ' '.join(
+            str(round(float(token), 2)) if _NUMBER_RE.match(token) else token for token in text.split()
+        )
+    return [
+        (element.tag, {name: value(v) for name, v in element.attrib.items()}, (element.text or '').strip())
+        for element in ET.fromstring(svg).iter()
+    ]
+
+
+class TestSVGBuilder:
+    """Tests du document SVG par chaînes"""
+
+    @pytest.mark.parametrize("value, expected", [
+        (120, '120'), (120.0, '120'), (66.66666666666667, '66.67'), (-0.001, '0'), (1.5, '1.5'),
+    ])
+    def test_format_number(self, value, expected):
+        assert format_number(value) == expected
+
+    def test_escaping(self):
+        doc = SVGStringDocument(10, 10)
+        doc.element('text', {'class': 'a"b'}, 'x < 5 & y > 2')
+        svg = doc.to_string()
+        parsed = ET.fromstring(svg)
+        text = parsed.find('{http://www.w3.org/2000/svg}text')
+        assert text.text == 'x < 5 & y > 2'
+        assert text.get('class') == 'a"b'
+
+    @pytest.mark.parametrize("figure_type", list(FIGURES))
+    def test_backends_are_equivalent(self, figure_type):
+        """Même rendu (au centième de pixel près) que l'ancien backend ElementTree"""
+        data = FIGURES[figure_type]
+        legacy = getattr(GeometrySVGRenderer(backend='etree'), f"render_{figure_type}")(dict(data))
+        fast = getattr(GeometrySVGRenderer(), f"render_{figure_type}")(dict(data))
+        assert normalize(fast) == normalize(legacy)
+        assert len(fast) < len(legacy)
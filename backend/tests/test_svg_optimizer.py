@@ -0,0 +1,80 @@
+"""
+Tests de la minification des SVG (précision, métadonnées, classes de style)
+"""
+
+import re
+import sys
+import os
+
+# Ajouter le chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from svg_optimizer import optimize_svg, optimize_html_svgs, minify_style
+from latex_to_svg import latex_renderer
+from geometry_renderer import GeometryRenderer
+from geometry_svg_renderer import GeometrySVGRenderer
+
+geometry = GeometryRenderer()
+
+
+class TestOptimizeSVG:
+    """Tests des transformations unitaires"""
+
+    def test_precision_and_path_compaction(self):
+        svg = '<svg><path d="M 0 22.284 \nL 15.15649 -0.001 \nz\n" /><use x="99.6049" y="192.0"/></svg>'
+        optimized = optimize_svg(svg, precision=2)
+        assert 'd="M0 22.28L15.16 0z"' in optimized
+        assert 'x="99.6" y="192"' in optimized
+
+    def test_metadata_comments_and_unreferenced_ids(self):
+        svg = (
+            '<svg><metadata><rdf:RDF/></metadata><!-- $x$ -->\n <g id="figure_1">'
+            '<defs><path id="glyph-1" d="M 0 0"/></defs><use xlink:href="#glyph-1"/></g></svg>'
+        )
+        optimized = optimize_svg(svg)
+        assert '<metadata' not in optimized and '<!--' not in optimized and '\n' not in optimized
+        assert 'id="figure_1"' not in optimized
+        assert 'id="glyph-1"' in optimized
+
+    def test_repeated_styles_become_classes(self):
+        style = "fill: #ff0000; stroke: #ff0000; stroke-width: 1.5"
+        svg = '<svg>' + f'<circle r="1" style="{style}"/>' * 4 + '<rect style="fill: none"/></svg>'
+        optimized = optimize_svg(svg)
+        classes = re.findall(r'class="(s-[0-9a-f]+)"', optimized)
+        assert len(classes) == 4 and len(set(classes)) == 1
+        assert f'.{classes[0]}{{{minify_style(style)}}}' in optimized
+        # Style unique : laissé en attribut
+        assert 'style="fill:none"' in optimized
+        # Même style, même classe d'un SVG à l'autre (SVG insérés dans la même page)
+        assert classes[0] in optimize_svg(svg.replace('r="1"', 'r="2"'))
+
+    def test_minify_style(self):
+        assert minify_style("fill: none; stroke: #000000;  stroke-width: 2; ") == 'fill:none;stroke:#000;stroke-width:2'
+        assert minify_style("fill: #1f77b4") == 'fill:#1f77b4'
+
+
+class TestRealSVGs:
+    """Tests sur les sorties des renderers"""
+
+    def test_matplotlib_figure_shrinks(self):
+        svg = geometry._figure_to_svg(geometry._draw_square({'points': ['A', 'B', 'C', 'D']}))
+        optimized = optimize_svg(svg)
+        assert len(optimized) < 0.7 * len(svg)
+        assert optimized.count('<use ') == svg.count('<use ')
+        assert optimize_svg(optimized) == optimized
+
+    def test_etree_geometry_svg(self):
+        svg = GeometrySVGRenderer(backend='etree').render_triangle({'points': ['A', 'B', 'C']})
+        optimized = optimize_svg(svg)
+        assert len(optimized) <= len(svg)
+        assert optimized.count('<text') == svg.count('<text')
+
+    def test_formulas_keep_sharing_glyphs(self):
+        html = latex_renderer.convert_latex_to_svg(r"\(\frac{1}{2}\) et \(\frac{1}{4}\)")
+        optimized, bytes_in, bytes_out = optimize_html_svgs(html)
+        assert bytes_out < bytes_in
+        assert optimized.count('<svg') == html.count('<svg') == 2
+        # Chaque glyphe référencé reste défini dans le SVG de sa formule
+        for svg in re.findall(r'<svg\b.*?</svg>', optimized, re.DOTALL):
+            glyph_ids = set(re.findall(r'<path id="([^"]+)"', svg))
+            assert glyph_ids and set(re.findall(r'xlink:href="#([^"]+)"', svg)) <= glyph_ids
@@ -0,0 +1,71 @@
+"""
+Tests de l'environnement Jinja2 des exports (compilation unique, bytecode, rechargement)
+"""
+
+import os
+import sys
+
+import pytest
+from jinja2 import Template
+
+# Ajouter le chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from template_engine import TemplateEngine, TEMPLATES_DIR
+
+
+@pytest.fixture
+def templates_dir(tmp_path):
+    directory = tmp_path / 'templates'
+    directory.mkdir()
+    (directory / 'sujet_test.html').write_text('<h1>{{ document.matiere }}</h1>', encoding='utf-8')
+    return directory
+
+
+class TestTemplateEngine:
+    """Tests du cache de templates compilés"""
+
+    def test_compiled_once(self, templates_dir, tmp_path):
+        engine = TemplateEngine(templates_dir, tmp_path / 'bytecode', auto_reload=False)
+        first = engine.get_template('sujet_test')
+        assert engine.get_template('sujet_test') is first
+        assert first.render(document={'matiere': 'Maths'}) == '<h1>Maths</h1>'
+        assert engine.stats()['compilations'] == 1
+
+    def test_no_reload_in_production(self, templates_dir, tmp_path):
+        engine = TemplateEngine(templates_dir, tmp_path / 'bytecode', auto_reload=False)
+        engine.precompile(['sujet_test'])
+        (templates_dir / 'sujet_test.html').unlink()
+        # Aucun accès disque sur le chemin d'export
+        assert engine.get_template('sujet_test').render(document={'matiere': 'SVT'}) == '<h1>SVT</h1>'
+
+    def test_auto_reload_in_development(self, templates_dir, tmp_path):
+        engine = TemplateEngine(templates_dir, None, auto_reload=True)
+        engine.get_template('sujet_test')
+        path = templates_dir / 'sujet_test.html'
+        path.write_text('<h2>{{ document.matiere }}</h2>', encoding='utf-8')
+        stat = path.stat()
+        os.utime(path, (stat.st_atime, stat.st_mtime + 5))
+        assert engine.get_template('sujet_test').render(document={'matiere': 'SVT'}) == '<h2>SVT</h2>'
+        assert engine.get_source('sujet_test') == '<h2>{{ document.matiere }}</h2>'
+
+    def test_bytecode_cache_written(self, templates_dir, tmp_path):
+        bytecode_dir = tmp_path / 'bytecode'
+        TemplateEngine(templates_dir, bytecode_dir, auto_reload=False).precompile(['sujet_test'])
+        assert list(bytecode_dir.iterdir())
+
+    def test_missing_templates(self, templates_dir, tmp_path):
+        engine = TemplateEngine(templates_dir, None, auto_reload=False)
+        assert engine.precompile(['sujet_test', 'absent']) == ['absent']
+        with pytest.raises(FileNotFoundError):
+            engine.get_template('absent')
+
+    def test_same_output_as_template_from_string(self, tmp_path):
+        engine = TemplateEngine(TEMPLATES_DIR, None, auto_reload=False)
+        context = {
+            'document': {'matiere': 'Mathématiques', 'niveau': '4e', 'chapitre': 'Fractions',
+                         'type_doc': 'exercices', 'exercises': [{'enonce': 'Calculer <b>1/2</b>'}]},
+            'date_creation': '01/01/2026',
+        }
+        source = (TEMPLATES_DIR / 'sujet_classique.html').read_text(encoding='utf-8')
+        assert engine.get_template('sujet_classique').render(**context) == Template(source).render(**context)
@@ -0,0 +1,81 @@
+"""
+Tests du warm-up des moteurs de rendu
+"""
+
+import sys
+import os
+from pathlib import Path
+
+# Ajouter le chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+matplotlib.use('Agg')
+
+import warmup
+from warmup import run_warmup, WarmupState, WARMUP_FORMULAS, WARMUP_FIGURES
+
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / 'templates'
+
+
+def load_template(name: str) -> str:
+    return (TEMPLATES_DIR / f"{name}.html").read_text(encoding='utf-8')
+
+
+class TestWarmup:
+    """Tests du déroulé et du rapport de warm-up"""
+
+    def test_state_not_ready_before_run(self):
+        state = WarmupState()
+        assert not state.ready
+        state.disable()
+        assert state.ready
+
+    def test_formulas_and_figures(self):
+        state = WarmupState()
+        report = run_warmup(state=state)
+
+        assert report['ready']
+        steps = {step['step']: step for step in report['steps']}
+        assert len(steps) == len(WARMUP_FORMULAS) + len(WARMUP_FIGURES)
+        assert all(step['ok'] for step in steps.values())
+        assert all(step['duration_ms'] >= 0 for step in steps.values())
+
+    def test_one_pdf_per_template(self):
+        rendered = []
+
+        def render_pdf(html_content: str) -> bytes:
+            rendered.append(html_content)
+            return b'%PDF'
+
+        state = WarmupState()
+        templates = ['sujet_classique', 'corrige_classique', 'sujet_classique']
+        report = run_warmup(templates, load_template, render_pdf, state=state)
+
+        pdf_steps = [step for step in report['steps'] if step['step'].startswith('pdf:')]
+        assert [step['step'] for step in pdf_steps] == ['pdf:sujet_classique', 'pdf:corrige_classique']
+        assert all(step['ok'] for step in pdf_steps)
+        assert '<svg' in rendered[1]
+
+    def test_failing_step_is_reported_without_blocking_readiness(self):
+        def render_pdf(html_content: str) -> bytes:
+            raise OSError("libpango missing")
+
+        state = WarmupState()
+        report = run_warmup(['sujet_classique'], load_template, render_pdf, state=state)
+
+        failed = [step for step in report['steps'] if not step['ok']]
+        assert [step['step'] for step in failed] == ['pdf:sujet_classique']
+        assert 'libpango' in failed[0]['error']
+        assert report['ready']
+
+    def test_aborted_warmup_still_finishes(self, monkeypatch):
+        monkeypatch.setitem(warmup.WARMUP_FIGURES, 'hexagone', {})
+
+        state = WarmupState()
+        report = run_warmup(state=state)
+
+        assert report['status'] == 'done' and report['ready']
+        assert report['finished_at'] is not None
+        assert report['steps'][-1]['step'] == 'warmup'
+        assert report['steps'][-1]['error'].startswith('AttributeError')
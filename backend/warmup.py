@@ -0,0 +1,199 @@
+"""
+Warm-up - Pré-chauffe des moteurs de rendu au démarrage (opt-in : WARMUP_ON_STARTUP=1)
+
+Le premier export après un déploiement paie le chargement du cache de polices matplotlib,
+l'initialisation de mathtext, le parsing des templates Jinja et la première mise en page
+WeasyPrint. Ce module exécute ces étapes une fois, mesure leur durée et expose un état
+utilisé par l'endpoint de readiness.
+"""
+
+import os
+import time
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+from jinja2 import Template
+
+from logger import get_logger
+
+logger = get_logger()
+
+WARMUP_FORMULAS = [
+    r"\frac{3}{4}",
+    r"\frac{a+b}{2}",
+    r"x^{2} + 2x + 1",
+    r"\sqrt{16} = 4",
+    r"3 \times \pi \approx 9{,}42",
+    r"AB^{2} = AC^{2} + BC^{2}",
+    r"\frac{AM}{AB} = \frac{AN}{AC}",
+]
+
+# Une figure par type de GeometrySVGRenderer
+WARMUP_FIGURES = {
+    'rectangle': {'longueur': 8, 'largeur': 5, 'points': ['A', 'B', 'C', 'D']},
+    'triangle_rectangle': {'points': ['A', 'B', 'C'], 'angle_droit': 'B', 'longueurs_connues': {'AB': 3, 'BC': 4}},
+    'triangle': {'points': ['A', 'B', 'C'], 'longueurs_connues': {'AB': 5}},
+    'cercle': {'rayon': 3, 'centre': 'O'},
+    'thales': {'points': ['A', 'B', 'C', 'M', 'N'], 'longueurs_connues': {'AM': 2, 'AB': 6}},
+    'mediatrice_construction': {},
+}
+
+
+def is_enabled() -> bool:
+    return os.getenv('WARMUP_ON_STARTUP', '').lower() in ('1', 'true', 'yes')
+
+
+class WarmupState:
+    """État partagé du warm-up (lu par /api/health/ready)"""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.status = 'pending'  # pending, running, done, disabled
+        self.steps: List[Dict[str, Any]] = []
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status in ('done', 'disabled')
+
+    def start(self):
+        with self._lock:
+            self.status = 'running'
+            self.steps = []
+            self.started_at = datetime.now(timezone.utc)
+            self.finished_at = None
+
+    def finish(self):
+        with self._lock:
+            self.status = 'done'
+            self.finished_at = datetime.now(timezone.utc)
+
+    def disable(self):
+        with self._lock:
+            self.status = 'disabled'
+
+    def record(self, name: str, duration_ms: float, error: Optional[str] = None):
+        with self._lock:
+            self.steps.append({
+                'step': name,
+                'duration_ms': round(duration_ms, 1),
+                'ok': error is None,
+                'error': error,
+            })
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'status': self.status,
+                'ready': self.ready,
+                'total_ms': round(sum(step['duration_ms'] for step in self.steps), 1),
+                'steps': list(self.steps),
+                'started_at': self.started_at.isoformat() if self.started_at else None,
+                'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            }
+
+
+warmup_state = WarmupState()
+
+
+def _timed_step(state: WarmupState, name: str, func: Callable[[], Any]) -> Any:
+    """Exécute une étape ; une erreur est enregistrée mais n'interrompt pas le warm-up"""
+    start = time.perf_counter()
+    try:
+        result = func()
+        error = None
+    except Exception as e:
+        result, error = None, f"{e.__class__.__name__}: {e}"
+    duration_ms = (time.perf_counter() - start) * 1000
+    state.record(name, duration_ms, error)
+
+    if error:
+        logger.warning(f"Warm-up step {name} failed: {error}", module_name="warmup", func_name=name)
+    else:
+        logger.debug(f"Warm-up step {name}: {duration_ms:.0f} ms", module_name="warmup", func_name=name)
+    return result
+
+
+def _sample_document(formulas_html: List[str], figure_svg: str) -> Dict[str, Any]:
+    """Petit document représentatif pour la première mise en page de chaque template"""
+    return {
+        'type_doc': 'exercices',
+        'matiere': 'Mathématiques',
+        'niveau': '4e',
+        'chapitre': 'Théorème de Pythagore',
+        'difficulte': 'moyen',
+        'exercises': [{
+            'type': 'ouvert',
+            'enonce': f"Calculer {formulas_html[0]} puis {formulas_html[-1]}.",
+            'schema_svg': figure_svg,
+            'donnees': None,
+            'solution': {
+                'etapes': formulas_html[1:4],
+                'resultat': formulas_html[0],
+            },
+        }],
+    }
+
+
+def run_warmup(
+    export_templates: Iterable[str] = (),
+    load_template: Optional[Callable[[str], Union[str, Template]]] = None,
+    render_pdf: Optional[Callable[[str], bytes]] = None,
+    state: WarmupState = warmup_state,
+) -> Dict[str, Any]:
+    """
+    Pré-chauffe : formules (latex_renderer), une figure par type (GeometrySVGRenderer)
+    puis un petit PDF par template d'export. Retourne le rapport de durées.
+    """
+    state.start()
+    started = time.perf_counter()
+    try:
+        from latex_to_svg import latex_renderer
+        from geometry_svg_renderer import geometry_svg_renderer
+
+        formulas_html = []
+        for formula in WARMUP_FORMULAS:
+            rendered = _timed_step(
+                state, f"formula:{formula}",
+                lambda formula=formula: latex_renderer.convert_latex_to_svg(f"\\({formula}\\)")
+            )
+            formulas_html.append(rendered or formula)
+
+        figures = {}
+        for figure_type, data in WARMUP_FIGURES.items():
+            render = getattr(geometry_svg_renderer, f"render_{figure_type}")
+            figures[figure_type] = _timed_step(
+                state, f"figure:{figure_type}", lambda render=render, data=data: render(dict(data))
+            )
+
+        if load_template and render_pdf:
+            document = _sample_document(formulas_html, figures.get('triangle_rectangle') or '')
+            for template_name in dict.fromkeys(export_templates):
+                def render_template(template_name=template_name):
+                    template = load_template(template_name)
+                    if isinstance(template, str):
+                        template = Template(template)
+                    html_content = template.render(
+                        document=document,
+                        date_creation=datetime.now().strftime("%d/%m/%Y"),
+                    )
+                    return render_pdf(html_content)
+                _timed_step(state, f"pdf:{template_name}", render_template)
+    except Exception as e:
+        # Import ou renderer cassé : le warm-up s'arrête, l'erreur est rapportée et le
+        # serveur est tout de même déclaré prêt (sinon /api/health/ready resterait à 503)
+        error = f"{e.__class__.__name__}: {e}"
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        state.record('warmup', max(0.0, elapsed_ms - state.report()['total_ms']), error)
+        logger.error(f"Warm-up aborted: {error}", module_name="warmup", func_name="run_warmup")
+    finally:
+        state.finish()
+
+    report = state.report()
+    logger.info(
+        f"Warm-up completed in {report['total_ms']:.0f} ms ({len(report['steps'])} steps)",
+        module_name="warmup", func_name="run_warmup", duration_ms=int(report['total_ms'])
+    )
+    return report